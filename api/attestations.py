@@ -1,33 +1,224 @@
 # endpoints for attestations
 
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Tuple
+
 from fastapi import APIRouter
-from fastapi import Depends
-from sqlalchemy.orm import Session
-from db.connection import SessionLocal
-from models.attestation import AttestationModel
-from models.user import AttestationOut, AttestationIn
-from utils.crypto import sign_attestation, verify_signature
+from fastapi import Depends, HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.connection import get_db
+from models.attestation import PENDING, AttestationModel
+from services.events import append_events, attestation_event
+from services.merkle_store import append_attestations, attestation_record
+from services.signatures import REPLAYED_SIGNATURE, check_signatures, screen_signatures, signature_error_status
+from services.subject_stats import record_attestations
+from utils.canonical import signature_digest
+from models.user import (
+    AttestationOut, AttestationIn, AttestationBatchItem, AttestationBatchResult,
+    AttestationVerifyItem, AttestationVerifyBatchResult
+)
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Upper bound on records accepted by a single batch request
+MAX_BATCH_SIZE = 10000
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
 
 @router.post("/attest", response_model=AttestationOut)
-def create_attestation(att: AttestationIn, db: Session = Depends(get_db)):
+async def create_attestation(att: AttestationIn, db: AsyncSession = Depends(get_db)):
+    """
+    Store an attestation. Under BITREP_SIGNATURE_POLICY=sync the issuer's
+    signature is verified first; under async the attestation is stored as
+    pending until the background verifier has checked it. A signature that
+    is already stored is rejected with 409.
+    """
+    status, errors = await screen_signatures(db, [att])
+    if errors[0]:
+        raise HTTPException(status_code=signature_error_status(errors[0]), detail=errors[0])
+
     db_att = AttestationModel(
         issuer=att.issuer,
         subject=att.subject,
         attestation_type=att.attestation_type,
         signature=att.signature,
-        anchor=att.anchor
+        signature_digest=signature_digest(att.signature) if att.signature else None,
+        anchor=att.anchor,
+        status=status
     )
     db.add(db_att)
-    db.commit()
-    db.refresh(db_att)
+    async with _rejecting_replays(db):
+        await db.flush()
+    if status != PENDING:
+        await record_attestations(db, [(att.subject, att.issuer, att.attestation_type)])
+        await append_attestations(db, [attestation_record(
+            db_att.id, db_att.issuer, db_att.subject, db_att.attestation_type, db_att.timestamp
+        )])
+    await append_events(db, [attestation_event(
+        db_att.id, db_att.issuer, db_att.subject, db_att.attestation_type, db_att.timestamp, status
+    )])
+    await db.commit()
+    await db.refresh(db_att)
     return db_att
 
+def _parse_batch_body(body: bytes, content_type: str) -> List[Tuple[object, str]]:
+    """
+    Split a batch request body into raw records.
+    Returns a list of (record, error) pairs; error is None for parseable records.
+    """
+    if content_type.split(";")[0].strip().lower() in NDJSON_CONTENT_TYPES:
+        records = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append((json.loads(line), None))
+            except ValueError:
+                records.append((None, "Invalid JSON"))
+        return records
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be a JSON array or NDJSON")
+
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON array or NDJSON")
+
+    return [(record, None) for record in payload]
+
+@asynccontextmanager
+async def _rejecting_replays(db: AsyncSession):
+    """
+    Turn a unique-index conflict on the issuer signature, from a replay
+    stored concurrently after screening, into a 409.
+    """
+    try:
+        yield
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=REPLAYED_SIGNATURE)
+
+async def _bulk_insert_attestations(db: AsyncSession, rows: List[dict]) -> List[int]:
+    """
+    Insert attestation rows with one executemany-style INSERT ... RETURNING,
+    update the subject counters and Merkle accumulators for all but pending
+    rows, append their events and commit once. Returns the new ids in input
+    order.
+    """
+    async with _rejecting_replays(db):
+        ids = (await db.scalars(
+            insert(AttestationModel).returning(AttestationModel.id, sort_by_parameter_order=True),
+            rows
+        )).all()
+    counted = [(att_id, r) for att_id, r in zip(ids, rows) if r["status"] != PENDING]
+    await record_attestations(db, ((r["subject"], r["issuer"], r["attestation_type"]) for _, r in counted))
+    await append_attestations(db, (
+        attestation_record(att_id, r["issuer"], r["subject"], r["attestation_type"], r["timestamp"])
+        for att_id, r in counted
+    ))
+    await append_events(db, (
+        attestation_event(att_id, r["issuer"], r["subject"], r["attestation_type"], r["timestamp"], r["status"])
+        for att_id, r in zip(ids, rows)
+    ))
+    await db.commit()
+    return ids
+
+@router.post("/attest/batch", response_model=AttestationBatchResult)
+async def create_attestations_batch(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Ingest many attestations in a single transaction.
+    Accepts a JSON array or NDJSON (one AttestationIn per line) and returns
+    the assigned id or validation or signature error for each record, in
+    input order. Signatures are checked per BITREP_SIGNATURE_POLICY, as for
+    POST /attest, and a signature already stored or repeated within the
+    batch is rejected.
+    """
+    records = _parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+
+    if len(records) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds maximum of {MAX_BATCH_SIZE} attestations"
+        )
+
+    results = [AttestationBatchItem(index=i) for i in range(len(records))]
+    valid = []
+    valid_indices = []
+
+    for i, (record, error) in enumerate(records):
+        if error:
+            results[i].error = error
+            continue
+        try:
+            att = AttestationIn.model_validate(record)
+        except ValidationError as e:
+            results[i].error = "; ".join(
+                f"{'.'.join(str(p) for p in err['loc']) or 'body'}: {err['msg']}"
+                for err in e.errors()
+            )
+            continue
+        valid.append(att)
+        valid_indices.append(i)
+
+    status, errors = await screen_signatures(db, valid)
+    rows = []
+    row_indices = []
+    timestamp = datetime.utcnow()
+    for i, att, error in zip(valid_indices, valid, errors):
+        if error:
+            results[i].error = error
+            continue
+        rows.append({
+            "issuer": att.issuer,
+            "subject": att.subject,
+            "attestation_type": att.attestation_type,
+            "signature": att.signature,
+            "signature_digest": signature_digest(att.signature) if att.signature else None,
+            "anchor": att.anchor,
+            "timestamp": timestamp,
+            "status": status,
+        })
+        row_indices.append(i)
+
+    if rows:
+        ids = await _bulk_insert_attestations(db, rows)
+        for i, att_id in zip(row_indices, ids):
+            results[i].id = att_id
+
+    return AttestationBatchResult(
+        inserted=len(rows),
+        failed=len(records) - len(rows),
+        results=results
+    )
+
+@router.post("/attest/verify-batch", response_model=AttestationVerifyBatchResult)
+async def verify_attestations_batch(attestations: List[AttestationIn], db: AsyncSession = Depends(get_db)):
+    """
+    Verify issuer signatures for many attestations, e.g. a full audit export.
+    Issuer keys are served from the issuer-key cache, with one query for
+    the issuers it does not hold.
+    """
+    if len(attestations) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds maximum of {MAX_BATCH_SIZE} attestations"
+        )
+
+    errors = await check_signatures(db, attestations)
+    results = [
+        AttestationVerifyItem(index=i, valid=error is None, error=error)
+        for i, error in enumerate(errors)
+    ]
+
+    valid = sum(1 for r in results if r.valid)
+    return AttestationVerifyBatchResult(
+        valid=valid,
+        invalid=len(results) - valid,
+        results=results
+    )
@@ -0,0 +1,117 @@
+# API endpoint tailing the event log (services/events.py)
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from db.connection import AsyncSessionLocal
+from services import events
+from services.events import event_feed, event_json, read_events
+
+router = APIRouter()
+
+DEFAULT_EVENT_LIMIT = 100
+MAX_EVENT_LIMIT = 1000
+# Longest long-poll a client may ask for
+MAX_EVENT_WAIT = float(os.getenv("BITREP_EVENTS_MAX_WAIT", "30"))
+# SSE streams close after this long; EventSource reconnects with Last-Event-ID
+EVENT_STREAM_SECONDS = float(os.getenv("BITREP_EVENTS_STREAM_SECONDS", "300"))
+# Comment lines keep idle SSE connections open through proxies
+EVENT_KEEPALIVE_SECONDS = 15.0
+
+class Event(BaseModel):
+    seq: int
+    kind: str
+    created_at: Optional[datetime] = None
+    data: dict
+
+class EventPage(BaseModel):
+    events: List[Event]
+    next_after: int
+
+async def _read(after: int, limit: int, kinds: Optional[List[str]]) -> list:
+    # A short session per read: a long-poll must not hold a connection, and
+    # each read needs a fresh snapshot to see new commits
+    async with AsyncSessionLocal() as db:
+        return [event_json(row) for row in await read_events(db, after, limit, kinds)]
+
+async def _wait_for_events(after: int, limit: int, kinds: Optional[List[str]], wait: float) -> list:
+    """
+    Events after `after`, waiting up to `wait` seconds for the first one.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        generation = event_feed.generation
+        batch = await _read(after, limit, kinds)
+        remaining = deadline - time.monotonic()
+        if batch or remaining <= 0:
+            return batch
+        await event_feed.wait(generation, min(remaining, events.EVENTS_POLL_INTERVAL))
+
+async def _stream_events(after: int, limit: int, kinds: Optional[List[str]], duration: float):
+    yield "retry: 1000\n\n"
+    deadline = time.monotonic() + duration
+    last_sent = time.monotonic()
+    while True:
+        remaining = deadline - time.monotonic()
+        batch = await _wait_for_events(after, limit, kinds, max(0.0, min(remaining, EVENT_KEEPALIVE_SECONDS)))
+        if batch:
+            after = batch[-1]["seq"]
+            yield "".join(
+                f"id: {e['seq']}\nevent: {e['kind']}\ndata: {json.dumps(e, separators=(',', ':'))}\n\n"
+                for e in batch
+            )
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= EVENT_KEEPALIVE_SECONDS:
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+        # A full batch means more are waiting: catch up before closing
+        if time.monotonic() >= deadline and len(batch) < limit:
+            return
+
+@router.get("/events", response_model=EventPage)
+async def get_events(
+    request: Request,
+    after: Optional[int] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_EVENT_LIMIT, ge=1, le=MAX_EVENT_LIMIT),
+    wait: float = Query(0.0, ge=0, le=MAX_EVENT_WAIT),
+    kinds: Optional[str] = None,
+    format: Optional[str] = Query(None, pattern="^(json|sse)$"),
+    timeout: float = Query(EVENT_STREAM_SECONDS, ge=0, le=3600),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Events with seq greater than `after`, oldest first, at most `limit`.
+    With `wait`, an empty result is held for up to that many seconds until
+    an event arrives (long-poll); pass `next_after` as `after` next time.
+    With format=sse (or Accept: text/event-stream) events are streamed as
+    Server-Sent Events in batches of `limit` until the client has caught up
+    and `timeout` seconds have passed; the Last-Event-ID header resumes a
+    stream. `kinds` is a comma-separated
+    filter, e.g. attestation.created,vote.cast.
+    """
+    if after is None:
+        try:
+            after = int(last_event_id) if last_event_id else 0
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    kind_list = [kind.strip() for kind in kinds.split(",") if kind.strip()] if kinds else None
+
+    sse = format == "sse" or (
+        format is None and "text/event-stream" in request.headers.get("accept", "")
+    )
+    if sse:
+        return StreamingResponse(
+            _stream_events(after, limit, kind_list, timeout),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    batch = await _wait_for_events(after, limit, kind_list, wait)
+    return EventPage(events=batch, next_after=batch[-1]["seq"] if batch else after)
@@ -1,24 +1,25 @@
 # API endpoints for governance and voting
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from db.connection import SessionLocal
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.connection import get_db
 from models.governance import GovernanceProposalModel, VoteModel, ProposalStatus
 from models.identity import UserIdentityModel
-from pydantic import BaseModel
-from typing import List
+from services.events import append_events, vote_event
+from services.proposal_cache import etag_matches, proposal_cache
+from services.proposal_scheduler import OPEN_STATUSES
+from services.sql import dialect_insert
+from services.sybil import SYBIL_FLAGGED, rejected_voters
+from services.vote_queue import vote_queue
+from services.votes import NOT_FOUND_ERRORS, submit_votes
+from utils.pagination import encode_cursor, decode_cursor
+from typing import List, Optional
 from datetime import datetime, timedelta
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 class ProposalCreate(BaseModel):
     title: str
     description: str
@@ -43,15 +44,33 @@ class VoteCreate(BaseModel):
     voter: str
     support: int  # 1 for yes, -1 for no
 
+class VoteBatchItem(BaseModel):
+    index: int
+    accepted: bool
+    error: Optional[str] = None
+
+class VoteBatchResult(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[VoteBatchItem]
+
+# Upper bound on votes accepted by a single batch request
+MAX_VOTE_BATCH_SIZE = 10000
+
+DEFAULT_PROPOSAL_PAGE_SIZE = 100
+MAX_PROPOSAL_PAGE_SIZE = 1000
+
+_proposal_list = TypeAdapter(List[ProposalOut])
+
 @router.post("/governance/proposal", response_model=ProposalOut)
-def create_proposal(proposal: ProposalCreate, db: Session = Depends(get_db)):
+async def create_proposal(proposal: ProposalCreate, db: AsyncSession = Depends(get_db)):
     """
     Create a new governance proposal.
     """
     # Verify proposer exists
-    identity = db.query(UserIdentityModel).filter(
+    identity = await db.scalar(select(UserIdentityModel).where(
         UserIdentityModel.username == proposal.proposer
-    ).first()
+    ))
     
     if not identity:
         raise HTTPException(status_code=404, detail="Proposer identity not found")
@@ -66,32 +85,88 @@ def create_proposal(proposal: ProposalCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_proposal)
-    db.commit()
-    db.refresh(new_proposal)
+    await db.commit()
+    proposal_cache.invalidate()
+    await db.refresh(new_proposal)
     
     return new_proposal
 
 @router.get("/governance/proposals", response_model=List[ProposalOut])
-def list_proposals(status: str = None, db: Session = Depends(get_db)):
+async def list_proposals(
+    status: Optional[str] = None,
+    limit: int = Query(DEFAULT_PROPOSAL_PAGE_SIZE, ge=1, le=MAX_PROPOSAL_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    List governance proposals, optionally filtered by status.
+    List governance proposals, newest first, optionally filtered by status.
+    
+    Pages hold up to `limit` proposals; when more remain, the X-Next-Cursor
+    header carries the cursor for the following page. Responses carry an
+    ETag, and a matching If-None-Match is answered with 304 from the cache
+    without querying the database.
     """
-    query = db.query(GovernanceProposalModel)
+    status_filter = _parse_status(status)
+    key = (status_filter, cursor, limit)
     
-    if status:
-        query = query.filter(GovernanceProposalModel.status == status)
+    page = proposal_cache.get(key)
+    if page is None:
+        generation = proposal_cache.generation
+        query = select(GovernanceProposalModel)
+        
+        if status_filter:
+            query = query.where(GovernanceProposalModel.status == status_filter)
+        
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.where(
+                tuple_(GovernanceProposalModel.created_at, GovernanceProposalModel.id) < tuple_(*after)
+            )
+        
+        proposals = (await db.scalars(query.order_by(
+            GovernanceProposalModel.created_at.desc(),
+            GovernanceProposalModel.id.desc()
+        ).limit(limit + 1))).all()
+        
+        next_cursor = None
+        if len(proposals) > limit:
+            proposals = proposals[:limit]
+            next_cursor = encode_cursor(proposals[-1].created_at, proposals[-1].id)
+        
+        body = _proposal_list.dump_json([ProposalOut.model_validate(p) for p in proposals])
+        page = proposal_cache.put(key, body, next_cursor, generation)
     
-    proposals = query.order_by(GovernanceProposalModel.created_at.desc()).all()
-    return proposals
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    
+    if etag_matches(if_none_match, page.etag):
+        proposal_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=page.body, media_type="application/json", headers=headers)
+
+def _parse_status(status: Optional[str]) -> Optional[ProposalStatus]:
+    """
+    Accept a status by value ("active") or name ("ACTIVE").
+    """
+    if not status:
+        return None
+    try:
+        return ProposalStatus(status.lower())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid status")
 
 @router.get("/governance/proposal/{proposal_id}", response_model=ProposalOut)
-def get_proposal(proposal_id: int, db: Session = Depends(get_db)):
+async def get_proposal(proposal_id: int, db: AsyncSession = Depends(get_db)):
     """
     Get a specific proposal by ID.
     """
-    proposal = db.query(GovernanceProposalModel).filter(
-        GovernanceProposalModel.id == proposal_id
-    ).first()
+    proposal = await db.get(GovernanceProposalModel, proposal_id)
     
     if not proposal:
         raise HTTPException(status_code=404, detail="Proposal not found")
@@ -99,85 +174,148 @@ def get_proposal(proposal_id: int, db: Session = Depends(get_db)):
     return proposal
 
 @router.post("/governance/vote")
-def cast_vote(vote: VoteCreate, db: Session = Depends(get_db)):
+async def cast_vote(vote: VoteCreate, db: AsyncSession = Depends(get_db)):
     """
     Cast a vote on a proposal (one vote per identity).
+    
+    The tally increment and the vote row commit in one transaction with no
+    reads on the happy path: the tally is incremented in SQL so concurrent
+    voters never overwrite each other, and the unique (proposal_id, voter)
+    index rejects duplicates.
     """
-    # Check if proposal exists and is active
-    proposal = db.query(GovernanceProposalModel).filter(
-        GovernanceProposalModel.id == vote.proposal_id
-    ).first()
+    # Each identity counts as one vote
+    vote_weight = 1.0
     
-    if not proposal:
-        raise HTTPException(status_code=404, detail="Proposal not found")
+    if vote_queue.enabled:
+        # Coalesced with concurrent votes into one transaction
+        error = await vote_queue.submit(vote.proposal_id, vote.voter, vote.support)
+        if error:
+            raise HTTPException(status_code=_vote_error_status(error), detail=error)
+        return _vote_receipt(vote, vote_weight)
     
-    if proposal.status != ProposalStatus.ACTIVE:
-        raise HTTPException(status_code=400, detail="Proposal is not active")
+    if await rejected_voters(db, [vote.voter]):
+        raise HTTPException(status_code=403, detail=SYBIL_FLAGGED)
+    
+    # Update proposal vote counts, only while it is open for voting and the
+    # voter has an identity
+    now = datetime.utcnow()
+    tally = GovernanceProposalModel.votes_for if vote.support > 0 else GovernanceProposalModel.votes_against
+    result = await db.execute(
+        update(GovernanceProposalModel)
+        .where(
+            GovernanceProposalModel.id == vote.proposal_id,
+            GovernanceProposalModel.status == ProposalStatus.ACTIVE,
+            GovernanceProposalModel.expires_at >= now,
+            select(UserIdentityModel.id).where(UserIdentityModel.username == vote.voter).exists()
+        )
+        .values({tally: tally + vote_weight})
+    )
     
-    if datetime.utcnow() > proposal.expires_at:
-        proposal.status = ProposalStatus.EXPIRED
-        db.commit()
-        raise HTTPException(status_code=400, detail="Proposal has expired")
+    if result.rowcount == 0:
+        await db.rollback()
+        await _reject_vote(db, vote)
     
-    # Check if voter has already voted
-    existing_vote = db.query(VoteModel).filter(
-        VoteModel.proposal_id == vote.proposal_id,
-        VoteModel.voter == vote.voter
-    ).first()
+    # Record vote; a conflict on the unique index means the voter already voted
+    result = await db.execute(
+        dialect_insert(db, VoteModel).values(
+            proposal_id=vote.proposal_id,
+            voter=vote.voter,
+            vote_value=vote_weight,
+            support=vote.support,
+            timestamp=now
+        ).on_conflict_do_nothing(index_elements=["proposal_id", "voter"])
+    )
     
-    if existing_vote:
+    if result.rowcount == 0:
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Already voted on this proposal")
     
-    # Verify voter identity exists
-    identity = db.query(UserIdentityModel).filter(
+    await append_events(db, [vote_event(vote.proposal_id, vote.voter, vote.support, vote_weight, now)])
+    await db.commit()
+    proposal_cache.invalidate()
+    
+    return _vote_receipt(vote, vote_weight)
+
+def _vote_error_status(error: str) -> int:
+    if error in NOT_FOUND_ERRORS:
+        return 404
+    return 403 if error == SYBIL_FLAGGED else 400
+
+def _vote_receipt(vote: VoteCreate, vote_weight: float) -> dict:
+    return {
+        "proposal_id": vote.proposal_id,
+        "voter": vote.voter,
+        "vote_weight": vote_weight,
+        "support": vote.support,
+        "message": "Vote recorded successfully"
+    }
+
+async def _reject_vote(db: AsyncSession, vote: VoteCreate):
+    """
+    Explain why a vote did not update the tally, marking the proposal
+    expired if its voting period has ended.
+    """
+    identity = await db.scalar(select(UserIdentityModel.id).where(
         UserIdentityModel.username == vote.voter
-    ).first()
+    ))
     
     if not identity:
         raise HTTPException(status_code=404, detail="Voter identity not found")
     
-    # Each identity counts as one vote
-    vote_weight = 1.0
+    proposal = await db.get(GovernanceProposalModel, vote.proposal_id)
     
-    # Record vote
-    new_vote = VoteModel(
-        proposal_id=vote.proposal_id,
-        voter=vote.voter,
-        vote_value=vote_weight,
-        support=vote.support
-    )
+    if not proposal:
+        raise HTTPException(status_code=404, detail="Proposal not found")
     
-    db.add(new_vote)
+    if proposal.status != ProposalStatus.ACTIVE:
+        raise HTTPException(status_code=400, detail="Proposal is not active")
     
-    # Update proposal vote counts
-    if vote.support > 0:
-        proposal.votes_for += vote_weight
-    else:
-        proposal.votes_against += vote_weight
+    await db.execute(
+        update(GovernanceProposalModel)
+        .where(
+            GovernanceProposalModel.id == vote.proposal_id,
+            GovernanceProposalModel.status == ProposalStatus.ACTIVE
+        )
+        .values(status=ProposalStatus.EXPIRED)
+    )
+    await db.commit()
+    proposal_cache.invalidate()
+    raise HTTPException(status_code=400, detail="Proposal has expired")
+
+@router.post("/governance/votes/batch", response_model=VoteBatchResult)
+async def cast_votes_batch(votes: List[VoteCreate], db: AsyncSession = Depends(get_db)):
+    """
+    Cast many votes in a single transaction.
+    Identities, proposals and duplicates are checked with set-based queries;
+    each vote is reported as accepted or with its rejection reason, in input order.
+    """
+    if len(votes) > MAX_VOTE_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds maximum of {MAX_VOTE_BATCH_SIZE} votes"
+        )
     
-    db.commit()
+    errors = await submit_votes(db, [(v.proposal_id, v.voter, v.support) for v in votes])
     
-    return {
-        "proposal_id": vote.proposal_id,
-        "voter": vote.voter,
-        "vote_weight": vote_weight,
-        "support": vote.support,
-        "message": "Vote recorded successfully"
-    }
+    accepted = sum(1 for error in errors if error is None)
+    return VoteBatchResult(
+        accepted=accepted,
+        rejected=len(votes) - accepted,
+        results=[VoteBatchItem(index=i, accepted=error is None, error=error) for i, error in enumerate(errors)]
+    )
 
 @router.post("/governance/proposal/{proposal_id}/finalize")
-def finalize_proposal(proposal_id: int, db: Session = Depends(get_db)):
+async def finalize_proposal(proposal_id: int, db: AsyncSession = Depends(get_db)):
     """
     Finalize a proposal after voting period ends.
     """
-    proposal = db.query(GovernanceProposalModel).filter(
-        GovernanceProposalModel.id == proposal_id
-    ).first()
+    proposal = await db.get(GovernanceProposalModel, proposal_id)
     
     if not proposal:
         raise HTTPException(status_code=404, detail="Proposal not found")
     
-    if proposal.status != ProposalStatus.ACTIVE:
+    # A late vote may already have marked it expired; it still needs an outcome
+    if proposal.status not in OPEN_STATUSES:
         raise HTTPException(status_code=400, detail="Proposal is not active")
     
     # Check if voting period has ended
@@ -190,7 +328,8 @@ def finalize_proposal(proposal_id: int, db: Session = Depends(get_db)):
     else:
         proposal.status = ProposalStatus.REJECTED
     
-    db.commit()
+    await db.commit()
+    proposal_cache.invalidate()
     
     return {
         "proposal_id": proposal_id,
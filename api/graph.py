@@ -0,0 +1,225 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Optional
+from db.connection import get_db
+from services.sybil import sybil_detector, top_sybil_clusters, user_sybil_clusters
+from services.trust_graph import trust_graph
+from services.trust_scores import get_trust_score, top_trust_scores, trust_propagator
+
+router = APIRouter()
+
+MAX_HOPS = 4
+MAX_PATH_HOPS = 12
+DEFAULT_NEIGHBOUR_LIMIT = 1000
+MAX_NEIGHBOUR_LIMIT = 10000
+DIRECTION = "^(out|in|both)$"
+DEFAULT_TRUST_LIMIT = 100
+MAX_TRUST_LIMIT = 1000
+DEFAULT_SYBIL_LIMIT = 100
+MAX_SYBIL_LIMIT = 1000
+
+class GraphNode(BaseModel):
+    username: str
+    out_degree: int
+    in_degree: int
+    distinct_subjects: int
+    distinct_issuers: int
+
+class GraphHop(BaseModel):
+    hop: int
+    nodes: List[str]
+
+class GraphNeighbourhood(BaseModel):
+    username: str
+    direction: str
+    total: int
+    truncated: bool
+    hops: List[GraphHop]
+
+class GraphPath(BaseModel):
+    source: str
+    target: str
+    direction: str
+    hops: int
+    path: List[str]
+
+class TrustScore(BaseModel):
+    username: str
+    score: float
+    updated_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+class SybilCluster(BaseModel):
+    id: int
+    kind: str
+    size: int
+    density: float
+    mutual_ratio: float
+    isolation: float
+    burst_fraction: float
+    mean_degree: float
+    degree_cv: float
+    score: float
+    detected_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+class SybilClusterMembers(SybilCluster):
+    members: List[str]
+
+class UserSybilStatus(BaseModel):
+    username: str
+    flagged: bool
+    clusters: List[SybilCluster]
+
+async def _node(db: AsyncSession, username: str) -> int:
+    await trust_graph.refresh(db)
+    node = trust_graph.node_id(username)
+    if node is None:
+        raise HTTPException(status_code=404, detail="User not found in trust graph")
+    return node
+
+@router.get("/graph/stats")
+async def get_graph_stats(db: AsyncSession = Depends(get_db)):
+    """
+    Size of the trust graph and its loader counters.
+    """
+    await trust_graph.refresh(db)
+    return trust_graph.stats()
+
+@router.get("/graph/node/{username}", response_model=GraphNode)
+async def get_graph_node(username: str, db: AsyncSession = Depends(get_db)):
+    """
+    Degrees of a user in the trust graph: attestations issued (out) and
+    received (in), and the number of distinct counterparties.
+    """
+    node = await _node(db, username)
+    graph = trust_graph.graph
+    return GraphNode(
+        username=username,
+        out_degree=graph.out_degree(node),
+        in_degree=graph.in_degree(node),
+        distinct_subjects=len(set(graph.out_neighbours(node).tolist())),
+        distinct_issuers=len(set(graph.in_neighbours(node).tolist()))
+    )
+
+@router.get("/graph/node/{username}/neighbors", response_model=GraphNeighbourhood)
+async def get_graph_neighbourhood(
+    username: str,
+    hops: int = Query(1, ge=1, le=MAX_HOPS),
+    direction: str = Query("out", pattern=DIRECTION),
+    limit: int = Query(DEFAULT_NEIGHBOUR_LIMIT, ge=1, le=MAX_NEIGHBOUR_LIMIT),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Users within `hops` edges of a user, grouped by distance. direction=out
+    follows attestations the user issued, in follows attestations about the
+    user, both ignores direction. At most `limit` users are returned.
+    """
+    node = await _node(db, username)
+    graph = trust_graph.graph
+    levels, truncated = graph.neighbourhood(node, hops, direction, limit)
+    return GraphNeighbourhood(
+        username=username,
+        direction=direction,
+        total=sum(len(level) for level in levels),
+        truncated=truncated,
+        hops=[
+            GraphHop(hop=hop, nodes=[graph.names[i] for i in level.tolist()])
+            for hop, level in enumerate(levels, start=1)
+        ]
+    )
+
+@router.get("/graph/path", response_model=GraphPath)
+async def get_graph_path(
+    source: str,
+    target: str,
+    direction: str = Query("out", pattern=DIRECTION),
+    max_hops: int = Query(6, ge=1, le=MAX_PATH_HOPS),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    A shortest chain of attestations from source to target.
+    """
+    source_id = await _node(db, source)
+    target_id = trust_graph.node_id(target)
+    if target_id is None:
+        raise HTTPException(status_code=404, detail="User not found in trust graph")
+
+    graph = trust_graph.graph
+    path = graph.shortest_path(source_id, target_id, direction, max_hops)
+    if path is None:
+        raise HTTPException(status_code=404, detail="No path within max_hops")
+    return GraphPath(
+        source=source,
+        target=target,
+        direction=direction,
+        hops=len(path) - 1,
+        path=[graph.names[i] for i in path]
+    )
+
+@router.get("/graph/trust", response_model=List[TrustScore])
+async def list_trust_scores(
+    limit: int = Query(DEFAULT_TRUST_LIMIT, ge=1, le=MAX_TRUST_LIMIT),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Highest trust propagation scores, as of the last recomputation.
+    """
+    return await top_trust_scores(db, limit)
+
+@router.get("/graph/node/{username}/trust", response_model=TrustScore)
+async def get_graph_trust(username: str, db: AsyncSession = Depends(get_db)):
+    """
+    A user's trust propagation score, as of the last recomputation.
+    """
+    score = await get_trust_score(db, username)
+    if score is None:
+        raise HTTPException(status_code=404, detail="No trust score for user")
+    return score
+
+@router.post("/graph/trust/recompute")
+async def recompute_trust(full: bool = False):
+    """
+    Recompute trust scores now instead of waiting for the scheduler.
+    full=true ignores the previous scores and solves from scratch.
+    """
+    written = await trust_propagator.run_once(full=full)
+    return {"written": written, **trust_propagator.stats()}
+
+@router.get("/graph/sybil/clusters", response_model=List[SybilClusterMembers])
+async def list_sybil_clusters(
+    min_score: float = Query(0.0, ge=0.0, le=1.0),
+    limit: int = Query(DEFAULT_SYBIL_LIMIT, ge=1, le=MAX_SYBIL_LIMIT),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Clusters flagged by the last Sybil detection run, highest score first.
+    """
+    return [
+        SybilClusterMembers(**SybilCluster.model_validate(cluster).model_dump(), members=members)
+        for cluster, members in await top_sybil_clusters(db, min_score, limit)
+    ]
+
+@router.get("/graph/node/{username}/sybil", response_model=UserSybilStatus)
+async def get_graph_sybil(username: str, db: AsyncSession = Depends(get_db)):
+    """
+    Whether a user belongs to a cluster flagged by the last Sybil detection
+    run, and which.
+    """
+    clusters = await user_sybil_clusters(db, username)
+    return UserSybilStatus(username=username, flagged=bool(clusters), clusters=clusters)
+
+@router.post("/graph/sybil/detect")
+async def detect_sybils():
+    """
+    Run Sybil detection now and replace the flagged clusters. Returns 409 if
+    a run is already in progress.
+    """
+    stats = await sybil_detector.run_once()
+    if stats is None:
+        raise HTTPException(status_code=409, detail="Sybil detection is already running")
+    return stats
@@ -1,66 +1,83 @@
 # API endpoints for identity management
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from db.connection import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.connection import get_db
 from models.identity import UserIdentityModel
 from models.user import UserIdentity, UserIdentityCreate
-from utils.crypto import generate_keypair, hash_private_key
+from services.events import IDENTITY_CREATED, append_events
+from services.signatures import issuer_keys
+from utils.crypto import generate_keypair, hash_private_key, run_crypto
+from utils.suites import DEFAULT_KEY_ALGORITHM, SUITES, get_suite
 from typing import Dict
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/identity/create", response_model=Dict)
-def create_identity(user_data: UserIdentityCreate, db: Session = Depends(get_db)):
+async def create_identity(user_data: UserIdentityCreate, db: AsyncSession = Depends(get_db)):
     """
     Create a new identity with cryptographic key pair.
+    key_algorithm picks the signature suite (rsa-pss-2048 or ed25519;
+    BITREP_KEY_ALGORITHM by default).
     Returns public key and private key (store private key securely on client side).
     """
+    key_algorithm = user_data.key_algorithm or DEFAULT_KEY_ALGORITHM
+    if key_algorithm not in SUITES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported key algorithm; use one of: {', '.join(SUITES)}"
+        )
+    
     # Check if username already exists
-    existing = db.query(UserIdentityModel).filter(
+    existing = await db.scalar(select(UserIdentityModel).where(
         UserIdentityModel.username == user_data.username
-    ).first()
+    ))
     
     if existing:
         raise HTTPException(status_code=400, detail="Username already exists")
     
-    # Generate key pair
-    public_key, private_key = generate_keypair()
+    # Generate key pair off the event loop
+    public_key, private_key = await run_crypto(generate_keypair, key_algorithm)
     
     # Create identity
     identity = UserIdentityModel(
         username=user_data.username,
         public_key=public_key,
+        key_algorithm=key_algorithm,
         private_key_hash=hash_private_key(private_key),
         verified=False
     )
     
     db.add(identity)
-    db.commit()
-    db.refresh(identity)
+    await db.flush()
+    await append_events(db, [(IDENTITY_CREATED, {
+        "id": identity.id,
+        "username": identity.username,
+        "key_algorithm": key_algorithm,
+        "created_at": identity.created_at
+    })])
+    await db.commit()
+    await db.refresh(identity)
+    # Attestations may already have been rejected for this unknown issuer
+    issuer_keys.invalidate(identity.username)
     
     return {
         "username": identity.username,
         "public_key": identity.public_key,
+        "key_algorithm": identity.key_algorithm,
         "private_key": private_key,  # Return once, client must store securely
         "message": "Store your private key securely. It cannot be recovered."
     }
 
 @router.get("/identity/{username}", response_model=UserIdentity)
-def get_identity(username: str, db: Session = Depends(get_db)):
+async def get_identity(username: str, db: AsyncSession = Depends(get_db)):
     """
     Get user identity information (public data only).
     """
-    identity = db.query(UserIdentityModel).filter(
+    identity = await db.scalar(select(UserIdentityModel).where(
         UserIdentityModel.username == username
-    ).first()
+    ))
     
     if not identity:
         raise HTTPException(status_code=404, detail="Identity not found")
@@ -68,18 +85,19 @@ def get_identity(username: str, db: Session = Depends(get_db)):
     return UserIdentity(
         username=identity.username,
         public_key=identity.public_key,
+        key_algorithm=get_suite(identity.key_algorithm).name,
         verified=identity.verified
     )
 
 @router.post("/identity/{username}/verify")
-def verify_identity(username: str, verification_data: Dict, db: Session = Depends(get_db)):
+async def verify_identity(username: str, verification_data: Dict, db: AsyncSession = Depends(get_db)):
     """
     Verify user identity through external verification channels.
     This is a placeholder - real implementation would integrate with verification services.
     """
-    identity = db.query(UserIdentityModel).filter(
+    identity = await db.scalar(select(UserIdentityModel).where(
         UserIdentityModel.username == username
-    ).first()
+    ))
     
     if not identity:
         raise HTTPException(status_code=404, detail="Identity not found")
@@ -91,6 +109,6 @@ def verify_identity(username: str, verification_data: Dict, db: Session = Depend
     # - Proof-of-personhood protocols
     
     identity.verified = True
-    db.commit()
+    await db.commit()
     
     return {"username": username, "verified": True, "message": "Identity verified"}
@@ -1,22 +1,25 @@
 # API endpoints for third-party attestation integration and bootstrapping
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from db.connection import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.connection import get_db
 from models.third_party import ThirdPartyAttestationModel
 from models.identity import UserIdentityModel
+from services.bulk_import import ImportFormatError, import_third_party_attestations
+from services.events import append_events, third_party_event
+from services.platforms import ADAPTERS, USER_NOT_FOUND, import_platform_accounts
+from services.verification import verification_queue_depth, verification_worker
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional
 import json
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+
+# Upper bound on accounts fetched by a single batch request
+MAX_ACCOUNT_BATCH_SIZE = 1000
 
 class ThirdPartyAttestationCreate(BaseModel):
     username: str
@@ -26,6 +29,20 @@ class ThirdPartyAttestationCreate(BaseModel):
     value: float
     metadata: Dict
 
+class ThirdPartyImportError(BaseModel):
+    record: int
+    error: str
+
+class ThirdPartyImportResult(BaseModel):
+    import_id: Optional[str]
+    resumed_from: int
+    records: int
+    imported: int
+    failed: int
+    elapsed_seconds: float
+    rows_per_sec: float
+    errors: List[ThirdPartyImportError]
+
 class ThirdPartyAttestationOut(BaseModel):
     id: int
     username: str
@@ -37,16 +54,32 @@ class ThirdPartyAttestationOut(BaseModel):
     
     model_config = {"from_attributes": True}
 
+class PlatformAccount(BaseModel):
+    username: str
+    platform: str
+    platform_username: str
+
+class PlatformImportResult(BaseModel):
+    username: str
+    platform: str
+    platform_username: str
+    attestations: List[ThirdPartyAttestationOut]
+
+class PlatformImportItem(BaseModel):
+    index: int
+    attestation_ids: List[int] = []
+    error: Optional[str] = None
+
 @router.post("/integration/import", response_model=ThirdPartyAttestationOut)
-def import_third_party_attestation(attestation: ThirdPartyAttestationCreate, db: Session = Depends(get_db)):
+async def import_third_party_attestation(attestation: ThirdPartyAttestationCreate, db: AsyncSession = Depends(get_db)):
     """
     Import attestation from third-party platform (e.g., GitHub, eBay).
     Requires user consent and verification.
     """
     # Verify user exists
-    identity = db.query(UserIdentityModel).filter(
+    identity = await db.scalar(select(UserIdentityModel).where(
         UserIdentityModel.username == attestation.username
-    ).first()
+    ))
     
     if not identity:
         raise HTTPException(status_code=404, detail="User identity not found")
@@ -63,43 +96,61 @@ def import_third_party_attestation(attestation: ThirdPartyAttestationCreate, db:
     )
     
     db.add(new_attestation)
-    db.commit()
-    db.refresh(new_attestation)
+    await db.flush()
+    await append_events(db, [third_party_event({
+        column: getattr(new_attestation, column)
+        for column in ("id", "username", "platform", "platform_username", "attestation_type", "value", "timestamp")
+    })])
+    await db.commit()
+    await db.refresh(new_attestation)
     
     return new_attestation
 
+@router.post("/integration/import/bulk", response_model=ThirdPartyImportResult)
+async def bulk_import_third_party_attestations(
+    request: Request,
+    import_id: Optional[str] = None,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Stream an NDJSON or CSV upload of third-party attestations into the
+    database in chunks, without buffering the body.
+    
+    The format comes from `format` or the Content-Type (text/csv for CSV,
+    NDJSON otherwise). With an `import_id`, progress is checkpointed per
+    chunk; re-sending the same upload with the same id resumes after the
+    last committed record.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        format = "csv" if content_type in CSV_CONTENT_TYPES else "ndjson"
+    
+    try:
+        report = await import_third_party_attestations(db, request.stream(), format, import_id)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return ThirdPartyImportResult(
+        import_id=report.import_id,
+        resumed_from=report.resumed_from,
+        records=report.records,
+        imported=report.imported,
+        failed=report.failed,
+        elapsed_seconds=round(report.elapsed_seconds, 3),
+        rows_per_sec=round(report.rows_per_sec, 1),
+        errors=[ThirdPartyImportError(record=record, error=error) for record, error in report.errors]
+    )
+
 @router.get("/integration/platforms")
-def list_supported_platforms():
+async def list_supported_platforms():
     """
     List supported third-party platforms for attestation import.
     """
-    platforms = {
-        "github": {
-            "name": "GitHub",
-            "attestation_types": ["commits", "pull_requests", "reviews", "stars"],
-            "description": "Import commit history and contribution data"
-        },
-        "ebay": {
-            "name": "eBay",
-            "attestation_types": ["seller_rating", "buyer_rating", "transactions"],
-            "description": "Import transaction and rating history"
-        },
-        "linkedin": {
-            "name": "LinkedIn",
-            "attestation_types": ["endorsements", "recommendations"],
-            "description": "Import professional endorsements"
-        },
-        "stackoverflow": {
-            "name": "Stack Overflow",
-            "attestation_types": ["reputation", "answers", "badges"],
-            "description": "Import community reputation"
-        }
-    }
-    
-    return {"supported_platforms": platforms}
+    return {"supported_platforms": {name: adapter.info() for name, adapter in ADAPTERS.items()}}
 
 @router.post("/integration/verify/{attestation_id}")
-def verify_third_party_attestation(attestation_id: int, verification_proof: Dict, db: Session = Depends(get_db)):
+async def verify_third_party_attestation(attestation_id: int, verification_proof: Dict, db: AsyncSession = Depends(get_db)):
     """
     Verify a third-party attestation using platform API or verification service.
     This is a placeholder - real implementation would integrate with platform APIs.
@@ -107,9 +158,7 @@ def verify_third_party_attestation(attestation_id: int, verification_proof: Dict
     WARNING: This endpoint currently performs no actual verification.
     In production, implement proper verification before marking as verified.
     """
-    attestation = db.query(ThirdPartyAttestationModel).filter(
-        ThirdPartyAttestationModel.id == attestation_id
-    ).first()
+    attestation = await db.get(ThirdPartyAttestationModel, attestation_id)
     
     if not attestation:
         raise HTTPException(status_code=404, detail="Attestation not found")
@@ -127,7 +176,7 @@ def verify_third_party_attestation(attestation_id: int, verification_proof: Dict
         )
     
     attestation.verified = 1  # Mark as verified
-    db.commit()
+    await db.commit()
     
     return {
         "attestation_id": attestation_id,
@@ -136,52 +185,87 @@ def verify_third_party_attestation(attestation_id: int, verification_proof: Dict
         "warning": "This is a placeholder implementation. Do not use in production."
     }
 
+@router.get("/integration/verification/queue")
+async def get_verification_queue(db: AsyncSession = Depends(get_db)):
+    """
+    Verification queue depth by state, with this process's worker counters.
+    """
+    return {
+        "queue": await verification_queue_depth(db),
+        "worker": verification_worker.stats()
+    }
+
 @router.get("/integration/user/{username}", response_model=List[ThirdPartyAttestationOut])
-def get_user_third_party_attestations(username: str, db: Session = Depends(get_db)):
+async def get_user_third_party_attestations(username: str, db: AsyncSession = Depends(get_db)):
     """
     Get all third-party attestations for a user.
     """
-    attestations = db.query(ThirdPartyAttestationModel).filter(
+    attestations = (await db.scalars(select(ThirdPartyAttestationModel).where(
         ThirdPartyAttestationModel.username == username
-    ).all()
+    ))).all()
     
     return attestations
 
 @router.post("/integration/github/import")
-def import_github_profile(username: str, github_username: str, db: Session = Depends(get_db)):
+async def import_github_profile(username: str, github_username: str, db: AsyncSession = Depends(get_db)):
+    """
+    Import GitHub contribution data for an identity.
+    """
+    result = await _import_account(db, username, "github", github_username)
+    return {
+        "username": username,
+        "github_username": github_username,
+        "attestations": result.attestations,
+        "message": "GitHub profile imported. Verification pending."
+    }
+
+@router.post("/integration/{platform}/import", response_model=PlatformImportResult)
+async def import_platform_account(platform: str, username: str, platform_username: str, db: AsyncSession = Depends(get_db)):
+    """
+    Fetch an account's current data from a supported platform and store each
+    value as a pending third-party attestation.
+    """
+    return await _import_account(db, username, platform, platform_username)
+
+@router.post("/integration/import/accounts", response_model=List[PlatformImportItem])
+async def import_platform_accounts_batch(accounts: List[PlatformAccount], db: AsyncSession = Depends(get_db)):
     """
-    Import GitHub profile data (placeholder for actual GitHub API integration).
+    Import many platform accounts at once. Accounts are fetched concurrently
+    within each platform's rate and concurrency limits and stored in one
+    transaction; each account reports its attestation ids or an error.
     """
-    # In production, this would:
-    # 1. Authenticate with GitHub OAuth
-    # 2. Fetch user's commit history, PRs, reviews
-    # 3. Create binary attestations for verified activities
+    if len(accounts) > MAX_ACCOUNT_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds maximum of {MAX_ACCOUNT_BATCH_SIZE} accounts"
+        )
+    unsupported = sorted({a.platform for a in accounts} - set(ADAPTERS))
+    if unsupported:
+        raise HTTPException(status_code=404, detail=f"Unsupported platform: {unsupported[0]}")
     
-    # Placeholder implementation
-    identity = db.query(UserIdentityModel).filter(
-        UserIdentityModel.username == username
-    ).first()
+    results = await import_platform_accounts(db, [(a.username, a.platform, a.platform_username) for a in accounts])
+    return [
+        PlatformImportItem(index=i, error=result) if isinstance(result, str)
+        else PlatformImportItem(index=i, attestation_ids=result)
+        for i, result in enumerate(results)
+    ]
+
+async def _import_account(db: AsyncSession, username: str, platform: str, platform_username: str) -> PlatformImportResult:
+    if platform not in ADAPTERS:
+        raise HTTPException(status_code=404, detail="Unsupported platform")
     
-    if not identity:
-        raise HTTPException(status_code=404, detail="User identity not found")
+    [result] = await import_platform_accounts(db, [(username, platform, platform_username)])
+    if isinstance(result, str):
+        status_code = 404 if result in (USER_NOT_FOUND, f"{platform} account not found") else 502
+        raise HTTPException(status_code=status_code, detail=result)
     
-    # Create sample GitHub attestation
-    github_attestation = ThirdPartyAttestationModel(
+    attestations = (await db.scalars(
+        select(ThirdPartyAttestationModel).where(ThirdPartyAttestationModel.id.in_(result))
+        .order_by(ThirdPartyAttestationModel.id)
+    )).all()
+    return PlatformImportResult(
         username=username,
-        platform="github",
-        platform_username=github_username,
-        attestation_type="commits",
-        value=10.0,  # Placeholder value
-        attestation_metadata=json.dumps({"note": "Sample GitHub import"}),
-        verified=0
+        platform=platform,
+        platform_username=platform_username,
+        attestations=[ThirdPartyAttestationOut.model_validate(a) for a in attestations]
     )
-    
-    db.add(github_attestation)
-    db.commit()
-    
-    return {
-        "username": username,
-        "github_username": github_username,
-        "message": "GitHub profile import initiated. Verification pending.",
-        "note": "This is a placeholder. Real implementation requires GitHub API integration."
-    }
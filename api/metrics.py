@@ -0,0 +1,37 @@
+# API endpoint exposing runtime metrics
+
+from fastapi import APIRouter
+from services.events import event_feed
+from services.platforms import platform_client
+from services.proposal_cache import proposal_cache
+from services.proposal_scheduler import proposal_scheduler
+from services.signatures import issuer_keys, signature_verifier
+from services.sybil import sybil_detector
+from services.trust_graph import trust_graph
+from services.trust_scores import trust_scheduler
+from services.verification import verification_worker
+from services.vote_queue import vote_queue
+from utils.crypto import keypair_pool, public_key_cache
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Runtime counters for in-process caches and workers.
+    """
+    return {
+        "public_key_cache": public_key_cache.stats(),
+        "issuer_key_cache": issuer_keys.stats(),
+        "signature_verifier": signature_verifier.stats(),
+        "keypair_pool": keypair_pool.stats(),
+        "vote_queue": vote_queue.stats(),
+        "proposal_scheduler": proposal_scheduler.stats(),
+        "proposal_cache": proposal_cache.stats(),
+        "platform_client": platform_client.stats(),
+        "verification_worker": verification_worker.stats(),
+        "trust_graph": trust_graph.stats(),
+        "trust_propagation": trust_scheduler.stats(),
+        "sybil_detection": sybil_detector.stats(),
+        "events": event_feed.stats()
+    }
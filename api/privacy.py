@@ -1,24 +1,23 @@
 # API endpoints for privacy features and zero-knowledge proofs
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from db.connection import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.connection import get_db
 from models.identity import UserIdentityModel
-from models.attestation import AttestationModel
 from models.user import ZKProof
-from utils.zkproof import generate_zk_proof, verify_zk_proof, create_selective_disclosure_proof
+from services.merkle_store import get_disclosure_proof
+from services.subject_stats import get_attestation_count
+from utils.zkproof import (
+    generate_zk_proof,
+    verify_zk_proof,
+    verify_selective_disclosure
+)
 from pydantic import BaseModel
-from typing import List
+from typing import Any, Dict, List
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 class ThresholdProofRequest(BaseModel):
     username: str
     threshold: int
@@ -27,24 +26,25 @@ class SelectiveDisclosureRequest(BaseModel):
     username: str
     selected_indices: List[int]
 
+class SelectiveDisclosureVerifyRequest(BaseModel):
+    proof: Dict[str, Any]
+
 @router.post("/privacy/prove-threshold", response_model=ZKProof)
-def prove_attestation_threshold(request: ThresholdProofRequest, db: Session = Depends(get_db)):
+async def prove_attestation_threshold(request: ThresholdProofRequest, db: AsyncSession = Depends(get_db)):
     """
     Generate a zero-knowledge proof that a user's attestation count meets a threshold.
     Does not reveal the exact number of attestations.
     """
     # Verify user exists
-    identity = db.query(UserIdentityModel).filter(
+    identity = await db.scalar(select(UserIdentityModel).where(
         UserIdentityModel.username == request.username
-    ).first()
+    ))
     
     if not identity:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Count attestations for this user
-    attestation_count = db.query(AttestationModel).filter(
-        AttestationModel.subject == request.username
-    ).count()
+    # Read the maintained counter rather than counting the user's history
+    attestation_count = await get_attestation_count(db, request.username)
     
     # Generate ZK proof
     proof_string, meets_threshold = generate_zk_proof(
@@ -59,7 +59,7 @@ def prove_attestation_threshold(request: ThresholdProofRequest, db: Session = De
     )
 
 @router.post("/privacy/verify-threshold")
-def verify_attestation_threshold(proof_data: ZKProof):
+async def verify_attestation_threshold(proof_data: ZKProof):
     """
     Verify a zero-knowledge proof without learning the actual attestation count.
     """
@@ -76,42 +76,38 @@ def verify_attestation_threshold(proof_data: ZKProof):
     }
 
 @router.post("/privacy/selective-disclosure")
-def create_selective_disclosure(request: SelectiveDisclosureRequest, db: Session = Depends(get_db)):
+async def create_selective_disclosure(request: SelectiveDisclosureRequest, db: AsyncSession = Depends(get_db)):
     """
     Create a selective disclosure proof for specific attestations.
     Allows proving certain attestations exist without revealing all.
+    Indices are positions in the user's attestation accumulator (insertion order).
     """
-    # Get all user attestations
-    attestations = db.query(AttestationModel).filter(
-        AttestationModel.subject == request.username
-    ).all()
-    
-    if not attestations:
-        raise HTTPException(status_code=404, detail="No attestations found")
-    
-    # Convert to list of dicts
-    attestation_list = []
-    for att in attestations:
-        attestation_list.append({
-            "id": att.id,
-            "issuer": att.issuer,
-            "subject": att.subject,
-            "attestation_type": att.attestation_type,
-            "timestamp": str(att.timestamp)
-        })
-    
-    # Validate selected indices
-    if any(i < 0 or i >= len(attestation_list) for i in request.selected_indices):
+    try:
+        disclosure_proof = await get_disclosure_proof(db, request.username, request.selected_indices)
+    except IndexError:
         raise HTTPException(status_code=400, detail="Invalid attestation indices")
     
-    # Create selective disclosure proof
-    disclosure_proof = create_selective_disclosure_proof(
-        attestation_list,
-        request.selected_indices
-    )
+    if disclosure_proof is None:
+        raise HTTPException(status_code=404, detail="No attestations found")
     
     return {
         "username": request.username,
         "proof": disclosure_proof,
         "message": "Selective disclosure proof created"
     }
+
+@router.post("/privacy/verify-disclosure")
+async def verify_disclosure(request: SelectiveDisclosureVerifyRequest):
+    """
+    Verify a selective disclosure proof against its Merkle root.
+    """
+    is_valid = verify_selective_disclosure(
+        request.proof,
+        request.proof.get("disclosed_attestations", [])
+    )
+    
+    return {
+        "valid": is_valid,
+        "merkle_root": request.proof.get("merkle_root"),
+        "disclosed_count": len(request.proof.get("disclosed_indices", [])) if is_valid else None
+    }
@@ -1,29 +1,92 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from db.connection import SessionLocal
-from models.attestation import AttestationModel
-from models.user import UserAttestations, AttestationOut
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from db.connection import AsyncSessionLocal, get_db
+from models.attestation import HIDDEN_STATUSES, AttestationModel
+from models.user import UserAttestations, AttestationOut, SubjectStats
+from services.subject_stats import get_subject_stats
+from utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rows fetched per round-trip when streaming NDJSON
+STREAM_CHUNK_SIZE = 500
+
+def _subject_query(username: str, cursor: Optional[str]):
+    query = select(AttestationModel).where(
+        AttestationModel.subject == username,
+        AttestationModel.status.not_in(HIDDEN_STATUSES)
+    )
+
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            tuple_(AttestationModel.timestamp, AttestationModel.id) > tuple_(*after)
+        )
+
+    return query.order_by(AttestationModel.timestamp, AttestationModel.id)
+
+async def _stream_attestations(username: str, cursor: Optional[str], limit: Optional[int]):
+    # The request-scoped session is closed once the handler returns, so the
+    # stream owns its own session for the lifetime of the response
+    async with AsyncSessionLocal() as db:
+        query = _subject_query(username, cursor)
+        if limit:
+            query = query.limit(limit)
+        result = await db.stream_scalars(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        async for partition in result.partitions():
+            yield "".join(
+                AttestationOut.model_validate(r).model_dump_json() + "\n" for r in partition
+            )
 
 @router.get("/user/{username}", response_model=UserAttestations)
-def get_user_attestations(username: str, db: Session = Depends(get_db)):
-    rows = (
-        db.query(AttestationModel)
-        .filter(AttestationModel.subject == username)
-        .all()
+async def get_user_attestations(
+    username: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List attestations about a user, oldest first, paginated on (timestamp, id).
+    Attestations pending or failing signature verification are left out.
+    Pass the returned next_cursor to fetch the following page. With
+    format=ndjson (or Accept: application/x-ndjson) every attestation after
+    the cursor is streamed as one JSON object per line.
+    """
+    ndjson = format == "ndjson" or (
+        format is None and "application/x-ndjson" in request.headers.get("accept", "")
     )
 
-    if not rows:
+    query = _subject_query(username, cursor)
+
+    if ndjson:
+        if not cursor and await db.scalar(query.limit(1)) is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return StreamingResponse(
+            _stream_attestations(username, cursor, limit),
+            media_type="application/x-ndjson"
+        )
+
+    page_size = limit or DEFAULT_PAGE_SIZE
+    rows = (await db.scalars(query.limit(page_size + 1))).all()
+
+    if not rows and not cursor:
         raise HTTPException(status_code=404, detail="User not found")
 
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+
     try:
         attestation_list = [AttestationOut.model_validate(r) for r in rows]
     except Exception:
@@ -32,4 +95,13 @@ def get_user_attestations(username: str, db: Session = Depends(get_db)):
     return UserAttestations(
         user=username,
         attestations=attestation_list,
+        next_cursor=next_cursor,
     )
+
+@router.get("/user/{username}/stats", response_model=SubjectStats)
+async def get_user_stats(username: str, db: AsyncSession = Depends(get_db)):
+    """
+    Attestation counters for a user: total, per attestation type and
+    distinct issuers. Served from the subject_stats table.
+    """
+    return SubjectStats(**await get_subject_stats(db, username))
@@ -0,0 +1,67 @@
+# Benchmark: single-item POST /attest vs. POST /attest/batch
+#
+# Usage:
+#     python -m benchmarks.bench_batch_ingest [--count 5000] [--batch-size 1000]
+#
+# Runs both ingestion paths in-process against a throwaway file-backed SQLite
+# database so every commit pays the real fsync cost.
+
+import argparse
+import os
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+
+def make_records(count: int, prefix: str):
+    return [
+        {
+            "issuer": f"{prefix}_issuer_{i % 97}",
+            "subject": f"{prefix}_subject_{i % 13}",
+            "attestation_type": "peer_verified",
+        }
+        for i in range(count)
+    ]
+
+
+def bench_single(client: TestClient, records) -> float:
+    start = time.perf_counter()
+    for record in records:
+        response = client.post("/attest", json=record)
+        assert response.status_code == 200, response.text
+    return time.perf_counter() - start
+
+
+def bench_batch(client: TestClient, records, batch_size: int) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(records), batch_size):
+        response = client.post("/attest/batch", json=records[offset:offset + batch_size])
+        assert response.status_code == 200, response.text
+        assert response.json()["failed"] == 0
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-item and batch attestation ingestion")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the application (and its engines) are imported
+        os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from main import app
+
+        client = TestClient(app)
+        single = bench_single(client, make_records(args.count, "single"))
+        batch = bench_batch(client, make_records(args.count, "batch"), args.batch_size)
+
+    print(f"{'path':<28}{'seconds':>10}{'rows/sec':>12}")
+    print(f"{'POST /attest':<28}{single:>10.3f}{args.count / single:>12.0f}")
+    print(f"{'POST /attest/batch (' + str(args.batch_size) + ')':<28}{batch:>10.3f}{args.count / batch:>12.0f}")
+    print(f"speedup: {single / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
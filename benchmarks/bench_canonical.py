@@ -0,0 +1,72 @@
+# Benchmark: encode + hash cost of the canonical attestation encodings
+#
+# Usage:
+#     python -m benchmarks.bench_canonical [--count 200000] [--repeat 5]
+#
+# Encodes and SHA-256-hashes `count` distinct attestation payloads (issuer,
+# subject, type, timestamp, half of them with an anchor) in the legacy JSON
+# form (v1) and the binary form (v2), reporting the best of `repeat` runs
+# as microseconds per attestation and the mean message size. The legacy
+# column also shows the pre-v2 code path, which serialized with
+# json.dumps(sort_keys=True) and left the hashing to the signature call.
+
+import argparse
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+
+from utils.canonical import CANONICAL_V1, CANONICAL_V2, digest, encode
+from utils.crypto import attestation_payload
+
+
+def make_payloads(count: int):
+    start = datetime(2026, 1, 1)
+    return [
+        attestation_payload(
+            f"issuer_{i % 1000}",
+            f"subject_{i}",
+            "peer_verified",
+            anchor=f"btc:{i:064x}" if i % 2 else None,
+            timestamp=start + timedelta(seconds=i)
+        )
+        for i in range(count)
+    ]
+
+
+def _best(fn, payloads, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for payload in payloads:
+            fn(payload)
+        best = min(best, time.perf_counter() - start)
+    return best / len(payloads) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-attestation encode + hash cost of the canonical forms")
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.count)
+    cases = [
+        ("json.dumps + sha256 (pre-v2)", lambda p: hashlib.sha256(json.dumps(p, sort_keys=True, default=str).encode("utf-8")).digest(), None),
+        ("v1 encode + hash", lambda p: digest(p, CANONICAL_V1), CANONICAL_V1),
+        ("v2 encode + hash", lambda p: digest(p, CANONICAL_V2), CANONICAL_V2),
+        ("v2 encode only", lambda p: encode(p, CANONICAL_V2), CANONICAL_V2),
+    ]
+
+    baseline = None
+    print(f"{'form':<30}{'us/attestation':>16}{'speedup':>10}{'bytes':>8}")
+    for label, fn, version in cases:
+        micros = _best(fn, payloads, args.repeat)
+        baseline = baseline or micros
+        size = sum(len(encode(p, version)) for p in payloads) / len(payloads) if version else ""
+        size = f"{size:.0f}" if size != "" else ""
+        print(f"{label:<30}{micros:>16.2f}{baseline / micros:>10.2f}{size:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Benchmark: read/write throughput with many concurrent clients
+#
+# Usage:
+#     python -m benchmarks.bench_db_concurrency [--clients 16] [--seconds 5] [--write-ratio 0.2]
+#     BITREP_DATABASE_URL=postgresql://... python -m benchmarks.bench_db_concurrency --url-only
+#
+# Each client thread loops over short transactions: a subject lookup or an
+# attestation insert + commit. SQLite is measured with its default rollback
+# journal and with the WAL tuning from db.connection; "database is locked"
+# failures are counted rather than retried.
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from db.connection import Base, DATABASE_URL, create_db_engine
+from models.attestation import AttestationModel
+
+
+def run(engine, clients: int, seconds: float, write_ratio: float) -> dict:
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all(
+            AttestationModel(issuer=f"seed_{i}", subject=f"subject_{i % 100}", attestation_type="seed")
+            for i in range(5000)
+        )
+        db.commit()
+
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(n):
+        rng = random.Random(n)
+        local = {"reads": 0, "writes": 0, "locked": 0}
+        while time.perf_counter() < deadline:
+            try:
+                with Session() as db:
+                    if rng.random() < write_ratio:
+                        db.add(AttestationModel(
+                            issuer=f"client_{n}",
+                            subject=f"subject_{rng.randrange(100)}",
+                            attestation_type="bench"
+                        ))
+                        db.commit()
+                        local["writes"] += 1
+                    else:
+                        db.query(AttestationModel).filter(
+                            AttestationModel.subject == f"subject_{rng.randrange(100)}"
+                        ).limit(50).all()
+                        local["reads"] += 1
+            except OperationalError:
+                local["locked"] += 1
+        with lock:
+            for key, value in local.items():
+                counts[key] += value
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure database throughput under concurrent clients")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--url-only", action="store_true", help="only benchmark BITREP_DATABASE_URL")
+    args = parser.parse_args()
+
+    configs = []
+    if args.url_only:
+        configs.append(("configured URL", lambda tmp: create_db_engine(DATABASE_URL)))
+    else:
+        configs.append((
+            "sqlite rollback journal",
+            lambda tmp: create_db_engine(f"sqlite:///{os.path.join(tmp, 'default.db')}", sqlite_pragmas={})
+        ))
+        configs.append((
+            "sqlite WAL tuned",
+            lambda tmp: create_db_engine(f"sqlite:///{os.path.join(tmp, 'wal.db')}")
+        ))
+
+    print(f"{args.clients} clients, {args.seconds:.0f}s, {args.write_ratio:.0%} writes")
+    print(f"{'config':<26}{'reads/s':>10}{'writes/s':>10}{'locked':>8}")
+    for label, make_engine in configs:
+        with tempfile.TemporaryDirectory() as tmp:
+            counts = run(make_engine(tmp), args.clients, args.seconds, args.write_ratio)
+        print(
+            f"{label:<26}{counts['reads'] / args.seconds:>10.0f}"
+            f"{counts['writes'] / args.seconds:>10.0f}{counts['locked']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Benchmark: selective disclosure latency as a subject's history grows
+#
+# Usage:
+#     python -m benchmarks.bench_disclosure [--sizes 100,1000,10000,50000] [--requests 50] [--disclose 3]
+#
+# Grows one subject's history through POST /attest/batch against a throwaway
+# file-backed SQLite database and, at each size, times
+# POST /privacy/selective-disclosure (served from the stored accumulator) and
+# a baseline that loads every attestation and rebuilds the tree in memory,
+# which is what the endpoint did before the accumulator existed.
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+SUBJECT = "bench_subject"
+BATCH_SIZE = 5000
+
+
+def grow(client: TestClient, current: int, target: int):
+    while current < target:
+        n = min(BATCH_SIZE, target - current)
+        records = [
+            {"issuer": f"issuer_{(current + i) % 101}", "subject": SUBJECT, "attestation_type": "peer_verified"}
+            for i in range(n)
+        ]
+        response = client.post("/attest/batch", json=records)
+        assert response.status_code == 200 and response.json()["failed"] == 0, response.text
+        current += n
+    return current
+
+
+def time_endpoint(client: TestClient, size: int, requests: int, disclose: int, rng: random.Random):
+    samples = []
+    for _ in range(requests):
+        indices = rng.sample(range(size), disclose)
+        start = time.perf_counter()
+        response = client.post("/privacy/selective-disclosure", json={"username": SUBJECT, "selected_indices": indices})
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return statistics.median(samples) * 1000
+
+
+def time_rehash(size: int, requests: int, disclose: int, rng: random.Random):
+    from db.connection import SessionLocal
+    from models.attestation import AttestationModel
+    from utils.zkproof import create_selective_disclosure_proof
+
+    samples = []
+    for _ in range(requests):
+        indices = rng.sample(range(size), disclose)
+        start = time.perf_counter()
+        with SessionLocal() as db:
+            attestations = db.query(AttestationModel).filter(AttestationModel.subject == SUBJECT).all()
+            create_selective_disclosure_proof(
+                [
+                    {
+                        "id": att.id, "issuer": att.issuer, "subject": att.subject,
+                        "attestation_type": att.attestation_type, "timestamp": str(att.timestamp)
+                    }
+                    for att in attestations
+                ],
+                indices
+            )
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure selective disclosure latency against history size")
+    parser.add_argument("--sizes", default="100,1000,10000,50000")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--disclose", type=int, default=3)
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the application (and its engines) are imported
+        os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from main import app
+
+        client = TestClient(app)
+        current = 0
+        print(f"{'history':>9}{'accumulator p50 ms':>20}{'rehash p50 ms':>16}")
+        for size in sizes:
+            current = grow(client, current, size)
+            accumulator = time_endpoint(client, size, args.requests, args.disclose, rng)
+            rehash = time_rehash(size, max(1, args.requests // 10), args.disclose, rng)
+            print(f"{size:>9}{accumulator:>20.2f}{rehash:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
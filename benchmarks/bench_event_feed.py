@@ -0,0 +1,113 @@
+# Benchmark: GET /events catch-up throughput and long-poll wake-up latency
+#
+# Usage:
+#     python -m benchmarks.bench_event_feed [--events 50000] [--page 1000] [--pollers 50] [--rounds 20]
+#
+# Against a throwaway file-backed SQLite database:
+#   ingest     writes --events attestations through POST /attest/batch, each
+#              appending its event in the same transaction
+#   catch-up   pages through the whole log with after=<seq>&limit=--page,
+#              timing each page (every page is a primary-key range read)
+#   wake-up    parks --pollers concurrent long-polls (wait=30) and commits
+#              one attestation per round; reports the delay between the
+#              commit returning and each poller receiving the event
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def bench_ingest(client: TestClient, count: int, batch_size: int) -> float:
+    start = time.perf_counter()
+    for offset in range(0, count, batch_size):
+        response = client.post("/attest/batch", json=[
+            {"issuer": f"feed_issuer_{i % 97}", "subject": f"feed_subject_{i % 13}", "attestation_type": "peer_verified"}
+            for i in range(offset, min(offset + batch_size, count))
+        ])
+        assert response.status_code == 200, response.text
+    return time.perf_counter() - start
+
+
+def bench_catch_up(client: TestClient, page: int):
+    after, total, latencies = 0, 0, []
+    start = time.perf_counter()
+    while True:
+        began = time.perf_counter()
+        body = client.get("/events", params={"after": after, "limit": page}).json()
+        latencies.append((time.perf_counter() - began) * 1000)
+        total += len(body["events"])
+        if not body["events"]:
+            return after, total, time.perf_counter() - start, latencies
+        after = body["next_after"]
+
+
+async def bench_wake_up(app, after: int, pollers: int, rounds: int):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    delays = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for round_no in range(rounds):
+            received = []
+
+            async def poll():
+                response = await client.get("/events", params={"after": after, "wait": 30})
+                received.append(time.perf_counter())
+                return response.json()
+
+            tasks = [asyncio.create_task(poll()) for _ in range(pollers)]
+            # Let every poller reach its wait
+            await asyncio.sleep(0.2)
+            response = await client.post(
+                "/attest", json={"issuer": "feed_writer", "subject": f"feed_round_{round_no}", "attestation_type": "peer_verified"}
+            )
+            committed = time.perf_counter()
+            pages = await asyncio.gather(*tasks)
+            assert all(page["events"][0]["data"]["id"] == response.json()["id"] for page in pages)
+            delays.extend((t - committed) * 1000 for t in received)
+            after = pages[0]["next_after"]
+    return delays
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure event-log catch-up throughput and long-poll latency")
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--pollers", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the application (and its engines) are imported
+        os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from main import app
+
+        client = TestClient(app)
+        ingest = bench_ingest(client, args.events, args.batch_size)
+        last_seq, total, catch_up, pages = bench_catch_up(client, args.page)
+        delays = asyncio.run(bench_wake_up(app, last_seq, args.pollers, args.rounds))
+
+    print(f"ingest    {args.events} attestations with events in {ingest:.2f} s ({args.events / ingest:.0f} rows/s)")
+    print(
+        f"catch-up  {total} events in {catch_up:.2f} s ({total / catch_up:.0f} events/s); "
+        f"page of {args.page}: p50 {statistics.median(pages):.1f} ms, p99 {_percentile(pages, 0.99):.1f} ms"
+    )
+    print(
+        f"wake-up   {args.pollers} pollers x {args.rounds} rounds: commit -> response "
+        f"p50 {statistics.median(delays):.1f} ms, p95 {_percentile(delays, 0.95):.1f} ms, max {max(delays):.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Benchmark: Merkle multiproof size and verification time
+#
+# Usage:
+#     python -m benchmarks.bench_merkle [--sizes 1000,10000,100000,1000000] [--disclose 1,10,100]
+#
+# Builds a tree over `size` leaves and, for each disclosure count k, proves k
+# random leaves. Reports the number of sibling hashes in the multiproof, its
+# size in bytes, and the time to verify it. Proof size grows with k * log2(n),
+# less the siblings the disclosed paths share.
+
+import argparse
+import math
+import random
+import time
+
+from utils.merkle import MerkleTree, leaf_hash, verify_multiproof
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Merkle multiproof size and verify time")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--disclose", default="1,10,100")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    disclose = [int(k) for k in args.disclose.split(",")]
+    rng = random.Random(0)
+
+    print(f"{'leaves':>9} {'build s':>8} {'k':>5} {'nodes':>6} {'k*log2n':>8} {'bytes':>7} {'verify ms':>10}")
+    for size in sizes:
+        leaves = [leaf_hash(i.to_bytes(8, "big")) for i in range(size)]
+        start = time.perf_counter()
+        tree = MerkleTree(leaves)
+        build = time.perf_counter() - start
+        root = tree.root()
+
+        for k in disclose:
+            if k > size:
+                continue
+            indices = rng.sample(range(size), k)
+            proof = tree.proof(indices)
+            disclosed = {i: leaves[i] for i in indices}
+
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                assert verify_multiproof(root, size, disclosed, proof)
+            verify_ms = (time.perf_counter() - start) / args.rounds * 1000
+
+            bound = k * math.ceil(math.log2(size))
+            print(f"{size:>9} {build:>8.2f} {k:>5} {len(proof):>6} {bound:>8} "
+                  f"{32 * len(proof):>7} {verify_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Benchmark: platform account import throughput against the mock server
+#
+# Usage:
+#     python -m benchmarks.bench_platform_import [--accounts 200] [--latency-ms 50] [--concurrency 1,8,32] [--failure-rate 0]
+#
+# Imports --accounts GitHub accounts (5 API requests each) from the mock
+# platform server, mounted in-process with simulated network latency, into a
+# throwaway file-backed SQLite database. Each row runs the batch import with
+# a different per-platform concurrency limit; rate limiting is disabled so
+# the limit is the only throttle. The last row re-imports the same accounts,
+# which the ETag cache turns into conditional requests answered with 304.
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import insert
+
+
+async def run(accounts: int, latency_ms: float, concurrencies, failure_rate: float):
+    from db.connection import AsyncSessionLocal
+    from main import app  # noqa: F401 (creates the tables)
+    from models.identity import UserIdentityModel
+    from services.platforms import import_platform_accounts, platform_client
+    from services.platforms.mock_server import create_mock_app
+
+    platform_client.configure(
+        base_url="http://mock",
+        transport=httpx.ASGITransport(app=create_mock_app(latency_ms=latency_ms, failure_rate=failure_rate))
+    )
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(UserIdentityModel), [
+            {"username": f"bench_{i}", "public_key": f"bench-platform-{i}", "verified": False}
+            for i in range(accounts)
+        ])
+        await db.commit()
+
+    state = platform_client._platforms["github"]
+    rows = []
+    for concurrency in concurrencies:
+        state.concurrency, state.semaphore = concurrency, None
+        batch = [(f"bench_{i}", "github", f"c{concurrency}_gh{i}") for i in range(accounts)]
+        requests_before = state.requests
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            results = await import_platform_accounts(db, batch)
+        elapsed = time.perf_counter() - start
+        assert all(isinstance(r, list) for r in results), [r for r in results if isinstance(r, str)][:3]
+        rows.append((f"concurrency {concurrency}", elapsed, state.requests - requests_before))
+
+    not_modified_before = state.not_modified
+    requests_before = state.requests
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        await import_platform_accounts(db, batch)
+    elapsed = time.perf_counter() - start
+    rows.append((f"re-import (304s: {state.not_modified - not_modified_before})", elapsed, state.requests - requests_before))
+    await platform_client.aclose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure platform import throughput against the mock platform server")
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the application (and its engines) are imported
+        os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["BITREP_GITHUB_RATE_LIMIT"] = "0"
+        rows = asyncio.run(run(
+            args.accounts, args.latency_ms, [int(c) for c in args.concurrency.split(",")], args.failure_rate
+        ))
+
+    print(f"{'run':<28}{'seconds':>9}{'accounts/sec':>14}{'requests/sec':>14}")
+    for label, elapsed, requests in rows:
+        print(f"{label:<28}{elapsed:>9.2f}{args.accounts / elapsed:>14.1f}{requests / elapsed:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
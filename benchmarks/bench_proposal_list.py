@@ -0,0 +1,114 @@
+# Benchmark: proposal listing latency with and without the page cache
+#
+# Usage:
+#     python -m benchmarks.bench_proposal_list [--proposals 5000] [--polls 500] [--limit 100] [--write-every 50]
+#
+# Polls GET /governance/proposals through the ASGI app (in-process, no server)
+# against a throwaway file-backed SQLite database seeded with --proposals
+# rows. Pollers walk the first three pages. Rows compare the cache disabled,
+# cache hits, conditional requests answered with 304, and a mixed workload
+# where a vote lands every --write-every polls and invalidates the cache.
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import insert
+
+
+async def seed(http, AsyncSessionLocal, GovernanceProposalModel, ProposalStatus, proposals: int):
+    await http.post("/identity/create", json={"username": "bench_proposer"})
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(GovernanceProposalModel), [
+            {
+                "title": f"bench {i}", "description": "bench", "proposer": "bench_proposer",
+                "status": ProposalStatus.ACTIVE, "votes_for": 0.0, "votes_against": 0.0,
+                "created_at": now - timedelta(seconds=i), "expires_at": now + timedelta(days=7)
+            }
+            for i in range(proposals)
+        ])
+        await db.commit()
+
+
+async def poll(http, polls: int, limit: int, conditional: bool, write_every: int = 0):
+    from services.proposal_cache import proposal_cache
+
+    # Cursors for the first three pages, so every poller walks the same keys
+    cursors = [None]
+    for _ in range(2):
+        response = await http.get("/governance/proposals", params={"limit": limit, **({"cursor": cursors[-1]} if cursors[-1] else {})})
+        cursors.append(response.headers.get("X-Next-Cursor"))
+
+    etags = {}
+    before = proposal_cache.stats()
+    latencies = []
+    for i in range(polls):
+        if write_every and i and i % write_every == 0:
+            await http.post("/governance/vote", json={"proposal_id": 1, "voter": f"bench_voter_{i}", "support": 1})
+        cursor = cursors[i % len(cursors)]
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        headers = {"If-None-Match": etags[cursor]} if conditional and cursor in etags else {}
+        start = time.perf_counter()
+        response = await http.get("/governance/proposals", params=params, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code in (200, 304), response.text
+        etags[cursor] = response.headers["ETag"]
+
+    after = proposal_cache.stats()
+    hits = after["hits"] - before["hits"]
+    lookups = hits + after["misses"] - before["misses"]
+    return latencies, hits / lookups if lookups else 0.0
+
+
+async def run(proposals: int, polls: int, limit: int, write_every: int):
+    from db.connection import AsyncSessionLocal
+    from main import app
+    from models.governance import GovernanceProposalModel, ProposalStatus
+    from services.proposal_cache import proposal_cache
+
+    rows = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as http:
+        await seed(http, AsyncSessionLocal, GovernanceProposalModel, ProposalStatus, proposals)
+        for i in range(polls):
+            await http.post("/identity/create", json={"username": f"bench_voter_{i}"})
+
+        maxsize = proposal_cache.maxsize
+        proposal_cache.maxsize = 0
+        rows.append(("cache disabled", *await poll(http, polls, limit, conditional=False)))
+        proposal_cache.maxsize = maxsize
+        proposal_cache.invalidate()
+        rows.append(("cache hits", *await poll(http, polls, limit, conditional=False)))
+        rows.append(("If-None-Match (304)", *await poll(http, polls, limit, conditional=True)))
+        rows.append((f"304 + vote every {write_every}", *await poll(http, polls, limit, conditional=True, write_every=write_every)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure proposal listing latency and cache hit rate")
+    parser.add_argument("--proposals", type=int, default=5000)
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--write-every", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the application (and its engines) are imported
+        os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        rows = asyncio.run(run(args.proposals, args.polls, args.limit, args.write_every))
+
+    baseline = statistics.median(rows[0][1])
+    print(f"{'mode':<26}{'p50 ms':>9}{'p95 ms':>9}{'hit rate':>10}{'speedup':>9}")
+    for label, latencies, hit_rate in rows:
+        p50 = statistics.median(latencies)
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{label:<26}{p50 * 1000:>9.2f}{p95 * 1000:>9.2f}{hit_rate:>10.1%}{baseline / p50:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
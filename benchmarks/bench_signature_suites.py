@@ -0,0 +1,75 @@
+# Benchmark: signature suites compared
+#
+# Usage:
+#     python -m benchmarks.bench_signature_suites [--keys 20] [--count 2000] [--workers 4]
+#
+# For every suite in utils.suites, reports the cost of generating `keys`
+# keypairs (inline, without the RSA pool), signing and verifying `count`
+# attestations with sign_attestation / verify_signature, and
+# verify_signatures_batch on `workers` threads, plus what an identity and
+# an attestation store: public and private key PEM sizes and the tagged
+# base64 signature length. A last batch row mixes all suites.
+#
+# sign_attestation parses the private key PEM on every call, which for RSA
+# costs far more than the signature itself; "raw sign" signs a digest with
+# an already loaded key.
+
+import argparse
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.hazmat.primitives import serialization
+
+from utils.crypto import attestation_payload, sign_attestation, verify_signature, verify_signatures_batch
+from utils.suites import SUITES
+
+
+def _per_op(fn, count: int) -> float:
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) / count * 1e6
+
+
+def bench_suite(suite, keys: int, count: int, executor):
+    pairs, keygen = _per_op(lambda: [suite.generate_keypair() for _ in range(keys)], keys)
+    payloads = [attestation_payload(f"issuer_{i % keys}", f"subject_{i}", "peer_verified") for i in range(count)]
+    signatures, sign = _per_op(
+        lambda: [sign_attestation(p, pairs[i % keys][1]) for i, p in enumerate(payloads)], count
+    )
+    private_key = serialization.load_pem_private_key(pairs[0][1].encode(), password=None)
+    digest = hashlib.sha256(b"attestation").digest()
+    _, raw_sign = _per_op(lambda: [suite.sign(private_key, digest) for _ in range(count)], count)
+    items = [(p, s, pairs[i % keys][0]) for i, (p, s) in enumerate(zip(payloads, signatures))]
+    ok, verify = _per_op(lambda: all(verify_signature(*item) for item in items), count)
+    assert ok
+    ok, batch = _per_op(lambda: all(verify_signatures_batch(items, executor=executor)), count)
+    assert ok
+    sizes = (len(pairs[0][0]), len(pairs[0][1]), len(signatures[0]))
+    return items, (keygen, sign, raw_sign, verify, batch) + sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare keygen, sign, verify and storage size across signature suites")
+    parser.add_argument("--keys", type=int, default=20)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'suite':<14}{'keygen us':>11}{'sign us':>9}{'raw sign us':>13}{'verify us':>11}{'batch us':>10}"
+          f"{'pub B':>7}{'priv B':>8}{'sig chars':>11}")
+    mixed = []
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for name, suite in SUITES.items():
+            items, row = bench_suite(suite, args.keys, args.count, executor)
+            mixed.extend(items[:args.count // len(SUITES)])
+            keygen, sign, raw_sign, verify, batch, public, private, signature = row
+            print(f"{name:<14}{keygen:>11.0f}{sign:>9.1f}{raw_sign:>13.1f}{verify:>11.1f}{batch:>10.1f}"
+                  f"{public:>7}{private:>8}{signature:>11}")
+        ok, batch = _per_op(lambda: all(verify_signatures_batch(mixed, executor=executor)), len(mixed))
+        assert ok
+    print(f"{'mixed batch':<14}{'':>11}{'':>9}{'':>13}{'':>11}{batch:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
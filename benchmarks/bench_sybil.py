@@ -0,0 +1,141 @@
+# Benchmark: Sybil-cluster detection at 1M and 10M edges
+#
+# Usage:
+#     python -m benchmarks.bench_sybil [--edges 1000000,10000000] [--nodes-per-edge 0.1] [--rings 100] [--db-rows 200000]
+#
+# For each edge count, builds a synthetic graph (uniform issuers,
+# Zipf-distributed subjects, random creation times) with --rings planted
+# Sybil rings of 5-20 identities that all attest to each other and were
+# created within minutes, then times each stage of utils.sybil.analyze:
+#   pairs        distinct (issuer, subject) pairs and reciprocity
+#   rings        union-find over reciprocated pairs, then scoring
+#   communities  label propagation over all pairs, then scoring
+# and reports how many planted rings were flagged and how many flagged
+# clusters were not planted.
+#
+# With --db-rows, also runs SybilDetector end to end on a throwaway SQLite
+# database with that many attestations (plus the same kind of rings) and
+# prints its per-stage timings.
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _graph(edges: int, nodes: int, rings: int, seed: int = 0):
+    """Random edges over the first nodes, planted rings over the last ones."""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(5, 21, rings)
+    honest = nodes - int(sizes.sum())
+    sources, targets = [rng.integers(0, honest, edges)], [rng.zipf(1.5, edges) % honest]
+    created = rng.uniform(0, 1e8, nodes)
+    planted, first = [], honest
+    for size in sizes.tolist():
+        members = np.arange(first, first + size)
+        sources.append(np.repeat(members, size))
+        targets.append(np.tile(members, size))
+        created[members] = rng.uniform(0, 1e8) + rng.uniform(0, 600, size)
+        planted.append(members)
+        first += size
+    return np.concatenate(sources), np.concatenate(targets), created, planted
+
+
+def bench_analyze(edges: int, nodes: int, rings: int, threshold: float):
+    from utils.sybil import connected_components, distinct_pairs, label_propagation, score_clusters
+
+    sources, targets, created, planted = _graph(edges, nodes, rings)
+    (src, dst, mutual), pairs = _timed(distinct_pairs, sources, targets, nodes)
+
+    start = time.perf_counter()
+    labels = connected_components(nodes, src[mutual], dst[mutual])
+    ring_clusters = score_clusters("ring", labels, src, dst, mutual, created, 4, 1000)
+    ring_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels = label_propagation(nodes, src, dst, np.ones(len(src)))
+    community_clusters = score_clusters("community", labels, src, dst, mutual, created, 4, 1000)
+    community_s = time.perf_counter() - start
+
+    planted_keys = {members.tobytes() for members in planted}
+    found = set()
+    false_positives = 0
+    for clusters in (ring_clusters, community_clusters):
+        for i in np.flatnonzero(clusters.score >= threshold).tolist():
+            key = clusters.members[i].tobytes()
+            if key in planted_keys:
+                found.add(key)
+            else:
+                false_positives += 1
+    return pairs, ring_s, community_s, len(found), false_positives
+
+
+async def bench_end_to_end(rows: int, rings: int):
+    from sqlalchemy import insert
+
+    from db.connection import AsyncSessionLocal
+    from main import app  # noqa: F401 (creates the tables)
+    from models.attestation import AttestationModel
+    from models.identity import UserIdentityModel
+    from services.sql import chunks
+    from services.sybil import SybilDetector
+
+    nodes = max(rows // 10, 100)
+    sources, targets, created, _ = _graph(rows, nodes, rings, seed=1)
+    async with AsyncSessionLocal() as db:
+        for chunk in chunks(list(range(nodes)), 10000):
+            await db.execute(insert(UserIdentityModel), [
+                {"username": f"user{i}", "public_key": f"unused-{i}", "verified": False,
+                 "created_at": np.datetime64(int(created[i]), "s").item()}
+                for i in chunk
+            ])
+        for chunk in chunks(list(zip(sources.tolist(), targets.tolist())), 10000):
+            await db.execute(insert(AttestationModel), [
+                {"issuer": f"user{i}", "subject": f"user{s}", "attestation_type": "peer_verified"}
+                for i, s in chunk
+            ])
+        await db.commit()
+
+    return await SybilDetector().run_once()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Sybil-cluster detection time at 1M and 10M edges")
+    parser.add_argument("--edges", default="1000000,10000000")
+    parser.add_argument("--nodes-per-edge", type=float, default=0.1)
+    parser.add_argument("--rings", type=int, default=100, help="planted Sybil rings per graph")
+    parser.add_argument("--threshold", type=float, default=0.75)
+    parser.add_argument("--db-rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"{'edges':>10} {'nodes':>9} {'pairs s':>8} {'rings s':>8} {'comm. s':>8} {'total s':>8} {'planted found':>14} {'other flagged':>14}")
+    for edges in (int(e) for e in args.edges.split(",")):
+        nodes = max(int(edges * args.nodes_per_edge), args.rings * 40)
+        pairs, ring_s, community_s, found, false_positives = bench_analyze(edges, nodes, args.rings, args.threshold)
+        print(
+            f"{edges:>10} {nodes:>9} {pairs:>8.2f} {ring_s:>8.2f} {community_s:>8.2f} "
+            f"{pairs + ring_s + community_s:>8.2f} {f'{found}/{args.rings}':>14} {false_positives:>14}"
+        )
+
+    if args.db_rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Must be set before the application (and its engines) are imported
+            os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            stats = asyncio.run(bench_end_to_end(args.db_rows, args.rings))
+        print(f"\nSybilDetector over {stats['edges']} attestations and {stats['nodes']} identities in SQLite:")
+        for stage in ("load_ms", "identities_ms", "analyze_ms", "write_ms", "total_ms"):
+            print(f"  {stage[:-3]:<12} {stats[stage]:>9.1f} ms")
+        print(f"  flagged {stats['flagged_clusters']} clusters with {stats['flagged_members']} members")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Benchmark: third-party attestation import throughput
+#
+# Usage:
+#     python -m benchmarks.bench_third_party_import [--records 200000] [--single 2000] [--users 1000] [--chunk-size 1000]
+#
+# Generates an NDJSON file of --records partner records spread over --users
+# identities in a throwaway file-backed SQLite database, then imports it
+# three ways: --single records through POST /integration/import one at a
+# time, the whole file streamed to POST /integration/import/bulk, and the
+# same file through the service the `manage.py import-third-party` command
+# uses. Peak traced memory shows the bulk paths stay bounded as input grows.
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import httpx
+from sqlalchemy import insert
+
+
+def write_input(path: str, records: int, users: int):
+    with open(path, "w") as f:
+        for i in range(records):
+            f.write(json.dumps({
+                "username": f"partner_{i % users}", "platform": "ebay", "platform_username": f"seller{i}",
+                "attestation_type": "transactions", "value": float(i % 100), "metadata": {"order": i}
+            }) + "\n")
+
+
+async def run(path: str, records: int, single: int, users: int, chunk_size: int):
+    from db.connection import AsyncSessionLocal
+    from main import app
+    from models.identity import UserIdentityModel
+    from services.bulk_import import import_third_party_attestations, read_file_chunks
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(UserIdentityModel), [
+            {"username": f"partner_{i}", "public_key": f"bench-partner-{i}", "verified": False}
+            for i in range(users)
+        ])
+        await db.commit()
+
+    rows = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as http:
+        with open(path) as f:
+            lines = [json.loads(next(f)) for _ in range(single)]
+        tracemalloc.start()
+        start = time.perf_counter()
+        for record in lines:
+            response = await http.post("/integration/import", json=record)
+            assert response.status_code == 200, response.text
+        rows.append(("POST /integration/import", single, time.perf_counter() - start, tracemalloc.get_traced_memory()[1]))
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = await http.post(
+            "/integration/import/bulk", content=read_file_chunks(path), headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert response.json()["imported"] == records, response.text
+        rows.append(("POST /integration/import/bulk", records, time.perf_counter() - start, tracemalloc.get_traced_memory()[1]))
+        tracemalloc.stop()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        report = await import_third_party_attestations(db, read_file_chunks(path), "ndjson", "bench", chunk_size)
+    assert report.imported == records
+    rows.append((f"import-third-party ({chunk_size})", records, time.perf_counter() - start, tracemalloc.get_traced_memory()[1]))
+    tracemalloc.stop()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure third-party attestation import throughput")
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--single", type=int, default=2000, help="records sent through the single-record endpoint")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the application (and its engines) are imported
+        os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        path = os.path.join(tmp, "partner.ndjson")
+        write_input(path, args.records, args.users)
+        size_mb = os.path.getsize(path) / 1e6
+        rows = asyncio.run(run(path, args.records, min(args.single, args.records), args.users, args.chunk_size))
+
+    print(f"input: {args.records} records, {size_mb:.1f} MB")
+    print(f"{'path':<34}{'records':>9}{'seconds':>9}{'rows/sec':>10}{'peak MB':>9}")
+    for label, count, elapsed, peak in rows:
+        print(f"{label:<34}{count:>9}{elapsed:>9.2f}{count / elapsed:>10.0f}{peak / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
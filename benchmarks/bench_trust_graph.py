@@ -0,0 +1,131 @@
+# Benchmark: trust graph build, incremental load and query latency
+#
+# Usage:
+#     python -m benchmarks.bench_trust_graph [--edges 1000000,10000000] [--nodes-per-edge 0.1] [--queries 200] [--db-rows 200000]
+#
+# For each edge count, builds a synthetic graph with uniformly random
+# issuers and Zipf-distributed subjects (a few users collect most
+# attestations), then reports build time and memory, the cost of merging a
+# batch of 10,000 new edges, and p50/p99 latency for degree, 2-hop
+# neighbourhood (limit 1,000) and shortest-path (max 6 hops) queries between
+# random users.
+#
+# With --db-rows, also inserts that many attestations into a throwaway
+# SQLite database and times the initial TrustGraphIndex.refresh() and an
+# incremental refresh picking up 1,000 more.
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1000, samples[int(len(samples) * 0.99) - 1] * 1000
+
+
+def _timed(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return _percentiles(samples)
+
+
+def bench_memory_graph(edges: int, nodes: int, queries: int):
+    from utils.graph import TrustGraph
+
+    rng = np.random.default_rng(0)
+    sources = rng.integers(0, nodes, edges)
+    targets = rng.zipf(1.5, edges) % nodes
+    names = [f"user{i}" for i in range(nodes)]
+
+    start = time.perf_counter()
+    graph = TrustGraph.from_arrays(sources, targets, names)
+    build = time.perf_counter() - start
+
+    batch = 10000
+    start = time.perf_counter()
+    graph.add_edge_ids(
+        rng.integers(0, nodes, batch).astype(np.int32), (rng.zipf(1.5, batch) % nodes).astype(np.int32)
+    )
+    merge = time.perf_counter() - start
+
+    picks = [(int(a), int(b)) for a, b in rng.integers(0, nodes, (queries, 2))]
+    degree = _timed(lambda a: (graph.out_degree(a), graph.in_degree(a)), [(a,) for a, _ in picks])
+    khop = _timed(lambda a: graph.neighbourhood(a, 2, "out", 1000), [(a,) for a, _ in picks])
+    path = _timed(lambda a, b: graph.shortest_path(a, b, "out", 6), picks)
+    return build, graph.nbytes, merge, degree, khop, path
+
+
+async def bench_db_load(rows: int):
+    from sqlalchemy import insert
+
+    from db.connection import AsyncSessionLocal
+    from main import app  # noqa: F401 (creates the tables)
+    from models.attestation import AttestationModel
+    from services.sql import chunks
+    from services.trust_graph import TrustGraphIndex
+
+    rng = np.random.default_rng(1)
+    nodes = max(rows // 10, 2)
+
+    async def add(count):
+        issuers = rng.integers(0, nodes, count)
+        subjects = rng.zipf(1.5, count) % nodes
+        async with AsyncSessionLocal() as db:
+            for chunk in chunks(list(zip(issuers.tolist(), subjects.tolist())), 10000):
+                await db.execute(insert(AttestationModel), [
+                    {"issuer": f"user{i}", "subject": f"user{s}", "attestation_type": "peer_verified"}
+                    for i, s in chunk
+                ])
+            await db.commit()
+
+    await add(rows)
+    index = TrustGraphIndex()
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        await index.refresh(db)
+        initial = time.perf_counter() - start
+    await add(1000)
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        added = await index.refresh(db)
+        incremental = time.perf_counter() - start
+    assert index.graph.num_edges == rows + 1000 and added == 1000
+    return initial, incremental
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure trust graph build, load and query latency")
+    parser.add_argument("--edges", default="1000000,10000000")
+    parser.add_argument("--nodes-per-edge", type=float, default=0.1)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--db-rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"{'edges':>10} {'nodes':>9} {'build s':>8} {'MB':>6} {'merge 10k ms':>13} "
+          f"{'degree p50/p99 ms':>18} {'2-hop p50/p99 ms':>17} {'path p50/p99 ms':>16}")
+    for edges in (int(e) for e in args.edges.split(",")):
+        nodes = max(int(edges * args.nodes_per_edge), 2)
+        build, nbytes, merge, degree, khop, path = bench_memory_graph(edges, nodes, args.queries)
+        print(f"{edges:>10} {nodes:>9} {build:>8.2f} {nbytes / 2**20:>6.0f} {merge * 1000:>13.1f} "
+              f"{degree[0]:>9.3f}/{degree[1]:<8.3f} {khop[0]:>8.2f}/{khop[1]:<8.2f} {path[0]:>7.2f}/{path[1]:<8.2f}")
+
+    if args.db_rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Must be set before the application (and its engines) are imported
+            os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            initial, incremental = asyncio.run(bench_db_load(args.db_rows))
+        print(f"\nload {args.db_rows} attestations from SQLite: {initial:.2f} s "
+              f"({args.db_rows / initial:,.0f} edges/s); refresh with 1,000 new: {incremental * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
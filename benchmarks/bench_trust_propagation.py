@@ -0,0 +1,123 @@
+# Benchmark: trust propagation at 1M and 10M edges
+#
+# Usage:
+#     python -m benchmarks.bench_trust_propagation [--edges 1000000,10000000] [--nodes-per-edge 0.1] [--change 0.001] [--db-rows 200000]
+#
+# For each edge count, builds a synthetic graph (uniform issuers,
+# Zipf-distributed subjects) and reports:
+#   matrix       building the row-normalized transition matrix
+#   full         power iteration from the uniform vector
+#   warm         power iteration from the previous vector after --change of
+#                the edges were added
+#   incremental  residual-push update of the previous vector for the same change
+# with the L1 distance of warm and incremental from a fresh full solve.
+#
+# With --db-rows, also runs TrustPropagator end to end on a throwaway SQLite
+# database: the first run (load, solve, write every score) and an
+# incremental run after 100 new attestations.
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_propagation(edges: int, nodes: int, change: float):
+    from utils.graph import TrustGraph
+    from utils.propagation import solve, transition, update
+
+    rng = np.random.default_rng(0)
+    graph = TrustGraph.from_arrays(
+        rng.integers(0, nodes, edges), rng.zipf(1.5, edges) % nodes, [f"user{i}" for i in range(nodes)]
+    )
+    t, matrix = _timed(transition, *graph.out_adjacency(), nodes)
+    full, full_s = _timed(solve, t)
+
+    added = max(int(edges * change), 1)
+    graph.add_edge_ids(
+        rng.integers(0, nodes, added).astype(np.int32), (rng.zipf(1.5, added) % nodes).astype(np.int32)
+    )
+    changed = transition(*graph.out_adjacency(), nodes)
+    fresh = solve(changed, tol=1e-13).scores
+    warm, warm_s = _timed(solve, changed, x0=full.scores)
+    incremental, incremental_s = _timed(update, changed, full.scores)
+    return [
+        ("matrix", matrix, "", ""),
+        ("full", full_s, full.iterations, ""),
+        (f"warm (+{added})", warm_s, warm.iterations, np.abs(warm.scores - fresh).sum()),
+        (f"incremental (+{added})", incremental_s, incremental.iterations, np.abs(incremental.scores - fresh).sum()),
+    ]
+
+
+async def bench_end_to_end(rows: int):
+    from sqlalchemy import insert
+
+    from db.connection import AsyncSessionLocal
+    from main import app  # noqa: F401 (creates the tables)
+    from models.attestation import AttestationModel
+    from services.sql import chunks
+    from services.trust_scores import TrustPropagator
+
+    rng = np.random.default_rng(1)
+    nodes = max(rows // 10, 2)
+
+    async def add(count):
+        issuers = rng.integers(0, nodes, count)
+        subjects = rng.zipf(1.5, count) % nodes
+        async with AsyncSessionLocal() as db:
+            for chunk in chunks(list(zip(issuers.tolist(), subjects.tolist())), 10000):
+                await db.execute(insert(AttestationModel), [
+                    {"issuer": f"user{i}", "subject": f"user{s}", "attestation_type": "peer_verified"}
+                    for i, s in chunk
+                ])
+            await db.commit()
+
+    await add(rows)
+    propagator = TrustPropagator()
+    runs = []
+    for label, count in (("first run", 0), ("after +100 attestations", 100)):
+        if count:
+            await add(count)
+        start = time.perf_counter()
+        written = await propagator.run_once()
+        runs.append((label, time.perf_counter() - start, written, propagator.stats()))
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure trust propagation time at 1M and 10M edges")
+    parser.add_argument("--edges", default="1000000,10000000")
+    parser.add_argument("--nodes-per-edge", type=float, default=0.1)
+    parser.add_argument("--change", type=float, default=0.001, help="fraction of edges added before the warm/incremental runs")
+    parser.add_argument("--db-rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"{'edges':>10} {'nodes':>9} {'step':<24} {'seconds':>8} {'iters':>6} {'L1 error':>10}")
+    for edges in (int(e) for e in args.edges.split(",")):
+        nodes = max(int(edges * args.nodes_per_edge), 2)
+        for step, seconds, iterations, error in bench_propagation(edges, nodes, args.change):
+            error = f"{error:.1e}" if error != "" else ""
+            print(f"{edges:>10} {nodes:>9} {step:<24} {seconds:>8.3f} {iterations!s:>6} {error:>10}")
+
+    if args.db_rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Must be set before the application (and its engines) are imported
+            os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            runs = asyncio.run(bench_end_to_end(args.db_rows))
+        print(f"\nTrustPropagator over {args.db_rows} attestations in SQLite:")
+        for label, seconds, written, stats in runs:
+            print(f"  {label:<24} {seconds:>7.2f} s  mode {stats['last_mode']:<11} "
+                  f"solve {stats['last_solve_ms']:>7.1f} ms  wrote {written} scores")
+
+
+if __name__ == "__main__":
+    main()
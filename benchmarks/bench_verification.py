@@ -0,0 +1,111 @@
+# Benchmark: batch verification of pending third-party attestations
+#
+# Usage:
+#     python -m benchmarks.bench_verification [--rows 2000] [--accounts 200] [--latency-ms 20] [--batch-sizes 50,200,1000] [--workers 1]
+#
+# Seeds --rows pending eBay attestations spread over --accounts seller
+# accounts into a throwaway file-backed SQLite database, then drains the
+# queue with VerificationWorker once per batch size, verifying against the
+# in-process mock platform server with simulated latency. The first row
+# flips the same number of rows one id at a time through
+# POST /integration/verify/{id}, the path this worker replaces (it does no
+# platform check at all, so it is a lower bound on per-row overhead).
+# With --workers > 1, several workers share the queue to show that claims
+# never overlap. Platform fetches are capped by the eBay concurrency limit;
+# raise it with BITREP_EBAY_CONCURRENCY to see the worker's own ceiling.
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import insert, update
+
+
+async def run(rows: int, accounts: int, latency_ms: float, batch_sizes, workers: int):
+    from db.connection import AsyncSessionLocal
+    from main import app  # noqa: F401 (creates the tables)
+    from models.identity import UserIdentityModel
+    from models.third_party import ThirdPartyAttestationModel
+    from services.platforms import platform_client
+    from services.platforms.mock_server import create_mock_app
+    from services.verification import VerificationWorker, verification_queue_depth
+
+    platform_client.configure(
+        base_url="http://mock",
+        transport=httpx.ASGITransport(app=create_mock_app(latency_ms=latency_ms))
+    )
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(UserIdentityModel), [
+            {"username": "bench_verify", "public_key": "bench-verify", "verified": False}
+        ])
+        ids = (await db.scalars(
+            insert(ThirdPartyAttestationModel).returning(ThirdPartyAttestationModel.id),
+            [
+                {"username": "bench_verify", "platform": "ebay", "platform_username": f"seller{i % accounts}",
+                 "attestation_type": "transactions", "value": float(i % 3), "verified": 0,
+                 "attestation_metadata": "{}"}
+                for i in range(rows)
+            ]
+        )).all()
+        await db.commit()
+
+    async def reset():
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(ThirdPartyAttestationModel).values(
+                verified=0, claim_token=None, claimed_until=None, verification_attempts=0
+            ))
+            await db.commit()
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        start = time.perf_counter()
+        for attestation_id in ids:
+            response = await http.post(f"/integration/verify/{attestation_id}", json={"verified": True})
+            assert response.status_code == 200, response.text
+        results.append(("one id per request", time.perf_counter() - start, len(ids)))
+
+    for batch_size in batch_sizes:
+        await reset()
+        pool = [VerificationWorker(batch_size=batch_size, interval=0) for _ in range(workers)]
+        start = time.perf_counter()
+        processed = sum(await asyncio.gather(*(w.run_once() for w in pool)))
+        elapsed = time.perf_counter() - start
+        async with AsyncSessionLocal() as db:
+            depth = await verification_queue_depth(db)
+        assert depth["pending"] == 0 and processed == rows, (processed, depth)
+        results.append((f"batch size {batch_size} x {workers} worker(s)", elapsed, processed))
+
+    await platform_client.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure third-party attestation verification throughput")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--batch-sizes", default="50,200,1000")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the application (and its engines) are imported
+        os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["BITREP_EBAY_RATE_LIMIT"] = "0"
+        os.environ["BITREP_VERIFY_INTERVAL"] = "0"
+        results = asyncio.run(run(
+            args.rows, args.accounts, args.latency_ms,
+            [int(b) for b in args.batch_sizes.split(",")], args.workers
+        ))
+
+    print(f"{'run':<36}{'seconds':>9}{'rows/sec':>12}")
+    for label, elapsed, processed in results:
+        print(f"{label:<36}{elapsed:>9.2f}{processed / elapsed:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Benchmark: per-call verify_signature vs. verify_signatures_batch
+#
+# Usage:
+#     python -m benchmarks.bench_verify_batch [--count 4000] [--issuers 50] [--workers 1,2,4,8]
+#
+# Simulates checking an audit export: `count` attestations signed by
+# `issuers` distinct keys, verified sequentially and then through the batch
+# engine at several thread-pool sizes.
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.crypto import (
+    attestation_payload,
+    generate_keypair,
+    sign_attestation,
+    verify_signature,
+    verify_signatures_batch,
+)
+
+
+def make_export(count: int, issuers: int):
+    keys = [generate_keypair() for _ in range(issuers)]
+    items = []
+    for i in range(count):
+        public_key, private_key = keys[i % issuers]
+        payload = attestation_payload(f"issuer_{i % issuers}", f"subject_{i}", "peer_verified")
+        items.append((payload, sign_attestation(payload, private_key), public_key))
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sequential and batch signature verification")
+    parser.add_argument("--count", type=int, default=4000)
+    parser.add_argument("--issuers", type=int, default=50)
+    parser.add_argument("--workers", default="1,2,4,8")
+    args = parser.parse_args()
+
+    print(f"signing {args.count} attestations from {args.issuers} issuers ({os.cpu_count()} CPUs)...")
+    items = make_export(args.count, args.issuers)
+
+    start = time.perf_counter()
+    assert all(verify_signature(*item) for item in items)
+    sequential = time.perf_counter() - start
+
+    print(f"{'mode':<24}{'seconds':>10}{'verifies/sec':>14}{'speedup':>10}")
+    print(f"{'verify_signature loop':<24}{sequential:>10.3f}{args.count / sequential:>14.0f}{1.0:>10.2f}")
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            start = time.perf_counter()
+            assert all(verify_signatures_batch(items, executor=executor))
+            elapsed = time.perf_counter() - start
+        label = f"batch, {workers} thread(s)"
+        print(f"{label:<24}{elapsed:>10.3f}{args.count / elapsed:>14.0f}{sequential / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Benchmark: vote ingestion throughput by batch window
+#
+# Usage:
+#     python -m benchmarks.bench_vote_ingest [--voters 4000] [--windows 0,2,5,10,25] [--batch-size 1000]
+#
+# Fires every vote at once through the ASGI app (in-process, no server)
+# against a throwaway file-backed SQLite database. Window 0 is the direct
+# per-request transaction; other windows route POST /governance/vote through
+# the write-behind vote queue. The last row posts the same votes to
+# POST /governance/votes/batch in chunks of --batch-size.
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import insert
+
+
+async def setup_proposal(http, AsyncSessionLocal, UserIdentityModel, label: str, voters: int):
+    await http.post("/identity/create", json={"username": f"{label}_proposer"})
+    response = await http.post(
+        "/governance/proposal",
+        json={"title": label, "description": "bench", "proposer": f"{label}_proposer"}
+    )
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(UserIdentityModel), [
+            {"username": f"{label}_{i}", "public_key": f"bench-{label}-{i}", "verified": False}
+            for i in range(voters)
+        ])
+        await db.commit()
+    return response.json()["id"], [f"{label}_{i}" for i in range(voters)]
+
+
+async def run(voters: int, windows, batch_size: int):
+    from db.connection import AsyncSessionLocal
+    from main import app
+    from models.identity import UserIdentityModel
+    from services.vote_queue import vote_queue
+
+    rows = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as http:
+        for window in windows:
+            label = f"w{window}".replace(".", "_")
+            proposal_id, ballots = await setup_proposal(http, AsyncSessionLocal, UserIdentityModel, label, voters)
+            vote_queue.window_ms = window
+            batches_before = vote_queue.batches
+
+            async def vote(voter):
+                start = time.perf_counter()
+                response = await http.post(
+                    "/governance/vote", json={"proposal_id": proposal_id, "voter": voter, "support": 1}
+                )
+                assert response.status_code == 200, response.text
+                return time.perf_counter() - start
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(vote(v) for v in ballots))
+            elapsed = time.perf_counter() - start
+            batches = vote_queue.batches - batches_before
+            rows.append((f"single, window {window:g} ms", elapsed, statistics.median(latencies), voters / batches if batches else 1))
+
+        vote_queue.window_ms = 0
+        proposal_id, ballots = await setup_proposal(http, AsyncSessionLocal, UserIdentityModel, "batch", voters)
+        start = time.perf_counter()
+        for offset in range(0, voters, batch_size):
+            response = await http.post("/governance/votes/batch", json=[
+                {"proposal_id": proposal_id, "voter": v, "support": 1} for v in ballots[offset:offset + batch_size]
+            ])
+            assert response.json()["accepted"] == len(ballots[offset:offset + batch_size]), response.text
+        elapsed = time.perf_counter() - start
+        rows.append((f"POST /votes/batch ({batch_size})", elapsed, None, batch_size))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure vote ingestion throughput at different batch windows")
+    parser.add_argument("--voters", type=int, default=4000)
+    parser.add_argument("--windows", default="0,2,5,10,25")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    windows = [float(w) for w in args.windows.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the application (and its engines) are imported
+        os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.setdefault("BITREP_SQLITE_BUSY_TIMEOUT", "60000")
+        rows = asyncio.run(run(args.voters, windows, args.batch_size))
+
+    print(f"{'path':<30}{'seconds':>9}{'votes/sec':>11}{'p50 ms':>9}{'avg batch':>11}")
+    for label, elapsed, p50, avg_batch in rows:
+        p50_ms = f"{p50 * 1000:.1f}" if p50 is not None else "-"
+        print(f"{label:<30}{elapsed:>9.2f}{args.voters / elapsed:>11.0f}{p50_ms:>9}{avg_batch:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Benchmark: concurrent voting, read-modify-write vs. atomic tally
+#
+# Usage:
+#     python -m benchmarks.bench_votes [--voters 2000] [--duplicates 0.1]
+#
+# Fires every vote at once through the ASGI app (in-process, no server)
+# against a throwaway file-backed SQLite database. The "legacy" path replays
+# the previous cast_vote flow (load proposal, pre-check for a duplicate,
+# `votes_for += 1` in Python); "atomic" is POST /governance/vote. Lost votes
+# are accepted votes missing from the proposal's tally. Both paths run behind
+# the same FastAPI stack, so on a single core the per-request overhead bounds
+# throughput; BITREP_DB_POOL_SIZE=1 shows the legacy path is only exact when
+# fully serialized.
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import insert, select
+
+
+def install_legacy_route(app):
+    """
+    Mount the previous cast_vote flow so both paths pay the same HTTP overhead.
+    """
+    from fastapi import Depends, HTTPException
+    from db.connection import get_db
+    from api.governance import VoteCreate
+    from models.governance import GovernanceProposalModel, VoteModel
+
+    @app.post("/bench/legacy-vote")
+    async def legacy_vote(vote: VoteCreate, db=Depends(get_db)):
+        proposal = await db.get(GovernanceProposalModel, vote.proposal_id)
+        existing = await db.scalar(select(VoteModel).where(
+            VoteModel.proposal_id == vote.proposal_id, VoteModel.voter == vote.voter
+        ))
+        if existing:
+            raise HTTPException(status_code=400, detail="Already voted on this proposal")
+        db.add(VoteModel(proposal_id=vote.proposal_id, voter=vote.voter, vote_value=1.0, support=vote.support))
+        if vote.support > 0:
+            proposal.votes_for += 1.0
+        else:
+            proposal.votes_against += 1.0
+        try:
+            await db.commit()
+        except Exception:
+            # A racing duplicate hits the unique index
+            raise HTTPException(status_code=500, detail="Commit failed")
+        return {"voter": vote.voter}
+
+
+async def run(path: str, voters: int, duplicates: float) -> dict:
+    from db.connection import AsyncSessionLocal
+    from main import app
+    from models.governance import GovernanceProposalModel
+    from models.identity import UserIdentityModel
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+        await http.post("/identity/create", json={"username": f"{path}_proposer"})
+        proposal = await http.post(
+            "/governance/proposal",
+            json={"title": path, "description": "bench", "proposer": f"{path}_proposer"}
+        )
+        proposal_id = proposal.json()["id"]
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(UserIdentityModel), [
+                {"username": f"{path}_{i}", "public_key": f"bench-{path}-{i}", "verified": False}
+                for i in range(voters)
+            ])
+            await db.commit()
+
+        ballots = [f"{path}_{i}" for i in range(voters)]
+        ballots += ballots[:int(voters * duplicates)]
+
+        url = "/bench/legacy-vote" if path == "legacy" else "/governance/vote"
+
+        async def vote(voter):
+            response = await http.post(url, json={"proposal_id": proposal_id, "voter": voter, "support": 1})
+            return response.status_code
+
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(vote(v) for v in ballots))
+        elapsed = time.perf_counter() - start
+
+        async with AsyncSessionLocal() as db:
+            tally = (await db.get(GovernanceProposalModel, proposal_id)).votes_for
+
+    accepted = statuses.count(200)
+    return {
+        "seconds": elapsed,
+        "accepted": accepted,
+        "errors": statuses.count(500),
+        "tally": int(tally),
+        "lost": accepted - int(tally),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare read-modify-write and atomic vote tallying under concurrency")
+    parser.add_argument("--voters", type=int, default=2000)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="fraction of voters who vote twice")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the application (and its engines) are imported
+        os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.setdefault("BITREP_SQLITE_BUSY_TIMEOUT", "60000")
+
+        from main import app
+        install_legacy_route(app)
+
+        async def both():
+            # One event loop: the async engine's pool is bound to it
+            return [(path, await run(path, args.voters, args.duplicates)) for path in ("legacy", "atomic")]
+
+        print(f"{'path':<8}{'seconds':>9}{'votes/sec':>11}{'accepted':>10}{'tally':>8}{'lost':>6}{'errors':>8}")
+        for path, r in asyncio.run(both()):
+            print(f"{path:<8}{r['seconds']:>9.2f}{r['accepted'] / r['seconds']:>11.0f}"
+                  f"{r['accepted']:>10}{r['tally']:>8}{r['lost']:>6}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# Load-test harness: latency percentiles at high concurrency
+#
+# Usage:
+#     python -m benchmarks.load_test [--concurrency 64] [--requests 4000] [--scenario mix]
+#     python -m benchmarks.load_test --url http://localhost:8000 ...
+#
+# Without --url the app is driven in-process through httpx's ASGI transport
+# against a throwaway SQLite database. With --url it targets a running server
+# (e.g. `uvicorn main:app --workers 1`), which is how to compare two
+# revisions of the service: start each one in turn and run the same scenario.
+#
+# Scenarios:
+#   read      GET /user/{subject}, GET /governance/proposals, GET /identity/{name}
+#   write     POST /attest
+#   mix       80% read, 15% write, 5% POST /identity/create (RSA keygen)
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+SCENARIOS = {
+    "read": {"user": 50, "proposals": 30, "identity": 20},
+    "write": {"attest": 100},
+    "mix": {"user": 40, "proposals": 25, "identity": 15, "attest": 15, "create_identity": 5},
+}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[k]
+
+
+async def seed(client: httpx.AsyncClient, run_id: str):
+    await client.post("/identity/create", json={"username": f"load_{run_id}"})
+    await client.post(
+        "/governance/proposal",
+        json={"title": "Load test", "description": "seed", "proposer": f"load_{run_id}"}
+    )
+    await client.post(
+        "/attest/batch",
+        json=[
+            {"issuer": f"seed_{i}", "subject": f"load_subject_{run_id}", "attestation_type": "seed"}
+            for i in range(200)
+        ]
+    )
+
+
+def make_request(kind: str, run_id: str, n: int):
+    if kind == "user":
+        return "GET", f"/user/load_subject_{run_id}", None
+    if kind == "proposals":
+        return "GET", "/governance/proposals", None
+    if kind == "identity":
+        return "GET", f"/identity/load_{run_id}", None
+    if kind == "attest":
+        return "POST", "/attest", {
+            "issuer": f"load_issuer_{n % 50}",
+            "subject": f"load_subject_{run_id}",
+            "attestation_type": "load"
+        }
+    if kind == "create_identity":
+        return "POST", "/identity/create", {"username": f"load_{run_id}_{n}"}
+    raise ValueError(kind)
+
+
+async def run(client: httpx.AsyncClient, scenario: str, total: int, concurrency: int):
+    run_id = uuid.uuid4().hex[:8]
+    await seed(client, run_id)
+
+    kinds, weights = zip(*SCENARIOS[scenario].items())
+    rng = random.Random(0)
+    plan = [rng.choices(kinds, weights)[0] for _ in range(total)]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < total:
+            n = next_index
+            next_index += 1
+            kind = plan[n]
+            method, path, body = make_request(kind, run_id, n)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                if response.status_code >= 400:
+                    errors[kind] += 1
+            except httpx.HTTPError:
+                errors[kind] += 1
+            latencies[kind].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    everything = [x for samples in latencies.values() for x in samples]
+    print(f"scenario={scenario} concurrency={concurrency} requests={total} "
+          f"elapsed={elapsed:.2f}s throughput={total / elapsed:.0f} req/s")
+    print(f"{'endpoint':<18}{'count':>7}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'mean ms':>9}")
+    for kind in sorted(latencies) + ["ALL"]:
+        samples = everything if kind == "ALL" else latencies[kind]
+        err = sum(errors.values()) if kind == "ALL" else errors[kind]
+        print(
+            f"{kind:<18}{len(samples):>7}{err:>8}"
+            f"{percentile(samples, 50) * 1000:>9.1f}{percentile(samples, 95) * 1000:>9.1f}"
+            f"{percentile(samples, 99) * 1000:>9.1f}{statistics.fmean(samples) * 1000:>9.1f}"
+        )
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+            await run(client, args.scenario, args.requests, args.concurrency)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the application (and its engines) are imported
+        os.environ["BITREP_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=60) as client:
+            await run(client, args.scenario, args.requests, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report p50/p99 latency under concurrent load")
+    parser.add_argument("--url", help="base URL of a running server; omit to run in-process")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mix")
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,148 @@
 # database connection
-from sqlalchemy import create_engine
+#
+# The engine is configured from the environment:
+#
+#   BITREP_DATABASE_URL          SQLAlchemy URL (default sqlite:///./bitrep.db)
+#   BITREP_DB_POOL_SIZE          pooled connections kept open (default 10)
+#   BITREP_DB_MAX_OVERFLOW       extra connections allowed under burst (default 20)
+#   BITREP_DB_POOL_RECYCLE       seconds before a connection is replaced (default 1800)
+#   BITREP_DB_POOL_TIMEOUT       seconds to wait for a free connection (default 30)
+#
+# SQLite only, applied on every new connection:
+#
+#   BITREP_SQLITE_JOURNAL_MODE   default WAL, so readers never block behind a writer
+#   BITREP_SQLITE_SYNCHRONOUS    default NORMAL (safe with WAL, no fsync per commit)
+#   BITREP_SQLITE_MMAP_SIZE      bytes of the file to memory-map (default 256 MiB)
+#   BITREP_SQLITE_CACHE_SIZE     page cache; negative values are KiB (default -65536)
+#   BITREP_SQLITE_BUSY_TIMEOUT   ms to wait on a locked database (default 5000)
+#
+# Request handlers use the async engine through get_db(); the URL is mapped to
+# an async driver (aiosqlite, asyncpg). The sync engine is kept for schema
+# creation, maintenance commands and benchmarks.
+
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import StaticPool
+from typing import AsyncIterator, Dict, Optional
+
+DATABASE_URL = os.getenv("BITREP_DATABASE_URL", "sqlite:///./bitrep.db")
+
+POOL_SIZE = int(os.getenv("BITREP_DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("BITREP_DB_MAX_OVERFLOW", "20"))
+POOL_RECYCLE = int(os.getenv("BITREP_DB_POOL_RECYCLE", "1800"))
+POOL_TIMEOUT = int(os.getenv("BITREP_DB_POOL_TIMEOUT", "30"))
+
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("BITREP_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("BITREP_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("BITREP_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("BITREP_SQLITE_CACHE_SIZE", "-65536")),
+    "busy_timeout": int(os.getenv("BITREP_SQLITE_BUSY_TIMEOUT", "5000")),
+}
+
+# Pragmas that only make sense for a database file
+_FILE_ONLY_PRAGMAS = ("journal_mode", "mmap_size")
+
+# Async driver used for each backend when the URL names none (or a sync one)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# Named shared-cache database both engines attach to for sqlite://
+_SHARED_MEMORY_DATABASE = "file:bitrep_memdb"
+_SHARED_MEMORY_QUERY = {"mode": "memory", "cache": "shared", "uri": "true"}
+
+def is_memory_url(url) -> bool:
+    """
+    True for in-memory SQLite URLs (sqlite://, sqlite:///:memory:).
+    """
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def async_url(url) -> URL:
+    """
+    Map a database URL onto its async driver, e.g. sqlite:// -> sqlite+aiosqlite://.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS and url.drivername != ASYNC_DRIVERS[backend]:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    return url
+
+def _engine_args(url: URL, sqlite_pragmas: Optional[Dict[str, object]]):
+    """
+    Shared engine arguments for the sync and async engines.
+    Returns (url, create_engine kwargs, pragmas to set on connect).
+    """
+    pool_args = {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_timeout": POOL_TIMEOUT,
+    }
 
-DATABASE_URL = "sqlite:///./bitrep.db"
+    if url.get_backend_name() != "sqlite":
+        return url, dict(pool_pre_ping=True, **pool_args), {}
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    pragmas = dict(SQLITE_PRAGMAS if sqlite_pragmas is None else sqlite_pragmas)
+
+    if is_memory_url(url):
+        # Every connection to :memory: is a new empty database, so each engine
+        # keeps a single connection to one named shared-cache database that
+        # the sync and async engines both attach to
+        for name in _FILE_ONLY_PRAGMAS:
+            pragmas.pop(name, None)
+        url = url.set(database=_SHARED_MEMORY_DATABASE, query=_SHARED_MEMORY_QUERY)
+        return url, dict(connect_args={"check_same_thread": False}, poolclass=StaticPool), pragmas
+
+    return url, dict(connect_args={"check_same_thread": False}, **pool_args), pragmas
+
+def _install_pragmas(engine: Engine, pragmas: Dict[str, object]) -> None:
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def create_db_engine(url: str = DATABASE_URL, sqlite_pragmas: Optional[Dict[str, object]] = None) -> Engine:
+    """
+    Create an engine with pooling and, for SQLite, per-connection pragmas.
+    sqlite_pragmas overrides SQLITE_PRAGMAS; pass {} to leave SQLite defaults.
+    """
+    url, kwargs, pragmas = _engine_args(make_url(url), sqlite_pragmas)
+    engine = create_engine(url, **kwargs)
+    _install_pragmas(engine, pragmas)
+    return engine
+
+def create_async_db_engine(url: str = DATABASE_URL, sqlite_pragmas: Optional[Dict[str, object]] = None) -> AsyncEngine:
+    """
+    Async counterpart of create_db_engine with the same pool and pragma settings.
+    """
+    url, kwargs, pragmas = _engine_args(async_url(url), sqlite_pragmas)
+    engine = create_async_engine(url, **kwargs)
+    _install_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_db_engine()
+# Objects stay usable after commit; lazy refreshes would need an await
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """
+    FastAPI dependency yielding a request-scoped async session.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -4,6 +4,7 @@ CREATE TABLE IF NOT EXISTS user_identities (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     username TEXT UNIQUE NOT NULL,
     public_key TEXT UNIQUE NOT NULL,
+    key_algorithm TEXT DEFAULT 'rsa-pss-2048',
     private_key_hash TEXT NOT NULL,
     verified INTEGER DEFAULT 0,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -17,9 +18,16 @@ CREATE TABLE IF NOT EXISTS attestations (
     attestation_type TEXT NOT NULL,
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
     signature TEXT,
-    anchor TEXT
+    signature_digest TEXT,
+    anchor TEXT,
+    status TEXT NOT NULL DEFAULT 'unverified'
 );
 
+CREATE INDEX IF NOT EXISTS ix_attestations_issuer ON attestations (issuer);
+CREATE INDEX IF NOT EXISTS ix_attestations_subject_timestamp_id ON attestations (subject, timestamp, id);
+CREATE INDEX IF NOT EXISTS ix_attestations_status_id ON attestations (status, id);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_attestations_issuer_signature_digest ON attestations (issuer, signature_digest);
+
 CREATE TABLE IF NOT EXISTS governance_proposals (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     title TEXT NOT NULL,
@@ -32,6 +40,10 @@ CREATE TABLE IF NOT EXISTS governance_proposals (
     expires_at DATETIME NOT NULL
 );
 
+CREATE INDEX IF NOT EXISTS ix_governance_proposals_status_created_at ON governance_proposals (status, created_at);
+CREATE INDEX IF NOT EXISTS ix_governance_proposals_created_at ON governance_proposals (created_at);
+CREATE INDEX IF NOT EXISTS ix_governance_proposals_status_expires_at ON governance_proposals (status, expires_at);
+
 CREATE TABLE IF NOT EXISTS votes (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     proposal_id INTEGER NOT NULL,
@@ -41,6 +53,9 @@ CREATE TABLE IF NOT EXISTS votes (
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE UNIQUE INDEX IF NOT EXISTS ux_votes_proposal_voter ON votes (proposal_id, voter);
+CREATE INDEX IF NOT EXISTS ix_votes_voter ON votes (voter);
+
 CREATE TABLE IF NOT EXISTS third_party_attestations (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     username TEXT NOT NULL,
@@ -50,5 +65,112 @@ CREATE TABLE IF NOT EXISTS third_party_attestations (
     value REAL,
     attestation_metadata TEXT,
     verified INTEGER DEFAULT 0,
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    claim_token TEXT,
+    claimed_until DATETIME,
+    verification_attempts INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_third_party_attestations_username_platform ON third_party_attestations (username, platform);
+CREATE INDEX IF NOT EXISTS ix_third_party_attestations_platform ON third_party_attestations (platform);
+CREATE INDEX IF NOT EXISTS ix_third_party_attestations_verified_timestamp ON third_party_attestations (verified, timestamp);
+
+-- Checkpoints for resumable bulk imports (POST /integration/import/bulk,
+-- `python manage.py import-third-party`)
+CREATE TABLE IF NOT EXISTS third_party_imports (
+    import_id TEXT PRIMARY KEY,
+    records INTEGER NOT NULL DEFAULT 0,
+    imported INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Per-subject counters maintained on every attestation insert
+-- (rebuild with `python manage.py rebuild-stats`)
+CREATE TABLE IF NOT EXISTS subject_stats (
+    subject TEXT PRIMARY KEY,
+    total_count INTEGER NOT NULL DEFAULT 0,
+    distinct_issuers INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS subject_type_counts (
+    subject TEXT NOT NULL,
+    attestation_type TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (subject, attestation_type)
+);
+
+CREATE TABLE IF NOT EXISTS subject_issuers (
+    subject TEXT NOT NULL,
+    issuer TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (subject, issuer)
+);
+
+-- Append-only Merkle accumulator per subject, extended on every attestation
+-- insert (rebuild with `python manage.py rebuild-merkle`)
+CREATE TABLE IF NOT EXISTS merkle_accumulators (
+    subject TEXT PRIMARY KEY,
+    size INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS merkle_leaves (
+    subject TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    attestation_id INTEGER NOT NULL,
+    salt TEXT NOT NULL,
+    PRIMARY KEY (subject, idx)
+);
+
+CREATE TABLE IF NOT EXISTS merkle_nodes (
+    subject TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    hash BLOB NOT NULL,
+    PRIMARY KEY (subject, level, idx)
+);
+
+-- Trust propagation scores over the attestation graph, recomputed by the
+-- trust scheduler (or `python manage.py recompute-trust`)
+CREATE TABLE IF NOT EXISTS trust_scores (
+    username TEXT PRIMARY KEY,
+    score REAL NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_trust_scores_score ON trust_scores (score);
+
+-- Sybil clusters flagged by `python manage.py detect-sybils` (or
+-- POST /graph/sybil/detect), replaced on every run
+CREATE TABLE IF NOT EXISTS sybil_clusters (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    density REAL NOT NULL,
+    mutual_ratio REAL NOT NULL,
+    isolation REAL NOT NULL,
+    burst_fraction REAL NOT NULL,
+    mean_degree REAL NOT NULL,
+    degree_cv REAL NOT NULL,
+    score REAL NOT NULL,
+    detected_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_sybil_clusters_score ON sybil_clusters (score);
+
+CREATE TABLE IF NOT EXISTS sybil_members (
+    username TEXT NOT NULL,
+    cluster_id INTEGER NOT NULL,
+    PRIMARY KEY (username, cluster_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_sybil_members_cluster_id ON sybil_members (cluster_id);
+
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
@@ -1,19 +1,60 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from db.connection import Base, engine
+from db.connection import Base, engine, async_engine
 from api.attestations import router as attest_router
 from api.users import router as users_router
 from api.identity import router as identity_router
 from api.governance import router as governance_router
 from api.privacy import router as privacy_router
 from api.integration import router as integration_router
+from api.metrics import router as metrics_router
+from api.graph import router as graph_router
+from api.events import router as events_router
 from models.attestation import AttestationModel
 from models.identity import UserIdentityModel
 from models.governance import GovernanceProposalModel, VoteModel
 from models.third_party import ThirdPartyAttestationModel
+from models.subject_stats import SubjectStatsModel, SubjectTypeCountModel, SubjectIssuerModel
+from models.merkle import MerkleAccumulatorModel, MerkleLeafModel, MerkleNodeModel
+from models.trust import TrustScoreModel
+from models.sybil import SybilClusterModel, SybilMemberModel
+from models.event import EventModel
+from services.platforms import platform_client
+from services.proposal_scheduler import proposal_scheduler
+from services.schema_upgrade import pending_changes
+from services.signatures import signature_verifier
+from services.trust_scores import trust_scheduler
+from services.verification import verification_worker
+from utils.crypto import keypair_pool
 
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="BitRep Attestations - Modular", debug=True)
+# create_all never alters existing tables; columns and indexes added since
+# this database was created come from python manage.py upgrade-db
+_pending = pending_changes(engine)
+if _pending:
+    logging.getLogger(__name__).warning(
+        "Database schema is out of date (missing %s); run python manage.py upgrade-db", ", ".join(_pending)
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    keypair_pool.start()
+    proposal_scheduler.start()
+    verification_worker.start()
+    trust_scheduler.start()
+    signature_verifier.start()
+    yield
+    await signature_verifier.stop()
+    await trust_scheduler.stop()
+    await verification_worker.stop()
+    await proposal_scheduler.stop()
+    keypair_pool.stop()
+    await platform_client.aclose()
+    await async_engine.dispose()
+
+app = FastAPI(title="BitRep Attestations - Modular", debug=True, lifespan=lifespan)
 
 app.include_router(attest_router)
 app.include_router(users_router)
@@ -21,3 +62,6 @@ app.include_router(identity_router)
 app.include_router(governance_router)
 app.include_router(privacy_router)
 app.include_router(integration_router)
+app.include_router(metrics_router)
+app.include_router(graph_router)
+app.include_router(events_router)
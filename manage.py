@@ -0,0 +1,224 @@
+# Maintenance commands
+#
+# Usage:
+#     python manage.py upgrade-db       add columns and indexes missing from an existing database
+#     python manage.py rebuild-stats    recompute subject_stats from attestations
+#     python manage.py check-stats      compare subject_stats with attestations
+#     python manage.py rebuild-merkle   recreate the per-subject Merkle accumulators
+#     python manage.py run-scheduler    finalize expired proposals (worker process)
+#     python manage.py run-verifier     verify pending third-party attestations (worker process)
+#     python manage.py import-third-party FILE
+#                                       bulk-import third-party attestations from NDJSON/CSV
+#     python manage.py recompute-trust  bring the trust propagation scores up to date
+#     python manage.py detect-sybils    flag Sybil clusters in the attestation graph
+#     python manage.py verify-signatures
+#                                       verify pending attestation signatures (worker process)
+
+import argparse
+import asyncio
+import os
+import sys
+
+from db.connection import AsyncSessionLocal, Base, async_engine, engine
+from models.attestation import AttestationModel
+from models.identity import UserIdentityModel
+from models.governance import GovernanceProposalModel, VoteModel
+from models.third_party import ThirdPartyAttestationModel, ThirdPartyImportModel
+from models.subject_stats import SubjectStatsModel, SubjectTypeCountModel, SubjectIssuerModel
+from models.merkle import MerkleAccumulatorModel, MerkleLeafModel, MerkleNodeModel
+from models.trust import TrustScoreModel
+from models.sybil import SybilClusterModel, SybilMemberModel
+from models.event import EventModel
+from services.bulk_import import IMPORT_CHUNK_SIZE, ImportFormatError, import_third_party_attestations, read_file_chunks
+from services.merkle_store import rebuild_merkle_accumulators
+from services.schema_upgrade import upgrade_schema
+from services.proposal_scheduler import ProposalScheduler, SCHEDULER_INTERVAL
+from services.signatures import SIGNATURE_VERIFY_BATCH_SIZE, SIGNATURE_VERIFY_INTERVAL, SignatureVerifier
+from services.subject_stats import rebuild_subject_stats, check_subject_stats
+from services.sybil import SYBIL_MIN_CLUSTER, SYBIL_SCORE_THRESHOLD, SybilDetector, top_sybil_clusters
+from services.trust_scores import TrustPropagator
+from services.verification import VERIFY_BATCH_SIZE, VERIFY_INTERVAL, VerificationWorker
+
+async def upgrade_db(args) -> int:
+    changes = upgrade_schema(engine)
+    for change in changes:
+        print(f"  {change}")
+    print(f"Schema is up to date ({len(changes)} changes)")
+    return 0
+
+async def rebuild_stats(args) -> int:
+    async with AsyncSessionLocal() as db:
+        subjects = await rebuild_subject_stats(db)
+    print(f"Rebuilt stats for {subjects} subjects")
+    return 0
+
+async def check_stats(args) -> int:
+    async with AsyncSessionLocal() as db:
+        mismatched = await check_subject_stats(db)
+    if not mismatched:
+        print("subject_stats is consistent with attestations")
+        return 0
+    print(f"{len(mismatched)} subjects out of sync:")
+    for subject in mismatched[:args.show]:
+        print(f"  {subject}")
+    return 1
+
+async def rebuild_merkle(args) -> int:
+    async with AsyncSessionLocal() as db:
+        subjects = await rebuild_merkle_accumulators(db)
+    print(f"Rebuilt Merkle accumulators for {subjects} subjects")
+    return 0
+
+async def run_scheduler(args) -> int:
+    scheduler = ProposalScheduler(interval=args.interval)
+    while True:
+        finalized = await scheduler.run_once()
+        stats = scheduler.stats()
+        print(
+            f"Finalized {finalized} proposals in {stats['last_duration_ms']:.1f} ms "
+            f"(lag {stats['last_lag_seconds']:.1f} s)"
+        )
+        if args.once:
+            return 0
+        await asyncio.sleep(args.interval)
+
+async def run_verifier(args) -> int:
+    worker = VerificationWorker(batch_size=args.batch_size, interval=args.interval)
+    while True:
+        processed = await worker.run_once()
+        stats = worker.stats()
+        print(
+            f"Processed {processed} attestations: {stats['verified']} verified, "
+            f"{stats['rejected']} rejected, {stats['retried']} retried in total"
+        )
+        if args.once:
+            return 0
+        await asyncio.sleep(args.interval)
+
+async def import_third_party(args) -> int:
+    fmt = args.format or ("csv" if args.file.lower().endswith(".csv") else "ndjson")
+    import_id = args.import_id or (None if args.file == "-" else os.path.abspath(args.file))
+
+    def progress(report):
+        print(f"  {report.records} records, {report.imported} imported, {report.failed} failed ({report.rows_per_sec:.0f} rows/sec)")
+
+    async with AsyncSessionLocal() as db:
+        try:
+            report = await import_third_party_attestations(
+                db, read_file_chunks(args.file), fmt, import_id, args.chunk_size, progress
+            )
+        except ImportFormatError as e:
+            print(f"Import stopped: {e}", file=sys.stderr)
+            return 1
+    if report.resumed_from:
+        print(f"Resumed after record {report.resumed_from}")
+    print(
+        f"Imported {report.imported} of {report.records} records ({report.failed} failed) "
+        f"in {report.elapsed_seconds:.1f} s, {report.rows_per_sec:.0f} rows/sec"
+    )
+    for record, error in report.errors[:args.show]:
+        print(f"  record {record}: {error}")
+    return 0
+
+async def recompute_trust(args) -> int:
+    propagator = TrustPropagator()
+    written = await propagator.run_once(full=args.full)
+    stats = propagator.stats()
+    if not stats["runs"]:
+        print("No attestations to propagate trust over")
+        return 0
+    print(
+        f"{stats['last_mode'].capitalize()} run over {stats['nodes']} identities and {stats['edges']} attestations: "
+        f"{stats['last_iterations']} iterations, matrix {stats['last_matrix_ms']:.0f} ms, "
+        f"solve {stats['last_solve_ms']:.0f} ms; wrote {written} scores"
+    )
+    return 0
+
+async def detect_sybils(args) -> int:
+    detector = SybilDetector(min_size=args.min_size, threshold=args.threshold)
+    stats = await detector.run_once()
+    print(
+        f"Scored {stats['candidates']} candidate clusters over {stats['nodes']} identities and "
+        f"{stats['edges']} attestations in {stats['total_ms'] / 1000:.1f} s "
+        f"(load {stats['load_ms']:.0f} ms, identities {stats['identities_ms']:.0f} ms, "
+        f"analyze {stats['analyze_ms']:.0f} ms, write {stats['write_ms']:.0f} ms); "
+        f"flagged {stats['flagged_clusters']} clusters with {stats['flagged_members']} members"
+    )
+    if args.show:
+        async with AsyncSessionLocal() as db:
+            for cluster, members in await top_sybil_clusters(db, args.threshold, args.show):
+                shown = ", ".join(members[:10]) + (", ..." if len(members) > 10 else "")
+                print(f"  {cluster.kind} #{cluster.id} score {cluster.score:.2f} size {cluster.size}: {shown}")
+    return 0
+
+async def verify_signatures(args) -> int:
+    verifier = SignatureVerifier(batch_size=args.batch_size, interval=args.interval)
+    while True:
+        processed = await verifier.run_once()
+        stats = verifier.stats()
+        print(
+            f"Processed {processed} pending attestations: {stats['verified']} verified, "
+            f"{stats['quarantined']} quarantined in total"
+        )
+        if args.once:
+            return 0
+        await asyncio.sleep(args.interval)
+
+COMMANDS = {
+    "upgrade-db": upgrade_db,
+    "rebuild-stats": rebuild_stats,
+    "check-stats": check_stats,
+    "rebuild-merkle": rebuild_merkle,
+    "run-scheduler": run_scheduler,
+    "run-verifier": run_verifier,
+    "import-third-party": import_third_party,
+    "recompute-trust": recompute_trust,
+    "detect-sybils": detect_sybils,
+    "verify-signatures": verify_signatures,
+}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="BitRep maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("upgrade-db", help="add columns and indexes missing from a database created by an earlier version")
+    subparsers.add_parser("rebuild-stats", help="recompute subject_stats from the attestations table")
+    check = subparsers.add_parser("check-stats", help="report subjects whose stats disagree with attestations")
+    check.add_argument("--show", type=int, default=20, help="maximum subjects to list")
+    subparsers.add_parser("rebuild-merkle", help="recreate the Merkle accumulators from the attestations table")
+    scheduler = subparsers.add_parser("run-scheduler", help="finalize proposals whose voting period has ended")
+    scheduler.add_argument("--interval", type=float, default=SCHEDULER_INTERVAL or 30, help="seconds between runs")
+    scheduler.add_argument("--once", action="store_true", help="run a single pass and exit")
+    verifier = subparsers.add_parser("run-verifier", help="verify pending third-party attestations")
+    verifier.add_argument("--interval", type=float, default=VERIFY_INTERVAL or 5, help="seconds between polls of an empty queue")
+    verifier.add_argument("--batch-size", type=int, default=VERIFY_BATCH_SIZE, help="attestations claimed per batch")
+    verifier.add_argument("--once", action="store_true", help="drain the queue once and exit")
+    importer = subparsers.add_parser("import-third-party", help="bulk-import third-party attestations from NDJSON or CSV")
+    importer.add_argument("file", help="input file, or - for stdin")
+    importer.add_argument("--format", choices=["ndjson", "csv"], help="input format (default: from the file extension)")
+    importer.add_argument("--import-id", help="checkpoint key; rerunning with the same id resumes (default: the absolute file path)")
+    importer.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="records per transaction")
+    importer.add_argument("--show", type=int, default=20, help="maximum errors to list")
+    trust = subparsers.add_parser("recompute-trust", help="recompute trust propagation scores over the attestation graph")
+    trust.add_argument("--full", action="store_true", help="solve from scratch instead of from the stored scores")
+    sybils = subparsers.add_parser("detect-sybils", help="flag Sybil clusters in the attestation graph")
+    sybils.add_argument("--min-size", type=int, default=SYBIL_MIN_CLUSTER, help="smallest cluster considered")
+    sybils.add_argument("--threshold", type=float, default=SYBIL_SCORE_THRESHOLD, help="score at which a cluster is flagged")
+    sybils.add_argument("--show", type=int, default=20, help="maximum clusters to list")
+    signatures = subparsers.add_parser("verify-signatures", help="verify pending attestation signatures")
+    signatures.add_argument("--interval", type=float, default=SIGNATURE_VERIFY_INTERVAL or 1, help="seconds between polls")
+    signatures.add_argument("--batch-size", type=int, default=SIGNATURE_VERIFY_BATCH_SIZE, help="attestations verified per batch")
+    signatures.add_argument("--once", action="store_true", help="drain the pending attestations once and exit")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+
+    async def run():
+        try:
+            return await COMMANDS[args.command](args)
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(run())
+
+if __name__ == "__main__":
+    sys.exit(main())
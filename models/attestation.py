@@ -1,16 +1,36 @@
 # attestation model
 
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from datetime import datetime
 from db.connection import Base
 
+# Signature status of an attestation (services/signatures.py)
+UNVERIFIED = "unverified"    # stored without a signature check
+VERIFIED = "verified"        # signature checked on ingestion
+PENDING = "pending"          # accepted, waiting for the background verifier
+QUARANTINED = "quarantined"  # signature failed the background check
+# Rows that are not (yet) part of a subject's record: not counted, not
+# accumulated, not in the trust graph and not listed
+HIDDEN_STATUSES = (PENDING, QUARANTINED)
+
 class AttestationModel(Base):
     __tablename__ = "attestations"
+    __table_args__ = (
+        # Subject listings filter on subject and page on (timestamp, id)
+        Index("ix_attestations_subject_timestamp_id", "subject", "timestamp", "id"),
+        # The signature verifier takes the oldest pending rows
+        Index("ix_attestations_status_id", "status", "id"),
+        # An issuer's signature is accepted once; replays conflict here
+        Index("ux_attestations_issuer_signature_digest", "issuer", "signature_digest", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     issuer = Column(String, index=True)
-    subject = Column(String, index=True)
+    subject = Column(String)
     attestation_type = Column(String)
     timestamp = Column(DateTime, default=datetime.utcnow)
     signature = Column(Text)
+    # utils.canonical.signature_digest of the signature, None without one
+    signature_digest = Column(String)
     anchor = Column(String)
+    status = Column(String, nullable=False, default=UNVERIFIED, server_default=UNVERIFIED)
@@ -0,0 +1,15 @@
+# Append-only change feed of writes (services/events.py)
+
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from datetime import datetime
+from db.connection import Base
+
+class EventModel(Base):
+    __tablename__ = "events"
+    # seq is the consumers' cursor, so SQLite must never reuse one
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON object describing the write
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,6 +1,6 @@
 # Governance models for proposals and voting
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Index, Enum as SQLEnum
 from datetime import datetime
 from db.connection import Base
 import enum
@@ -13,6 +13,12 @@ class ProposalStatus(str, enum.Enum):
 
 class GovernanceProposalModel(Base):
     __tablename__ = "governance_proposals"
+    __table_args__ = (
+        Index("ix_governance_proposals_status_created_at", "status", "created_at"),
+        Index("ix_governance_proposals_created_at", "created_at"),
+        # The proposal scheduler finds due proposals by status and expiry
+        Index("ix_governance_proposals_status_expires_at", "status", "expires_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -26,9 +32,13 @@ class GovernanceProposalModel(Base):
 
 class VoteModel(Base):
     __tablename__ = "votes"
+    __table_args__ = (
+        # One vote per identity per proposal
+        Index("ux_votes_proposal_voter", "proposal_id", "voter", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    proposal_id = Column(Integer, index=True)
+    proposal_id = Column(Integer)
     voter = Column(String, index=True)
     vote_value = Column(Float)  # Weighted vote value
     support = Column(Integer)  # 1 for yes, -1 for no
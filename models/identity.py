@@ -10,6 +10,9 @@ class UserIdentityModel(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
     public_key = Column(String, unique=True)
+    # Signature suite of public_key (utils/suites.py); NULL on rows created
+    # before suites existed, which are RSA
+    key_algorithm = Column(String, default="rsa-pss-2048")
     private_key_hash = Column(String)  # Store hash, not actual private key
     verified = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,30 @@
+# Persistent per-subject Merkle accumulators over attestations
+
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+from datetime import datetime
+from db.connection import Base
+
+class MerkleAccumulatorModel(Base):
+    __tablename__ = "merkle_accumulators"
+
+    subject = Column(String, primary_key=True)
+    size = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class MerkleLeafModel(Base):
+    __tablename__ = "merkle_leaves"
+
+    # Leaf position -> attestation, with the salt hashed into the leaf
+    subject = Column(String, primary_key=True)
+    idx = Column(Integer, primary_key=True)
+    attestation_id = Column(Integer, nullable=False)
+    salt = Column(String, nullable=False)
+
+class MerkleNodeModel(Base):
+    __tablename__ = "merkle_nodes"
+
+    # Perfect subtree hashes; level 0 holds the leaf hashes
+    subject = Column(String, primary_key=True)
+    level = Column(Integer, primary_key=True)
+    idx = Column(Integer, primary_key=True)
+    hash = Column(LargeBinary, nullable=False)
@@ -0,0 +1,28 @@
+# Materialized per-subject attestation counters
+
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from db.connection import Base
+
+class SubjectStatsModel(Base):
+    __tablename__ = "subject_stats"
+
+    subject = Column(String, primary_key=True)
+    total_count = Column(Integer, nullable=False, default=0)
+    distinct_issuers = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SubjectTypeCountModel(Base):
+    __tablename__ = "subject_type_counts"
+
+    subject = Column(String, primary_key=True)
+    attestation_type = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class SubjectIssuerModel(Base):
+    __tablename__ = "subject_issuers"
+
+    # Backs the distinct-issuer counter: a new row means a new issuer
+    subject = Column(String, primary_key=True)
+    issuer = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,34 @@
+# Sybil clusters flagged by the detection pipeline
+
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String
+from datetime import datetime
+from db.connection import Base
+
+class SybilClusterModel(Base):
+    __tablename__ = "sybil_clusters"
+    __table_args__ = (
+        Index("ix_sybil_clusters_score", "score"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # "ring" or "community"
+    size = Column(Integer, nullable=False)
+    density = Column(Float, nullable=False)
+    mutual_ratio = Column(Float, nullable=False)
+    isolation = Column(Float, nullable=False)
+    burst_fraction = Column(Float, nullable=False)
+    mean_degree = Column(Float, nullable=False)
+    degree_cv = Column(Float, nullable=False)
+    score = Column(Float, nullable=False)
+    detected_at = Column(DateTime, default=datetime.utcnow)
+
+class SybilMemberModel(Base):
+    __tablename__ = "sybil_members"
+    __table_args__ = (
+        # Cluster listings fetch the members of each cluster
+        Index("ix_sybil_members_cluster_id", "cluster_id"),
+    )
+
+    # Keyed by username first so governance checks a voter with one index probe
+    username = Column(String, primary_key=True)
+    cluster_id = Column(Integer, primary_key=True)
@@ -1,14 +1,19 @@
 # Third-party attestation model for bootstrapping trust
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Index
 from datetime import datetime
 from db.connection import Base
 
 class ThirdPartyAttestationModel(Base):
     __tablename__ = "third_party_attestations"
+    __table_args__ = (
+        Index("ix_third_party_attestations_username_platform", "username", "platform"),
+        # Verification workers claim the oldest pending rows
+        Index("ix_third_party_attestations_verified_timestamp", "verified", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    username = Column(String, index=True)
+    username = Column(String)
     platform = Column(String, index=True)  # e.g., "github", "ebay", "linkedin"
     platform_username = Column(String)
     attestation_type = Column(String)  # e.g., "commits", "reviews", "transactions"
@@ -16,3 +21,19 @@ class ThirdPartyAttestationModel(Base):
     attestation_metadata = Column(Text)  # JSON metadata about the attestation (renamed from 'metadata')
     verified = Column(Integer, default=0)  # 0 = pending, 1 = verified, -1 = rejected
     timestamp = Column(DateTime, default=datetime.utcnow)
+    # Lease held by a verification worker (services.verification)
+    claim_token = Column(String, nullable=True)
+    claimed_until = Column(DateTime, nullable=True)
+    verification_attempts = Column(Integer, nullable=False, default=0)
+
+class ThirdPartyImportModel(Base):
+    """
+    Progress of a resumable bulk import, committed with each chunk of rows.
+    """
+    __tablename__ = "third_party_imports"
+
+    import_id = Column(String, primary_key=True)
+    records = Column(Integer, nullable=False, default=0)  # input records consumed
+    imported = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
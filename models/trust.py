@@ -0,0 +1,16 @@
+# Persisted trust propagation scores
+
+from sqlalchemy import Column, DateTime, Float, Index, String
+from datetime import datetime
+from db.connection import Base
+
+class TrustScoreModel(Base):
+    __tablename__ = "trust_scores"
+    __table_args__ = (
+        # Top-N listings read the highest scores first
+        Index("ix_trust_scores_score", "score"),
+    )
+
+    username = Column(String, primary_key=True)
+    score = Column(Float, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class AttestationIn(BaseModel):
     issuer: str
@@ -17,20 +17,50 @@ class AttestationOut(BaseModel):
     timestamp: datetime
     signature: Optional[str] = None
     anchor: Optional[str] = None
+    status: str = "unverified"
 
     model_config = {"from_attributes": True}
 
+class AttestationBatchItem(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class AttestationBatchResult(BaseModel):
+    inserted: int
+    failed: int
+    results: List[AttestationBatchItem]
+
+class AttestationVerifyItem(BaseModel):
+    index: int
+    valid: bool
+    error: Optional[str] = None
+
+class AttestationVerifyBatchResult(BaseModel):
+    valid: int
+    invalid: int
+    results: List[AttestationVerifyItem]
+
 class UserAttestations(BaseModel):
     user: str
     attestations: List[AttestationOut]
+    next_cursor: Optional[str] = None
+
+class SubjectStats(BaseModel):
+    subject: str
+    total_count: int
+    distinct_issuers: int
+    by_type: Dict[str, int]
 
 class UserIdentity(BaseModel):
     username: str
     public_key: str
+    key_algorithm: str = "rsa-pss-2048"
     verified: bool = False
 
 class UserIdentityCreate(BaseModel):
     username: str
+    key_algorithm: Optional[str] = None
 
 class ZKProof(BaseModel):
     proof: str
@@ -0,0 +1,272 @@
+# Streaming bulk import of third-party attestations
+#
+# import_third_party_attestations() consumes an async iterator of raw byte
+# chunks (a request body or a file) holding NDJSON or CSV, so memory is
+# bounded by the chunk size rather than the size of the input. Records are
+# handled IMPORT_CHUNK_SIZE at a time: usernames are resolved with one IN
+# query, valid rows go in with one executemany INSERT, and the chunk commits
+# together with the import's checkpoint row and its events. Restarting an
+# interrupted import with the same import_id skips the records already
+# committed.
+#
+# CSV input needs a header row naming the ThirdPartyAttestationCreate fields;
+# the metadata column, if present, holds a JSON object.
+
+import codecs
+import csv
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.identity import UserIdentityModel
+from models.third_party import ThirdPartyAttestationModel, ThirdPartyImportModel
+from services.events import append_events, third_party_event
+from services.sql import chunks as in_chunks, dialect_insert
+
+IMPORT_CHUNK_SIZE = int(os.getenv("BITREP_IMPORT_CHUNK_SIZE", "1000"))
+
+# Longest single record accepted; guards the line buffer against input with no newlines
+MAX_RECORD_BYTES = 1 << 20
+
+# Per-record errors kept in the report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = ("ndjson", "csv")
+
+CSV_REQUIRED_COLUMNS = ("username", "platform", "platform_username", "attestation_type", "value")
+
+USER_NOT_FOUND = "User identity not found"
+
+class ImportFormatError(ValueError):
+    """
+    The input stream itself is unreadable (bad encoding, missing CSV header,
+    oversized record). Chunks committed before the error are kept.
+    """
+
+@dataclass
+class ImportReport:
+    import_id: Optional[str]
+    resumed_from: int = 0
+    records: int = 0  # input records consumed, including resumed ones
+    imported: int = 0
+    failed: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        processed = self.records - self.resumed_from
+        return processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def add_error(self, record: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((record, error))
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+            if len(pending) > MAX_RECORD_BYTES:
+                raise ImportFormatError(f"Record exceeds {MAX_RECORD_BYTES} bytes")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ImportFormatError("Input is not valid UTF-8")
+    if pending:
+        yield pending.rstrip("\r")
+
+async def _ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[object, Optional[str]]]:
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError:
+            yield None, "Invalid JSON"
+
+async def _csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[object, Optional[str]]]:
+    header = None
+    buffered = []
+    async for line in lines:
+        # A quoted field may span lines; a record is complete once its quotes balance
+        buffered.append(line)
+        text = "\n".join(buffered)
+        if text.count('"') % 2:
+            if len(text) > MAX_RECORD_BYTES:
+                raise ImportFormatError(f"Record exceeds {MAX_RECORD_BYTES} bytes")
+            continue
+        buffered = []
+        if not text.strip():
+            continue
+
+        row = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in row]
+            missing = [name for name in CSV_REQUIRED_COLUMNS if name not in header]
+            if missing:
+                raise ImportFormatError(f"CSV header is missing columns: {', '.join(missing)}")
+            continue
+        if len(row) != len(header):
+            yield None, f"Expected {len(header)} columns, got {len(row)}"
+            continue
+
+        record = dict(zip(header, row))
+        try:
+            record["metadata"] = json.loads(record["metadata"]) if record.get("metadata") else {}
+        except ValueError:
+            yield None, "metadata: Invalid JSON"
+            continue
+        yield record, None
+
+    if buffered:
+        yield None, "Unterminated quoted field"
+
+def parse_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[object, Optional[str]]]:
+    """
+    Stream (record, error) pairs out of NDJSON or CSV byte chunks; error is
+    None for parseable records. Blank lines are skipped.
+    """
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"Unsupported format: {fmt}")
+    lines = _lines(chunks)
+    return _csv_records(lines) if fmt == "csv" else _ndjson_records(lines)
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'body'}: {err['msg']}"
+        for err in e.errors()
+    )
+
+async def _existing_users(db: AsyncSession, usernames: set) -> set:
+    found = set()
+    for chunk in in_chunks(sorted(usernames)):
+        found.update((await db.scalars(
+            select(UserIdentityModel.username).where(UserIdentityModel.username.in_(chunk))
+        )).all())
+    return found
+
+async def _commit_chunk(db: AsyncSession, report: ImportReport, batch: List[Tuple[int, object, Optional[str]]]) -> None:
+    """
+    Validate and insert one chunk, then commit it with the checkpoint.
+    """
+    # api.integration imports this module, so its request schema is
+    # imported when the first chunk is committed
+    from api.integration import ThirdPartyAttestationCreate
+
+    valid = []
+    for index, record, error in batch:
+        if error is None:
+            try:
+                valid.append((index, ThirdPartyAttestationCreate.model_validate(record)))
+                continue
+            except ValidationError as e:
+                error = _validation_message(e)
+        report.add_error(index, error)
+
+    users = await _existing_users(db, {att.username for _, att in valid}) if valid else set()
+    timestamp = datetime.utcnow()
+    rows = []
+    for index, att in valid:
+        if att.username not in users:
+            report.add_error(index, USER_NOT_FOUND)
+            continue
+        rows.append({
+            "username": att.username,
+            "platform": att.platform,
+            "platform_username": att.platform_username,
+            "attestation_type": att.attestation_type,
+            "value": att.value,
+            "attestation_metadata": json.dumps(att.metadata),
+            "verified": 0,  # Pending verification
+            "timestamp": timestamp
+        })
+
+    if rows:
+        ids = (await db.scalars(
+            insert(ThirdPartyAttestationModel).returning(ThirdPartyAttestationModel.id, sort_by_parameter_order=True),
+            rows
+        )).all()
+    report.imported += len(rows)
+    report.records += len(batch)
+
+    if report.import_id is not None:
+        values = {"records": report.records, "imported": report.imported, "failed": report.failed, "updated_at": timestamp}
+        await db.execute(
+            dialect_insert(db, ThirdPartyImportModel)
+            .values(import_id=report.import_id, **values)
+            .on_conflict_do_update(index_elements=["import_id"], set_=values)
+        )
+    if rows:
+        await append_events(db, (third_party_event({**row, "id": att_id}) for att_id, row in zip(ids, rows)))
+    await db.commit()
+
+async def import_third_party_attestations(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    fmt: str = "ndjson",
+    import_id: Optional[str] = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    progress: Optional[Callable[[ImportReport], None]] = None
+) -> ImportReport:
+    """
+    Import every record of an NDJSON or CSV byte stream, committing each
+    chunk of `chunk_size` records. With an import_id, progress is
+    checkpointed and a rerun resumes after the last committed record;
+    `imported` and `failed` then include the earlier runs. Raises
+    ImportFormatError if the stream cannot be parsed.
+    """
+    start = time.perf_counter()
+    report = ImportReport(import_id=import_id)
+    checkpoint = await db.get(ThirdPartyImportModel, import_id) if import_id is not None else None
+    if checkpoint is not None:
+        report.resumed_from = report.records = checkpoint.records
+        report.imported, report.failed = checkpoint.imported, checkpoint.failed
+    # Release the read snapshot before the first write
+    await db.commit()
+
+    batch = []
+    index = 0
+    try:
+        async for record, error in parse_records(chunks, fmt):
+            if index >= report.resumed_from:
+                batch.append((index, record, error))
+                if len(batch) >= chunk_size:
+                    await _commit_chunk(db, report, batch)
+                    batch = []
+                    report.elapsed_seconds = time.perf_counter() - start
+                    if progress:
+                        progress(report)
+            index += 1
+        if batch:
+            await _commit_chunk(db, report, batch)
+    finally:
+        report.elapsed_seconds = time.perf_counter() - start
+    return report
+
+async def read_file_chunks(path: str, size: int = 1 << 20) -> AsyncIterator[bytes]:
+    """
+    Yield a file's contents in `size`-byte chunks ("-" reads stdin).
+    """
+    f = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while True:
+            chunk = f.read(size)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        if f is not sys.stdin.buffer:
+            f.close()
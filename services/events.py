@@ -0,0 +1,197 @@
+# Append-only event log of writes, tailed through GET /events
+#
+# Every write path appends its events with append_events() in the
+# transaction that makes the change, so an event is visible exactly when
+# its write is. Events carry a monotonically increasing seq; consumers keep
+# the last seq they processed and read everything after it through the
+# primary key, so catching up never scans the table.
+#
+#   attestation.created        POST /attest, /attest/batch
+#   attestation.verified       the signature verifier promoted a pending row
+#   attestation.quarantined    the signature verifier rejected a pending row
+#   vote.cast                  POST /governance/vote, /governance/votes/batch
+#   identity.created           POST /identity/create
+#   third_party.created        POST /integration/import, /integration/import/bulk,
+#                              platform account imports
+#
+# On Postgres, event-appending transactions take a transaction-scoped
+# advisory lock before inserting, so seqs are assigned in commit order and a
+# consumer never skips an event committed late by a concurrent transaction.
+# SQLite serializes writers anyway.
+#
+# After a commit that appended events, EventFeed wakes the long-polls and
+# SSE streams waiting in this process. Waiters also re-check the table every
+# BITREP_EVENTS_POLL_INTERVAL seconds to pick up events written by other
+# processes.
+
+import asyncio
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.event import EventModel
+from services.sql import chunks
+
+EVENTS_POLL_INTERVAL = float(os.getenv("BITREP_EVENTS_POLL_INTERVAL", "1"))
+
+ATTESTATION_CREATED = "attestation.created"
+ATTESTATION_VERIFIED = "attestation.verified"
+ATTESTATION_QUARANTINED = "attestation.quarantined"
+VOTE_CAST = "vote.cast"
+IDENTITY_CREATED = "identity.created"
+THIRD_PARTY_CREATED = "third_party.created"
+
+# Key of the Postgres advisory lock serializing event appends
+EVENTS_LOCK_KEY = 0x62697472  # "bitr"
+
+# Session.info entry counting events appended in the open transaction
+_APPENDED = "bitrep_events_appended"
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def attestation_event(
+    att_id: int, issuer: str, subject: str, attestation_type: str, timestamp: datetime, status: str
+) -> Tuple[str, dict]:
+    return ATTESTATION_CREATED, {
+        "id": att_id,
+        "issuer": issuer,
+        "subject": subject,
+        "attestation_type": attestation_type,
+        "timestamp": timestamp,
+        "status": status
+    }
+
+def vote_event(proposal_id: int, voter: str, support: int, weight: float, timestamp: datetime) -> Tuple[str, dict]:
+    return VOTE_CAST, {
+        "proposal_id": proposal_id,
+        "voter": voter,
+        "support": support,
+        "weight": weight,
+        "timestamp": timestamp
+    }
+
+def third_party_event(row: dict) -> Tuple[str, dict]:
+    """
+    Event for a new third_party_attestations row, given its id and the
+    columns it was inserted with.
+    """
+    return THIRD_PARTY_CREATED, {
+        field: row[field]
+        for field in ("id", "username", "platform", "platform_username", "attestation_type", "value", "timestamp")
+    }
+
+async def append_events(db: AsyncSession, events: Iterable[Tuple[str, dict]]) -> None:
+    """
+    Append (kind, payload) events in the caller's transaction. Call it just
+    before committing: on Postgres it holds the append lock until then.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {"kind": kind, "payload": json.dumps(payload, default=_json_default, separators=(",", ":")), "created_at": now}
+        for kind, payload in events
+    ]
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": EVENTS_LOCK_KEY})
+    for chunk in chunks(rows):
+        await db.execute(insert(EventModel), chunk)
+    db.info[_APPENDED] = db.info.get(_APPENDED, 0) + len(rows)
+
+async def read_events(
+    db: AsyncSession,
+    after: int,
+    limit: int,
+    kinds: Optional[Sequence[str]] = None
+) -> List[EventModel]:
+    """
+    Up to `limit` events with seq > after, oldest first.
+    """
+    query = select(EventModel).where(EventModel.seq > after)
+    if kinds:
+        query = query.where(EventModel.kind.in_(kinds))
+    return list((await db.scalars(query.order_by(EventModel.seq).limit(limit))).all())
+
+def event_json(row: EventModel) -> dict:
+    return {
+        "seq": row.seq,
+        "kind": row.kind,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "data": json.loads(row.payload)
+    }
+
+class EventFeed:
+    """
+    Wakes waiters on any event loop when events are committed in this
+    process.
+    """
+
+    def __init__(self):
+        self._waiters = set()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.committed = 0
+        self.notifications = 0
+
+    def notify(self, count: int) -> None:
+        with self._lock:
+            self.generation += 1
+            self.committed += count
+            self.notifications += 1
+            waiters = list(self._waiters)
+        for loop, woken in waiters:
+            try:
+                loop.call_soon_threadsafe(woken.set)
+            except RuntimeError:
+                # The waiter's loop has already closed
+                pass
+
+    async def wait(self, generation: int, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for a commit after `generation` (read
+        from self.generation before querying). Returns True if one happened.
+        """
+        woken = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), woken)
+        with self._lock:
+            if self.generation != generation:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(woken.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "committed": self.committed,
+                "notifications": self.notifications,
+                "waiters": len(self._waiters),
+                "poll_interval_seconds": EVENTS_POLL_INTERVAL
+            }
+
+event_feed = EventFeed()
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session: Session) -> None:
+    count = session.info.pop(_APPENDED, 0)
+    if count:
+        event_feed.notify(count)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_after_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_APPENDED, None)
@@ -0,0 +1,232 @@
+# Persistent append-only Merkle accumulator per subject
+#
+# Each subject's attestations are the leaves of an RFC 6962-shaped tree (see
+# utils/merkle.py) in insertion order. Leaf hashes and every perfect interior
+# node are stored in merkle_nodes, so:
+#
+# - append_attestations() runs in the transaction that inserts the
+#   attestations: it reserves leaf positions with one upsert on
+#   merkle_accumulators, reads at most one existing node per tree level and
+#   inserts the new nodes, O(log n) per attestation.
+# - get_disclosure_proof() reads only the O(k log n) nodes a proof needs plus
+#   the k disclosed leaves, independent of the subject's history size.
+#
+# rebuild_merkle_accumulators() recreates every tree from the attestations
+# table with fresh salts. Pending and quarantined attestations are left out;
+# a pending one is appended when the signature verifier promotes it.
+
+import secrets
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.attestation import HIDDEN_STATUSES, AttestationModel
+from models.merkle import MerkleAccumulatorModel, MerkleLeafModel, MerkleNodeModel
+from services.sql import chunks, dialect_insert
+from utils.merkle import (
+    MerkleTree,
+    append_nodes,
+    append_required_nodes,
+    multiproof,
+    required_nodes,
+    root_from_nodes
+)
+from utils.zkproof import attestation_leaf_hash
+
+# Node keys per lookup. The keys are OR-ed equality terms, which SQLite turns
+# into one primary-key search each (a row-value IN list is not indexed); the
+# chunk also stays well under SQLite's expression depth limit.
+NODE_LOOKUP_CHUNK_SIZE = 200
+
+def attestation_record(att_id: int, issuer: str, subject: str, attestation_type: str, timestamp: datetime) -> dict:
+    """
+    The attestation fields committed to by its Merkle leaf.
+    """
+    return {
+        "id": att_id,
+        "issuer": issuer,
+        "subject": subject,
+        "attestation_type": attestation_type,
+        "timestamp": str(timestamp)
+    }
+
+def _new_salt() -> str:
+    return secrets.token_hex(16)
+
+async def _load_nodes(db: AsyncSession, keys: List[Tuple[str, int, int]]) -> Dict[Tuple[str, int, int], bytes]:
+    """
+    Fetch stored nodes by (subject, level, idx).
+    """
+    nodes = {}
+    for chunk in chunks(keys, NODE_LOOKUP_CHUNK_SIZE):
+        result = await db.execute(
+            select(MerkleNodeModel.subject, MerkleNodeModel.level, MerkleNodeModel.idx, MerkleNodeModel.hash)
+            .where(or_(*(
+                and_(MerkleNodeModel.subject == subject, MerkleNodeModel.level == level, MerkleNodeModel.idx == idx)
+                for subject, level, idx in chunk
+            )))
+        )
+        for subject, level, idx, node in result:
+            nodes[(subject, level, idx)] = node
+    return nodes
+
+async def append_attestations(db: AsyncSession, attestations: Iterable[dict]) -> None:
+    """
+    Append attestation records (see attestation_record()) to their subjects'
+    accumulators, in the given order.
+    Does not commit; call inside the transaction that inserts the attestations.
+    """
+    per_subject = defaultdict(list)
+    for att in attestations:
+        per_subject[att["subject"]].append(att)
+
+    if not per_subject:
+        return
+
+    # Reserve contiguous leaf positions; the row lock on the accumulator
+    # serializes concurrent appends to the same subject until commit
+    now = datetime.utcnow()
+    new_sizes = {}
+    for chunk in chunks(list(per_subject.items())):
+        stmt = dialect_insert(db, MerkleAccumulatorModel).values([
+            {"subject": subject, "size": len(atts), "updated_at": now}
+            for subject, atts in chunk
+        ])
+        result = await db.execute(stmt.on_conflict_do_update(
+            index_elements=["subject"],
+            set_={
+                "size": MerkleAccumulatorModel.size + stmt.excluded.size,
+                "updated_at": stmt.excluded.updated_at
+            }
+        ).returning(MerkleAccumulatorModel.subject, MerkleAccumulatorModel.size))
+        new_sizes.update(result.all())
+
+    old_sizes = {subject: new_sizes[subject] - len(atts) for subject, atts in per_subject.items()}
+    existing = await _load_nodes(db, [
+        (subject, level, idx)
+        for subject, atts in per_subject.items()
+        for level, idx in append_required_nodes(old_sizes[subject], len(atts))
+    ])
+
+    leaf_rows = []
+    node_rows = []
+    for subject, atts in per_subject.items():
+        size = old_sizes[subject]
+        salts = [_new_salt() for _ in atts]
+        leaves = [attestation_leaf_hash(att, salt) for att, salt in zip(atts, salts)]
+        nodes = append_nodes(size, leaves, lambda level, idx: existing[(subject, level, idx)])
+
+        leaf_rows.extend(
+            {"subject": subject, "idx": size + i, "attestation_id": att["id"], "salt": salt}
+            for i, (att, salt) in enumerate(zip(atts, salts))
+        )
+        node_rows.extend(
+            {"subject": subject, "level": level, "idx": idx, "hash": node}
+            for (level, idx), node in nodes.items()
+        )
+
+    await db.execute(insert(MerkleLeafModel), leaf_rows)
+    await db.execute(insert(MerkleNodeModel), node_rows)
+
+async def get_disclosure_proof(db: AsyncSession, subject: str, indices: List[int]) -> Optional[dict]:
+    """
+    Selective disclosure proof for the subject's leaves at `indices`, in the
+    format of utils.zkproof.create_selective_disclosure_proof().
+    Returns None if the subject has no attestations; raises IndexError for
+    indices outside the accumulator.
+    """
+    size = await db.scalar(
+        select(MerkleAccumulatorModel.size).where(MerkleAccumulatorModel.subject == subject)
+    )
+    if not size:
+        return None
+
+    coords = required_nodes(size, indices)
+    disclosed_indices = sorted(set(indices))
+
+    stored = await _load_nodes(db, [(subject, level, idx) for level, idx in coords])
+    get_node = lambda level, idx: stored[(subject, level, idx)]
+
+    leaves = (await db.execute(
+        select(MerkleLeafModel.idx, MerkleLeafModel.attestation_id, MerkleLeafModel.salt)
+        .where(MerkleLeafModel.subject == subject, MerkleLeafModel.idx.in_(disclosed_indices))
+    )).all()
+    by_index = {idx: (att_id, salt) for idx, att_id, salt in leaves}
+
+    rows = (await db.execute(
+        select(
+            AttestationModel.id,
+            AttestationModel.issuer,
+            AttestationModel.subject,
+            AttestationModel.attestation_type,
+            AttestationModel.timestamp
+        ).where(AttestationModel.id.in_([att_id for att_id, _ in by_index.values()]))
+    )).all()
+    records = {row[0]: attestation_record(*row) for row in rows}
+
+    return {
+        "merkle_root": root_from_nodes(size, get_node).hex(),
+        "total_count": size,
+        "disclosed_attestations": [records[by_index[i][0]] for i in disclosed_indices],
+        "disclosed_indices": disclosed_indices,
+        "disclosed_salts": [by_index[i][1] for i in disclosed_indices],
+        "proof": [node.hex() for node in multiproof(size, disclosed_indices, get_node)]
+    }
+
+async def rebuild_merkle_accumulators(db: AsyncSession) -> int:
+    """
+    Recreate every subject's accumulator from the attestations table, in id
+    order, with fresh leaf salts, and commit. Returns the number of subjects.
+    Proofs issued before the rebuild no longer match the new roots.
+    """
+    await db.execute(delete(MerkleNodeModel))
+    await db.execute(delete(MerkleLeafModel))
+    await db.execute(delete(MerkleAccumulatorModel))
+
+    async def flush(subject: str, atts: List[dict]):
+        salts = [_new_salt() for _ in atts]
+        tree = MerkleTree([attestation_leaf_hash(att, salt) for att, salt in zip(atts, salts)])
+        await db.execute(insert(MerkleAccumulatorModel), [
+            {"subject": subject, "size": len(atts), "updated_at": datetime.utcnow()}
+        ])
+        for chunk in chunks([
+            {"subject": subject, "idx": i, "attestation_id": att["id"], "salt": salt}
+            for i, (att, salt) in enumerate(zip(atts, salts))
+        ]):
+            await db.execute(insert(MerkleLeafModel), chunk)
+        for chunk in chunks([
+            {"subject": subject, "level": level, "idx": idx, "hash": node}
+            for level, hashes in enumerate(tree.levels)
+            for idx, node in enumerate(hashes)
+        ]):
+            await db.execute(insert(MerkleNodeModel), chunk)
+
+    subjects = 0
+    current, atts = None, []
+    result = await db.stream(
+        select(
+            AttestationModel.id,
+            AttestationModel.issuer,
+            AttestationModel.subject,
+            AttestationModel.attestation_type,
+            AttestationModel.timestamp
+        ).where(AttestationModel.status.not_in(HIDDEN_STATUSES))
+        .order_by(AttestationModel.subject, AttestationModel.id)
+        .execution_options(yield_per=1000)
+    )
+    async for row in result:
+        if row.subject != current and atts:
+            await flush(current, atts)
+            subjects += 1
+            atts = []
+        current = row.subject
+        atts.append(attestation_record(*row))
+    if atts:
+        await flush(current, atts)
+        subjects += 1
+
+    await db.commit()
+    return subjects
@@ -0,0 +1,113 @@
+# Third-party platform integrations
+#
+# Adapters (services.platforms.adapters) fetch account data from external
+# platforms through the shared PlatformClient (services.platforms.client);
+# import_platform_accounts() fetches many accounts concurrently and stores
+# the results as pending third-party attestations. The mock platform server
+# (services.platforms.mock_server) emulates every platform for offline
+# testing and benchmarks.
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Type, Union
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.identity import UserIdentityModel
+from models.third_party import ThirdPartyAttestationModel
+from services.bulk_import import USER_NOT_FOUND
+from services.events import append_events, third_party_event
+from services.platforms.adapters import (
+    PlatformAdapter, PlatformAttestation, GitHubAdapter, EbayAdapter, LinkedInAdapter, StackOverflowAdapter
+)
+from services.platforms.client import PlatformClient, PlatformError, PlatformUserNotFound
+
+platform_client = PlatformClient()
+
+ADAPTERS: Dict[str, PlatformAdapter] = {}
+
+def register_adapter(adapter_class: Type[PlatformAdapter]) -> PlatformAdapter:
+    adapter = adapter_class(platform_client)
+    ADAPTERS[adapter.name] = adapter
+    return adapter
+
+for _adapter_class in (GitHubAdapter, EbayAdapter, LinkedInAdapter, StackOverflowAdapter):
+    register_adapter(_adapter_class)
+
+def get_adapter(platform: str) -> Optional[PlatformAdapter]:
+    return ADAPTERS.get(platform)
+
+async def _fetch(platform: str, platform_username: str) -> Union[List[PlatformAttestation], PlatformError]:
+    try:
+        return await ADAPTERS[platform].fetch(platform_username)
+    except PlatformError as e:
+        return e
+
+async def import_platform_accounts(
+    db: AsyncSession,
+    accounts: Sequence[Tuple[str, str, str]]
+) -> List[Union[List[int], str]]:
+    """
+    Fetch (username, platform, platform_username) accounts concurrently and
+    store each fetched value as a pending third-party attestation, committing
+    once. Returns, per account, the new attestation ids or an error message.
+    Raises KeyError for an unregistered platform.
+    """
+    for _, platform, _ in accounts:
+        if platform not in ADAPTERS:
+            raise KeyError(platform)
+
+    usernames = {username for username, _, _ in accounts}
+    existing = set((await db.scalars(
+        select(UserIdentityModel.username).where(UserIdentityModel.username.in_(usernames))
+    )).all()) if usernames else set()
+    # Release the read snapshot while waiting on the network
+    await db.commit()
+
+    pending = {
+        i: _fetch(platform, platform_username)
+        for i, (username, platform, platform_username) in enumerate(accounts)
+        if username in existing
+    }
+    fetched = dict(zip(pending, await asyncio.gather(*pending.values())))
+
+    timestamp = datetime.utcnow()
+    results: List[Union[List[int], str]] = []
+    rows = []
+    spans = []
+    for i, (username, platform, platform_username) in enumerate(accounts):
+        values = fetched.get(i)
+        if values is None:
+            results.append(USER_NOT_FOUND)
+            continue
+        if isinstance(values, PlatformUserNotFound):
+            results.append(f"{platform} account not found")
+            continue
+        if isinstance(values, PlatformError):
+            results.append(f"{platform} request failed: {values.detail}")
+            continue
+        spans.append((len(results), len(rows), len(values)))
+        results.append([])
+        rows.extend({
+            "username": username,
+            "platform": platform,
+            "platform_username": platform_username,
+            "attestation_type": value.attestation_type,
+            "value": value.value,
+            "attestation_metadata": json.dumps(value.metadata),
+            "verified": 0,  # Pending verification
+            "timestamp": timestamp
+        } for value in values)
+
+    if rows:
+        ids = (await db.scalars(
+            insert(ThirdPartyAttestationModel).returning(ThirdPartyAttestationModel.id, sort_by_parameter_order=True),
+            rows
+        )).all()
+        for result_index, offset, count in spans:
+            results[result_index] = list(ids[offset:offset + count])
+        await append_events(db, (third_party_event({**row, "id": att_id}) for att_id, row in zip(ids, rows)))
+        await db.commit()
+    return results
@@ -0,0 +1,149 @@
+# Platform adapters
+#
+# Each adapter knows one platform's API: which endpoints to call for a
+# platform account and how to turn the responses into attestation values.
+# Requests for one account are issued concurrently; rate limits,
+# concurrency, retries and ETags are handled by the shared PlatformClient.
+# Register new platforms with register_adapter().
+
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, NamedTuple, Tuple
+from urllib.parse import quote
+
+from services.platforms.client import PlatformClient, PlatformLimits, PlatformUserNotFound
+
+class PlatformAttestation(NamedTuple):
+    attestation_type: str
+    value: float
+    metadata: dict
+
+class PlatformAdapter(ABC):
+    """
+    Base class: subclasses set the class attributes and implement fetch().
+    """
+    name: str = ""
+    display_name: str = ""
+    description: str = ""
+    attestation_types: Tuple[str, ...] = ()
+    base_url: str = ""
+    # Default request policy: requests/sec, burst, concurrent requests
+    limits: Tuple[float, int, int] = (10.0, 10, 8)
+    # Environment variable holding an API token, sent as a bearer token
+    token_env: str = ""
+
+    def __init__(self, client: PlatformClient):
+        self.client = client
+        client.register(self.name, PlatformLimits(self.name, *self.limits))
+
+    def headers(self) -> Dict[str, str]:
+        token = os.getenv(self.token_env) if self.token_env else None
+        return {"Authorization": f"Bearer {token}"} if token else {}
+
+    async def get(self, path: str) -> object:
+        return await self.client.get_json(self.name, self.client.url_for(self.name, self.base_url, path), self.headers())
+
+    @abstractmethod
+    async def fetch(self, platform_username: str) -> List[PlatformAttestation]:
+        """
+        Fetch the account's current values, one entry per attestation type.
+        """
+
+    def info(self) -> dict:
+        return {
+            "name": self.display_name,
+            "attestation_types": list(self.attestation_types),
+            "description": self.description
+        }
+
+class GitHubAdapter(PlatformAdapter):
+    name = "github"
+    display_name = "GitHub"
+    description = "Import commit history and contribution data"
+    attestation_types = ("commits", "pull_requests", "reviews", "stars")
+    base_url = "https://api.github.com"
+    # 5,000 requests/hour for authenticated clients
+    limits = (1.3, 10, 8)
+    token_env = "BITREP_GITHUB_TOKEN"
+
+    async def fetch(self, platform_username: str) -> List[PlatformAttestation]:
+        user = quote(platform_username, safe="")
+        profile, repos, commits, pulls, reviews = await asyncio.gather(
+            self.get(f"/users/{user}"),
+            self.get(f"/users/{user}/repos?per_page=100"),
+            self.get(f"/search/commits?q=author:{user}"),
+            self.get(f"/search/issues?q=type:pr+author:{user}"),
+            self.get(f"/search/issues?q=type:pr+reviewed-by:{user}")
+        )
+        return [
+            PlatformAttestation("commits", float(commits["total_count"]), {"public_repos": profile["public_repos"]}),
+            PlatformAttestation("pull_requests", float(pulls["total_count"]), {}),
+            PlatformAttestation("reviews", float(reviews["total_count"]), {}),
+            PlatformAttestation(
+                "stars", float(sum(repo["stargazers_count"] for repo in repos)), {"repos_counted": len(repos)}
+            ),
+        ]
+
+class EbayAdapter(PlatformAdapter):
+    name = "ebay"
+    display_name = "eBay"
+    description = "Import transaction and rating history"
+    attestation_types = ("seller_rating", "buyer_rating", "transactions")
+    base_url = "https://api.ebay.com"
+    limits = (5.0, 5, 4)
+    token_env = "BITREP_EBAY_TOKEN"
+
+    async def fetch(self, platform_username: str) -> List[PlatformAttestation]:
+        user = quote(platform_username, safe="")
+        summary = await self.get(f"/commerce/feedback/v1/feedback_summary?user_id={user}")
+        return [
+            PlatformAttestation("seller_rating", float(summary["seller_positive_percent"]), {"ratings": summary["seller_ratings"]}),
+            PlatformAttestation("buyer_rating", float(summary["buyer_positive_percent"]), {"ratings": summary["buyer_ratings"]}),
+            PlatformAttestation("transactions", float(summary["transactions"]), {}),
+        ]
+
+class LinkedInAdapter(PlatformAdapter):
+    name = "linkedin"
+    display_name = "LinkedIn"
+    description = "Import professional endorsements"
+    attestation_types = ("endorsements", "recommendations")
+    base_url = "https://api.linkedin.com"
+    limits = (2.0, 2, 2)
+    token_env = "BITREP_LINKEDIN_TOKEN"
+
+    async def fetch(self, platform_username: str) -> List[PlatformAttestation]:
+        user = quote(platform_username, safe="")
+        endorsements, recommendations = await asyncio.gather(
+            self.get(f"/v2/people/{user}/endorsements"),
+            self.get(f"/v2/people/{user}/recommendations")
+        )
+        return [
+            PlatformAttestation("endorsements", float(endorsements["total"]), {"skills": endorsements["skills"]}),
+            PlatformAttestation("recommendations", float(recommendations["total"]), {}),
+        ]
+
+class StackOverflowAdapter(PlatformAdapter):
+    name = "stackoverflow"
+    display_name = "Stack Overflow"
+    description = "Import community reputation"
+    attestation_types = ("reputation", "answers", "badges")
+    base_url = "https://api.stackexchange.com"
+    # The Stack Exchange API rejects clients above 30 requests/sec
+    limits = (25.0, 25, 8)
+
+    async def fetch(self, platform_username: str) -> List[PlatformAttestation]:
+        user = quote(platform_username, safe="")
+        users, answers = await asyncio.gather(
+            self.get(f"/2.3/users/{user}?site=stackoverflow"),
+            self.get(f"/2.3/users/{user}/answers?site=stackoverflow&filter=total")
+        )
+        if not users["items"]:
+            raise PlatformUserNotFound(self.name, "not found", 404)
+        account = users["items"][0]
+        badges = account["badge_counts"]
+        return [
+            PlatformAttestation("reputation", float(account["reputation"]), {}),
+            PlatformAttestation("answers", float(answers["total"]), {}),
+            PlatformAttestation("badges", float(sum(badges.values())), badges),
+        ]
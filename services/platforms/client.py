@@ -0,0 +1,248 @@
+# Shared HTTP client for third-party platform APIs
+#
+# All adapters go through one PlatformClient: a pooled httpx.AsyncClient plus,
+# per platform, a concurrency limit (semaphore), a token-bucket rate limiter,
+# retries with exponential backoff and jitter (honouring Retry-After), and an
+# ETag cache so unchanged resources are revalidated with a conditional GET
+# instead of being downloaded again.
+#
+# httpx clients and semaphores belong to the event loop that created them, so
+# they are created lazily and rebuilt if the client is used from another loop
+# (e.g. TestClient runs each request on a fresh loop).
+
+import asyncio
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+PLATFORM_TIMEOUT = float(os.getenv("BITREP_PLATFORM_TIMEOUT", "10"))
+PLATFORM_MAX_RETRIES = int(os.getenv("BITREP_PLATFORM_MAX_RETRIES", "3"))
+PLATFORM_MAX_CONNECTIONS = int(os.getenv("BITREP_PLATFORM_MAX_CONNECTIONS", "100"))
+ETAG_CACHE_SIZE = int(os.getenv("BITREP_PLATFORM_ETAG_CACHE_SIZE", "4096"))
+
+# Points every adapter at one server (e.g. the mock platform server), with
+# each platform under /<name>
+PLATFORM_API_URL = os.getenv("BITREP_PLATFORM_API_URL")
+
+BACKOFF_BASE = 0.2
+BACKOFF_MAX = 5.0
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class PlatformError(Exception):
+    """
+    A platform request failed after retries, or with a non-retryable status.
+    """
+
+    def __init__(self, platform: str, message: str, status_code: Optional[int] = None):
+        super().__init__(f"{platform}: {message}")
+        self.platform = platform
+        self.detail = message
+        self.status_code = status_code
+
+class PlatformUserNotFound(PlatformError):
+    pass
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` requests per second with bursts of `burst`.
+    A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.waits = 0
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            self.waits += 1
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class PlatformLimits:
+    """
+    Per-platform request policy; BITREP_<PLATFORM>_RATE_LIMIT and
+    BITREP_<PLATFORM>_CONCURRENCY override the defaults.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, concurrency: int):
+        prefix = f"BITREP_{name.upper()}_"
+        self.rate = float(os.getenv(prefix + "RATE_LIMIT", rate))
+        self.burst = burst
+        self.concurrency = int(os.getenv(prefix + "CONCURRENCY", concurrency))
+
+class _PlatformState:
+    def __init__(self, limits: PlatformLimits):
+        self.limiter = RateLimiter(limits.rate, limits.burst)
+        self.concurrency = limits.concurrency
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.requests = 0
+        self.retries = 0
+        self.not_modified = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.latency_total = 0.0
+
+class PlatformClient:
+    """
+    Pooled, rate-limited, retrying JSON GET client shared by all adapters.
+    """
+
+    def __init__(
+        self,
+        timeout: float = PLATFORM_TIMEOUT,
+        max_retries: int = PLATFORM_MAX_RETRIES,
+        max_connections: int = PLATFORM_MAX_CONNECTIONS,
+        etag_cache_size: int = ETAG_CACHE_SIZE,
+        base_url: Optional[str] = PLATFORM_API_URL
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self.etag_cache_size = etag_cache_size
+        self.base_url = base_url
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._platforms: Dict[str, _PlatformState] = {}
+        self._etags: "OrderedDict[str, Tuple[str, object]]" = OrderedDict()
+
+    def configure(self, base_url: Optional[str] = None, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        """
+        Redirect every platform to `base_url` (each under /<platform>) and/or
+        send requests through `transport`, e.g. the in-process mock server.
+        """
+        self.base_url = base_url
+        self.transport = transport
+        self._client = None
+        self._loop = None
+
+    def url_for(self, platform: str, default_base: str, path: str) -> str:
+        base = f"{self.base_url.rstrip('/')}/{platform}" if self.base_url else default_base
+        return base + path
+
+    def register(self, platform: str, limits: PlatformLimits) -> None:
+        self._platforms[platform] = _PlatformState(limits)
+
+    def _http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                headers={"Accept": "application/json", "User-Agent": "bitrep-attestations"}
+            )
+            self._loop = loop
+            for state in self._platforms.values():
+                state.semaphore = None
+        return self._client
+
+    def _state(self, platform: str) -> _PlatformState:
+        state = self._platforms[platform]
+        if state.semaphore is None:
+            state.semaphore = asyncio.Semaphore(state.concurrency)
+        return state
+
+    async def get_json(self, platform: str, url: str, headers: Optional[Dict[str, str]] = None) -> object:
+        """
+        GET `url` and return its JSON body, revalidating a cached copy with
+        If-None-Match when one exists. Raises PlatformUserNotFound on 404 and
+        PlatformError once retries are exhausted.
+        """
+        http = self._http()
+        state = self._state(platform)
+        request_headers = dict(headers or {})
+        cached = self._etags.get(url)
+        if cached is not None:
+            request_headers["If-None-Match"] = cached[0]
+
+        attempt = 0
+        while True:
+            async with state.semaphore:
+                await state.limiter.acquire()
+                state.requests += 1
+                state.in_flight += 1
+                start = time.perf_counter()
+                try:
+                    response = await http.get(url, headers=request_headers)
+                    error = None
+                except httpx.TransportError as e:
+                    response, error = None, e
+                finally:
+                    state.in_flight -= 1
+                    state.latency_total += time.perf_counter() - start
+
+            if response is not None and response.status_code == 304 and cached is not None:
+                state.not_modified += 1
+                self._etags.move_to_end(url)
+                return cached[1]
+            if response is not None and response.status_code == 404:
+                raise PlatformUserNotFound(platform, "not found", 404)
+            if response is not None and response.status_code < 400:
+                body = response.json()
+                etag = response.headers.get("ETag")
+                if etag and self.etag_cache_size > 0:
+                    self._etags[url] = (etag, body)
+                    self._etags.move_to_end(url)
+                    while len(self._etags) > self.etag_cache_size:
+                        self._etags.popitem(last=False)
+                return body
+
+            retryable = response is None or response.status_code in RETRY_STATUSES
+            if not retryable or attempt >= self.max_retries:
+                state.failures += 1
+                detail = str(error) if response is None else f"HTTP {response.status_code}"
+                raise PlatformError(platform, detail, None if response is None else response.status_code)
+
+            attempt += 1
+            state.retries += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+
+    @staticmethod
+    def _backoff(attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_MAX)
+            except ValueError:
+                pass
+        delay = min(BACKOFF_BASE * 2 ** (attempt - 1), BACKOFF_MAX)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        self._loop = None
+        if client is not None:
+            await client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "etag_cache_size": len(self._etags),
+            "platforms": {
+                name: {
+                    "requests": state.requests,
+                    "retries": state.retries,
+                    "not_modified": state.not_modified,
+                    "failures": state.failures,
+                    "in_flight": state.in_flight,
+                    "rate_limit_waits": state.limiter.waits,
+                    "avg_latency_ms": round(state.latency_total / state.requests * 1000, 3) if state.requests else 0.0
+                }
+                for name, state in self._platforms.items()
+            }
+        }
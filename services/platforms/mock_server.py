@@ -0,0 +1,152 @@
+# Local stand-in for the third-party platform APIs
+#
+# Usage:
+#     python -m services.platforms.mock_server [--port 8900] [--latency-ms 50] [--failure-rate 0.05] [--rate-limit 100]
+#     BITREP_PLATFORM_API_URL=http://127.0.0.1:8900 uvicorn main:app
+#
+# Serves the endpoints the adapters call, each platform under /<name>, with
+# deterministic per-account data derived from the account name. Every
+# response carries an ETag and honours If-None-Match. Optional latency,
+# injected 503s and a per-platform 429 rate limit (with Retry-After)
+# exercise the client's concurrency, retry and backoff paths. Accounts whose
+# name starts with "missing" return 404.
+#
+# Tests mount the app in-process with httpx.ASGITransport instead of
+# listening on a port.
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import defaultdict
+
+from fastapi import FastAPI, Request, Response
+
+def _seed(account: str, field: str, high: int) -> int:
+    digest = hashlib.sha256(f"{account}:{field}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") % high
+
+def create_mock_app(latency_ms: float = 0.0, failure_rate: float = 0.0, rate_limit: float = 0.0, seed: int = 0) -> FastAPI:
+    """
+    Build the mock platform app. `rate_limit` is requests/sec per platform
+    (0 disables); `failure_rate` is the fraction of requests answered 503.
+    """
+    app = FastAPI(title="BitRep mock platforms")
+    rng = random.Random(seed)
+    windows = defaultdict(lambda: [0.0, 0])
+    app.state.stats = defaultdict(int)
+
+    async def respond(request: Request, platform: str, account: str, body) -> Response:
+        stats = app.state.stats
+        stats["requests"] += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+        if rate_limit:
+            window = windows[platform]
+            now = time.monotonic()
+            if now - window[0] >= 1.0:
+                window[0], window[1] = now, 0
+            window[1] += 1
+            if window[1] > rate_limit:
+                stats["throttled"] += 1
+                retry_after = max(window[0] + 1.0 - now, 0.01)
+                return Response(status_code=429, headers={"Retry-After": f"{retry_after:.2f}"})
+
+        if failure_rate and rng.random() < failure_rate:
+            stats["failed"] += 1
+            return Response(status_code=503)
+
+        if account.startswith("missing"):
+            return Response(status_code=404)
+
+        payload = json.dumps(body() if callable(body) else body, separators=(",", ":")).encode("utf-8")
+        etag = '"' + hashlib.sha256(payload).hexdigest()[:16] + '"'
+        if request.headers.get("if-none-match") == etag:
+            stats["not_modified"] += 1
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=payload, media_type="application/json", headers={"ETag": etag})
+
+    @app.get("/github/users/{login}")
+    async def github_user(request: Request, login: str):
+        return await respond(request, "github", login, lambda: {
+            "login": login, "public_repos": _seed(login, "repos", 60), "followers": _seed(login, "followers", 500)
+        })
+
+    @app.get("/github/users/{login}/repos")
+    async def github_repos(request: Request, login: str):
+        return await respond(request, "github", login, lambda: [
+            {"name": f"repo{i}", "stargazers_count": _seed(login, f"stars{i}", 200)}
+            for i in range(_seed(login, "repos", 60))
+        ])
+
+    @app.get("/github/search/commits")
+    async def github_commits(request: Request, q: str):
+        login = q.split("author:", 1)[-1]
+        return await respond(request, "github", login, lambda: {"total_count": _seed(login, "commits", 5000)})
+
+    @app.get("/github/search/issues")
+    async def github_issues(request: Request, q: str):
+        login = q.rsplit(":", 1)[-1]
+        field = "reviews" if "reviewed-by:" in q else "pulls"
+        return await respond(request, "github", login, lambda: {"total_count": _seed(login, field, 800)})
+
+    @app.get("/ebay/commerce/feedback/v1/feedback_summary")
+    async def ebay_feedback(request: Request, user_id: str):
+        return await respond(request, "ebay", user_id, lambda: {
+            "seller_positive_percent": 90 + _seed(user_id, "seller", 100) / 10,
+            "seller_ratings": _seed(user_id, "seller_count", 3000),
+            "buyer_positive_percent": 90 + _seed(user_id, "buyer", 100) / 10,
+            "buyer_ratings": _seed(user_id, "buyer_count", 1000),
+            "transactions": _seed(user_id, "transactions", 10000)
+        })
+
+    @app.get("/linkedin/v2/people/{person}/endorsements")
+    async def linkedin_endorsements(request: Request, person: str):
+        return await respond(request, "linkedin", person, lambda: {
+            "total": _seed(person, "endorsements", 300), "skills": _seed(person, "skills", 40)
+        })
+
+    @app.get("/linkedin/v2/people/{person}/recommendations")
+    async def linkedin_recommendations(request: Request, person: str):
+        return await respond(request, "linkedin", person, lambda: {"total": _seed(person, "recommendations", 30)})
+
+    @app.get("/stackoverflow/2.3/users/{user_id}")
+    async def stackoverflow_user(request: Request, user_id: str):
+        return await respond(request, "stackoverflow", user_id, lambda: {"items": [{
+            "user_id": user_id,
+            "reputation": _seed(user_id, "reputation", 100000),
+            "badge_counts": {
+                "gold": _seed(user_id, "gold", 10),
+                "silver": _seed(user_id, "silver", 50),
+                "bronze": _seed(user_id, "bronze", 200)
+            }
+        }]})
+
+    @app.get("/stackoverflow/2.3/users/{user_id}/answers")
+    async def stackoverflow_answers(request: Request, user_id: str):
+        return await respond(request, "stackoverflow", user_id, lambda: {"total": _seed(user_id, "answers", 2000)})
+
+    @app.get("/stats")
+    async def get_stats():
+        return dict(app.state.stats)
+
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the third-party platform APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/sec per platform; 0 disables")
+    args = parser.parse_args()
+
+    uvicorn.run(create_mock_app(args.latency_ms, args.failure_rate, args.rate_limit), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
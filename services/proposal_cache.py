@@ -0,0 +1,112 @@
+# Read-through cache for proposal listing pages
+#
+# GET /governance/proposals pages are cached as serialized JSON, keyed by
+# (status, cursor, limit), with an ETag derived from the body. Every write
+# that changes a proposal (create, vote, finalize, the scheduler) calls
+# invalidate(), which bumps a generation counter and empties the cache, so a
+# poller whose If-None-Match matches a cached page gets a 304 without a query.
+#
+# Invalidation is per process. With several worker processes, entries also
+# expire after BITREP_PROPOSAL_CACHE_TTL seconds to bound staleness from
+# writes handled elsewhere.
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+
+PROPOSAL_CACHE_SIZE = int(os.getenv("BITREP_PROPOSAL_CACHE_SIZE", "256"))
+PROPOSAL_CACHE_TTL = float(os.getenv("BITREP_PROPOSAL_CACHE_TTL", "30"))
+
+class CachedPage(NamedTuple):
+    body: bytes
+    etag: str
+    next_cursor: Optional[str]
+    expires: float
+
+def page_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag.
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+class ProposalPageCache:
+    """
+    Bounded, thread-safe LRU of serialized listing pages with
+    generation-based invalidation.
+    """
+
+    def __init__(self, maxsize: int = PROPOSAL_CACHE_SIZE, ttl: float = PROPOSAL_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[CachedPage]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, body: bytes, next_cursor: Optional[str], generation: int) -> CachedPage:
+        """
+        Store a page read while the cache was at `generation`; pages read
+        before an invalidation are returned but not stored.
+        """
+        entry = CachedPage(body, page_etag(body), next_cursor, time.monotonic() + self.ttl)
+        with self._lock:
+            if generation == self.generation and self.maxsize > 0:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def invalidate(self) -> None:
+        """
+        Drop every cached page; call after any write that changes a proposal.
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+proposal_cache = ProposalPageCache()
@@ -0,0 +1,172 @@
+# Background finalization of expired proposals
+#
+# finalize_due_proposals() closes every proposal whose voting period has ended
+# with set-based UPDATEs: the (status, expires_at) index finds due rows, and
+# each batch of up to FINALIZE_BATCH_SIZE is set to PASSED or REJECTED with a
+# CASE on the tallies in a single statement. Proposals a late vote already
+# flipped to EXPIRED are finalized the same way.
+#
+# ProposalScheduler runs it every BITREP_PROPOSAL_SCHEDULER_INTERVAL seconds
+# as an asyncio task started by the app's lifespan (0 disables it, e.g. when
+# `python manage.py run-scheduler` runs as a separate worker).
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import case, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.connection import AsyncSessionLocal
+from models.governance import GovernanceProposalModel, ProposalStatus
+from services.proposal_cache import proposal_cache
+
+SCHEDULER_INTERVAL = float(os.getenv("BITREP_PROPOSAL_SCHEDULER_INTERVAL", "30"))
+FINALIZE_BATCH_SIZE = int(os.getenv("BITREP_PROPOSAL_FINALIZE_BATCH", "1000"))
+
+# Statuses whose voting period can end without a final outcome
+OPEN_STATUSES = (ProposalStatus.ACTIVE, ProposalStatus.EXPIRED)
+
+logger = logging.getLogger(__name__)
+
+def _due(now: datetime):
+    return (
+        GovernanceProposalModel.status.in_(OPEN_STATUSES),
+        GovernanceProposalModel.expires_at <= now
+    )
+
+def outcome_status():
+    """
+    SQL expression for a closed proposal's final status.
+    """
+    status_type = GovernanceProposalModel.status.type
+    return case(
+        (GovernanceProposalModel.votes_for > GovernanceProposalModel.votes_against,
+         literal(ProposalStatus.PASSED, status_type)),
+        else_=literal(ProposalStatus.REJECTED, status_type)
+    )
+
+async def finalize_due_proposals(
+    db: AsyncSession,
+    now: Optional[datetime] = None,
+    batch_size: int = FINALIZE_BATCH_SIZE
+) -> Tuple[int, Optional[datetime]]:
+    """
+    Finalize every proposal whose voting period ended at or before `now`,
+    committing after each batch. Returns the number finalized and the
+    earliest expiry among them (None if nothing was due).
+    """
+    now = now or datetime.utcnow()
+    oldest = await db.scalar(select(func.min(GovernanceProposalModel.expires_at)).where(*_due(now)))
+    if oldest is None:
+        return 0, None
+
+    finalized = 0
+    while True:
+        due_ids = (
+            select(GovernanceProposalModel.id)
+            .where(*_due(now))
+            .order_by(GovernanceProposalModel.expires_at)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            update(GovernanceProposalModel)
+            .where(GovernanceProposalModel.id.in_(due_ids), *_due(now))
+            .values(status=outcome_status())
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if result.rowcount:
+            proposal_cache.invalidate()
+        finalized += result.rowcount
+        if result.rowcount < batch_size:
+            return finalized, oldest
+
+class ProposalScheduler:
+    """
+    Periodically finalizes due proposals and records lag and throughput.
+    """
+
+    def __init__(self, interval: float = SCHEDULER_INTERVAL, batch_size: int = FINALIZE_BATCH_SIZE):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.failures = 0
+        self.finalized = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_finalized = 0
+        self.last_duration_ms = 0.0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """
+        Start the periodic task on the running loop; an interval of 0 leaves it disabled.
+        """
+        if self.interval <= 0 or self.running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def run_once(self) -> int:
+        """
+        Finalize everything currently due. Returns the number finalized.
+        """
+        start = time.perf_counter()
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            finalized, oldest = await finalize_due_proposals(db, now, self.batch_size)
+
+        self.runs += 1
+        self.finalized += finalized
+        self.last_run_at = now
+        self.last_finalized = finalized
+        self.last_duration_ms = (time.perf_counter() - start) * 1000
+        # How long the most overdue proposal waited past its expiry
+        self.last_lag_seconds = (now - oldest).total_seconds() if oldest else 0.0
+        self.max_lag_seconds = max(self.max_lag_seconds, self.last_lag_seconds)
+        return finalized
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                self.failures += 1
+                logger.exception("Proposal scheduler run failed")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "finalized": self.finalized,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_finalized": self.last_finalized,
+            "last_duration_ms": round(self.last_duration_ms, 3),
+            "last_throughput_per_sec": round(self.last_finalized / (self.last_duration_ms / 1000), 1)
+            if self.last_duration_ms else 0.0,
+            "last_lag_seconds": round(self.last_lag_seconds, 3),
+            "max_lag_seconds": round(self.max_lag_seconds, 3)
+        }
+
+proposal_scheduler = ProposalScheduler()
@@ -0,0 +1,219 @@
+# Schema upgrades for databases created by earlier versions
+#
+# Base.metadata.create_all() creates missing tables but never changes an
+# existing one, so columns and indexes added to a table after a database
+# was created are missing from it. upgrade_schema() (python manage.py
+# upgrade-db) adds them: columns with ALTER TABLE ... ADD COLUMN, taking the
+# model's default so NOT NULL columns can be added to tables with rows, then
+# indexes. Every step inspects the live schema first, so running it again
+# is a no-op.
+#
+# The unique ux_votes_proposal_voter index cannot be created while the votes
+# table holds more than one vote per (proposal_id, voter), which the old
+# check-then-insert vote path could let through under concurrency. Those
+# duplicates are removed first, keeping each voter's earliest vote, and the
+# affected proposals are re-tallied from the votes that remain.
+#
+# Signed attestations stored before attestations.signature_digest existed
+# get their digest, so replays of their signatures are rejected too. A row
+# repeating the signature of an earlier one keeps a NULL digest, which the
+# unique (issuer, signature_digest) index allows.
+
+import logging
+from typing import List, Tuple
+
+from sqlalchemy import Column, bindparam, func, inspect, literal, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from db.connection import Base
+# Every model, so that Base.metadata describes every table
+from models.attestation import AttestationModel
+from models.identity import UserIdentityModel
+from models.governance import GovernanceProposalModel, VoteModel
+from models.third_party import ThirdPartyAttestationModel, ThirdPartyImportModel
+from models.subject_stats import SubjectStatsModel, SubjectTypeCountModel, SubjectIssuerModel
+from models.merkle import MerkleAccumulatorModel, MerkleLeafModel, MerkleNodeModel
+from models.trust import TrustScoreModel
+from models.sybil import SybilClusterModel, SybilMemberModel
+from models.event import EventModel
+from services.sql import CHUNK_SIZE
+from utils.canonical import signature_digest
+
+logger = logging.getLogger(__name__)
+
+def missing_columns(conn: Connection) -> List[Column]:
+    """
+    Columns declared on the models but absent from existing tables.
+    """
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(column for column in table.columns if column.name not in existing)
+    return missing
+
+def _column_ddl(conn: Connection, column: Column) -> str:
+    """
+    ALTER TABLE ... ADD COLUMN for a model column. NOT NULL columns get the
+    model's default, which fills existing rows.
+    """
+    dialect = conn.dialect
+    quote = dialect.identifier_preparer.quote
+    ddl = f"ALTER TABLE {quote(column.table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(dialect=dialect)}"
+    default = None
+    if column.server_default is not None:
+        default = column.server_default.arg
+    elif not column.nullable and column.default is not None and column.default.is_scalar:
+        default = column.default.arg
+    if default is not None:
+        if isinstance(default, str):
+            default = literal(default).compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+        ddl += f" DEFAULT {default}"
+    elif not column.nullable:
+        raise RuntimeError(f"Cannot add NOT NULL column {column.table.name}.{column.name} without a default")
+    if not column.nullable:
+        ddl += " NOT NULL"
+    return ddl
+
+def missing_indexes(conn: Connection) -> List:
+    """
+    Indexes declared on the models but absent from existing tables.
+    """
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in table.indexes if index.name not in existing)
+    return missing
+
+def dedupe_votes(conn: Connection) -> int:
+    """
+    Delete all but the earliest vote of each voter on each proposal and
+    re-tally the proposals that had duplicates. Returns the votes deleted.
+    """
+    votes = VoteModel.__table__
+    keep = (
+        select(func.min(votes.c.id))
+        .group_by(votes.c.proposal_id, votes.c.voter)
+    )
+    affected = conn.scalars(
+        select(votes.c.proposal_id)
+        .group_by(votes.c.proposal_id, votes.c.voter)
+        .having(func.count() > 1)
+        .distinct()
+    ).all()
+    if not affected:
+        return 0
+
+    deleted = conn.execute(
+        votes.delete().where(votes.c.proposal_id.in_(affected), votes.c.id.not_in(keep))
+    ).rowcount
+
+    # Same split as the vote paths: support > 0 counts for, anything else against
+    def tally(in_favour: bool):
+        side = votes.c.support > 0 if in_favour else votes.c.support <= 0
+        return (
+            select(func.coalesce(func.sum(votes.c.vote_value), 0.0))
+            .where(votes.c.proposal_id == GovernanceProposalModel.id, side)
+            .scalar_subquery()
+        )
+
+    conn.execute(
+        update(GovernanceProposalModel)
+        .where(GovernanceProposalModel.id.in_(affected))
+        .values(votes_for=tally(True), votes_against=tally(False))
+    )
+    return deleted
+
+def backfill_signature_digests(conn: Connection) -> Tuple[int, int]:
+    """
+    Record the digest of signed attestations stored without one, oldest
+    first. Returns (rows given a digest, rows repeating an earlier
+    signature, left without one).
+    """
+    attestations = AttestationModel.__table__
+    filled = repeated = 0
+    after_id = 0
+    while True:
+        rows = conn.execute(
+            select(attestations.c.id, attestations.c.issuer, attestations.c.signature)
+            .where(
+                attestations.c.id > after_id,
+                attestations.c.signature.is_not(None),
+                attestations.c.signature_digest.is_(None)
+            )
+            .order_by(attestations.c.id)
+            .limit(CHUNK_SIZE)
+        ).all()
+        if not rows:
+            return filled, repeated
+        after_id = rows[-1].id
+
+        keys = [(row.issuer, signature_digest(row.signature)) for row in rows]
+        taken = set(tuple(pair) for pair in conn.execute(
+            select(attestations.c.issuer, attestations.c.signature_digest).where(
+                attestations.c.issuer.in_(sorted({issuer for issuer, _ in keys})),
+                attestations.c.signature_digest.in_(sorted({digest for _, digest in keys}))
+            )
+        ))
+        updates = []
+        for row, key in zip(rows, keys):
+            if key in taken:
+                repeated += 1
+                continue
+            taken.add(key)
+            updates.append({"row_id": row.id, "digest": key[1]})
+        if updates:
+            conn.execute(
+                attestations.update()
+                .where(attestations.c.id == bindparam("row_id"))
+                .values(signature_digest=bindparam("digest")),
+                updates
+            )
+            filled += len(updates)
+
+def pending_changes(engine: Engine) -> List[str]:
+    """
+    Columns and indexes upgrade_schema() would add, as "table.name".
+    """
+    with engine.connect() as conn:
+        return (
+            [f"{column.table.name}.{column.name}" for column in missing_columns(conn)]
+            + [f"{index.table.name}.{index.name}" for index in missing_indexes(conn)]
+        )
+
+def upgrade_schema(engine: Engine) -> List[str]:
+    """
+    Bring an existing database up to the current models in one transaction.
+    Returns a description of each change made.
+    """
+    changes = []
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for column in missing_columns(conn):
+            conn.exec_driver_sql(_column_ddl(conn, column))
+            changes.append(f"added column {column.name} to {column.table.name}")
+
+        filled, repeated = backfill_signature_digests(conn)
+        if filled:
+            changes.append(f"recorded the signature digest of {filled} attestations")
+        if repeated:
+            logger.warning("%d attestations repeat an earlier signature and were left without a digest", repeated)
+
+        indexes = missing_indexes(conn)
+        if any(index.name == "ux_votes_proposal_voter" for index in indexes):
+            deleted = dedupe_votes(conn)
+            if deleted:
+                changes.append(f"deleted {deleted} duplicate votes and re-tallied their proposals")
+        for index in indexes:
+            index.create(conn)
+            changes.append(f"created index {index.name} on {index.table.name}")
+    for change in changes:
+        logger.info("Schema upgrade: %s", change)
+    return changes
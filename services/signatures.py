@@ -0,0 +1,424 @@
+# Issuer-signature enforcement for attestation ingestion
+#
+# BITREP_SIGNATURE_POLICY decides what POST /attest and /attest/batch do
+# with the issuer's signature:
+#
+#   off    store it unchecked (status "unverified"); the default, since
+#          clients that predate enforcement send no signature at all
+#   sync   verify before inserting and reject attestations whose signature
+#          does not match the issuer's registered key (status "verified")
+#   async  reject only missing signatures, insert the rest as "pending" and
+#          let SignatureVerifier check them in batches; failures are
+#          "quarantined"
+#
+# Pending and quarantined rows are not part of a subject's record: they are
+# not counted in subject_stats, not appended to the Merkle accumulators, not
+# loaded into the trust graph and not listed. The verifier applies the
+# counters and accumulators when it promotes a row to verified. Promotion is
+# an UPDATE guarded on status = 'pending', so when several verifiers race
+# over the same rows only one of them applies each row.
+#
+# A signature is accepted once per issuer. Attestations carrying a signature
+# record its signature_digest, which a unique (issuer, signature_digest)
+# index guards; resubmitting a stored signature, e.g. one read back from
+# GET /user/{username}, is rejected with REPLAYED_SIGNATURE under every
+# policy, and the verifier quarantines a pending row that repeats another.
+#
+# Issuer keys come from IssuerKeyCache: parsed keys (through the shared
+# public_key_cache) per username with a TTL, so the write path normally
+# costs no identity query. Unknown issuers are cached for a shorter TTL;
+# identities created in this process are invalidated immediately, in other
+# processes they become visible within that TTL. Parsing and verification
+# run on the crypto pool, off the event loop.
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.connection import AsyncSessionLocal
+from models.attestation import PENDING, QUARANTINED, UNVERIFIED, VERIFIED, AttestationModel
+from models.identity import UserIdentityModel
+from services.events import ATTESTATION_QUARANTINED, ATTESTATION_VERIFIED, append_events
+from services.merkle_store import append_attestations, attestation_record
+from services.sql import chunks
+from services.subject_stats import record_attestations
+from utils.canonical import signature_digest
+from utils.crypto import attestation_payload, public_key_cache, run_crypto, verify_signatures_batch_async
+from utils.suites import get_suite, suite_for_key
+
+# "off", "sync" or "async"
+SIGNATURE_POLICY = os.getenv("BITREP_SIGNATURE_POLICY", "off")
+ISSUER_KEY_CACHE_SIZE = int(os.getenv("BITREP_ISSUER_KEY_CACHE_SIZE", "4096"))
+ISSUER_KEY_TTL = float(os.getenv("BITREP_ISSUER_KEY_TTL", "60"))
+ISSUER_KEY_NEGATIVE_TTL = float(os.getenv("BITREP_ISSUER_KEY_NEGATIVE_TTL", "5"))
+SIGNATURE_VERIFY_BATCH_SIZE = int(os.getenv("BITREP_SIGNATURE_VERIFY_BATCH_SIZE", "500"))
+# Seconds between polls for pending attestations; 0 disables the in-app verifier
+SIGNATURE_VERIFY_INTERVAL = float(os.getenv("BITREP_SIGNATURE_VERIFY_INTERVAL", "1"))
+
+ISSUER_NOT_FOUND = "Issuer identity not found"
+INVALID_ISSUER_KEY = "Invalid issuer public key"
+MISSING_SIGNATURE = "Missing signature"
+INVALID_SIGNATURE = "Invalid signature"
+REPLAYED_SIGNATURE = "Signature already used"
+
+logger = logging.getLogger(__name__)
+
+# Cached marker for a username without an identity
+_NO_IDENTITY = object()
+
+def load_issuer_keys(identities) -> dict:
+    """
+    Resolve issuer PEMs through the key cache; None marks a key that cannot
+    be parsed or does not match the identity's recorded signature suite.
+    """
+    public_keys = {}
+    for username, public_key_pem, key_algorithm, last_updated in identities:
+        try:
+            public_key = public_key_cache.get(public_key_pem, username, last_updated)
+            if suite_for_key(public_key) is not get_suite(key_algorithm):
+                public_key = None
+        except ValueError:
+            public_key = None
+        public_keys[username] = public_key
+    return public_keys
+
+class IssuerKeyCache:
+    """
+    Bounded, thread-safe LRU of issuer username -> parsed public key with
+    per-entry expiry.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = ISSUER_KEY_CACHE_SIZE,
+        ttl: float = ISSUER_KEY_TTL,
+        negative_ttl: float = ISSUER_KEY_NEGATIVE_TTL
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, Tuple[object, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get_many(self, db: AsyncSession, usernames: Iterable[str]) -> dict:
+        """
+        Public keys of the given issuers, querying only those not cached.
+        Issuers without an identity are left out; None marks an unusable key.
+        """
+        found, missing = {}, []
+        now = time.monotonic()
+        with self._lock:
+            for username in set(usernames):
+                entry = self._entries.get(username)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(username)
+                    self.hits += 1
+                    if entry[0] is not _NO_IDENTITY:
+                        found[username] = entry[0]
+                else:
+                    self.misses += 1
+                    missing.append(username)
+
+        if missing:
+            identities = []
+            for chunk in chunks(sorted(missing)):
+                identities.extend((await db.execute(
+                    select(
+                        UserIdentityModel.username,
+                        UserIdentityModel.public_key,
+                        UserIdentityModel.key_algorithm,
+                        UserIdentityModel.last_updated
+                    ).where(UserIdentityModel.username.in_(chunk))
+                )).all())
+            loaded = await run_crypto(load_issuer_keys, identities)
+            found.update(loaded)
+
+            now = time.monotonic()
+            with self._lock:
+                for username in missing:
+                    if username in loaded:
+                        self._entries[username] = (loaded[username], now + self.ttl)
+                    else:
+                        self._entries[username] = (_NO_IDENTITY, now + self.negative_ttl)
+                    self._entries.move_to_end(username)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return found
+
+    def invalidate(self, username: str) -> None:
+        """
+        Drop a cached issuer, e.g. after its identity was created or changed.
+        """
+        with self._lock:
+            if self._entries.pop(username, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+issuer_keys = IssuerKeyCache()
+
+async def check_signatures(db: AsyncSession, attestations: Sequence) -> List[Optional[str]]:
+    """
+    Verify each attestation's signature (over attestation_payload, without a
+    timestamp) against its issuer's registered key. Takes anything with
+    issuer, subject, attestation_type, anchor and signature attributes.
+    Returns, in order, None for a valid signature or the error.
+    """
+    public_keys = await issuer_keys.get_many(db, (att.issuer for att in attestations))
+    errors: List[Optional[str]] = [None] * len(attestations)
+    items, positions = [], []
+    for i, att in enumerate(attestations):
+        if att.issuer not in public_keys:
+            errors[i] = ISSUER_NOT_FOUND
+        elif public_keys[att.issuer] is None:
+            errors[i] = INVALID_ISSUER_KEY
+        elif not att.signature:
+            errors[i] = MISSING_SIGNATURE
+        else:
+            payload = attestation_payload(att.issuer, att.subject, att.attestation_type, att.anchor)
+            items.append((payload, att.signature, public_keys[att.issuer]))
+            positions.append(i)
+
+    for i, ok in zip(positions, await verify_signatures_batch_async(items)):
+        if not ok:
+            errors[i] = INVALID_SIGNATURE
+    return errors
+
+async def find_replays(db: AsyncSession, attestations: Sequence, ids: Optional[Sequence[int]] = None) -> List[bool]:
+    """
+    Flag, in order, attestations whose issuer signature is already stored
+    or repeats an earlier one in the sequence. With `ids`, the attestations'
+    own stored rows do not count.
+    """
+    keys = [(att.issuer, signature_digest(att.signature)) if att.signature else None for att in attestations]
+    stored = {}
+    pairs = sorted(set(key for key in keys if key))
+    for chunk in chunks(pairs):
+        # Two IN lists seek the unique index; row-value IN would scan it
+        stored.update(((issuer, digest), att_id) for att_id, issuer, digest in (await db.execute(
+            select(AttestationModel.id, AttestationModel.issuer, AttestationModel.signature_digest)
+            .where(
+                AttestationModel.issuer.in_(sorted({issuer for issuer, _ in chunk})),
+                AttestationModel.signature_digest.in_(sorted({digest for _, digest in chunk}))
+            )
+        )).all())
+
+    replays, seen = [], set()
+    for i, key in enumerate(keys):
+        own_id = ids[i] if ids is not None else None
+        replays.append(key is not None and (key in seen or stored.get(key, own_id) != own_id))
+        if key is not None:
+            seen.add(key)
+    return replays
+
+async def screen_signatures(db: AsyncSession, attestations: Sequence) -> Tuple[str, List[Optional[str]]]:
+    """
+    Apply the signature policy to incoming attestations and reject replayed
+    signatures. Returns the status to store accepted attestations with and,
+    in order, None for each accepted attestation or the error that rejects
+    it.
+    """
+    if SIGNATURE_POLICY == "sync":
+        status, errors = VERIFIED, await check_signatures(db, attestations)
+    elif SIGNATURE_POLICY == "async":
+        status, errors = PENDING, [None if att.signature else MISSING_SIGNATURE for att in attestations]
+    else:
+        status, errors = UNVERIFIED, [None] * len(attestations)
+
+    accepted = [i for i, error in enumerate(errors) if error is None]
+    replays = await find_replays(db, [attestations[i] for i in accepted])
+    for i, replayed in zip(accepted, replays):
+        if replayed:
+            errors[i] = REPLAYED_SIGNATURE
+    return status, errors
+
+def signature_error_status(error: str) -> int:
+    if error == ISSUER_NOT_FOUND:
+        return 404
+    return 409 if error == REPLAYED_SIGNATURE else 400
+
+class SignatureVerifier:
+    """
+    Verifies pending attestations and promotes or quarantines them.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = SIGNATURE_VERIFY_BATCH_SIZE,
+        interval: float = SIGNATURE_VERIFY_INTERVAL
+    ):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.verified = 0
+        self.quarantined = 0
+        self.stale = 0
+        self.failures = 0
+        self.last_batch_ms = 0.0
+        self.last_batch_size = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """
+        Start the verifier on the running loop; an interval of 0 leaves it disabled.
+        """
+        if self.interval <= 0 or self.running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def process(self, db: AsyncSession, after_id: int = 0) -> Tuple[int, int]:
+        """
+        Verify the oldest pending attestations above `after_id` and commit
+        their outcomes. Returns (rows read, last id read).
+        """
+        start = time.perf_counter()
+        model = AttestationModel
+        rows = (await db.execute(
+            select(
+                model.id, model.issuer, model.subject, model.attestation_type,
+                model.timestamp, model.signature, model.signature_digest, model.anchor
+            )
+            .where(model.status == PENDING, model.id > after_id)
+            .order_by(model.id)
+            .limit(self.batch_size)
+        )).all()
+        if not rows:
+            return 0, after_id
+
+        errors = await check_signatures(db, rows)
+        # Pending rows normally carry a digest the unique index already
+        # checked; this catches rows stored without one, which get theirs
+        # when promoted
+        checked = [i for i, error in enumerate(errors) if error is None]
+        replays = await find_replays(db, [rows[i] for i in checked], [rows[i].id for i in checked])
+        for i, replayed in zip(checked, replays):
+            if replayed:
+                errors[i] = REPLAYED_SIGNATURE
+        valid = [row.id for row, error in zip(rows, errors) if error is None]
+        invalid = [row.id for row, error in zip(rows, errors) if error is not None]
+
+        undigested = [
+            {"id": row.id, "signature_digest": signature_digest(row.signature)}
+            for row, error in zip(rows, errors) if error is None and row.signature_digest is None
+        ]
+        if undigested:
+            await db.execute(update(model).execution_options(synchronize_session=False), undigested)
+
+        promoted = []
+        for chunk in chunks(valid):
+            promoted.extend((await db.execute(
+                update(model)
+                .where(model.id.in_(chunk), model.status == PENDING)
+                .values(status=VERIFIED)
+                .returning(model.id, model.issuer, model.subject, model.attestation_type, model.timestamp)
+                .execution_options(synchronize_session=False)
+            )).all())
+        promoted.sort(key=lambda row: row.id)
+        await record_attestations(db, ((r.subject, r.issuer, r.attestation_type) for r in promoted))
+        await append_attestations(db, (attestation_record(*r) for r in promoted))
+
+        quarantined = []
+        for chunk in chunks(invalid):
+            quarantined.extend((await db.scalars(
+                update(model)
+                .where(model.id.in_(chunk), model.status == PENDING)
+                .values(status=QUARANTINED)
+                .returning(model.id)
+                .execution_options(synchronize_session=False)
+            )).all())
+        reasons = {row.id: error for row, error in zip(rows, errors)}
+        await append_events(db, sorted(
+            [(ATTESTATION_VERIFIED, {"id": r.id, "subject": r.subject}) for r in promoted]
+            + [(ATTESTATION_QUARANTINED, {"id": att_id, "error": reasons[att_id]}) for att_id in quarantined],
+            key=lambda e: e[1]["id"]
+        ))
+        await db.commit()
+
+        self.batches += 1
+        self.verified += len(promoted)
+        self.quarantined += len(quarantined)
+        self.stale += len(rows) - len(promoted) - len(quarantined)
+        self.last_batch_size = len(rows)
+        self.last_batch_ms = (time.perf_counter() - start) * 1000
+        return len(rows), rows[-1].id
+
+    async def run_once(self) -> int:
+        """
+        Drain the pending attestations as they stand. Returns the number of
+        rows processed.
+        """
+        processed, last_id = 0, 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                count, last_id = await self.process(db, last_id)
+            processed += count
+            if count < self.batch_size:
+                return processed
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                self.failures += 1
+                logger.exception("Signature verifier run failed")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "policy": SIGNATURE_POLICY,
+            "running": self.running,
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "verified": self.verified,
+            "quarantined": self.quarantined,
+            "stale": self.stale,
+            "failures": self.failures,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": round(self.last_batch_ms, 3),
+            "last_throughput_per_sec": round(self.last_batch_size / (self.last_batch_ms / 1000), 1)
+            if self.last_batch_ms else 0.0
+        }
+
+signature_verifier = SignatureVerifier()
@@ -0,0 +1,19 @@
+# SQL helpers shared by the services
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Rows per multi-VALUES statement; keeps SQLite under its bound-parameter limit
+CHUNK_SIZE = 1000
+
+def dialect_insert(db: AsyncSession, model):
+    """
+    INSERT construct supporting ON CONFLICT for the session's backend.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+def chunks(items: list, size: int = CHUNK_SIZE):
+    for offset in range(0, len(items), size):
+        yield items[offset:offset + size]
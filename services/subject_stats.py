@@ -0,0 +1,184 @@
+# Incremental maintenance of the subject_stats counters
+#
+# Every write path that inserts attestations calls record_attestations() in
+# the same transaction, so the counters commit or roll back with the rows
+# they describe. rebuild_subject_stats() recomputes everything from the raw
+# attestations table and check_subject_stats() reports any drift. Rows held
+# back by signature enforcement (pending or quarantined, see
+# services/signatures.py) are not counted; the signature verifier records a
+# pending row when it promotes it.
+
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.attestation import HIDDEN_STATUSES, AttestationModel
+from models.subject_stats import SubjectStatsModel, SubjectTypeCountModel, SubjectIssuerModel
+from services.sql import chunks, dialect_insert
+
+async def record_attestations(db: AsyncSession, attestations: Iterable[Tuple[str, str, str]]) -> None:
+    """
+    Add (subject, issuer, attestation_type) triples to the counters.
+    Does not commit; call inside the transaction that inserts the attestations.
+    """
+    per_subject = Counter()
+    per_type = Counter()
+    per_issuer = Counter()
+    for subject, issuer, attestation_type in attestations:
+        per_subject[subject] += 1
+        per_type[(subject, attestation_type)] += 1
+        per_issuer[(subject, issuer)] += 1
+
+    if not per_subject:
+        return
+
+    for chunk in chunks(list(per_type.items())):
+        stmt = dialect_insert(db, SubjectTypeCountModel).values([
+            {"subject": subject, "attestation_type": attestation_type, "count": n}
+            for (subject, attestation_type), n in chunk
+        ])
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=["subject", "attestation_type"],
+            set_={"count": SubjectTypeCountModel.count + stmt.excluded.count}
+        ))
+
+    # A pair whose count after the upsert equals this batch's increment did
+    # not exist before, i.e. the issuer is new for that subject
+    new_issuers = Counter()
+    for chunk in chunks(list(per_issuer.items())):
+        stmt = dialect_insert(db, SubjectIssuerModel).values([
+            {"subject": subject, "issuer": issuer, "count": n}
+            for (subject, issuer), n in chunk
+        ])
+        result = await db.execute(stmt.on_conflict_do_update(
+            index_elements=["subject", "issuer"],
+            set_={"count": SubjectIssuerModel.count + stmt.excluded.count}
+        ).returning(SubjectIssuerModel.subject, SubjectIssuerModel.issuer, SubjectIssuerModel.count))
+        for subject, issuer, count in result:
+            if count == per_issuer[(subject, issuer)]:
+                new_issuers[subject] += 1
+
+    now = datetime.utcnow()
+    for chunk in chunks(list(per_subject.items())):
+        stmt = dialect_insert(db, SubjectStatsModel).values([
+            {
+                "subject": subject,
+                "total_count": n,
+                "distinct_issuers": new_issuers[subject],
+                "updated_at": now
+            }
+            for subject, n in chunk
+        ])
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=["subject"],
+            set_={
+                "total_count": SubjectStatsModel.total_count + stmt.excluded.total_count,
+                "distinct_issuers": SubjectStatsModel.distinct_issuers + stmt.excluded.distinct_issuers,
+                "updated_at": stmt.excluded.updated_at
+            }
+        ))
+
+async def get_subject_stats(db: AsyncSession, subject: str) -> Dict:
+    """
+    Counters for one subject; all zero if it has never been attested.
+    """
+    stats = await db.get(SubjectStatsModel, subject)
+    by_type = dict((await db.execute(
+        select(SubjectTypeCountModel.attestation_type, SubjectTypeCountModel.count)
+        .where(SubjectTypeCountModel.subject == subject)
+    )).all()) if stats else {}
+
+    return {
+        "subject": subject,
+        "total_count": stats.total_count if stats else 0,
+        "distinct_issuers": stats.distinct_issuers if stats else 0,
+        "by_type": by_type
+    }
+
+async def get_attestation_count(db: AsyncSession, subject: str) -> int:
+    """
+    Total attestations about a subject, read from the counters in O(1).
+    """
+    count = await db.scalar(
+        select(SubjectStatsModel.total_count).where(SubjectStatsModel.subject == subject)
+    )
+    return count or 0
+
+async def rebuild_subject_stats(db: AsyncSession) -> int:
+    """
+    Recompute every counter from the attestations table and commit.
+    Returns the number of subjects.
+    """
+    await db.execute(delete(SubjectTypeCountModel))
+    await db.execute(delete(SubjectIssuerModel))
+    await db.execute(delete(SubjectStatsModel))
+
+    await db.execute(SubjectTypeCountModel.__table__.insert().from_select(
+        ["subject", "attestation_type", "count"],
+        select(AttestationModel.subject, AttestationModel.attestation_type, func.count())
+        .where(AttestationModel.status.not_in(HIDDEN_STATUSES))
+        .group_by(AttestationModel.subject, AttestationModel.attestation_type)
+    ))
+    await db.execute(SubjectIssuerModel.__table__.insert().from_select(
+        ["subject", "issuer", "count"],
+        select(AttestationModel.subject, AttestationModel.issuer, func.count())
+        .where(AttestationModel.status.not_in(HIDDEN_STATUSES))
+        .group_by(AttestationModel.subject, AttestationModel.issuer)
+    ))
+    await db.execute(SubjectStatsModel.__table__.insert().from_select(
+        ["subject", "total_count", "distinct_issuers", "updated_at"],
+        select(
+            SubjectIssuerModel.subject,
+            func.sum(SubjectIssuerModel.count),
+            func.count(),
+            func.current_timestamp()
+        ).group_by(SubjectIssuerModel.subject)
+    ))
+
+    subjects = await db.scalar(select(func.count()).select_from(SubjectStatsModel))
+    await db.commit()
+    return subjects
+
+async def check_subject_stats(db: AsyncSession) -> List[str]:
+    """
+    Compare the counters with the raw attestations table.
+    Returns the sorted subjects whose counters disagree (empty if consistent).
+    """
+    expected_totals = select(
+        AttestationModel.subject,
+        func.count(),
+        func.count(AttestationModel.issuer.distinct())
+    ).where(AttestationModel.status.not_in(HIDDEN_STATUSES)).group_by(AttestationModel.subject)
+    stored_totals = select(
+        SubjectStatsModel.subject,
+        SubjectStatsModel.total_count,
+        SubjectStatsModel.distinct_issuers
+    ).where(SubjectStatsModel.total_count > 0)
+
+    expected_types = select(
+        AttestationModel.subject,
+        AttestationModel.attestation_type,
+        func.count()
+    ).where(AttestationModel.status.not_in(HIDDEN_STATUSES)).group_by(
+        AttestationModel.subject, AttestationModel.attestation_type
+    )
+    stored_types = select(
+        SubjectTypeCountModel.subject,
+        SubjectTypeCountModel.attestation_type,
+        SubjectTypeCountModel.count
+    ).where(SubjectTypeCountModel.count > 0)
+
+    mismatched = set()
+    for left, right in (
+        (expected_totals, stored_totals),
+        (stored_totals, expected_totals),
+        (expected_types, stored_types),
+        (stored_types, expected_types),
+    ):
+        diff = left.except_(right).subquery()
+        mismatched.update((await db.scalars(select(diff.c[0]))).all())
+
+    return sorted(mismatched)
@@ -0,0 +1,262 @@
+# Sybil-cluster detection over the attestation graph
+#
+# SybilDetector is a batch job: it refreshes the in-memory trust graph
+# (services/trust_graph), which streams only attestations it has not seen
+# yet, reads identity creation times in primary-key chunks, and runs the
+# heuristics in utils/sybil.py off the event loop. Clusters scoring at least
+# BITREP_SYBIL_SCORE_THRESHOLD replace the contents of sybil_clusters and
+# sybil_members in one transaction. A community whose members are exactly a
+# detected ring is stored once, as the ring.
+#
+# Run it with `python manage.py detect-sybils` (e.g. from cron) or
+# POST /graph/sybil/detect. Governance consults sybil_members through
+# flagged_voters(), one primary-key probe per voter; with
+# BITREP_SYBIL_VOTE_POLICY=reject, votes from flagged identities are refused.
+# The default, off, only reports clusters.
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Iterable, Optional, Set
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.connection import AsyncSessionLocal
+from models.identity import UserIdentityModel
+from models.sybil import SybilClusterModel, SybilMemberModel
+from services.sql import chunks
+from services.trust_graph import GRAPH_LOAD_CHUNK, TrustGraphIndex, trust_graph
+from utils.sybil import BURST_WINDOW_SECONDS, Clusters, analyze
+
+SYBIL_MIN_CLUSTER = int(os.getenv("BITREP_SYBIL_MIN_CLUSTER", "4"))
+SYBIL_MAX_CLUSTER = int(os.getenv("BITREP_SYBIL_MAX_CLUSTER", "1000"))
+SYBIL_SCORE_THRESHOLD = float(os.getenv("BITREP_SYBIL_SCORE_THRESHOLD", "0.75"))
+SYBIL_BURST_WINDOW = float(os.getenv("BITREP_SYBIL_BURST_WINDOW", str(BURST_WINDOW_SECONDS)))
+SYBIL_ITERATIONS = int(os.getenv("BITREP_SYBIL_ITERATIONS", "20"))
+# "off" or "reject": whether governance refuses votes from flagged identities
+SYBIL_VOTE_POLICY = os.getenv("BITREP_SYBIL_VOTE_POLICY", "off")
+
+SYBIL_FLAGGED = "Voter is flagged as part of a Sybil cluster"
+
+EPOCH = datetime(1970, 1, 1)
+
+async def load_creation_times(db: AsyncSession, ids: dict, chunk_size: int = GRAPH_LOAD_CHUNK) -> np.ndarray:
+    """
+    Identity creation times in seconds, aligned to the node ids in `ids`
+    (username -> id). Nodes without an identity get NaN.
+    """
+    created = np.full(len(ids), np.nan)
+    last_id = 0
+    while True:
+        rows = (await db.execute(
+            select(UserIdentityModel.id, UserIdentityModel.username, UserIdentityModel.created_at)
+            .where(UserIdentityModel.id > last_id)
+            .order_by(UserIdentityModel.id)
+            .limit(chunk_size)
+        )).all()
+        for row in rows:
+            node = ids.get(row.username)
+            if node is not None and row.created_at is not None:
+                created[node] = (row.created_at - EPOCH).total_seconds()
+        if len(rows) < chunk_size:
+            return created
+        last_id = rows[-1].id
+
+async def flagged_voters(db: AsyncSession, voters: Iterable[str]) -> Set[str]:
+    """
+    The voters that belong to a flagged Sybil cluster.
+    """
+    flagged = set()
+    for chunk in chunks(sorted(set(voters))):
+        flagged.update((await db.scalars(
+            select(SybilMemberModel.username).where(SybilMemberModel.username.in_(chunk)).distinct()
+        )).all())
+    return flagged
+
+async def rejected_voters(db: AsyncSession, voters: Iterable[str]) -> Set[str]:
+    """
+    The voters whose votes governance must refuse under the vote policy.
+    """
+    if SYBIL_VOTE_POLICY != "reject":
+        return set()
+    return await flagged_voters(db, voters)
+
+async def top_sybil_clusters(db: AsyncSession, min_score: float, limit: int):
+    """
+    Flagged clusters with their members, highest score first.
+    """
+    clusters = list((await db.scalars(
+        select(SybilClusterModel)
+        .where(SybilClusterModel.score >= min_score)
+        .order_by(SybilClusterModel.score.desc(), SybilClusterModel.id)
+        .limit(limit)
+    )).all())
+    members = {cluster.id: [] for cluster in clusters}
+    for chunk in chunks(list(members)):
+        rows = await db.execute(
+            select(SybilMemberModel.cluster_id, SybilMemberModel.username)
+            .where(SybilMemberModel.cluster_id.in_(chunk))
+            .order_by(SybilMemberModel.cluster_id, SybilMemberModel.username)
+        )
+        for cluster_id, username in rows:
+            members[cluster_id].append(username)
+    return [(cluster, members[cluster.id]) for cluster in clusters]
+
+async def user_sybil_clusters(db: AsyncSession, username: str):
+    """
+    The flagged clusters a user belongs to, highest score first.
+    """
+    return list((await db.scalars(
+        select(SybilClusterModel)
+        .join(SybilMemberModel, SybilMemberModel.cluster_id == SybilClusterModel.id)
+        .where(SybilMemberModel.username == username)
+        .order_by(SybilClusterModel.score.desc())
+    )).all())
+
+def _flagged(clusters: Clusters, threshold: float) -> list:
+    """
+    Indices of clusters at or above the threshold, with communities that
+    duplicate a ring's member set dropped.
+    """
+    keep, rings = [], set()
+    for i in np.argsort(clusters.kind != "ring", kind="stable").tolist():
+        if clusters.score[i] < threshold:
+            continue
+        key = clusters.members[i].tobytes()
+        if clusters.kind[i] == "ring":
+            rings.add(key)
+        elif key in rings:
+            continue
+        keep.append(i)
+    return sorted(keep)
+
+class SybilDetector:
+    """
+    Finds and stores Sybil clusters in the attestation graph.
+    """
+
+    def __init__(
+        self,
+        index: TrustGraphIndex = trust_graph,
+        min_size: int = SYBIL_MIN_CLUSTER,
+        max_size: int = SYBIL_MAX_CLUSTER,
+        threshold: float = SYBIL_SCORE_THRESHOLD,
+        window: float = SYBIL_BURST_WINDOW,
+        iterations: int = SYBIL_ITERATIONS
+    ):
+        self.index = index
+        self.min_size = min_size
+        self.max_size = max_size
+        self.threshold = threshold
+        self.window = window
+        self.iterations = iterations
+        self._running = False
+        self.runs = 0
+        self.last_nodes = 0
+        self.last_edges = 0
+        self.last_candidates = 0
+        self.last_flagged = 0
+        self.last_flagged_members = 0
+        self.last_timings_ms: dict = {}
+        self.last_run_at: Optional[datetime] = None
+
+    def _analyze(self, indptr: np.ndarray, indices: np.ndarray, created: np.ndarray) -> Clusters:
+        n = len(indptr) - 1
+        sources = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+        return analyze(
+            sources, indices.astype(np.int64), n, created,
+            self.min_size, self.max_size, self.iterations, self.window
+        )
+
+    async def run_once(self) -> Optional[dict]:
+        """
+        Detect clusters and replace the stored ones. Returns the run's
+        stats, or None if a run is already in progress.
+        """
+        if self._running:
+            return None
+        self._running = True
+        try:
+            await self._run()
+            return self.stats()
+        finally:
+            self._running = False
+
+    async def _run(self) -> None:
+        timings = {}
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await self.index.refresh(db)
+            indptr, indices, names = self.index.snapshot()
+            timings["load_ms"] = (time.perf_counter() - start) * 1000
+
+            stage = time.perf_counter()
+            created = await load_creation_times(db, {name: i for i, name in enumerate(names)})
+            timings["identities_ms"] = (time.perf_counter() - stage) * 1000
+
+        stage = time.perf_counter()
+        clusters = await asyncio.get_running_loop().run_in_executor(
+            None, self._analyze, indptr, indices, created
+        )
+        flagged = _flagged(clusters, self.threshold)
+        timings["analyze_ms"] = (time.perf_counter() - stage) * 1000
+
+        stage = time.perf_counter()
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(SybilMemberModel))
+            await db.execute(delete(SybilClusterModel))
+            members = []
+            for cluster_id, i in enumerate(flagged, start=1):
+                members.extend(
+                    {"username": names[node], "cluster_id": cluster_id} for node in clusters.members[i].tolist()
+                )
+            for chunk in chunks(list(enumerate(flagged, start=1))):
+                await db.execute(insert(SybilClusterModel), [
+                    {
+                        "id": cluster_id,
+                        "kind": str(clusters.kind[i]),
+                        "size": int(clusters.size[i]),
+                        "density": float(clusters.density[i]),
+                        "mutual_ratio": float(clusters.mutual_ratio[i]),
+                        "isolation": float(clusters.isolation[i]),
+                        "burst_fraction": float(clusters.burst_fraction[i]),
+                        "mean_degree": float(clusters.mean_degree[i]),
+                        "degree_cv": float(clusters.degree_cv[i]),
+                        "score": float(clusters.score[i]),
+                        "detected_at": now
+                    }
+                    for cluster_id, i in chunk
+                ])
+            for chunk in chunks(members):
+                await db.execute(insert(SybilMemberModel), chunk)
+            await db.commit()
+        timings["write_ms"] = (time.perf_counter() - stage) * 1000
+        timings["total_ms"] = (time.perf_counter() - start) * 1000
+
+        self.runs += 1
+        self.last_nodes = len(names)
+        self.last_edges = len(indices)
+        self.last_candidates = len(clusters.score)
+        self.last_flagged = len(flagged)
+        self.last_flagged_members = len(members)
+        self.last_timings_ms = {name: round(ms, 3) for name, ms in timings.items()}
+        self.last_run_at = now
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "nodes": self.last_nodes,
+            "edges": self.last_edges,
+            "candidates": self.last_candidates,
+            "flagged_clusters": self.last_flagged,
+            "flagged_members": self.last_flagged_members,
+            "vote_policy": SYBIL_VOTE_POLICY,
+            **self.last_timings_ms
+        }
+
+sybil_detector = SybilDetector()
@@ -0,0 +1,113 @@
+# In-memory trust graph index over the attestations table
+#
+# Every attestation is an issuer -> subject edge. The index keeps a
+# TrustGraph (utils/graph.py) of all of them in CSR arrays and remembers the
+# highest attestation id it has loaded. refresh() reads only rows above that
+# id, in primary-key order and in chunks of GRAPH_LOAD_CHUNK, and merges
+# them into the arrays, so the first call loads the whole table and later
+# calls pick up new attestations from any process at the cost of one
+# primary-key range query. The /graph endpoints refresh before answering.
+#
+# Attestations whose signature is pending are not loaded yet: a refresh
+# stops in front of the first pending row and resumes there, so the row is
+# added once the signature verifier promotes it and skipped if it is
+# quarantined.
+#
+# Attestations are append-only, so the index never has to drop edges. On
+# Postgres, ids from concurrent transactions can commit out of order; a row
+# committed after a refresh has already moved past its id is not picked up
+# until the process restarts.
+
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.attestation import PENDING, QUARANTINED, AttestationModel
+from utils.graph import TrustGraph
+
+GRAPH_LOAD_CHUNK = int(os.getenv("BITREP_GRAPH_LOAD_CHUNK", "100000"))
+
+class TrustGraphIndex:
+    """
+    Incrementally loaded issuer -> subject graph of all attestations.
+    """
+
+    def __init__(self, chunk_size: int = GRAPH_LOAD_CHUNK):
+        self.chunk_size = chunk_size
+        self.graph = TrustGraph()
+        self.last_id = 0
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.loaded = 0
+        self.last_refresh_ms = 0.0
+        self.last_loaded = 0
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """
+        Load attestations added since the last refresh. Returns the number
+        of edges added.
+        """
+        start = time.perf_counter()
+        added = 0
+        while True:
+            rows = (await db.execute(
+                select(
+                    AttestationModel.id, AttestationModel.issuer, AttestationModel.subject, AttestationModel.status
+                )
+                .where(AttestationModel.id > self.last_id)
+                .order_by(AttestationModel.id)
+                .limit(self.chunk_size)
+            )).all()
+            if not rows:
+                break
+            fetched = len(rows)
+            pending = next((i for i, row in enumerate(rows) if row.status == PENDING), None)
+            if pending is not None:
+                rows = rows[:pending]
+            with self._lock:
+                # A concurrent refresh may already have merged some of these
+                rows = [row for row in rows if row.id > self.last_id]
+                if rows:
+                    edges = [row for row in rows if row.status != QUARANTINED]
+                    self.graph.add_edges([row.issuer for row in edges], [row.subject for row in edges])
+                    self.last_id = rows[-1].id
+                    added += len(edges)
+            if pending is not None or fetched < self.chunk_size:
+                break
+
+        self.refreshes += 1
+        self.loaded += added
+        self.last_loaded = added
+        self.last_refresh_ms = (time.perf_counter() - start) * 1000
+        return added
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Consistent out-adjacency arrays and node names for offline work.
+        """
+        with self._lock:
+            indptr, indices = self.graph.out_adjacency()
+            return indptr, indices, self.graph.names[:]
+
+    def node_id(self, username: str) -> Optional[int]:
+        return self.graph.node_id(username)
+
+    def stats(self) -> dict:
+        graph = self.graph
+        return {
+            "nodes": graph.num_nodes,
+            "edges": graph.num_edges,
+            "memory_bytes": graph.nbytes,
+            "last_attestation_id": self.last_id,
+            "refreshes": self.refreshes,
+            "loaded": self.loaded,
+            "last_loaded": self.last_loaded,
+            "last_refresh_ms": round(self.last_refresh_ms, 3)
+        }
+
+trust_graph = TrustGraphIndex()
@@ -0,0 +1,259 @@
+# Scheduled trust propagation over the attestation graph
+#
+# TrustPropagator refreshes the in-memory trust graph (services/trust_graph),
+# builds the transition matrix from its CSR arrays and runs the propagation
+# in utils/propagation.py off the event loop:
+#
+# - first run: power iteration, warm-started from the scores already in
+#   trust_scores if there are any (e.g. after a restart)
+# - later runs with at most TRUST_INCREMENTAL_FRACTION of the edges new:
+#   residual-push correction of the previous vector
+# - larger changes: power iteration warm-started from the previous vector
+# - no new attestations: nothing to do
+#
+# Only scores that moved by more than TRUST_WRITE_TOLERANCE are upserted
+# into trust_scores, which serves lookups by primary key. TrustScheduler
+# runs this every BITREP_TRUST_INTERVAL seconds (0 disables it, e.g. when
+# `python manage.py recompute-trust` runs from cron).
+#
+# The scores are a graph diagnostic: reputation queries and governance stay
+# on direct attestation counts and one-identity-one-vote.
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.connection import AsyncSessionLocal
+from models.trust import TrustScoreModel
+from services.sql import chunks, dialect_insert
+from services.trust_graph import TrustGraphIndex, trust_graph
+from utils.propagation import DAMPING, solve, transition, update
+
+TRUST_INTERVAL = float(os.getenv("BITREP_TRUST_INTERVAL", "300"))
+TRUST_DAMPING = float(os.getenv("BITREP_TRUST_DAMPING", str(DAMPING)))
+TRUST_TOLERANCE = float(os.getenv("BITREP_TRUST_TOLERANCE", "1e-10"))
+# Largest share of new edges still handled by the incremental update
+TRUST_INCREMENTAL_FRACTION = float(os.getenv("BITREP_TRUST_INCREMENTAL_FRACTION", "0.1"))
+TRUST_WRITE_TOLERANCE = float(os.getenv("BITREP_TRUST_WRITE_TOLERANCE", "1e-12"))
+
+logger = logging.getLogger(__name__)
+
+async def load_trust_scores(db: AsyncSession, names: List[str]) -> Optional[np.ndarray]:
+    """
+    Persisted scores aligned to node ids, or None if none of the names has
+    one. Identities without a stored score get NaN.
+    """
+    ids = {name: i for i, name in enumerate(names)}
+    scores = np.full(len(names), np.nan)
+    found = False
+    for chunk in chunks(names):
+        rows = await db.execute(
+            select(TrustScoreModel.username, TrustScoreModel.score).where(TrustScoreModel.username.in_(chunk))
+        )
+        for username, score in rows:
+            scores[ids[username]] = score
+            found = True
+    return scores if found else None
+
+async def save_trust_scores(db: AsyncSession, names: List[str], scores: np.ndarray, changed: np.ndarray) -> None:
+    """
+    Upsert the scores of the node ids in `changed` and commit.
+    """
+    now = datetime.utcnow()
+    for chunk in chunks(changed.tolist()):
+        stmt = dialect_insert(db, TrustScoreModel).values([
+            {"username": names[i], "score": float(scores[i]), "updated_at": now} for i in chunk
+        ])
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=["username"],
+            set_={"score": stmt.excluded.score, "updated_at": stmt.excluded.updated_at}
+        ))
+    await db.commit()
+
+async def get_trust_score(db: AsyncSession, username: str) -> Optional[TrustScoreModel]:
+    return await db.get(TrustScoreModel, username)
+
+async def top_trust_scores(db: AsyncSession, limit: int) -> List[TrustScoreModel]:
+    return list((await db.scalars(
+        select(TrustScoreModel).order_by(TrustScoreModel.score.desc()).limit(limit)
+    )).all())
+
+class TrustPropagator:
+    """
+    Keeps the trust vector current with the attestation graph.
+    """
+
+    def __init__(
+        self,
+        index: TrustGraphIndex = trust_graph,
+        damping: float = TRUST_DAMPING,
+        tol: float = TRUST_TOLERANCE,
+        incremental_fraction: float = TRUST_INCREMENTAL_FRACTION,
+        write_tolerance: float = TRUST_WRITE_TOLERANCE
+    ):
+        self.index = index
+        self.damping = damping
+        self.tol = tol
+        self.incremental_fraction = incremental_fraction
+        self.write_tolerance = write_tolerance
+        self.scores: Optional[np.ndarray] = None
+        self.edges = 0
+        self._running = False
+        self.runs = 0
+        self.last_mode: Optional[str] = None
+        self.last_iterations = 0
+        self.last_residual = 0.0
+        self.last_matrix_ms = 0.0
+        self.last_solve_ms = 0.0
+        self.last_duration_ms = 0.0
+        self.last_written = 0
+        self.last_run_at: Optional[datetime] = None
+
+    def _compute(self, indptr, indices, n: int, previous: Optional[np.ndarray], mode: str):
+        start = time.perf_counter()
+        t = transition(indptr, indices, n)
+        matrix_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        if mode == "incremental":
+            result = update(t, previous, self.damping, self.tol)
+        else:
+            result = solve(t, self.damping, previous, self.tol)
+        return result, matrix_ms, (time.perf_counter() - start) * 1000
+
+    def _mode(self, edges: int, stored: Optional[np.ndarray], full: bool) -> Tuple[str, Optional[np.ndarray]]:
+        if full:
+            return "full", None
+        if self.scores is None:
+            if stored is None:
+                return "full", None
+            # Identities added since the scores were saved start at the mean
+            return "warm", np.where(np.isnan(stored), np.nanmean(stored), stored)
+        if edges - self.edges <= self.incremental_fraction * edges:
+            return "incremental", self.scores
+        return "warm", self.scores
+
+    async def run_once(self, full: bool = False) -> int:
+        """
+        Bring the scores up to date with the attestations table. Returns the
+        number of scores written; 0 if nothing changed or a run is already
+        in progress.
+        """
+        if self._running:
+            return 0
+        self._running = True
+        try:
+            return await self._run(full)
+        finally:
+            self._running = False
+
+    async def _run(self, full: bool) -> int:
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await self.index.refresh(db)
+            indptr, indices, names = self.index.snapshot()
+            edges, n = len(indices), len(names)
+            if n == 0 or (edges == self.edges and self.scores is not None and not full):
+                return 0
+            stored = await load_trust_scores(db, names) if self.scores is None else None
+
+        mode, previous = self._mode(edges, stored, full)
+        result, matrix_ms, solve_ms = await asyncio.get_running_loop().run_in_executor(
+            None, self._compute, indptr, indices, n, previous, mode
+        )
+
+        # Write only the scores that moved; the first run writes everything
+        known = self.scores if self.scores is not None else stored
+        if known is None:
+            changed = np.arange(n)
+        else:
+            before = np.full(n, -1.0)
+            before[:len(known)] = np.nan_to_num(known, nan=-1.0)
+            changed = np.flatnonzero(np.abs(result.scores - before) > self.write_tolerance)
+        async with AsyncSessionLocal() as db:
+            await save_trust_scores(db, names, result.scores, changed)
+
+        self.scores, self.edges = result.scores, edges
+        self.runs += 1
+        self.last_mode = mode
+        self.last_iterations = result.iterations
+        self.last_residual = result.residual
+        self.last_matrix_ms = matrix_ms
+        self.last_solve_ms = solve_ms
+        self.last_written = len(changed)
+        self.last_run_at = datetime.utcnow()
+        self.last_duration_ms = (time.perf_counter() - start) * 1000
+        return len(changed)
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "nodes": 0 if self.scores is None else len(self.scores),
+            "edges": self.edges,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_mode": self.last_mode,
+            "last_iterations": self.last_iterations,
+            "last_residual": self.last_residual,
+            "last_matrix_ms": round(self.last_matrix_ms, 3),
+            "last_solve_ms": round(self.last_solve_ms, 3),
+            "last_written": self.last_written,
+            "last_duration_ms": round(self.last_duration_ms, 3)
+        }
+
+class TrustScheduler:
+    """
+    Periodically recomputes trust scores.
+    """
+
+    def __init__(self, propagator: TrustPropagator, interval: float = TRUST_INTERVAL):
+        self.propagator = propagator
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """
+        Start the periodic task on the running loop; an interval of 0 leaves it disabled.
+        """
+        if self.interval <= 0 or self.running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.propagator.run_once()
+            except Exception:
+                self.failures += 1
+                logger.exception("Trust propagation run failed")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "failures": self.failures,
+            **self.propagator.stats()
+        }
+
+trust_propagator = TrustPropagator()
+trust_scheduler = TrustScheduler(trust_propagator)
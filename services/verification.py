@@ -0,0 +1,386 @@
+# Batch verification of pending third-party attestations
+#
+# Pending rows (verified = 0) form the queue. A VerificationWorker claims the
+# oldest of them in batches with one UPDATE ... RETURNING through the
+# (verified, timestamp) index, stamping each row with a claim token and a
+# lease. Claims only take rows that are unclaimed or whose lease has expired,
+# so any number of workers can share the queue without double-processing; a
+# worker that dies simply lets its leases run out.
+#
+# Claimed rows are checked concurrently by the verifier registered for their
+# platform, then written back with one bulk UPDATE per outcome. Write-backs
+# are guarded on the claim token, so a result arriving after the lease was
+# taken over is discarded. Verifier errors release the row for a delayed
+# retry, up to VERIFY_MAX_ATTEMPTS.
+#
+# Backpressure: a worker holds at most VERIFY_MAX_BATCHES batches at a time
+# and only claims more when one completes, verifications are capped at
+# VERIFY_CONCURRENCY, and platform requests are further limited by the
+# platform client. Unclaimed rows simply wait in the table.
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.connection import DATABASE_URL, AsyncSessionLocal, is_memory_url
+from models.third_party import ThirdPartyAttestationModel
+from services.platforms import ADAPTERS, PlatformAdapter, PlatformError, PlatformUserNotFound
+from services.sql import chunks
+
+VERIFY_BATCH_SIZE = int(os.getenv("BITREP_VERIFY_BATCH_SIZE", "200"))
+VERIFY_CONCURRENCY = int(os.getenv("BITREP_VERIFY_CONCURRENCY", "32"))
+# The in-memory database has a single shared connection, so batches cannot overlap
+VERIFY_MAX_BATCHES = 1 if is_memory_url(DATABASE_URL) else int(os.getenv("BITREP_VERIFY_MAX_BATCHES", "2"))
+VERIFY_LEASE_SECONDS = float(os.getenv("BITREP_VERIFY_LEASE_SECONDS", "300"))
+VERIFY_RETRY_SECONDS = float(os.getenv("BITREP_VERIFY_RETRY_SECONDS", "60"))
+VERIFY_MAX_ATTEMPTS = int(os.getenv("BITREP_VERIFY_MAX_ATTEMPTS", "5"))
+# Seconds between polls of an empty queue; 0 disables the in-app worker
+VERIFY_INTERVAL = float(os.getenv("BITREP_VERIFY_INTERVAL", "5"))
+
+PENDING = 0
+VERIFIED = 1
+REJECTED = -1
+
+logger = logging.getLogger(__name__)
+
+class PendingAttestation(NamedTuple):
+    id: int
+    username: str
+    platform: str
+    platform_username: str
+    attestation_type: str
+    value: float
+
+class Verifier(ABC):
+    """
+    Checks claimed attestations for one platform. verify() returns, per
+    attestation and in order, True (verified), False (rejected) or None
+    (could not decide now; retry later).
+    """
+
+    @abstractmethod
+    async def verify(self, attestations: Sequence[PendingAttestation], limit: asyncio.Semaphore) -> List[Optional[bool]]:
+        """
+        Outcomes for `attestations`; platform requests hold `limit`.
+        """
+
+class PlatformVerifier(Verifier):
+    """
+    Re-fetches each account through its platform adapter and accepts a
+    claim if the platform currently reports at least the claimed value.
+    Each account is fetched once per batch.
+    """
+
+    def __init__(self, adapter: PlatformAdapter):
+        self.adapter = adapter
+
+    async def _fetch(self, platform_username: str, limit: asyncio.Semaphore):
+        async with limit:
+            try:
+                return {v.attestation_type: v.value for v in await self.adapter.fetch(platform_username)}
+            except PlatformUserNotFound:
+                return {}
+            except PlatformError:
+                return None
+
+    async def verify(self, attestations: Sequence[PendingAttestation], limit: asyncio.Semaphore) -> List[Optional[bool]]:
+        accounts = sorted({a.platform_username for a in attestations})
+        fetched = dict(zip(accounts, await asyncio.gather(*(self._fetch(a, limit) for a in accounts))))
+        outcomes = []
+        for attestation in attestations:
+            values = fetched[attestation.platform_username]
+            if values is None:
+                outcomes.append(None)
+            else:
+                reported = values.get(attestation.attestation_type)
+                outcomes.append(reported is not None and reported >= attestation.value)
+        return outcomes
+
+VERIFIERS: Dict[str, Verifier] = {name: PlatformVerifier(adapter) for name, adapter in ADAPTERS.items()}
+
+def register_verifier(platform: str, verifier: Verifier) -> None:
+    if not isinstance(verifier, Verifier):
+        raise TypeError(f"{type(verifier).__name__} is not a Verifier")
+    VERIFIERS[platform] = verifier
+
+def _claimable(now: datetime):
+    model = ThirdPartyAttestationModel
+    return (
+        model.verified == PENDING,
+        model.platform.in_(sorted(VERIFIERS)),
+        model.verification_attempts < VERIFY_MAX_ATTEMPTS,
+        or_(model.claimed_until.is_(None), model.claimed_until < now)
+    )
+
+async def claim_pending(
+    db: AsyncSession,
+    limit: int,
+    lease_seconds: float = VERIFY_LEASE_SECONDS,
+    now: Optional[datetime] = None
+) -> Tuple[str, List[PendingAttestation]]:
+    """
+    Lease up to `limit` of the oldest claimable pending rows and commit.
+    Returns the claim token and the claimed rows.
+    """
+    model = ThirdPartyAttestationModel
+    now = now or datetime.utcnow()
+    token = uuid.uuid4().hex
+    oldest = (
+        select(model.id)
+        .where(*_claimable(now))
+        .order_by(model.timestamp)
+        .limit(limit)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        oldest = oldest.with_for_update(skip_locked=True)
+    # The conditions are repeated so a row claimed concurrently is never re-leased
+    result = await db.execute(
+        update(model)
+        .where(model.id.in_(oldest.scalar_subquery()), *_claimable(now))
+        .values(claim_token=token, claimed_until=now + timedelta(seconds=lease_seconds))
+        .returning(
+            model.id, model.username, model.platform, model.platform_username,
+            model.attestation_type, model.value
+        )
+        .execution_options(synchronize_session=False)
+    )
+    claimed = [PendingAttestation(*row) for row in result]
+    await db.commit()
+    return token, claimed
+
+async def record_outcomes(
+    db: AsyncSession,
+    token: str,
+    outcomes: Dict[int, Optional[bool]],
+    retry_seconds: float = VERIFY_RETRY_SECONDS,
+    now: Optional[datetime] = None
+) -> int:
+    """
+    Write verification outcomes back with one UPDATE per outcome and commit.
+    Rows no longer held by `token` are left alone. Returns the number of
+    rows updated.
+    """
+    model = ThirdPartyAttestationModel
+    now = now or datetime.utcnow()
+    groups = defaultdict(list)
+    for attestation_id, outcome in outcomes.items():
+        groups[outcome].append(attestation_id)
+
+    updated = 0
+    for outcome, ids in groups.items():
+        if outcome is None:
+            # Not decided: release the lease and hold the row back before retrying
+            values = {"claim_token": None, "claimed_until": now + timedelta(seconds=retry_seconds)}
+        else:
+            values = {"verified": VERIFIED if outcome else REJECTED, "claim_token": None, "claimed_until": None}
+        values["verification_attempts"] = model.verification_attempts + 1
+        for chunk in chunks(ids):
+            result = await db.execute(
+                update(model)
+                .where(model.id.in_(chunk), model.claim_token == token, model.verified == PENDING)
+                .values(values)
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+    await db.commit()
+    return updated
+
+async def verification_queue_depth(db: AsyncSession, now: Optional[datetime] = None) -> dict:
+    """
+    Count third-party attestations by verification state.
+    """
+    model = ThirdPartyAttestationModel
+    now = now or datetime.utcnow()
+    by_status = dict((await db.execute(
+        select(model.verified, func.count()).group_by(model.verified)
+    )).all())
+    leased = await db.scalar(
+        select(func.count()).select_from(model).where(
+            model.verified == PENDING, model.claim_token.is_not(None), model.claimed_until >= now
+        )
+    )
+    exhausted = await db.scalar(
+        select(func.count()).select_from(model).where(
+            model.verified == PENDING, model.verification_attempts >= VERIFY_MAX_ATTEMPTS
+        )
+    )
+    oldest = await db.scalar(select(func.min(model.timestamp)).where(model.verified == PENDING))
+    return {
+        "pending": by_status.get(PENDING, 0),
+        "claimed": leased,
+        "exhausted": exhausted,
+        "verified": by_status.get(VERIFIED, 0),
+        "rejected": by_status.get(REJECTED, 0),
+        "oldest_pending_age_seconds": round((now - oldest).total_seconds(), 3) if oldest else 0.0
+    }
+
+class VerificationWorker:
+    """
+    Claims, verifies and records pending third-party attestations.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = VERIFY_BATCH_SIZE,
+        concurrency: int = VERIFY_CONCURRENCY,
+        max_batches: int = VERIFY_MAX_BATCHES,
+        lease_seconds: float = VERIFY_LEASE_SECONDS,
+        retry_seconds: float = VERIFY_RETRY_SECONDS,
+        interval: float = VERIFY_INTERVAL
+    ):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_batches = max_batches
+        self.lease_seconds = lease_seconds
+        self.retry_seconds = retry_seconds
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.in_flight_batches = 0
+        self.batches = 0
+        self.claimed = 0
+        self.verified = 0
+        self.rejected = 0
+        self.retried = 0
+        self.stale = 0
+        self.failures = 0
+        self.last_batch_ms = 0.0
+        self.last_batch_size = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """
+        Start the worker on the running loop; an interval of 0 leaves it disabled.
+        """
+        if self.interval <= 0 or self.running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def claim(self) -> Tuple[str, List[PendingAttestation]]:
+        async with AsyncSessionLocal() as db:
+            token, claimed = await claim_pending(db, self.batch_size, self.lease_seconds)
+        self.claimed += len(claimed)
+        return token, claimed
+
+    async def process(self, token: str, claimed: Sequence[PendingAttestation], limit: asyncio.Semaphore) -> None:
+        """
+        Verify one claimed batch and record the outcomes.
+        """
+        start = time.perf_counter()
+        by_platform = defaultdict(list)
+        for attestation in claimed:
+            by_platform[attestation.platform].append(attestation)
+
+        async def verify(platform, attestations):
+            try:
+                return await VERIFIERS[platform].verify(attestations, limit)
+            except Exception:
+                logger.exception("Verifier for %s failed", platform)
+                return [None] * len(attestations)
+
+        results = await asyncio.gather(*(verify(p, a) for p, a in by_platform.items()))
+        outcomes = {
+            attestation.id: outcome
+            for attestations, platform_outcomes in zip(by_platform.values(), results)
+            for attestation, outcome in zip(attestations, platform_outcomes)
+        }
+
+        async with AsyncSessionLocal() as db:
+            updated = await record_outcomes(db, token, outcomes, self.retry_seconds)
+
+        self.batches += 1
+        self.verified += sum(1 for o in outcomes.values() if o is True)
+        self.rejected += sum(1 for o in outcomes.values() if o is False)
+        self.retried += sum(1 for o in outcomes.values() if o is None)
+        self.stale += len(outcomes) - updated
+        self.last_batch_size = len(claimed)
+        self.last_batch_ms = (time.perf_counter() - start) * 1000
+
+    async def run_once(self) -> int:
+        """
+        Drain the queue as it stands, keeping up to max_batches batches in
+        flight. Returns the number of rows processed.
+        """
+        limit = asyncio.Semaphore(self.concurrency)
+        slots = asyncio.Semaphore(self.max_batches)
+        tasks = set()
+        processed = 0
+
+        async def run_batch(token, claimed):
+            try:
+                await self.process(token, claimed, limit)
+            except Exception:
+                self.failures += 1
+                logger.exception("Verification batch failed")
+            finally:
+                self.in_flight_batches -= 1
+                slots.release()
+
+        try:
+            while True:
+                # Only claim once a batch slot is free, so leases never pile up
+                await slots.acquire()
+                token, claimed = await self.claim()
+                if not claimed:
+                    slots.release()
+                    break
+                processed += len(claimed)
+                self.in_flight_batches += 1
+                task = asyncio.get_running_loop().create_task(run_batch(token, claimed))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks)
+        return processed
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                self.failures += 1
+                logger.exception("Verification worker run failed")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "batch_size": self.batch_size,
+            "concurrency": self.concurrency,
+            "max_batches": self.max_batches,
+            "in_flight_batches": self.in_flight_batches,
+            "batches": self.batches,
+            "claimed": self.claimed,
+            "verified": self.verified,
+            "rejected": self.rejected,
+            "retried": self.retried,
+            "stale": self.stale,
+            "failures": self.failures,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": round(self.last_batch_ms, 3),
+            "last_throughput_per_sec": round(self.last_batch_size / (self.last_batch_ms / 1000), 1)
+            if self.last_batch_ms else 0.0
+        }
+
+verification_worker = VerificationWorker()
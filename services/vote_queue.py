@@ -0,0 +1,124 @@
+# Write-behind queue coalescing single votes into micro-batches
+#
+# With BITREP_VOTE_BATCH_WINDOW_MS > 0, POST /governance/vote hands its vote
+# to the queue instead of running its own transaction. The first vote to
+# arrive opens a batch and waits up to the window (or until the batch holds
+# BITREP_VOTE_BATCH_MAX votes), then applies the whole batch with
+# services.votes.submit_votes(): a handful of set-based statements and one
+# commit. Every caller awaits its own result, so acknowledgements are still
+# per vote and only sent after the batch is committed.
+#
+# The request that opens a batch schedules its flush as a task on the
+# running loop, so there is no long-lived worker to start or stop, and a
+# cancelled request does not strand the rest of its batch.
+
+import asyncio
+import os
+import threading
+import time
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+
+from db.connection import AsyncSessionLocal
+from services.votes import submit_votes
+
+VOTE_BATCH_WINDOW_MS = float(os.getenv("BITREP_VOTE_BATCH_WINDOW_MS", "0"))
+VOTE_BATCH_MAX = int(os.getenv("BITREP_VOTE_BATCH_MAX", "500"))
+
+Vote = Tuple[int, str, int]
+BatchSubmitter = Callable[[Sequence[Vote]], Awaitable[List[Optional[str]]]]
+
+class _Batch:
+    def __init__(self):
+        self.votes: List[Vote] = []
+        self.results: List[asyncio.Future] = []
+        self.full = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+class VoteQueue:
+    """
+    Coalesces concurrently submitted votes into batches of up to `max_batch`,
+    waiting at most `window_ms` after the first vote of a batch.
+    """
+
+    def __init__(self, submitter: BatchSubmitter, window_ms: float = VOTE_BATCH_WINDOW_MS, max_batch: int = VOTE_BATCH_MAX):
+        self.submitter = submitter
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self._batch: Optional[_Batch] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.votes = 0
+        self.failures = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_ms > 0
+
+    async def submit(self, proposal_id: int, voter: str, support: int) -> Optional[str]:
+        """
+        Queue a vote and wait until its batch is committed.
+        Returns None if the vote was counted, otherwise the rejection reason.
+        """
+        result = asyncio.get_running_loop().create_future()
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = _Batch()
+                batch.task = asyncio.get_running_loop().create_task(self._flush(batch))
+            batch.votes.append((proposal_id, voter, support))
+            batch.results.append(result)
+            if len(batch.votes) >= self.max_batch:
+                # Full: close it so later votes open a new batch
+                self._batch = None
+                batch.full.set()
+
+        return await result
+
+    async def _flush(self, batch: _Batch) -> None:
+        try:
+            await asyncio.wait_for(batch.full.wait(), self.window_ms / 1000)
+        except asyncio.TimeoutError:
+            pass
+        with self._lock:
+            if self._batch is batch:
+                self._batch = None
+
+        start = time.perf_counter()
+        try:
+            errors = await self.submitter(batch.votes)
+        except Exception as e:
+            self.failures += 1
+            for result in batch.results:
+                if not result.done():
+                    result.set_exception(e)
+            return
+
+        self.batches += 1
+        self.votes += len(batch.votes)
+        self.last_batch_size = len(batch.votes)
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        for result, error in zip(batch.results, errors):
+            if not result.done():
+                result.set_result(error)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window_ms,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "votes": self.votes,
+            "failures": self.failures,
+            "avg_batch_size": round(self.votes / self.batches, 2) if self.batches else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": round(self.last_flush_ms, 3)
+        }
+
+async def _submit_in_session(votes: Sequence[Vote]) -> List[Optional[str]]:
+    async with AsyncSessionLocal() as db:
+        return await submit_votes(db, votes)
+
+vote_queue = VoteQueue(_submit_in_session)
@@ -0,0 +1,159 @@
+# Set-based vote ingestion
+#
+# submit_votes() applies many votes in one transaction with a fixed number of
+# statements per batch rather than per vote: one lookup each for voter
+# identities and proposals, a multi-row INSERT ... ON CONFLICT DO NOTHING
+# RETURNING that reports which votes were new, and one tally UPDATE per
+# proposal. Used by POST /governance/votes/batch and the vote queue. Under
+# BITREP_SYBIL_VOTE_POLICY=reject, one more lookup refuses voters flagged by
+# the Sybil detector (services/sybil).
+
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.governance import GovernanceProposalModel, ProposalStatus, VoteModel
+from models.identity import UserIdentityModel
+from services.events import append_events, vote_event
+from services.proposal_cache import proposal_cache
+from services.sql import chunks, dialect_insert
+from services.sybil import SYBIL_FLAGGED, rejected_voters
+
+# Each identity counts as one vote
+VOTE_WEIGHT = 1.0
+
+ALREADY_VOTED = "Already voted on this proposal"
+VOTER_NOT_FOUND = "Voter identity not found"
+PROPOSAL_NOT_FOUND = "Proposal not found"
+PROPOSAL_NOT_ACTIVE = "Proposal is not active"
+PROPOSAL_EXPIRED = "Proposal has expired"
+
+# Errors that mean the referenced row does not exist (404 on the single-vote endpoint)
+NOT_FOUND_ERRORS = (VOTER_NOT_FOUND, PROPOSAL_NOT_FOUND)
+
+async def _existing_voters(db: AsyncSession, voters: Set[str]) -> Set[str]:
+    found = set()
+    for chunk in chunks(sorted(voters)):
+        found.update((await db.scalars(
+            select(UserIdentityModel.username).where(UserIdentityModel.username.in_(chunk))
+        )).all())
+    return found
+
+async def _proposal_states(db: AsyncSession, proposal_ids: Set[int]) -> Dict[int, Tuple[ProposalStatus, datetime]]:
+    states = {}
+    for chunk in chunks(sorted(proposal_ids)):
+        result = await db.execute(
+            select(GovernanceProposalModel.id, GovernanceProposalModel.status, GovernanceProposalModel.expires_at)
+            .where(GovernanceProposalModel.id.in_(chunk))
+        )
+        for proposal_id, status, expires_at in result:
+            states[proposal_id] = (status, expires_at)
+    return states
+
+async def submit_votes(db: AsyncSession, votes: Sequence[Tuple[int, str, int]]) -> List[Optional[str]]:
+    """
+    Apply (proposal_id, voter, support) votes and commit once.
+    Returns one entry per vote, in order: None if it was counted, otherwise
+    the reason it was rejected. Within a batch the first vote of a voter on a
+    proposal wins.
+    """
+    errors: List[Optional[str]] = [None] * len(votes)
+    if not votes:
+        return errors
+
+    now = datetime.utcnow()
+    voters = await _existing_voters(db, {voter for _, voter, _ in votes})
+    flagged = await rejected_voters(db, voters)
+    states = await _proposal_states(db, {proposal_id for proposal_id, _, _ in votes})
+
+    expired = set()
+    pending: Dict[Tuple[int, str], int] = {}
+    for i, (proposal_id, voter, support) in enumerate(votes):
+        state = states.get(proposal_id)
+        if voter not in voters:
+            errors[i] = VOTER_NOT_FOUND
+        elif voter in flagged:
+            errors[i] = SYBIL_FLAGGED
+        elif state is None:
+            errors[i] = PROPOSAL_NOT_FOUND
+        elif state[0] != ProposalStatus.ACTIVE:
+            errors[i] = PROPOSAL_NOT_ACTIVE
+        elif state[1] < now:
+            errors[i] = PROPOSAL_EXPIRED
+            expired.add(proposal_id)
+        elif (proposal_id, voter) in pending:
+            errors[i] = ALREADY_VOTED
+        else:
+            pending[(proposal_id, voter)] = i
+
+    # Rows that already existed are skipped by the unique index
+    inserted = set()
+    for chunk in chunks(list(pending.items())):
+        result = await db.execute(
+            dialect_insert(db, VoteModel).values([
+                {
+                    "proposal_id": proposal_id,
+                    "voter": voter,
+                    "vote_value": VOTE_WEIGHT,
+                    "support": votes[i][2],
+                    "timestamp": now
+                }
+                for (proposal_id, voter), i in chunk
+            ]).on_conflict_do_nothing(
+                index_elements=["proposal_id", "voter"]
+            ).returning(VoteModel.proposal_id, VoteModel.voter)
+        )
+        inserted.update(map(tuple, result.all()))
+
+    tallies: Dict[int, List[float]] = {}
+    for key, i in pending.items():
+        if key not in inserted:
+            errors[i] = ALREADY_VOTED
+            continue
+        tally = tallies.setdefault(key[0], [0.0, 0.0])
+        tally[0 if votes[i][2] > 0 else 1] += VOTE_WEIGHT
+
+    for proposal_id, (votes_for, votes_against) in tallies.items():
+        result = await db.execute(
+            update(GovernanceProposalModel)
+            .where(
+                GovernanceProposalModel.id == proposal_id,
+                GovernanceProposalModel.status == ProposalStatus.ACTIVE,
+                GovernanceProposalModel.expires_at >= now
+            )
+            .values(
+                votes_for=GovernanceProposalModel.votes_for + votes_for,
+                votes_against=GovernanceProposalModel.votes_against + votes_against
+            )
+        )
+        if result.rowcount == 0:
+            # Closed by a concurrent finalize between the lookup and the update
+            closed = [voter for (p, voter), i in pending.items() if p == proposal_id and errors[i] is None]
+            for chunk in chunks(closed):
+                await db.execute(delete(VoteModel).where(
+                    VoteModel.proposal_id == proposal_id,
+                    VoteModel.voter.in_(chunk)
+                ))
+            for voter in closed:
+                errors[pending[(proposal_id, voter)]] = PROPOSAL_NOT_ACTIVE
+
+    if expired:
+        await db.execute(
+            update(GovernanceProposalModel)
+            .where(
+                GovernanceProposalModel.id.in_(expired),
+                GovernanceProposalModel.status == ProposalStatus.ACTIVE
+            )
+            .values(status=ProposalStatus.EXPIRED)
+        )
+
+    await append_events(db, (
+        vote_event(proposal_id, voter, votes[i][2], VOTE_WEIGHT, now)
+        for (proposal_id, voter), i in pending.items() if errors[i] is None
+    ))
+    await db.commit()
+    if tallies or expired:
+        proposal_cache.invalidate()
+    return errors
@@ -1,30 +1,68 @@
 # Test configuration and fixtures
+#
+# The suite runs against a throwaway database selected with --db:
+#   pytest --db=file     file-backed SQLite in WAL mode (default)
+#   pytest --db=memory   shared in-memory SQLite
+# BITREP_DATABASE_URL, if already set, takes precedence (e.g. a Postgres URL).
 
+import os
+import shutil
+import tempfile
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from db.connection import Base
-from main import app
-import os
 
-# Create test database
-TEST_DATABASE_URL = "sqlite:///./test_bitrep.db"
+_test_dir = tempfile.mkdtemp(prefix="bitrep-test-")
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--db",
+        choices=("file", "memory"),
+        default="file",
+        help="database backing the test run (default: file-backed WAL SQLite)"
+    )
+
+def pytest_configure(config):
+    # Must run before any test module imports db.connection / main
+    # SQLite's busy handler polls rather than queueing, so with thousands of
+    # concurrent writers (test_governance_votes) a single wait can exceed the
+    # 5 s default; the stress tests check correctness, not lock fairness
+    os.environ.setdefault("BITREP_SQLITE_BUSY_TIMEOUT", "60000")
+    # Platform requests go to the in-process mock server; no need to pace them
+    for platform in ("GITHUB", "EBAY", "LINKEDIN", "STACKOVERFLOW"):
+        os.environ.setdefault(f"BITREP_{platform}_RATE_LIMIT", "0")
+    if config.getoption("--db") == "memory":
+        os.environ.setdefault("BITREP_DATABASE_URL", "sqlite://")
+    else:
+        os.environ.setdefault(
+            "BITREP_DATABASE_URL",
+            f"sqlite:///{os.path.join(_test_dir, 'test_bitrep.db')}"
+        )
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_test_dir, ignore_errors=True)
+
+@pytest.fixture(scope="session", autouse=True)
+def mock_platforms():
+    """Serve every platform adapter from the in-process mock platform server."""
+    from services.platforms import platform_client
+    from services.platforms.mock_server import create_mock_app
+    mock_app = create_mock_app()
+    platform_client.configure(base_url="http://mock-platforms", transport=httpx.ASGITransport(app=mock_app))
+    yield mock_app
 
 @pytest.fixture(scope="module")
 def test_db():
-    """Create a test database."""
-    engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+    """The engine the application is bound to for this test run."""
+    from db.connection import Base, engine
     Base.metadata.create_all(bind=engine)
     yield engine
-    Base.metadata.drop_all(bind=engine)
-    # Clean up test database
-    if os.path.exists("./test_bitrep.db"):
-        os.remove("./test_bitrep.db")
 
 @pytest.fixture(scope="module")
 def client(test_db):
     """Create a test client."""
+    from main import app
     return TestClient(app)
 
 @pytest.fixture
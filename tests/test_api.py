@@ -3,6 +3,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from main import app
+from utils.crypto import sign_attestation, attestation_payload
 import json
 
 client = TestClient(app)
@@ -69,6 +70,106 @@ def test_create_attestation():
     assert "value" not in data
     assert "weight" not in data
 
+def test_create_attestations_batch():
+    """Test batch attestation ingestion from a JSON array."""
+    response = client.post(
+        "/attest/batch",
+        json=[
+            {"issuer": "alice", "subject": "batch_subject", "attestation_type": "peer_verified"},
+            {"issuer": "bob", "subject": "batch_subject"},
+            {"issuer": "carol", "subject": "batch_subject", "attestation_type": "good_work"},
+        ]
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] == 2
+    assert data["failed"] == 1
+    results = data["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert results[0]["id"] is not None and results[0]["error"] is None
+    assert results[1]["id"] is None and "attestation_type" in results[1]["error"]
+    assert results[2]["id"] > results[0]["id"]
+
+def test_create_attestations_batch_ndjson():
+    """Test batch attestation ingestion from NDJSON."""
+    lines = [
+        json.dumps({"issuer": "alice", "subject": "ndjson_subject", "attestation_type": "peer_verified"}),
+        "{not json",
+        json.dumps({"issuer": "bob", "subject": "ndjson_subject", "attestation_type": "nice_job"}),
+    ]
+    response = client.post(
+        "/attest/batch",
+        content="\n".join(lines),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] == 2
+    assert data["results"][1]["error"] == "Invalid JSON"
+
+    response = client.get("/user/ndjson_subject")
+    assert len(response.json()["attestations"]) == 2
+
+def test_create_attestations_batch_rejects_non_array():
+    """Test that a batch body must be an array."""
+    response = client.post("/attest/batch", json={"issuer": "alice"})
+    assert response.status_code == 400
+
+def test_verify_attestations_batch():
+    """Test batch signature verification of attestations against issuer keys."""
+    keys = client.post("/identity/create", json={"username": "verify_batch_issuer"}).json()
+    signed = {"issuer": "verify_batch_issuer", "subject": "bob", "attestation_type": "peer_verified"}
+    signed["signature"] = sign_attestation(
+        attestation_payload(signed["issuer"], signed["subject"], signed["attestation_type"]),
+        keys["private_key"]
+    )
+    tampered = dict(signed, attestation_type="good_work")
+
+    response = client.post(
+        "/attest/verify-batch",
+        json=[
+            signed,
+            tampered,
+            {"issuer": "verify_batch_issuer", "subject": "bob", "attestation_type": "peer_verified"},
+            {"issuer": "unknown_issuer", "subject": "bob", "attestation_type": "peer_verified", "signature": "abc"},
+        ]
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["valid"] == 1
+    assert data["invalid"] == 3
+    assert [r["valid"] for r in data["results"]] == [True, False, False, False]
+    assert data["results"][1]["error"] == "Invalid signature"
+    assert data["results"][2]["error"] == "Missing signature"
+    assert data["results"][3]["error"] == "Issuer identity not found"
+
+def test_ed25519_identity_and_mixed_verification():
+    """Test creating an Ed25519 identity and verifying it alongside RSA issuers."""
+    ed = client.post("/identity/create", json={"username": "ed25519_issuer", "key_algorithm": "ed25519"}).json()
+    rsa = client.post("/identity/create", json={"username": "rsa_issuer"}).json()
+    assert ed["key_algorithm"] == "ed25519" and rsa["key_algorithm"] == "rsa-pss-2048"
+    assert client.get("/identity/ed25519_issuer").json()["key_algorithm"] == "ed25519"
+
+    response = client.post("/identity/create", json={"username": "dsa_issuer", "key_algorithm": "dsa"})
+    assert response.status_code == 400
+
+    batch = []
+    for issuer, keys in (("ed25519_issuer", ed), ("rsa_issuer", rsa)):
+        payload = attestation_payload(issuer, "mixed_subject", "peer_verified")
+        batch.append(dict(payload, signature=sign_attestation(payload, keys["private_key"])))
+    # An Ed25519 signature presented for the RSA issuer
+    batch.append(dict(batch[0], issuer="rsa_issuer"))
+
+    results = client.post("/attest/verify-batch", json=batch).json()["results"]
+    assert [r["valid"] for r in results] == [True, True, False]
+
+def test_metrics():
+    """Test that cache counters are exposed."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    stats = response.json()["public_key_cache"]
+    assert {"hits", "misses", "evictions", "size"} <= set(stats)
+
 def test_get_user_attestations():
     """Test getting user attestations (binary model, no reputation score)."""
     # Create some attestations
@@ -98,6 +199,55 @@ def test_get_user_attestations():
     assert "reputation" not in data
     assert len(data["attestations"]) == 2
 
+def test_get_user_attestations_paginated():
+    """Test keyset pagination of a subject's attestations."""
+    client.post(
+        "/attest/batch",
+        json=[
+            {"issuer": f"issuer_{i}", "subject": "paged_subject", "attestation_type": "peer_verified"}
+            for i in range(5)
+        ]
+    )
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/user/paged_subject", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["attestations"]) <= 2
+        seen.extend(a["issuer"] for a in data["attestations"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == [f"issuer_{i}" for i in range(5)]
+
+    response = client.get("/user/paged_subject", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_get_user_attestations_ndjson():
+    """Test streaming a subject's attestations as NDJSON."""
+    client.post(
+        "/attest/batch",
+        json=[
+            {"issuer": f"issuer_{i}", "subject": "streamed_subject", "attestation_type": "peer_verified"}
+            for i in range(3)
+        ]
+    )
+
+    response = client.get("/user/streamed_subject", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [a["issuer"] for a in lines] == ["issuer_0", "issuer_1", "issuer_2"]
+
+    response = client.get("/user/nobody_here", headers={"Accept": "application/x-ndjson"})
+    assert response.status_code == 404
+
 def test_create_governance_proposal():
     """Test creating a governance proposal."""
     # Create identity first
@@ -142,6 +292,31 @@ def test_prove_attestation_threshold():
     assert "threshold" in data
     assert "verified" in data
 
+def test_selective_disclosure_roundtrip():
+    """Test creating and verifying a selective disclosure proof."""
+    for i in range(5):
+        client.post(
+            "/attest",
+            json={"issuer": f"disclosure_issuer_{i}", "subject": "disclosure_user", "attestation_type": "peer_verified"}
+        )
+    
+    response = client.post(
+        "/privacy/selective-disclosure",
+        json={"username": "disclosure_user", "selected_indices": [1, 3]}
+    )
+    assert response.status_code == 200
+    proof = response.json()["proof"]
+    assert proof["total_count"] == 5
+    assert len(proof["disclosed_attestations"]) == 2
+    
+    response = client.post("/privacy/verify-disclosure", json={"proof": proof})
+    assert response.status_code == 200
+    assert response.json()["valid"] is True
+    
+    proof["disclosed_attestations"][0]["issuer"] = "mallory"
+    response = client.post("/privacy/verify-disclosure", json={"proof": proof})
+    assert response.json()["valid"] is False
+
 def test_list_supported_platforms():
     """Test listing supported third-party platforms."""
     response = client.get("/integration/platforms")
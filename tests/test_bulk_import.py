@@ -0,0 +1,126 @@
+# Tests for streaming bulk import of third-party attestations
+
+import asyncio
+import argparse
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from db.connection import AsyncSessionLocal
+from main import app
+from manage import import_third_party
+from models.third_party import ThirdPartyAttestationModel
+from services.bulk_import import parse_records
+
+client = TestClient(app)
+
+def _record(username, i, **overrides):
+    record = {
+        "username": username, "platform": "github", "platform_username": f"gh{i}",
+        "attestation_type": "commits", "value": float(i), "metadata": {"n": i}
+    }
+    record.update(overrides)
+    return record
+
+def _ndjson(records):
+    return "\n".join(json.dumps(r) if isinstance(r, dict) else r for r in records).encode()
+
+def _count(username):
+    async def count():
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(
+                select(func.count()).select_from(ThirdPartyAttestationModel)
+                .where(ThirdPartyAttestationModel.username == username)
+            )
+    return asyncio.run(count())
+
+def test_bulk_import_ndjson_reports_per_record_errors():
+    """Test that valid rows are inserted and bad records are reported by position."""
+    client.post("/identity/create", json={"username": "bulk_ndjson"})
+    body = _ndjson([
+        _record("bulk_ndjson", 0),
+        "{not json",
+        _record("bulk_missing_user", 2),
+        "",
+        _record("bulk_ndjson", 3, value="lots"),
+        _record("bulk_ndjson", 4),
+    ])
+
+    response = client.post("/integration/import/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["records"] == 5
+    assert data["imported"] == 2
+    assert data["failed"] == 3
+    errors = {e["record"]: e["error"] for e in data["errors"]}
+    assert errors[1] == "Invalid JSON"
+    assert errors[2] == "User identity not found"
+    assert errors[3].startswith("value:")
+
+    imported = client.get("/integration/user/bulk_ndjson").json()
+    assert sorted(a["platform_username"] for a in imported) == ["gh0", "gh4"]
+    assert all(a["verified"] == 0 for a in imported)
+
+def test_bulk_import_csv_with_quoted_metadata():
+    """Test CSV input, including a quoted JSON field that spans lines."""
+    client.post("/identity/create", json={"username": "bulk_csv"})
+    body = (
+        "username,platform,platform_username,attestation_type,value,metadata\r\n"
+        'bulk_csv,ebay,seller1,seller_rating,4.5,"{""stars"": 5,\n""count"": 10}"\r\n'
+        "bulk_csv,ebay,seller2,seller_rating,4.0,\r\n"
+        "bulk_csv,ebay,seller3\r\n"
+    ).encode()
+
+    response = client.post("/integration/import/bulk", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["imported"], data["failed"]) == (2, 1)
+    assert data["errors"] == [{"record": 2, "error": "Expected 6 columns, got 3"}]
+
+    bad_header = client.post("/integration/import/bulk", params={"format": "csv"}, content=b"username,platform\nx,y\n")
+    assert bad_header.status_code == 400
+
+def test_bulk_import_resumes_from_checkpoint():
+    """Test that rerunning an import_id skips records already committed."""
+    client.post("/identity/create", json={"username": "bulk_resume"})
+    records = [_record("bulk_resume", i) for i in range(7)]
+    params = {"import_id": "bulk-resume-test"}
+
+    # First attempt only got part of the input through
+    first = client.post("/integration/import/bulk", params=params, content=_ndjson(records[:4])).json()
+    assert (first["resumed_from"], first["imported"]) == (0, 4)
+
+    second = client.post("/integration/import/bulk", params=params, content=_ndjson(records)).json()
+    assert second["resumed_from"] == 4
+    assert (second["records"], second["imported"]) == (7, 7)
+    assert _count("bulk_resume") == 7
+
+def test_parse_records_across_chunk_boundaries():
+    """Test that records split across arbitrary byte chunks parse intact."""
+    body = _ndjson([_record("split", i, metadata={"note": "café"}) for i in range(20)])
+
+    async def parse():
+        async def chunks():
+            for offset in range(0, len(body), 7):
+                yield body[offset:offset + 7]
+        return [record async for record in parse_records(chunks(), "ndjson")]
+
+    records = asyncio.run(parse())
+    assert [r["platform_username"] for r, _ in records] == [f"gh{i}" for i in range(20)]
+    assert records[0][0]["metadata"] == {"note": "café"}
+
+def test_manage_import_command(tmp_path, capsys):
+    """Test the CLI import with a small chunk size and rerun resumption."""
+    client.post("/identity/create", json={"username": "bulk_cli"})
+    path = tmp_path / "partner.ndjson"
+    path.write_bytes(_ndjson([_record("bulk_cli", i) for i in range(25)]))
+    args = argparse.Namespace(file=str(path), format=None, import_id=None, chunk_size=10, show=5)
+
+    assert asyncio.run(import_third_party(args)) == 0
+    assert "Imported 25 of 25 records" in capsys.readouterr().out
+    assert _count("bulk_cli") == 25
+
+    assert asyncio.run(import_third_party(args)) == 0
+    assert "Resumed after record 25" in capsys.readouterr().out
+    assert _count("bulk_cli") == 25
@@ -0,0 +1,68 @@
+# Tests for the canonical attestation encodings
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.canonical import (
+    CANONICAL_V1,
+    CANONICAL_V2,
+    digest,
+    encode_v1,
+    encode_v2,
+    split_signature,
+    tag_signature
+)
+
+def test_v2_layout_is_fixed():
+    """Test the exact bytes of the binary form, so other implementations can match them."""
+    encoded = encode_v2({
+        "issuer": "alice",
+        "subject": "bob",
+        "attestation_type": "peer_verified",
+        "timestamp": datetime(2026, 1, 1),
+        "anchor": None
+    })
+    assert encoded == (
+        b"BRA\x02\x0f"
+        b"\x00\x00\x00\x05alice"
+        b"\x00\x00\x00\x03bob"
+        b"\x00\x00\x00\x0dpeer_verified"
+        + (1767225600 * 1000000).to_bytes(8, "big")
+    )
+    # Key order, explicit None and an equivalent aware timestamp change nothing
+    assert encode_v2({
+        "anchor": None,
+        "timestamp": datetime(2026, 1, 1, 1, tzinfo=timezone(timedelta(hours=1))),
+        "attestation_type": "peer_verified",
+        "subject": "bob",
+        "issuer": "alice"
+    }) == encoded
+
+def test_v2_is_unambiguous():
+    """Test that moving bytes between fields, or dropping one, changes the encoding."""
+    base = {"issuer": "ab", "subject": "c", "attestation_type": "t"}
+    assert encode_v2(base) != encode_v2({"issuer": "a", "subject": "bc", "attestation_type": "t"})
+    assert encode_v2(base) != encode_v2(dict(base, anchor=""))
+    assert encode_v2({"issuer": "é"}) == b"BRA\x02\x01\x00\x00\x00\x02\xc3\xa9"
+
+    with pytest.raises(ValueError):
+        encode_v2(dict(base, value=5))
+    with pytest.raises(ValueError):
+        encode_v2(dict(base, timestamp="2026-01-01"))
+    with pytest.raises(ValueError):
+        encode_v2(dict(base, subject=3))
+
+def test_v1_is_sorted_json_and_versions_are_tagged():
+    """Test the legacy form and the signature version prefix."""
+    fields = {"subject": "bob", "issuer": "alice", "anchor": None}
+    assert encode_v1(fields) == json.dumps(fields, sort_keys=True).encode()
+    assert digest(fields, CANONICAL_V1) != digest(fields, CANONICAL_V2)
+
+    assert tag_signature("c2ln", CANONICAL_V1) == "c2ln"
+    assert split_signature(tag_signature("c2ln", CANONICAL_V2)) == (CANONICAL_V2, "c2ln")
+    assert split_signature("c2ln") == (CANONICAL_V1, "c2ln")
+    for bad in ("v7:c2ln", "x2:c2ln", "v:c2ln"):
+        with pytest.raises(ValueError):
+            split_signature(bad)
@@ -0,0 +1,128 @@
+# Tests for database engine configuration
+
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from db.connection import SQLITE_PRAGMAS, Base, async_url, create_async_db_engine, create_db_engine, is_memory_url
+from models.attestation import AttestationModel
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def memory_engine():
+    engine = create_db_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+def test_is_memory_url():
+    """Test that only in-memory SQLite URLs are recognised as memory databases."""
+    assert is_memory_url("sqlite://")
+    assert is_memory_url("sqlite:///:memory:")
+    assert not is_memory_url("sqlite:///./bitrep.db")
+    assert not is_memory_url("postgresql://localhost/bitrep")
+
+def test_file_engine_applies_pragmas(file_engine):
+    """Test that every pooled connection gets the WAL tuning pragmas."""
+    assert isinstance(file_engine.pool, QueuePool)
+    with file_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_PRAGMAS["busy_timeout"]
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -65536
+
+def test_pragmas_can_be_disabled(tmp_path):
+    """Test that an engine created without pragmas keeps SQLite's defaults."""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'plain.db'}", sqlite_pragmas={})
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+    engine.dispose()
+
+def test_memory_engine_shares_one_database(memory_engine):
+    """Test that sessions on different threads see the same in-memory database."""
+    assert isinstance(memory_engine.pool, StaticPool)
+    Session = sessionmaker(bind=memory_engine)
+
+    def write():
+        with Session() as db:
+            db.add(AttestationModel(issuer="memory_thread", subject="b", attestation_type="t"))
+            db.commit()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    thread.join()
+
+    with Session() as db:
+        assert db.query(AttestationModel).filter(AttestationModel.issuer == "memory_thread").count() == 1
+
+def test_async_engine_shares_memory_database(memory_engine):
+    """Test that the async engine attaches to the same in-memory database as the sync one."""
+    async_engine = create_async_db_engine("sqlite://")
+
+    async def write():
+        async with async_engine.begin() as conn:
+            await conn.execute(
+                AttestationModel.__table__.insert().values(issuer="memory_async", subject="b", attestation_type="t")
+            )
+        await async_engine.dispose()
+
+    asyncio.run(write())
+
+    with sessionmaker(bind=memory_engine)() as db:
+        assert db.query(AttestationModel).filter(AttestationModel.issuer == "memory_async").count() == 1
+
+def test_async_url_maps_drivers():
+    """Test that sync database URLs map to their async drivers."""
+    assert str(async_url("sqlite:///./bitrep.db")) == "sqlite+aiosqlite:///./bitrep.db"
+    assert async_url("postgresql://u@h/db").drivername == "postgresql+asyncpg"
+    assert async_url("sqlite+aiosqlite://").drivername == "sqlite+aiosqlite"
+
+def test_concurrent_writers_and_readers(file_engine):
+    """Test that WAL lets readers run alongside writers without 'database is locked'."""
+    Session = sessionmaker(bind=file_engine)
+    errors = []
+
+    def writer(n):
+        try:
+            for i in range(25):
+                with Session() as db:
+                    db.add(AttestationModel(issuer=f"w{n}", subject="s", attestation_type="t"))
+                    db.commit()
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(25):
+                with Session() as db:
+                    db.query(AttestationModel).filter(AttestationModel.subject == "s").count()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    threads += [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    with Session() as db:
+        assert db.query(AttestationModel).count() == 100
+
+def test_postgres_url_uses_pool_settings():
+    """Test that Postgres engines use the configured pool settings."""
+    pytest.importorskip("psycopg2")
+    engine = create_db_engine("postgresql://bitrep@localhost/bitrep")
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 10
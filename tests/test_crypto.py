@@ -5,8 +5,17 @@ from utils.crypto import (
     generate_keypair,
     sign_attestation,
     verify_signature,
-    hash_private_key
+    verify_signatures_batch,
+    hash_private_key,
+    attestation_payload,
+    PublicKeyCache
 )
+from utils.canonical import CANONICAL_V1, encode_v1
+from utils.suites import ED25519, RSA_PSS_2048, SignatureSuite, get_suite
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from datetime import datetime, timedelta
+import base64
 
 def test_generate_keypair():
     """Test key pair generation."""
@@ -31,8 +40,8 @@ def test_sign_and_verify_attestation():
         "context": "Test attestation"
     }
     
-    # Sign attestation
-    signature = sign_attestation(attestation_data, private_key)
+    # Sign attestation; arbitrary fields need the legacy JSON form
+    signature = sign_attestation(attestation_data, private_key, version=CANONICAL_V1)
     assert signature is not None
     assert len(signature) > 0
     
@@ -52,7 +61,7 @@ def test_verify_invalid_signature():
     }
     
     # Sign attestation
-    signature = sign_attestation(attestation_data, private_key)
+    signature = sign_attestation(attestation_data, private_key, version=CANONICAL_V1)
     
     # Modify data
     modified_data = attestation_data.copy()
@@ -62,6 +71,77 @@ def test_verify_invalid_signature():
     is_valid = verify_signature(modified_data, signature, public_key)
     assert is_valid is False
 
+def test_binary_and_legacy_signatures_verify():
+    """Test that v2 signatures are tagged and bound to their form, and untagged legacy signatures still verify."""
+    public_key, private_key = generate_keypair()
+    payload = attestation_payload("alice", "bob", "peer_verified", timestamp=datetime(2026, 1, 2, 3, 4, 5))
+
+    signature = sign_attestation(payload, private_key)
+    assert signature.startswith("v2:")
+    assert verify_signature(payload, signature, public_key)
+    assert not verify_signature(dict(payload, subject="carol"), signature, public_key)
+    # The same bytes presented as a legacy signature do not verify
+    assert not verify_signature(payload, signature[3:], public_key)
+    assert not verify_signature(payload, "v9:" + signature[3:], public_key)
+
+    # Signed before canonical versions existed: PSS over the raw JSON message
+    legacy_payload = attestation_payload("alice", "bob", "peer_verified")
+    key = serialization.load_pem_private_key(private_key.encode(), password=None)
+    legacy = base64.b64encode(key.sign(
+        encode_v1(legacy_payload),
+        padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
+        hashes.SHA256()
+    )).decode()
+    assert sign_attestation(legacy_payload, private_key, version=CANONICAL_V1).count(":") == 0
+    assert verify_signature(legacy_payload, legacy, public_key)
+    assert verify_signatures_batch([
+        (legacy_payload, legacy, public_key), (payload, signature, public_key), (payload, legacy, public_key)
+    ]) == [True, True, False]
+
+def test_ed25519_suite_and_mixed_batch():
+    """Test Ed25519 keys end to end and one batch mixing them with RSA keys."""
+    ed_public, ed_private = generate_keypair(ED25519)
+    rsa_public, rsa_private = generate_keypair(RSA_PSS_2048)
+    assert "BEGIN PUBLIC KEY" in ed_public and len(ed_public) < len(rsa_public) / 3
+
+    payload = attestation_payload("alice", "bob", "peer_verified")
+    ed_signature = sign_attestation(payload, ed_private)
+    rsa_signature = sign_attestation(payload, rsa_private)
+    assert len(ed_signature) < len(rsa_signature) / 3
+    assert verify_signature(payload, ed_signature, ed_public)
+    assert verify_signature(payload, sign_attestation(payload, ed_private, version=CANONICAL_V1), ed_public)
+    assert not verify_signature(dict(payload, subject="carol"), ed_signature, ed_public)
+    assert not verify_signature(payload, rsa_signature, ed_public)
+
+    items = []
+    expected = []
+    for i in range(40):
+        data = attestation_payload("alice", f"user_{i}", "peer_verified")
+        public_key, private_key = (ed_public, ed_private) if i % 2 else (rsa_public, rsa_private)
+        signature = sign_attestation(data, private_key)
+        if i % 5 == 0:
+            # Checked against the other suite's key
+            public_key = rsa_public if i % 2 else ed_public
+        items.append((data, signature, public_key))
+        expected.append(i % 5 != 0)
+    assert verify_signatures_batch(items) == expected
+
+    with pytest.raises(ValueError):
+        get_suite("dsa-1024")
+
+    class SignOnlySuite(SignatureSuite):
+        name = "sign-only"
+
+        def generate_keypair(self):
+            return generate_keypair(ED25519)
+
+        def sign(self, private_key, digest):
+            return private_key.sign(digest)
+
+    # A suite missing verify fails when constructed, not when first used
+    with pytest.raises(TypeError):
+        SignOnlySuite()
+
 def test_hash_private_key():
     """Test private key hashing."""
     _, private_key = generate_keypair()
@@ -72,3 +152,70 @@ def test_hash_private_key():
     # Same key should produce same hash
     assert hash1 == hash2
     assert len(hash1) == 64  # SHA256 hex digest is 64 characters
+
+def test_verify_signatures_batch():
+    """Test batch verification across issuers, with bad signatures and keys mixed in."""
+    alice_public, alice_private = generate_keypair()
+    bob_public, bob_private = generate_keypair()
+
+    items = []
+    expected = []
+    for i in range(40):
+        data = {"issuer": "alice" if i % 2 else "bob", "subject": f"user_{i}"}
+        private_key = alice_private if i % 2 else bob_private
+        public_key = alice_public if i % 2 else bob_public
+        signature = sign_attestation(data, private_key)
+        if i % 5 == 0:
+            # Signature checked against the wrong issuer's key
+            public_key = bob_public if i % 2 else alice_public
+        items.append((data, signature, public_key))
+        expected.append(i % 5 != 0)
+
+    items.append(({"issuer": "mallory"}, "c2lnbmF0dXJl", "not a pem"))
+    expected.append(False)
+    items.append(({"issuer": "alice"}, None, alice_public))
+    expected.append(False)
+
+    assert verify_signatures_batch(items) == expected
+    assert verify_signatures_batch([]) == []
+
+def test_public_key_cache_hits_and_eviction():
+    """Test that cached keys are reused and the LRU entry is evicted."""
+    cache = PublicKeyCache(maxsize=2)
+    keys = [generate_keypair()[0] for _ in range(3)]
+
+    first = cache.get(keys[0], "alice")
+    assert cache.get(keys[0], "alice") is first
+    cache.get(keys[1], "bob")
+    cache.get(keys[2], "carol")  # evicts alice
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+    assert cache.get(keys[0], "alice") is not first
+    assert cache.stats()["misses"] == 4
+
+def test_public_key_cache_invalidation():
+    """Test that key rotation and newer last_updated stamps drop cached keys."""
+    cache = PublicKeyCache()
+    old_key, _ = generate_keypair()
+    new_key, _ = generate_keypair()
+    updated = datetime(2026, 1, 1)
+
+    first = cache.get(old_key, "alice", updated)
+    assert cache.get(old_key, "alice", updated) is first
+
+    # Same key, newer identity record
+    refreshed = cache.get(old_key, "alice", updated + timedelta(seconds=1))
+    assert refreshed is not first
+
+    # Rotated key replaces the old entry
+    cache.get(new_key, "alice", updated + timedelta(seconds=2))
+    assert cache.stats()["size"] == 1
+    assert cache.stats()["invalidations"] == 2
+
+    cache.invalidate("alice")
+    assert cache.stats()["size"] == 0
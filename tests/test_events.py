@@ -0,0 +1,117 @@
+# Tests for the event log and the GET /events change feed
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from db.connection import DATABASE_URL, AsyncSessionLocal, is_memory_url
+from main import app
+from models.event import EventModel
+from services import events
+
+client = TestClient(app)
+
+def _run(coro_fn):
+    async def wrapper():
+        async with AsyncSessionLocal() as db:
+            return await coro_fn(db)
+    return asyncio.run(wrapper())
+
+def _last_seq() -> int:
+    return _run(lambda db: db.scalar(select(func.coalesce(func.max(EventModel.seq), 0))))
+
+def test_write_paths_append_events_in_order():
+    """Test that every write path appends its events and the feed pages through them."""
+    start = _last_seq()
+    client.post("/identity/create", json={"username": "events_voter"})
+    client.post("/attest", json={"issuer": "events_voter", "subject": "events_subject", "attestation_type": "peer_verified"})
+    client.post("/attest/batch", json=[
+        {"issuer": f"events_issuer_{i}", "subject": "events_subject", "attestation_type": "endorsement"} for i in range(2)
+    ])
+    proposal = client.post(
+        "/governance/proposal",
+        json={"title": "Events", "description": "d", "proposer": "events_voter", "days_until_expiry": 7}
+    ).json()
+    client.post("/governance/vote", json={"proposal_id": proposal["id"], "voter": "events_voter", "support": 1})
+    client.post("/governance/votes/batch", json=[{"proposal_id": proposal["id"], "voter": "events_voter", "support": 1}])
+    client.post("/integration/import", json={
+        "username": "events_voter", "platform": "github", "platform_username": "gh",
+        "attestation_type": "commits", "value": 3.0, "metadata": {}
+    })
+    client.post("/integration/import/bulk", content=json.dumps({
+        "username": "events_voter", "platform": "github", "platform_username": "gh",
+        "attestation_type": "stars", "value": 1.0, "metadata": {}
+    }))
+
+    page = client.get("/events", params={"after": start, "limit": 1000}).json()
+    assert [e["kind"] for e in page["events"]] == [
+        "identity.created", "attestation.created", "attestation.created", "attestation.created",
+        "vote.cast", "third_party.created", "third_party.created"
+    ]
+    seqs = [e["seq"] for e in page["events"]]
+    assert seqs == sorted(seqs) and page["next_after"] == seqs[-1]
+    identity, attestation, _, _, vote, imported, bulk = (e["data"] for e in page["events"])
+    assert identity["username"] == "events_voter" and identity["key_algorithm"] == "rsa-pss-2048"
+    assert attestation["subject"] == "events_subject" and attestation["status"] == "unverified"
+    assert vote == {**vote, "proposal_id": proposal["id"], "voter": "events_voter", "support": 1}
+    assert imported["attestation_type"] == "commits" and bulk["attestation_type"] == "stars"
+
+    # Batched paging and kind filters
+    first = client.get("/events", params={"after": start, "limit": 2}).json()
+    assert [e["seq"] for e in first["events"]] == seqs[:2]
+    rest = client.get("/events", params={"after": first["next_after"], "limit": 1000}).json()
+    assert [e["seq"] for e in rest["events"]] == seqs[2:]
+    filtered = client.get("/events", params={"after": start, "kinds": "vote.cast,identity.created"}).json()
+    assert [e["kind"] for e in filtered["events"]] == ["identity.created", "vote.cast"]
+
+    empty = client.get("/events", params={"after": seqs[-1]}).json()
+    assert empty == {"events": [], "next_after": seqs[-1]}
+
+def test_server_sent_events_resume_from_last_event_id():
+    """Test the SSE stream format and resuming with Last-Event-ID."""
+    start = _last_seq()
+    for i in range(3):
+        client.post("/attest", json={"issuer": "events_sse", "subject": f"events_sse_{i}", "attestation_type": "peer_verified"})
+
+    response = client.get("/events", params={"after": start, "format": "sse", "timeout": 0, "limit": 2})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = [frame for frame in response.text.split("\n\n") if frame.startswith("id:")]
+    assert len(frames) == 3
+    lines = frames[0].split("\n")
+    assert lines[0] == f"id: {start + 1}" and lines[1] == "event: attestation.created"
+    assert json.loads(lines[2][len("data: "):])["data"]["subject"] == "events_sse_0"
+
+    response = client.get(
+        "/events",
+        params={"timeout": 0},
+        headers={"Accept": "text/event-stream", "Last-Event-ID": str(start + 2)}
+    )
+    assert [frame.split("\n")[0] for frame in response.text.split("\n\n") if frame.startswith("id:")] == [f"id: {start + 3}"]
+    assert client.get("/events", headers={"Last-Event-ID": "abc"}).status_code == 400
+
+@pytest.mark.skipif(is_memory_url(DATABASE_URL), reason="the in-memory database has a single shared connection")
+def test_long_poll_wakes_on_commit(monkeypatch):
+    """Test that a waiting long-poll returns as soon as an event is committed."""
+    # Without the commit notification the poll would sleep for the full wait
+    monkeypatch.setattr(events, "EVENTS_POLL_INTERVAL", 30)
+    start = _last_seq()
+    result = {}
+
+    def poll():
+        began = time.perf_counter()
+        result["page"] = client.get("/events", params={"after": start, "wait": 20}).json()
+        result["seconds"] = time.perf_counter() - began
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    time.sleep(0.3)
+    client.post("/attest", json={"issuer": "events_poll", "subject": "events_poll", "attestation_type": "peer_verified"})
+    poller.join(timeout=25)
+
+    assert [e["data"]["issuer"] for e in result["page"]["events"]] == ["events_poll"]
+    assert result["seconds"] < 5
@@ -0,0 +1,212 @@
+# Tests for atomic vote casting, including a concurrent stress run
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert, select, update
+
+from db.connection import DATABASE_URL, AsyncSessionLocal, is_memory_url
+from main import app
+from models.governance import GovernanceProposalModel, ProposalStatus, VoteModel
+from models.identity import UserIdentityModel
+from services.vote_queue import VoteQueue, vote_queue
+
+client = TestClient(app)
+
+STRESS_VOTERS = 2000
+
+def _run(coro_fn):
+    async def wrapper():
+        async with AsyncSessionLocal() as db:
+            return await coro_fn(db)
+    return asyncio.run(wrapper())
+
+def _create_voters(prefix, count):
+    """Insert identities directly; generating thousands of RSA keys is not under test."""
+    async def create(db):
+        await db.execute(insert(UserIdentityModel), [
+            {"username": f"{prefix}_{i}", "public_key": f"unused-{prefix}-{i}", "verified": False}
+            for i in range(count)
+        ])
+        await db.commit()
+    _run(create)
+    return [f"{prefix}_{i}" for i in range(count)]
+
+def _create_proposal(proposer):
+    client.post("/identity/create", json={"username": proposer})
+    response = client.post(
+        "/governance/proposal",
+        json={"title": "Votes", "description": "d", "proposer": proposer, "days_until_expiry": 7}
+    )
+    return response.json()["id"]
+
+def test_duplicate_vote_is_rejected():
+    """Test that the unique index, not a pre-check, rejects a second vote."""
+    proposal_id = _create_proposal("vote_dup_proposer")
+    voter = _create_voters("vote_dup", 1)[0]
+
+    first = client.post("/governance/vote", json={"proposal_id": proposal_id, "voter": voter, "support": 1})
+    assert first.status_code == 200
+    second = client.post("/governance/vote", json={"proposal_id": proposal_id, "voter": voter, "support": -1})
+    assert second.status_code == 400
+    assert second.json()["detail"] == "Already voted on this proposal"
+
+    proposal = client.get(f"/governance/proposal/{proposal_id}").json()
+    assert proposal["votes_for"] == 1.0
+    assert proposal["votes_against"] == 0.0
+
+def test_vote_on_closed_proposals():
+    """Test that rejected votes leave no vote row behind."""
+    voter = _create_voters("vote_closed", 1)[0]
+    response = client.post("/governance/vote", json={"proposal_id": 999999, "voter": voter, "support": 1})
+    assert response.status_code == 404
+
+    expired_id = _create_proposal("vote_closed_proposer")
+    async def expire(db):
+        await db.execute(
+            update(GovernanceProposalModel)
+            .where(GovernanceProposalModel.id == expired_id)
+            .values(expires_at=datetime.utcnow() - timedelta(minutes=1))
+        )
+        await db.commit()
+    _run(expire)
+
+    response = client.post("/governance/vote", json={"proposal_id": expired_id, "voter": voter, "support": 1})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Proposal has expired"
+    assert client.get(f"/governance/proposal/{expired_id}").json()["status"] == ProposalStatus.EXPIRED
+
+    response = client.post("/governance/vote", json={"proposal_id": expired_id, "voter": voter, "support": 1})
+    assert response.json()["detail"] == "Proposal is not active"
+
+    async def count_votes(db):
+        return await db.scalar(select(func.count()).select_from(VoteModel).where(VoteModel.voter == voter))
+    assert _run(count_votes) == 0
+
+@pytest.mark.skipif(
+    is_memory_url(DATABASE_URL),
+    reason="the in-memory database shares one connection, so transactions cannot run concurrently"
+)
+def test_concurrent_votes_tally_exactly():
+    """Thousands of simultaneous voters, some voting twice: no lost or double counts."""
+    proposal_id = _create_proposal("vote_stress_proposer")
+    voters = _create_voters("vote_stress", STRESS_VOTERS)
+    # Every tenth voter submits twice with opposite support
+    ballots = [(voter, 1 if i % 3 else -1) for i, voter in enumerate(voters)]
+    ballots += [(voter, -support) for voter, support in ballots[::10]]
+
+    async def vote_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(
+                http.post("/governance/vote", json={"proposal_id": proposal_id, "voter": voter, "support": support})
+                for voter, support in ballots
+            ))
+
+    responses = asyncio.run(vote_all())
+    accepted = [r for r in responses if r.status_code == 200]
+    assert len(accepted) == STRESS_VOTERS
+    assert all(r.json()["detail"] == "Already voted on this proposal" for r in responses if r.status_code != 200)
+
+    accepted_for = sum(1 for r in accepted if r.json()["support"] > 0)
+    proposal = client.get(f"/governance/proposal/{proposal_id}").json()
+    assert proposal["votes_for"] == accepted_for
+    assert proposal["votes_against"] == STRESS_VOTERS - accepted_for
+
+    async def count_votes(db):
+        return await db.scalar(select(func.count()).select_from(VoteModel).where(VoteModel.proposal_id == proposal_id))
+    assert _run(count_votes) == STRESS_VOTERS
+
+def test_batch_votes_report_each_vote():
+    """Test set-based batch voting with every rejection reason."""
+    proposal_id = _create_proposal("vote_batch_proposer")
+    closed_id = _create_proposal("vote_batch_closed_proposer")
+    async def expire(db):
+        await db.execute(
+            update(GovernanceProposalModel)
+            .where(GovernanceProposalModel.id == closed_id)
+            .values(expires_at=datetime.utcnow() - timedelta(minutes=1))
+        )
+        await db.commit()
+    _run(expire)
+    voters = _create_voters("vote_batch", 4)
+    client.post("/governance/vote", json={"proposal_id": proposal_id, "voter": voters[3], "support": 1})
+
+    response = client.post("/governance/votes/batch", json=[
+        {"proposal_id": proposal_id, "voter": voters[0], "support": 1},
+        {"proposal_id": proposal_id, "voter": voters[1], "support": -1},
+        {"proposal_id": proposal_id, "voter": voters[0], "support": -1},
+        {"proposal_id": proposal_id, "voter": voters[3], "support": 1},
+        {"proposal_id": proposal_id, "voter": "vote_batch_nobody", "support": 1},
+        {"proposal_id": 999999, "voter": voters[2], "support": 1},
+        {"proposal_id": closed_id, "voter": voters[2], "support": 1},
+    ])
+    assert response.status_code == 200
+    data = response.json()
+    assert data["accepted"] == 2
+    assert data["rejected"] == 5
+    assert [r["error"] for r in data["results"]] == [
+        None,
+        None,
+        "Already voted on this proposal",
+        "Already voted on this proposal",
+        "Voter identity not found",
+        "Proposal not found",
+        "Proposal has expired",
+    ]
+
+    proposal = client.get(f"/governance/proposal/{proposal_id}").json()
+    assert (proposal["votes_for"], proposal["votes_against"]) == (2.0, 1.0)
+    assert client.get(f"/governance/proposal/{closed_id}").json()["status"] == ProposalStatus.EXPIRED
+
+def test_vote_queue_coalesces_votes():
+    """Test that concurrent submissions share batches and keep per-vote results."""
+    batches = []
+
+    async def submitter(votes):
+        batches.append(list(votes))
+        return [None if support > 0 else "rejected" for _, _, support in votes]
+
+    queue = VoteQueue(submitter, window_ms=20, max_batch=4)
+
+    async def submit_all():
+        return await asyncio.gather(*(queue.submit(1, f"v{i}", 1 if i % 2 else -1) for i in range(10)))
+
+    results = asyncio.run(submit_all())
+    assert results == [None if i % 2 else "rejected" for i in range(10)]
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert queue.stats()["votes"] == 10
+
+@pytest.mark.skipif(
+    is_memory_url(DATABASE_URL),
+    reason="the in-memory database shares one connection, so transactions cannot run concurrently"
+)
+def test_single_votes_through_queue(monkeypatch):
+    """Test POST /governance/vote with the write-behind queue enabled."""
+    proposal_id = _create_proposal("vote_queue_proposer")
+    voters = _create_voters("vote_queue", 300)
+    monkeypatch.setattr(vote_queue, "window_ms", 10)
+    batches_before = vote_queue.batches
+
+    async def vote_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            ballots = [(voter, 1) for voter in voters] + [(voters[0], -1), ("vote_queue_nobody", 1)]
+            return await asyncio.gather(*(
+                http.post("/governance/vote", json={"proposal_id": proposal_id, "voter": voter, "support": support})
+                for voter, support in ballots
+            ))
+
+    responses = asyncio.run(vote_all())
+    assert responses[-1].status_code == 404
+    # Whichever of voters[0]'s two votes is applied first wins
+    first_voter = [responses[0], responses[-2]]
+    assert sorted(r.status_code for r in first_voter) == [200, 400]
+    assert all(r.status_code == 200 for r in responses[1:-2])
+    assert vote_queue.batches - batches_before < 300
+
+    proposal = client.get(f"/governance/proposal/{proposal_id}").json()
+    assert proposal["votes_for"] + proposal["votes_against"] == 300.0
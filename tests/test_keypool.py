@@ -0,0 +1,73 @@
+# Tests for the pre-generated keypair pool
+
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import utils.crypto as crypto
+from utils.keypool import KeypairPool
+
+def _fake_generator():
+    counter = itertools.count()
+    return lambda: (f"public_{next(counter)}", "private")
+
+def _wait_for_depth(pool, depth, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while pool.stats()["depth"] < depth:
+        assert time.monotonic() < deadline, pool.stats()
+        time.sleep(0.01)
+
+def test_pool_fills_to_target_and_refills():
+    """Test that taking a keypair triggers a background refill."""
+    pool = KeypairPool(_fake_generator(), target_depth=4, workers=2, executor_factory=ThreadPoolExecutor)
+    pool.start()
+    try:
+        _wait_for_depth(pool, 4)
+        first = pool.take()
+        assert first is not None
+        _wait_for_depth(pool, 4)
+
+        stats = pool.stats()
+        assert stats["served"] == 1
+        assert stats["generated"] == 5
+        assert stats["fallbacks"] == 0
+        assert stats["refill_rate_per_sec"] > 0
+    finally:
+        pool.stop()
+
+def test_pool_reports_fallback_when_empty():
+    """Test that an empty pool returns None so callers generate inline."""
+    pool = KeypairPool(_fake_generator(), target_depth=0, executor_factory=ThreadPoolExecutor)
+    pool.start()
+    assert not pool.running
+    assert pool.take() is None
+    assert pool.stats()["fallbacks"] == 1
+
+def test_keypairs_are_never_handed_out_twice():
+    """Test that concurrent takes never receive the same keypair."""
+    pool = KeypairPool(_fake_generator(), target_depth=8, workers=4, executor_factory=ThreadPoolExecutor)
+    pool.start()
+    try:
+        _wait_for_depth(pool, 8)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            taken = list(executor.map(lambda _: pool.take(), range(8)))
+        public_keys = [k[0] for k in taken if k is not None]
+        assert len(public_keys) == len(set(public_keys)) == 8
+    finally:
+        pool.stop()
+
+def test_generate_keypair_draws_from_pool(monkeypatch):
+    """Test that utils.crypto.generate_keypair prefers pooled keypairs."""
+    public_key, private_key = crypto.generate_rsa_keypair()
+    pool = KeypairPool(lambda: (public_key, private_key), target_depth=1, executor_factory=ThreadPoolExecutor)
+    monkeypatch.setattr(crypto, "keypair_pool", pool)
+    pool.start()
+    try:
+        _wait_for_depth(pool, 1)
+        assert crypto.generate_keypair() == (public_key, private_key)
+        assert pool.stats()["served"] == 1
+    finally:
+        pool.stop()
+
+    # Stopped pool: generated inline
+    assert "BEGIN PUBLIC KEY" in crypto.generate_keypair()[0]
@@ -0,0 +1,104 @@
+# Tests for the Merkle tree and multiproofs
+
+import random
+
+import pytest
+
+from utils.merkle import (
+    MerkleTree,
+    append_nodes,
+    append_required_nodes,
+    leaf_hash,
+    multiproof,
+    node_hash,
+    required_nodes,
+    root_from_nodes,
+    verify_multiproof
+)
+
+def _reference_root(leaves):
+    """RFC 6962 Merkle Tree Hash, computed recursively."""
+    if len(leaves) == 1:
+        return leaves[0]
+    k = 1 << ((len(leaves) - 1).bit_length() - 1)
+    return node_hash(_reference_root(leaves[:k]), _reference_root(leaves[k:]))
+
+def _leaves(n):
+    return [leaf_hash(str(i).encode()) for i in range(n)]
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 8, 13, 64, 100])
+def test_root_matches_rfc6962(n):
+    """Test that tree roots match the RFC 6962 reference computation."""
+    leaves = _leaves(n)
+    assert MerkleTree(leaves).root() == _reference_root(leaves)
+
+def test_leaf_and_node_hashes_are_domain_separated():
+    """Test that a leaf hash never collides with an interior node hash."""
+    a, b = leaf_hash(b"a"), leaf_hash(b"b")
+    assert leaf_hash(a + b) != node_hash(a, b)
+
+@pytest.mark.parametrize("n", [1, 7, 16, 33, 1000])
+def test_single_inclusion_proofs(n):
+    """Test single-leaf inclusion proofs, their length and forged-leaf rejection."""
+    leaves = _leaves(n)
+    tree = MerkleTree(leaves)
+    for index in {0, n // 2, n - 1}:
+        proof = tree.proof([index])
+        assert len(proof) <= max(1, (n - 1).bit_length())
+        assert verify_multiproof(tree.root(), n, {index: leaves[index]}, proof)
+        assert not verify_multiproof(tree.root(), n, {index: leaf_hash(b"forged")}, proof)
+
+def test_multiproof_shares_siblings():
+    """Test that multiproofs share siblings and are smaller than separate proofs."""
+    leaves = _leaves(1024)
+    tree = MerkleTree(leaves)
+    # Adjacent leaves share every sibling above level 0
+    assert len(tree.proof([10, 11])) == len(tree.proof([10])) - 1
+
+    rng = random.Random(7)
+    indices = rng.sample(range(1024), 20)
+    proof = tree.proof(indices)
+    assert len(proof) < sum(len(tree.proof([i])) for i in indices)
+    assert verify_multiproof(tree.root(), 1024, {i: leaves[i] for i in indices}, proof)
+
+def test_multiproof_rejects_malformed_proofs():
+    """Test that truncated, padded or mismatched multiproofs are rejected."""
+    leaves = _leaves(50)
+    tree = MerkleTree(leaves)
+    proof = tree.proof([3, 40])
+    disclosed = {3: leaves[3], 40: leaves[40]}
+    assert not verify_multiproof(tree.root(), 50, disclosed, proof[:-1])
+    assert not verify_multiproof(tree.root(), 50, disclosed, proof + [proof[0]])
+    assert not verify_multiproof(tree.root(), 100, disclosed, proof)
+    assert not verify_multiproof(tree.root(), 50, {}, proof)
+    assert not verify_multiproof(tree.root(), 50, {60: leaves[3]}, proof)
+
+def test_required_nodes_are_sufficient():
+    """Test that proofs can be built from just the nodes required_nodes() lists."""
+    leaves = _leaves(77)
+    tree = MerkleTree(leaves)
+    indices = [0, 31, 64, 76]
+    nodes = {coord: tree.node(*coord) for coord in required_nodes(77, indices)}
+    get_node = lambda level, index: nodes[(level, index)]
+
+    assert root_from_nodes(77, get_node) == tree.root()
+    assert multiproof(77, indices, get_node) == tree.proof(indices)
+
+@pytest.mark.parametrize("size,count", [(0, 1), (1, 1), (5, 3), (8, 1), (31, 40), (100, 1)])
+def test_append_matches_full_rebuild(size, count):
+    """Test that appending leaves produces exactly the nodes of a tree built in one go."""
+    leaves = _leaves(size + count)
+    before = MerkleTree(leaves[:size]) if size else None
+    allowed = set(append_required_nodes(size, count))
+    assert len(allowed) <= (size + count).bit_length()
+
+    def get_node(level, index):
+        assert (level, index) in allowed
+        return before.node(level, index)
+
+    nodes = append_nodes(size, leaves[size:], get_node)
+    if before:
+        nodes.update({(l, i): h for l, hashes in enumerate(before.levels) for i, h in enumerate(hashes)})
+
+    after = MerkleTree(leaves)
+    assert nodes == {(l, i): h for l, hashes in enumerate(after.levels) for i, h in enumerate(hashes)}
@@ -0,0 +1,155 @@
+# Tests for the platform adapters, the shared platform client and the mock server
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services.platforms import ADAPTERS, platform_client, register_adapter
+from services.platforms.adapters import GitHubAdapter, PlatformAdapter
+from services.platforms.client import PlatformClient, PlatformError, PlatformLimits, PlatformUserNotFound, RateLimiter
+from services.platforms.mock_server import create_mock_app
+
+client = TestClient(app)
+
+def _client(mock_app, rate=0.0, burst=1, concurrency=8, max_retries=3):
+    platform = PlatformClient(max_retries=max_retries, base_url="http://mock")
+    platform.configure(base_url="http://mock", transport=httpx.ASGITransport(app=mock_app))
+    platform.register("github", PlatformLimits("test", rate, burst, concurrency))
+    return platform
+
+def test_import_platform_account_creates_pending_attestations():
+    """Test a GitHub import through the generic endpoint and the legacy route."""
+    client.post("/identity/create", json={"username": "platform_user"})
+
+    response = client.post(
+        "/integration/github/import", params={"username": "platform_user", "github_username": "octo"}
+    )
+    assert response.status_code == 200
+    attestations = response.json()["attestations"]
+    assert {a["attestation_type"] for a in attestations} == {"commits", "pull_requests", "reviews", "stars"}
+    assert all(a["platform_username"] == "octo" and a["verified"] == 0 for a in attestations)
+
+    again = client.post(
+        "/integration/stackoverflow/import", params={"username": "platform_user", "platform_username": "4242"}
+    )
+    assert again.status_code == 200
+    assert {a["attestation_type"] for a in again.json()["attestations"]} == {"reputation", "answers", "badges"}
+
+def test_import_platform_account_errors():
+    """Test unknown identities, platforms and platform accounts."""
+    client.post("/identity/create", json={"username": "platform_errors"})
+
+    params = {"username": "platform_errors", "platform_username": "missing_account"}
+    assert client.post("/integration/ebay/import", params=params).status_code == 404
+    params = {"username": "no_such_identity", "platform_username": "someone"}
+    assert client.post("/integration/ebay/import", params=params).status_code == 404
+    params = {"username": "platform_errors", "platform_username": "someone"}
+    assert client.post("/integration/myspace/import", params=params).status_code == 404
+
+def test_reimport_revalidates_with_etag():
+    """Test that fetching an unchanged account again is answered with 304s."""
+    client.post("/identity/create", json={"username": "platform_etag"})
+    params = {"username": "platform_etag", "platform_username": "etag_person"}
+    first = client.post("/integration/linkedin/import", params=params).json()
+    before = platform_client.stats()["platforms"]["linkedin"]["not_modified"]
+
+    second = client.post("/integration/linkedin/import", params=params).json()
+    assert platform_client.stats()["platforms"]["linkedin"]["not_modified"] == before + 2
+    assert [a["value"] for a in first["attestations"]] == [a["value"] for a in second["attestations"]]
+
+def test_batch_account_import_reports_per_account():
+    """Test that a batch reports attestation ids or an error for each account."""
+    client.post("/identity/create", json={"username": "platform_batch"})
+    response = client.post("/integration/import/accounts", json=[
+        {"username": "platform_batch", "platform": "ebay", "platform_username": "seller_a"},
+        {"username": "platform_batch", "platform": "ebay", "platform_username": "missing_seller"},
+        {"username": "platform_nobody", "platform": "stackoverflow", "platform_username": "1"},
+        {"username": "platform_batch", "platform": "stackoverflow", "platform_username": "77"},
+    ])
+    assert response.status_code == 200
+    items = response.json()
+    assert len(items[0]["attestation_ids"]) == 3
+    assert items[1]["error"] == "ebay account not found"
+    assert items[2]["error"] == "User identity not found"
+    assert len(items[3]["attestation_ids"]) == 3
+
+    unsupported = client.post("/integration/import/accounts", json=[
+        {"username": "platform_batch", "platform": "myspace", "platform_username": "x"}
+    ])
+    assert unsupported.status_code == 404
+
+def test_client_retries_failures_and_throttling():
+    """Test that 503s and 429s are retried until the request succeeds."""
+    mock_app = create_mock_app(failure_rate=0.3, rate_limit=20, seed=1)
+    platform = _client(mock_app, max_retries=8)
+
+    async def fetch_all():
+        return await asyncio.gather(*(
+            platform.get_json("github", f"http://mock/github/users/retry{i}") for i in range(30)
+        ))
+
+    bodies = asyncio.run(fetch_all())
+    assert [b["login"] for b in bodies] == [f"retry{i}" for i in range(30)]
+    stats = platform.stats()["platforms"]["github"]
+    assert stats["retries"] > 0
+    assert stats["failures"] == 0
+    assert mock_app.state.stats["failed"] + mock_app.state.stats["throttled"] == stats["retries"]
+
+def test_client_gives_up_after_max_retries():
+    """Test that persistent failures raise PlatformError and 404s are not retried."""
+    platform = _client(create_mock_app(failure_rate=1.0), max_retries=1)
+    with pytest.raises(PlatformError) as excinfo:
+        asyncio.run(platform.get_json("github", "http://mock/github/users/down"))
+    assert excinfo.value.status_code == 503
+
+    platform = _client(create_mock_app())
+    with pytest.raises(PlatformUserNotFound):
+        asyncio.run(platform.get_json("github", "http://mock/github/users/missing_user"))
+    assert platform.stats()["platforms"]["github"]["retries"] == 0
+
+def test_client_limits_concurrency():
+    """Test that no more than the platform's concurrency limit is in flight."""
+    platform = _client(create_mock_app(latency_ms=20), concurrency=2)
+
+    async def fetch_all():
+        start = time.perf_counter()
+        await asyncio.gather(*(platform.get_json("github", f"http://mock/github/users/c{i}") for i in range(8)))
+        return time.perf_counter() - start
+
+    # 8 requests, 2 at a time, 20 ms each
+    assert asyncio.run(fetch_all()) >= 0.08
+
+def test_rate_limiter_spaces_requests():
+    """Test the token bucket allows the burst immediately, then the configured rate."""
+    limiter = RateLimiter(rate=100, burst=5)
+
+    async def acquire_all():
+        start = time.perf_counter()
+        for _ in range(15):
+            await limiter.acquire()
+        return time.perf_counter() - start
+
+    # 5 from the burst, 10 more at 100/s
+    assert asyncio.run(acquire_all()) >= 0.09
+    assert limiter.waits > 0
+
+def test_adapter_uses_mock_server_offline():
+    """Test that an adapter maps the mock platform's responses to attestations."""
+    platform = _client(create_mock_app())
+    adapter = GitHubAdapter(platform)
+    values = asyncio.run(adapter.fetch("offline user"))
+    assert [v.attestation_type for v in values] == ["commits", "pull_requests", "reviews", "stars"]
+    assert all(v.value >= 0 for v in values)
+
+def test_adapter_without_fetch_is_rejected_on_registration():
+    """Test that register_adapter refuses an adapter that does not implement fetch."""
+    class _IncompleteAdapter(PlatformAdapter):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        register_adapter(_IncompleteAdapter)
+    assert "incomplete" not in ADAPTERS
@@ -0,0 +1,128 @@
+# Tests for paginated, cached proposal listing
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from db.connection import async_engine
+from main import app
+from services.proposal_cache import ProposalPageCache, etag_matches, proposal_cache
+
+client = TestClient(app)
+
+def _proposal(proposer, title, days=7):
+    response = client.post(
+        "/governance/proposal",
+        json={"title": title, "description": "d", "proposer": proposer, "days_until_expiry": days}
+    )
+    return response.json()["id"]
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(async_engine.sync_engine, "before_cursor_execute", self)
+
+def test_proposals_paginate_with_cursor():
+    """Test that cursors walk every proposal newest first without repeats."""
+    client.post("/identity/create", json={"username": "page_proposer"})
+    created = [_proposal("page_proposer", f"page {i}") for i in range(5)]
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = client.get("/governance/proposals", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(p["id"] for p in page)
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    assert len(seen) == len(set(seen))
+    positions = [seen.index(pid) for pid in created]
+    assert positions == sorted(positions, reverse=True)
+
+def test_status_filter_accepts_value_or_name():
+    """Test that status filters match by value or name and reject unknown statuses."""
+    client.post("/identity/create", json={"username": "status_proposer"})
+    proposal_id = _proposal("status_proposer", "status filter")
+
+    by_value = client.get("/governance/proposals", params={"status": "active", "limit": 1000}).json()
+    by_name = client.get("/governance/proposals", params={"status": "ACTIVE", "limit": 1000}).json()
+    assert proposal_id in {p["id"] for p in by_value}
+    assert by_value == by_name
+    assert all(p["status"] == "active" for p in by_value)
+
+    assert client.get("/governance/proposals", params={"status": "bogus"}).status_code == 400
+    assert client.get("/governance/proposals", params={"cursor": "not-a-cursor"}).status_code == 400
+
+def test_matching_etag_returns_304_without_querying():
+    """Test that a poller with a current ETag is answered from the cache."""
+    client.post("/identity/create", json={"username": "etag_proposer"})
+    _proposal("etag_proposer", "etag")
+
+    first = client.get("/governance/proposals", params={"limit": 3})
+    etag = first.headers["ETag"]
+
+    with _QueryCounter() as queries:
+        cached = client.get("/governance/proposals", params={"limit": 3})
+        unchanged = client.get("/governance/proposals", params={"limit": 3}, headers={"If-None-Match": etag})
+    assert queries.count == 0
+    assert cached.content == first.content
+    assert unchanged.status_code == 304
+    assert unchanged.headers["ETag"] == etag
+    assert proposal_cache.stats()["not_modified"] >= 1
+
+def test_writes_invalidate_cached_pages():
+    """Test that creating, voting on and finalizing proposals change the ETag."""
+    client.post("/identity/create", json={"username": "inval_proposer"})
+    client.post("/identity/create", json={"username": "inval_voter"})
+
+    def etag():
+        return client.get("/governance/proposals", params={"limit": 1000}).headers["ETag"]
+
+    before = etag()
+    proposal_id = _proposal("inval_proposer", "invalidate", days=0)
+    after_create = etag()
+    assert after_create != before
+
+    # The proposal expired immediately, so the vote flips its status
+    response = client.post("/governance/vote", json={"proposal_id": proposal_id, "voter": "inval_voter", "support": 1})
+    assert response.status_code == 400
+    after_vote = etag()
+    assert after_vote != after_create
+
+    assert client.post(f"/governance/proposal/{proposal_id}/finalize").status_code == 200
+    assert etag() != after_vote
+
+def test_cache_skips_pages_read_before_invalidation():
+    """Test that a page read under a stale generation is not stored, and LRU bounds hold."""
+    cache = ProposalPageCache(maxsize=2, ttl=60)
+    generation = cache.generation
+    cache.invalidate()
+    cache.put("stale", b"[]", None, generation)
+    assert cache.get("stale") is None
+
+    for key in ("a", "b", "c"):
+        cache.put(key, b"[]", None, cache.generation)
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["size"] == 2
+
+def test_etag_matching():
+    """Test If-None-Match parsing."""
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"x"', '"abc"')
+    assert not etag_matches(None, '"abc"')
@@ -0,0 +1,101 @@
+# Tests for the background proposal scheduler
+
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from db.connection import AsyncSessionLocal
+from main import app
+from models.governance import GovernanceProposalModel, ProposalStatus
+from services.proposal_scheduler import ProposalScheduler
+
+client = TestClient(app)
+
+def _run(coro_fn):
+    async def wrapper():
+        async with AsyncSessionLocal() as db:
+            return await coro_fn(db)
+    return asyncio.run(wrapper())
+
+def _proposal(proposer, title, days=7):
+    response = client.post(
+        "/governance/proposal",
+        json={"title": title, "description": "d", "proposer": proposer, "days_until_expiry": days}
+    )
+    return response.json()["id"]
+
+def _set(proposal_id, **values):
+    async def apply(db):
+        await db.execute(
+            update(GovernanceProposalModel).where(GovernanceProposalModel.id == proposal_id).values(**values)
+        )
+        await db.commit()
+    _run(apply)
+
+def test_scheduler_finalizes_due_proposals():
+    """Test that one pass finalizes ACTIVE and EXPIRED proposals past their deadline."""
+    client.post("/identity/create", json={"username": "sched_proposer"})
+    past = datetime.utcnow() - timedelta(hours=1)
+
+    passing = _proposal("sched_proposer", "sched passing")
+    _set(passing, expires_at=past, votes_for=3.0, votes_against=1.0)
+    tied = _proposal("sched_proposer", "sched tied")
+    _set(tied, expires_at=past)
+    flipped = _proposal("sched_proposer", "sched flipped")
+    _set(flipped, expires_at=past, status=ProposalStatus.EXPIRED, votes_for=0.0, votes_against=2.0)
+    open_id = _proposal("sched_proposer", "sched open")
+
+    scheduler = ProposalScheduler(interval=0, batch_size=2)
+    assert asyncio.run(scheduler.run_once()) >= 3
+
+    status = lambda pid: client.get(f"/governance/proposal/{pid}").json()["status"]
+    assert status(passing) == ProposalStatus.PASSED
+    assert status(tied) == ProposalStatus.REJECTED
+    assert status(flipped) == ProposalStatus.REJECTED
+    assert status(open_id) == ProposalStatus.ACTIVE
+
+    active = {p["id"] for p in client.get("/governance/proposals", params={"status": ProposalStatus.ACTIVE.name}).json()}
+    assert open_id in active and passing not in active
+
+    stats = scheduler.stats()
+    assert stats["runs"] == 1
+    assert stats["last_lag_seconds"] >= 3600
+    assert asyncio.run(scheduler.run_once()) == 0
+    assert scheduler.stats()["last_lag_seconds"] == 0.0
+
+def test_manual_finalize_accepts_expired_proposals():
+    """Test that a proposal flipped to EXPIRED by a late vote can still be finalized."""
+    client.post("/identity/create", json={"username": "sched_manual"})
+    proposal_id = _proposal("sched_manual", "sched manual")
+    _set(proposal_id, expires_at=datetime.utcnow() - timedelta(minutes=1), status=ProposalStatus.EXPIRED)
+
+    response = client.post(f"/governance/proposal/{proposal_id}/finalize")
+    assert response.status_code == 200
+    assert response.json()["status"] == ProposalStatus.REJECTED
+
+def test_scheduler_task_runs_periodically():
+    """Test the asyncio task lifecycle."""
+    scheduler = ProposalScheduler(interval=0.01)
+
+    async def run():
+        scheduler.start()
+        assert scheduler.running
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+
+    asyncio.run(run())
+    assert not scheduler.running
+    assert scheduler.runs >= 2
+    assert scheduler.failures == 0
+
+def test_disabled_scheduler_does_not_start():
+    """Test that a scheduler with a zero interval does not start its task."""
+    scheduler = ProposalScheduler(interval=0)
+
+    async def run():
+        scheduler.start()
+        return scheduler.running
+
+    assert asyncio.run(run()) is False
@@ -0,0 +1,150 @@
+# Query-plan regression tests: no endpoint query may fall back to a full table scan
+
+import asyncio
+import json
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from db.connection import Base, async_engine, engine
+from main import app
+from services.proposal_scheduler import ProposalScheduler
+from services.signatures import SignatureVerifier
+from services.verification import VerificationWorker
+from utils.crypto import sign_attestation, attestation_payload
+
+client = TestClient(app)
+
+# "SCAN attestations" (3.36+) or "SCAN TABLE attestations" (older SQLite);
+# index scans ("SCAN t USING INDEX ...") are reported with a USING clause
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+def _exercise_endpoints():
+    """Drive every endpoint once with data that reaches its queries."""
+    keys = client.post("/identity/create", json={"username": "plan_issuer"}).json()
+    client.post("/identity/create", json={"username": "plan_voter"})
+    client.get("/identity/plan_issuer")
+    client.post("/identity/plan_issuer/verify", json={})
+
+    payload = attestation_payload("plan_issuer", "plan_subject", "peer_verified")
+    attestation = dict(payload, signature=sign_attestation(payload, keys["private_key"]))
+    client.post("/attest", json=attestation)
+    client.post("/attest/batch", json=[attestation, attestation])
+    client.post("/attest/verify-batch", json=[attestation])
+    asyncio.run(SignatureVerifier(interval=0).run_once())
+
+    page = client.get("/user/plan_subject", params={"limit": 1}).json()
+    client.get("/user/plan_subject", params={"cursor": page["next_cursor"]})
+    client.get("/user/plan_subject", params={"format": "ndjson"})
+
+    proposal = client.post(
+        "/governance/proposal",
+        json={"title": "Plan", "description": "d", "proposer": "plan_issuer", "days_until_expiry": 0}
+    ).json()
+    active = client.post(
+        "/governance/proposal",
+        json={"title": "Plan 2", "description": "d", "proposer": "plan_issuer", "days_until_expiry": 7}
+    ).json()
+    client.get("/governance/proposals")
+    client.get("/governance/proposals", params={"status": "active"})
+    listed = client.get("/governance/proposals", params={"limit": 1})
+    client.get("/governance/proposals", params={"limit": 1, "cursor": listed.headers["X-Next-Cursor"]})
+    client.get("/governance/proposals", params={"status": "active", "limit": 1, "cursor": listed.headers["X-Next-Cursor"]})
+    client.get(f"/governance/proposal/{active['id']}")
+    client.post("/governance/vote", json={"proposal_id": active["id"], "voter": "plan_voter", "support": 1})
+    client.post(f"/governance/proposal/{proposal['id']}/finalize")
+    asyncio.run(ProposalScheduler(interval=0).run_once())
+
+    client.get("/graph/stats")
+    client.get("/graph/node/plan_subject")
+    client.get("/graph/node/plan_issuer/neighbors", params={"hops": 2, "direction": "both"})
+    client.get("/graph/path", params={"source": "plan_issuer", "target": "plan_subject"})
+    client.post("/graph/trust/recompute")
+    client.get("/graph/trust")
+    client.get("/graph/node/plan_subject/trust")
+    client.post("/graph/sybil/detect")
+    client.get("/graph/sybil/clusters")
+    client.get("/graph/node/plan_subject/sybil")
+
+    client.post("/privacy/prove-threshold", json={"username": "plan_issuer", "threshold": 1})
+    client.post("/privacy/selective-disclosure", json={"username": "plan_subject", "selected_indices": [0]})
+
+    imported = client.post(
+        "/integration/import",
+        json={
+            "username": "plan_issuer", "platform": "github", "platform_username": "gh",
+            "attestation_type": "commits", "value": 1.0, "metadata": {}
+        }
+    ).json()
+    client.post(f"/integration/verify/{imported['id']}", json={"verified": True})
+    client.post(
+        "/integration/import/bulk",
+        params={"import_id": "plan-import"},
+        content=json.dumps({
+            "username": "plan_issuer", "platform": "github", "platform_username": "gh",
+            "attestation_type": "commits", "value": 1.0, "metadata": {}
+        })
+    )
+    client.get("/integration/user/plan_issuer")
+    client.get("/integration/verification/queue")
+
+    client.get("/events", params={"after": 0, "limit": 10})
+    client.get("/events", params={"after": 1, "kinds": "vote.cast"})
+    client.get("/events", params={"format": "sse", "timeout": 0}, headers={"Last-Event-ID": "2"})
+    asyncio.run(VerificationWorker(interval=0).run_once())
+    client.post("/integration/github/import", params={"username": "plan_issuer", "github_username": "gh"})
+
+@pytest.fixture(scope="module")
+def endpoint_queries():
+    """Capture every read/update statement the endpoints issue."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((statement, parameters))
+
+    # Request handlers run on the async engine
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        _exercise_endpoints()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    return captured
+
+def test_endpoint_queries_were_captured(endpoint_queries):
+    """Guard against the capture silently seeing nothing."""
+    tables = {t for statement, _ in endpoint_queries for t in Base.metadata.tables if t in statement}
+    assert {"attestations", "user_identities", "governance_proposals", "votes", "third_party_attestations", "events"} <= tables
+
+def test_no_full_table_scans(endpoint_queries):
+    """EXPLAIN QUERY PLAN every captured query and reject unindexed scans."""
+    offenders = []
+    with engine.connect() as conn:
+        for statement, parameters in endpoint_queries:
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            for row in plan:
+                match = FULL_SCAN.match(row[-1])
+                if match and match.group(1) in Base.metadata.tables:
+                    offenders.append(f"{row[-1]}  <-  {' '.join(statement.split())}")
+
+    assert not offenders, "Full table scans:\n" + "\n".join(offenders)
+
+def test_composite_indexes_exist():
+    """The hot two-column lookups are backed by composite indexes."""
+    with engine.connect() as conn:
+        indexes = {
+            row[0]: row[1]
+            for row in conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"))
+        }
+    assert "ix_attestations_subject_timestamp_id" in indexes
+    assert "ix_attestations_status_id" in indexes
+    assert "UNIQUE" in indexes["ux_attestations_issuer_signature_digest"]
+    assert "UNIQUE" in indexes["ux_votes_proposal_voter"]
+    assert "ix_third_party_attestations_username_platform" in indexes
+    assert "ix_governance_proposals_status_created_at" in indexes
+    assert "ix_governance_proposals_status_expires_at" in indexes
+    assert "ix_third_party_attestations_verified_timestamp" in indexes
+    assert "ix_trust_scores_score" in indexes
+    assert "ix_sybil_members_cluster_id" in indexes
@@ -0,0 +1,108 @@
+# Tests for upgrading databases created by earlier versions
+
+from sqlalchemy import inspect, text
+
+from db.connection import Base, create_db_engine
+from services.schema_upgrade import pending_changes, upgrade_schema
+from utils.canonical import signature_digest
+
+def _legacy_engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+def test_upgrade_dedupes_votes_and_adds_unique_index(tmp_path):
+    """Test that duplicate votes are removed and re-tallied before the unique index is created."""
+    engine = _legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ux_votes_proposal_voter"))
+        conn.execute(text("DROP INDEX ix_attestations_subject_timestamp_id"))
+        conn.execute(text(
+            "INSERT INTO governance_proposals (id, title, status, votes_for, votes_against) VALUES "
+            "(1, 'raced', 'ACTIVE', 3.0, 1.0), (2, 'clean', 'ACTIVE', 1.0, 0.0)"
+        ))
+        # alice's vote was counted twice by the old check-then-insert path
+        conn.execute(text(
+            "INSERT INTO votes (id, proposal_id, voter, vote_value, support) VALUES "
+            "(1, 1, 'alice', 1.0, 1), (2, 1, 'alice', 1.0, 1), (3, 1, 'bob', 1.0, -1), (4, 2, 'alice', 1.0, 1)"
+        ))
+
+    changes = upgrade_schema(engine)
+    assert changes[0] == "deleted 1 duplicate votes and re-tallied their proposals"
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM votes ORDER BY id")).scalars().all() == [1, 3, 4]
+        tallies = conn.execute(text("SELECT id, votes_for, votes_against FROM governance_proposals ORDER BY id")).all()
+        assert [tuple(row) for row in tallies] == [(1, 1.0, 1.0), (2, 1.0, 0.0)]
+        indexes = {index["name"]: index for index in inspect(conn).get_indexes("votes")}
+        assert indexes["ux_votes_proposal_voter"]["unique"]
+        assert "ix_attestations_subject_timestamp_id" in {i["name"] for i in inspect(conn).get_indexes("attestations")}
+
+    # A second run finds nothing to do
+    assert upgrade_schema(engine) == []
+    engine.dispose()
+
+def test_upgrade_adds_attestation_columns_and_backfills_digests(tmp_path):
+    """Test that status and signature_digest are added and digests recorded for signed rows."""
+    engine = _legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ux_attestations_issuer_signature_digest"))
+        conn.execute(text("DROP INDEX ix_attestations_status_id"))
+        conn.execute(text("ALTER TABLE attestations DROP COLUMN signature_digest"))
+        conn.execute(text("ALTER TABLE attestations DROP COLUMN status"))
+        # Row 2 replays row 1's signature under another spelling
+        conn.execute(text(
+            "INSERT INTO attestations (id, issuer, subject, attestation_type, signature) VALUES "
+            "(1, 'alice', 'bob', 't', 'c2ln'), (2, 'alice', 'bob', 't', 'v2:c2ln'), "
+            "(3, 'alice', 'bob', 't', 'b3RoZXI='), (4, 'alice', 'bob', 't', NULL)"
+        ))
+    assert {"attestations.status", "attestations.signature_digest",
+            "attestations.ux_attestations_issuer_signature_digest"} <= set(pending_changes(engine))
+
+    changes = upgrade_schema(engine)
+    assert "added column status to attestations" in changes
+    assert "recorded the signature digest of 2 attestations" in changes
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT status, signature_digest FROM attestations ORDER BY id")).all()
+        assert [tuple(row) for row in rows] == [
+            ("unverified", signature_digest("c2ln")), ("unverified", None),
+            ("unverified", signature_digest("b3RoZXI=")), ("unverified", None)
+        ]
+        indexes = {index["name"]: index for index in inspect(conn).get_indexes("attestations")}
+        assert indexes["ux_attestations_issuer_signature_digest"]["unique"]
+
+    assert pending_changes(engine) == [] and upgrade_schema(engine) == []
+    engine.dispose()
+
+def test_upgrade_adds_verification_lease_columns(tmp_path):
+    """Test that the verification worker's lease columns are added to existing third-party rows."""
+    engine = _legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_third_party_attestations_verified_timestamp"))
+        for column in ("claim_token", "claimed_until", "verification_attempts"):
+            conn.execute(text(f"ALTER TABLE third_party_attestations DROP COLUMN {column}"))
+        conn.execute(text(
+            "INSERT INTO third_party_attestations (username, platform, platform_username, attestation_type, value, verified) "
+            "VALUES ('alice', 'github', 'gh', 'commits', 3.0, 0)"
+        ))
+
+    changes = upgrade_schema(engine)
+    assert "added column verification_attempts to third_party_attestations" in changes
+    assert "created index ix_third_party_attestations_verified_timestamp on third_party_attestations" in changes
+    with engine.connect() as conn:
+        row = conn.execute(text(
+            "SELECT claim_token, claimed_until, verification_attempts FROM third_party_attestations"
+        )).one()
+        assert tuple(row) == (None, None, 0)
+    engine.dispose()
+
+def test_upgrade_adds_identity_key_algorithm(tmp_path):
+    """Test that user_identities.key_algorithm is added, NULL (RSA) for existing identities."""
+    engine = _legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE user_identities DROP COLUMN key_algorithm"))
+        conn.execute(text("INSERT INTO user_identities (username, public_key) VALUES ('alice', 'pem')"))
+
+    assert "added column key_algorithm to user_identities" in upgrade_schema(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT key_algorithm FROM user_identities")).scalar() is None
+    engine.dispose()
@@ -0,0 +1,173 @@
+# Tests for issuer-signature enforcement on attestation ingestion
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from db.connection import AsyncSessionLocal
+from main import app
+from models.attestation import AttestationModel
+from services import signatures
+from services.signatures import IssuerKeyCache, SignatureVerifier
+from services.trust_graph import TrustGraphIndex
+from utils.crypto import attestation_payload, sign_attestation
+
+client = TestClient(app)
+
+def _run(coro_fn):
+    async def wrapper():
+        async with AsyncSessionLocal() as db:
+            return await coro_fn(db)
+    return asyncio.run(wrapper())
+
+def _signed(private_key, issuer, subject, attestation_type="peer_verified"):
+    payload = attestation_payload(issuer, subject, attestation_type)
+    return dict(payload, signature=sign_attestation(payload, private_key))
+
+def test_sync_policy_rejects_bad_signatures(monkeypatch):
+    """Test that sync enforcement verifies single and batch writes against the issuer key."""
+    monkeypatch.setattr(signatures, "SIGNATURE_POLICY", "sync")
+    keys = client.post("/identity/create", json={"username": "sig_sync_issuer"}).json()
+    valid = _signed(keys["private_key"], "sig_sync_issuer", "sig_sync_subject")
+
+    response = client.post("/attest", json=valid)
+    assert response.status_code == 200 and response.json()["status"] == "verified"
+
+    unsigned = {**valid, "signature": None}
+    tampered = {**valid, "attestation_type": "endorsement"}
+    for attestation, status, detail in (
+        (unsigned, 400, signatures.MISSING_SIGNATURE),
+        (tampered, 400, signatures.INVALID_SIGNATURE),
+        ({**valid, "issuer": "sig_sync_unknown"}, 404, signatures.ISSUER_NOT_FOUND),
+    ):
+        response = client.post("/attest", json=attestation)
+        assert response.status_code == status and response.json()["detail"] == detail
+
+    other = _signed(keys["private_key"], "sig_sync_issuer", "sig_sync_subject", "endorsement")
+    result = client.post("/attest/batch", json=[other, tampered, unsigned]).json()
+    assert result["inserted"] == 1 and result["failed"] == 2
+    assert [r["error"] for r in result["results"]] == [None, signatures.INVALID_SIGNATURE, signatures.MISSING_SIGNATURE]
+    assert client.get("/user/sig_sync_subject/stats").json()["total_count"] == 2
+
+    # An issuer rejected as unknown is accepted as soon as its identity exists
+    keys = client.post("/identity/create", json={"username": "sig_sync_unknown"}).json()
+    response = client.post("/attest", json=_signed(keys["private_key"], "sig_sync_unknown", "sig_sync_subject"))
+    assert response.status_code == 200
+
+def test_async_policy_quarantines_failures(monkeypatch):
+    """Test that pending attestations stay out of every read path until verified."""
+    monkeypatch.setattr(signatures, "SIGNATURE_POLICY", "async")
+    keys = client.post("/identity/create", json={"username": "sig_async_issuer"}).json()
+    valid = _signed(keys["private_key"], "sig_async_issuer", "sig_async_subject")
+    # A genuine signature of the issuer's, over other fields
+    elsewhere = _signed(keys["private_key"], "sig_async_issuer", "sig_async_elsewhere")
+    forged = {**valid, "subject": "sig_async_other", "signature": elsewhere["signature"]}
+
+    good = client.post("/attest", json=valid).json()
+    bad = client.post("/attest/batch", json=[forged]).json()["results"][0]
+    assert good["status"] == "pending" and bad["error"] is None
+    assert client.post("/attest", json={**valid, "signature": ""}).status_code == 400
+
+    assert client.get("/user/sig_async_subject").status_code == 404
+    assert client.get("/user/sig_async_subject/stats").json()["total_count"] == 0
+    index = TrustGraphIndex()
+    _run(index.refresh)
+    assert index.last_id < good["id"] and index.node_id("sig_async_subject") is None
+
+    verifier = SignatureVerifier(batch_size=1, interval=0)
+    assert asyncio.run(verifier.run_once()) >= 2
+    assert verifier.stats()["verified"] >= 1 and verifier.stats()["quarantined"] >= 1
+
+    async def statuses(db):
+        return dict((await db.execute(
+            select(AttestationModel.id, AttestationModel.status)
+            .where(AttestationModel.id.in_([good["id"], bad["id"]]))
+        )).all())
+    assert _run(statuses) == {good["id"]: "verified", bad["id"]: "quarantined"}
+    outcomes = client.get("/events", params={"kinds": "attestation.verified,attestation.quarantined", "limit": 1000}).json()
+    outcomes = {e["data"]["id"]: e["kind"] for e in outcomes["events"]}
+    assert outcomes[good["id"]] == "attestation.verified" and outcomes[bad["id"]] == "attestation.quarantined"
+
+    listed = client.get("/user/sig_async_subject").json()["attestations"]
+    assert [(a["id"], a["status"]) for a in listed] == [(good["id"], "verified")]
+    assert client.get("/user/sig_async_other").status_code == 404
+    assert client.get("/user/sig_async_subject/stats").json()["total_count"] == 1
+    proof = client.post("/privacy/selective-disclosure", json={"username": "sig_async_subject", "selected_indices": [0]})
+    assert proof.status_code == 200
+
+    _run(index.refresh)
+    assert index.last_id >= bad["id"]
+    assert index.graph.in_degree(index.node_id("sig_async_subject")) == 1
+    assert index.node_id("sig_async_other") is None
+
+def test_replayed_signatures_are_rejected(monkeypatch):
+    """Test that a stored signature cannot be submitted again under any policy."""
+    monkeypatch.setattr(signatures, "SIGNATURE_POLICY", "sync")
+    keys = client.post("/identity/create", json={"username": "sig_replay_issuer"}).json()
+    original = _signed(keys["private_key"], "sig_replay_issuer", "sig_replay_subject")
+    assert client.post("/attest", json=original).status_code == 200
+
+    # Replaying the signature as listed, or spelled differently, conflicts
+    listed = client.get("/user/sig_replay_subject").json()["attestations"][0]
+    respelled = original["signature"].replace("v2:", "v2:\n", 1)
+    for signature in (listed["signature"], respelled):
+        response = client.post("/attest", json={**original, "signature": signature})
+        assert response.status_code == 409 and response.json()["detail"] == signatures.REPLAYED_SIGNATURE
+
+    fresh = _signed(keys["private_key"], "sig_replay_issuer", "sig_replay_subject", "endorsement")
+    result = client.post("/attest/batch", json=[original, fresh, fresh]).json()
+    assert [r["error"] for r in result["results"]] == [
+        signatures.REPLAYED_SIGNATURE, None, signatures.REPLAYED_SIGNATURE
+    ]
+    assert client.get("/user/sig_replay_subject/stats").json()["total_count"] == 2
+
+    monkeypatch.setattr(signatures, "SIGNATURE_POLICY", "async")
+    assert client.post("/attest", json=fresh).status_code == 409
+    monkeypatch.setattr(signatures, "SIGNATURE_POLICY", "off")
+    assert client.post("/attest/batch", json=[original]).json()["failed"] == 1
+
+    # The verifier quarantines pending rows stored without a digest that
+    # repeat a signature, and records the digest of those it promotes
+    late = _signed(keys["private_key"], "sig_replay_issuer", "sig_replay_subject", "late")
+    async def store_undigested(db):
+        rows = [AttestationModel(**attestation, status="pending") for attestation in (fresh, late, late)]
+        db.add_all(rows)
+        await db.commit()
+        return [row.id for row in rows]
+    ids = _run(store_undigested)
+    verifier = SignatureVerifier(interval=0)
+    asyncio.run(verifier.run_once())
+
+    async def outcomes(db):
+        return (await db.execute(
+            select(AttestationModel.status, AttestationModel.signature_digest)
+            .where(AttestationModel.id.in_(ids)).order_by(AttestationModel.id)
+        )).all()
+    (replayed, _), (promoted, digest), (repeated, _) = _run(outcomes)
+    assert (replayed, promoted, repeated) == ("quarantined", "verified", "quarantined") and digest
+    assert client.get("/user/sig_replay_subject/stats").json()["total_count"] == 3
+
+def test_issuer_key_cache_expiry_and_invalidation():
+    """Test cached positive and negative lookups, their expiry and invalidation."""
+    client.post("/identity/create", json={"username": "sig_cache_issuer"})
+    cache = IssuerKeyCache(maxsize=2, ttl=60, negative_ttl=60)
+
+    found = _run(lambda db: cache.get_many(db, ["sig_cache_issuer", "sig_cache_missing"]))
+    assert set(found) == {"sig_cache_issuer"} and found["sig_cache_issuer"] is not None
+    assert _run(lambda db: cache.get_many(db, ["sig_cache_issuer", "sig_cache_missing"])) == found
+    assert cache.stats()["misses"] == 2 and cache.stats()["hits"] == 2
+
+    # Unknown issuers stay cached until invalidated or expired
+    client.post("/identity/create", json={"username": "sig_cache_missing"})
+    assert "sig_cache_missing" not in _run(lambda db: cache.get_many(db, ["sig_cache_missing"]))
+    cache.invalidate("sig_cache_missing")
+    assert "sig_cache_missing" in _run(lambda db: cache.get_many(db, ["sig_cache_missing"]))
+
+    _run(lambda db: cache.get_many(db, ["sig_cache_other"]))
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2
+
+    expiring = IssuerKeyCache(ttl=0)
+    for _ in range(2):
+        assert "sig_cache_issuer" in _run(lambda db: expiring.get_many(db, ["sig_cache_issuer"]))
+    assert expiring.stats()["misses"] == 2
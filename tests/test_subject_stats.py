@@ -0,0 +1,77 @@
+# Tests for the materialized per-subject attestation counters
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from db.connection import AsyncSessionLocal
+from main import app
+from models.subject_stats import SubjectStatsModel
+from services.subject_stats import rebuild_subject_stats, check_subject_stats
+
+client = TestClient(app)
+
+def _run(coro_fn):
+    async def wrapper():
+        async with AsyncSessionLocal() as db:
+            return await coro_fn(db)
+    return asyncio.run(wrapper())
+
+def test_stats_follow_single_and_batch_ingest():
+    """Test that both write paths update the counters incrementally."""
+    client.post("/attest", json={"issuer": "alice", "subject": "stats_subject", "attestation_type": "good_work"})
+    client.post(
+        "/attest/batch",
+        json=[
+            {"issuer": "alice", "subject": "stats_subject", "attestation_type": "peer_verified"},
+            {"issuer": "bob", "subject": "stats_subject", "attestation_type": "peer_verified"},
+            {"issuer": "bob", "subject": "stats_other", "attestation_type": "peer_verified"},
+        ]
+    )
+
+    response = client.get("/user/stats_subject/stats")
+    assert response.status_code == 200
+    assert response.json() == {
+        "subject": "stats_subject",
+        "total_count": 3,
+        "distinct_issuers": 2,
+        "by_type": {"good_work": 1, "peer_verified": 2}
+    }
+
+    response = client.get("/user/never_attested/stats")
+    assert response.json()["total_count"] == 0
+
+def test_threshold_proof_reads_counters():
+    """Test that threshold proofs use the maintained count."""
+    client.post("/identity/create", json={"username": "stats_prover"})
+    client.post(
+        "/attest/batch",
+        json=[{"issuer": f"i{n}", "subject": "stats_prover", "attestation_type": "t"} for n in range(3)]
+    )
+
+    meets = client.post("/privacy/prove-threshold", json={"username": "stats_prover", "threshold": 3})
+    assert meets.json()["verified"] is True
+    short = client.post("/privacy/prove-threshold", json={"username": "stats_prover", "threshold": 4})
+    assert short.json()["verified"] is False
+
+def test_rebuild_and_consistency_check():
+    """Test that drift is detected and repaired by a rebuild."""
+    client.post("/attest", json={"issuer": "carol", "subject": "stats_drift", "attestation_type": "t"})
+    _run(rebuild_subject_stats)
+    assert _run(check_subject_stats) == []
+
+    async def corrupt(db):
+        await db.execute(
+            update(SubjectStatsModel)
+            .where(SubjectStatsModel.subject == "stats_drift")
+            .values(total_count=SubjectStatsModel.total_count + 5)
+        )
+        await db.commit()
+
+    _run(corrupt)
+    assert _run(check_subject_stats) == ["stats_drift"]
+
+    _run(rebuild_subject_stats)
+    assert _run(check_subject_stats) == []
+    assert client.get("/user/stats_drift/stats").json()["total_count"] == 1
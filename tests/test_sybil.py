@@ -0,0 +1,123 @@
+# Tests for Sybil-cluster detection and its governance policy
+
+import asyncio
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from db.connection import AsyncSessionLocal
+from main import app
+from models.identity import UserIdentityModel
+from services import sybil
+from services.vote_queue import vote_queue
+from utils.sybil import analyze, connected_components, distinct_pairs
+
+client = TestClient(app)
+
+def _run(coro_fn):
+    async def wrapper():
+        async with AsyncSessionLocal() as db:
+            return await coro_fn(db)
+    return asyncio.run(wrapper())
+
+def _planted_graph(seed=0, n=2000, edges=20000, ring=10):
+    """Random attestations plus a ring of `ring` more nodes all attesting to each other."""
+    rng = np.random.default_rng(seed)
+    sources, targets = rng.integers(0, n - ring, edges), rng.zipf(1.5, edges) % (n - ring)
+    members = np.arange(n - ring, n)
+    sources = np.concatenate([sources, np.repeat(members, ring)])
+    targets = np.concatenate([targets, np.tile(members, ring)])
+    created = rng.uniform(0, 1e8, n)
+    created[members] = 5e7 + np.arange(ring) * 60
+    return sources, targets, n, created, members
+
+def test_union_find_and_pairs_match_reference():
+    """Test the vectorized components and reciprocity flags against plain Python."""
+    rng = np.random.default_rng(1)
+    n = 300
+    sources, targets = rng.integers(0, n, 600), rng.integers(0, n, 600)
+    src, dst, mutual = distinct_pairs(sources, targets, n)
+
+    pairs = {(s, t) for s, t in zip(sources.tolist(), targets.tolist()) if s != t}
+    assert sorted(pairs) == list(zip(src.tolist(), dst.tolist()))
+    assert mutual.tolist() == [(t, s) in pairs for s, t in zip(src.tolist(), dst.tolist())]
+
+    labels = connected_components(n, src, dst)
+    parent = list(range(n))
+    def find(x):
+        while parent[x] != x:
+            x = parent[x]
+        return x
+    for s, t in pairs:
+        a, b = find(s), find(t)
+        parent[max(a, b)] = min(a, b)
+    assert labels.tolist() == [find(x) for x in range(n)]
+
+def test_planted_ring_is_flagged_and_honest_clusters_are_not():
+    """Test that a reciprocal, isolated, burst-created ring scores high on every signal."""
+    sources, targets, n, created, members = _planted_graph()
+    clusters = analyze(sources, targets, n, created)
+
+    flagged = np.flatnonzero(clusters.score >= 0.75)
+    assert sorted(clusters.kind[flagged].tolist()) == ["community", "ring"]
+    for i in flagged:
+        assert clusters.members[i].tolist() == members.tolist()
+        assert clusters.density[i] == clusters.mutual_ratio[i] == clusters.isolation[i] == 1.0
+        assert clusters.burst_fraction[i] == 1.0
+        assert clusters.mean_degree[i] == len(members) - 1 and clusters.degree_cv[i] == 0.0
+    assert (np.delete(clusters.score, flagged) < 0.5).all()
+
+    # Without creation times the ring still stands out on structure alone
+    assert analyze(sources, targets, n).score.max() == 0.75
+
+def test_detection_pipeline_and_vote_policy(monkeypatch):
+    """Test detection end to end, the lookup endpoints and rejecting flagged voters."""
+    ring = [f"sybil_ring_{i}" for i in range(6)]
+
+    async def create(db):
+        await db.execute(insert(UserIdentityModel), [
+            {"username": name, "public_key": f"unused-{name}", "verified": False} for name in ring
+        ])
+        await db.commit()
+    _run(create)
+    client.post("/attest/batch", json=[
+        {"issuer": a, "subject": b, "attestation_type": "peer_verified"}
+        for a in ring for b in ring if a != b
+    ] + [
+        {"issuer": f"sybil_honest_{i}", "subject": f"sybil_honest_{(i + 1) % 8}", "attestation_type": "peer_verified"}
+        for i in range(8)
+    ])
+
+    response = client.post("/graph/sybil/detect")
+    assert response.status_code == 200
+    assert response.json()["flagged_clusters"] >= 1
+
+    clusters = client.get("/graph/sybil/clusters", params={"min_score": 0.75}).json()
+    planted = [c for c in clusters if c["members"] == sorted(ring)]
+    assert len(planted) == 1 and planted[0]["kind"] == "ring" and planted[0]["score"] == 1.0
+    status = client.get(f"/graph/node/{ring[0]}/sybil").json()
+    assert status["flagged"] and status["clusters"][0]["id"] == planted[0]["id"]
+    assert not client.get("/graph/node/sybil_honest_0/sybil").json()["flagged"]
+
+    response = client.post(
+        "/governance/proposal",
+        json={"title": "Sybil", "description": "d", "proposer": ring[0], "days_until_expiry": 7}
+    )
+    proposal_id = response.json()["id"]
+
+    # Off by default: flagged identities still vote
+    vote = {"proposal_id": proposal_id, "voter": ring[0], "support": 1}
+    assert client.post("/governance/vote", json=vote).status_code == 200
+
+    monkeypatch.setattr(sybil, "SYBIL_VOTE_POLICY", "reject")
+    response = client.post("/governance/vote", json={**vote, "voter": ring[1]})
+    assert response.status_code == 403 and response.json()["detail"] == sybil.SYBIL_FLAGGED
+    results = client.post("/governance/votes/batch", json=[{**vote, "voter": ring[2]}]).json()["results"]
+    assert results[0]["error"] == sybil.SYBIL_FLAGGED
+
+    monkeypatch.setattr(vote_queue, "window_ms", 5)
+    assert vote_queue.enabled
+    response = client.post("/governance/vote", json={**vote, "voter": ring[3]})
+    assert response.status_code == 403
+    assert client.get(f"/governance/proposal/{proposal_id}").json()["votes_for"] == 1.0
@@ -0,0 +1,109 @@
+# Tests for the CSR trust graph and the /graph endpoints
+
+import random
+from collections import deque
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from main import app
+from utils.graph import TrustGraph
+
+client = TestClient(app)
+
+def _bfs(edges, source, directions):
+    adjacency = {}
+    for issuer, subject in edges:
+        if "out" in directions:
+            adjacency.setdefault(issuer, []).append(subject)
+        if "in" in directions:
+            adjacency.setdefault(subject, []).append(issuer)
+    dist = {source: 0}
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        for neighbour in adjacency.get(node, []):
+            if neighbour not in dist:
+                dist[neighbour] = dist[node] + 1
+                queue.append(neighbour)
+    return dist
+
+def test_incremental_edges_match_reference_traversal():
+    """Test degrees, k-hop sets and path lengths against a plain BFS over edges added in batches."""
+    rng = random.Random(7)
+    names = [f"n{i}" for i in range(30)]
+    edges = [(rng.choice(names), rng.choice(names)) for _ in range(90)]
+
+    graph = TrustGraph()
+    for start in range(0, len(edges), 25):
+        batch = edges[start:start + 25]
+        graph.add_edges([e[0] for e in batch], [e[1] for e in batch])
+    assert graph.num_edges == len(edges)
+
+    for name, node in graph.ids.items():
+        assert graph.out_degree(node) == sum(1 for issuer, _ in edges if issuer == name)
+        assert graph.in_degree(node) == sum(1 for _, subject in edges if subject == name)
+        for direction, directions in (("out", ("out",)), ("in", ("in",)), ("both", ("out", "in"))):
+            dist = _bfs(edges, name, directions)
+            levels, truncated = graph.neighbourhood(node, 3, direction)
+            assert not truncated
+            for hop, level in enumerate(levels, start=1):
+                assert {graph.names[i] for i in level} == {n for n, d in dist.items() if d == hop}
+            for target, target_id in graph.ids.items():
+                path = graph.shortest_path(node, target_id, direction)
+                if target in dist:
+                    assert len(path) - 1 == dist[target]
+                    assert path[0] == node and path[-1] == target_id
+                else:
+                    assert path is None
+
+def test_neighbourhood_limit_and_path_bound():
+    """Test that neighbourhoods are truncated at the limit and paths respect max_hops."""
+    # A chain 0 -> 1 -> ... -> 9 plus a star 0 -> 100..149
+    sources = np.array(list(range(9)) + [0] * 50)
+    targets = np.array(list(range(1, 10)) + list(range(100, 150)))
+    graph = TrustGraph.from_arrays(sources, targets, [f"u{i}" for i in range(150)])
+
+    levels, truncated = graph.neighbourhood(0, 2, limit=20)
+    assert truncated and sum(len(level) for level in levels) == 20
+
+    assert len(graph.shortest_path(0, 9)) == 10
+    assert graph.shortest_path(0, 9, max_hops=8) is None
+    assert graph.shortest_path(9, 0) is None
+    assert graph.shortest_path(9, 0, direction="in") == list(range(9, -1, -1))
+
+def test_graph_endpoints_follow_new_attestations():
+    """Test degrees, neighbourhoods and paths over attestations, including ones added after the first load."""
+    client.post("/attest/batch", json=[
+        {"issuer": "graph_a", "subject": "graph_b", "attestation_type": "peer_verified"},
+        {"issuer": "graph_a", "subject": "graph_b", "attestation_type": "good_work"},
+        {"issuer": "graph_b", "subject": "graph_c", "attestation_type": "peer_verified"},
+    ])
+
+    node = client.get("/graph/node/graph_a").json()
+    assert node == {
+        "username": "graph_a", "out_degree": 2, "in_degree": 0, "distinct_subjects": 1, "distinct_issuers": 0
+    }
+    assert client.get("/graph/path", params={"source": "graph_a", "target": "graph_d"}).status_code == 404
+
+    client.post("/attest", json={"issuer": "graph_c", "subject": "graph_d", "attestation_type": "peer_verified"})
+
+    response = client.get("/graph/node/graph_a/neighbors", params={"hops": 3})
+    assert response.status_code == 200
+    assert response.json()["hops"] == [
+        {"hop": 1, "nodes": ["graph_b"]}, {"hop": 2, "nodes": ["graph_c"]}, {"hop": 3, "nodes": ["graph_d"]}
+    ]
+    inbound = client.get("/graph/node/graph_d/neighbors", params={"hops": 1, "direction": "in"}).json()
+    assert inbound["hops"] == [{"hop": 1, "nodes": ["graph_c"]}]
+
+    path = client.get("/graph/path", params={"source": "graph_a", "target": "graph_d"}).json()
+    assert path["path"] == ["graph_a", "graph_b", "graph_c", "graph_d"] and path["hops"] == 3
+    reverse = client.get("/graph/path", params={"source": "graph_d", "target": "graph_a"})
+    assert reverse.status_code == 404
+    both = client.get("/graph/path", params={"source": "graph_d", "target": "graph_a", "direction": "both"})
+    assert both.json()["hops"] == 3
+
+    assert client.get("/graph/node/graph_nobody").status_code == 404
+    assert client.get("/graph/node/graph_a/neighbors", params={"direction": "sideways"}).status_code == 422
+    stats = client.get("/graph/stats").json()
+    assert stats["edges"] >= 4 and stats["nodes"] >= 4
@@ -0,0 +1,91 @@
+# Tests for trust propagation and the persisted trust scores
+
+import asyncio
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from main import app
+from services.trust_scores import TrustPropagator
+from utils.graph import TrustGraph
+from utils.propagation import solve, transition, update
+
+client = TestClient(app)
+
+def _transition(sources, targets, n):
+    graph = TrustGraph.from_arrays(np.array(sources), np.array(targets), [f"u{i}" for i in range(n)])
+    indptr, indices = graph.out_adjacency()
+    return transition(indptr, indices, n)
+
+def _reference(sources, targets, n, damping=0.85):
+    """Dense solve of x = (1 - d) / n + d * M^T x with distinct, non-self edges."""
+    weights = np.zeros((n, n))
+    for s, t in set(zip(sources, targets)):
+        if s != t:
+            weights[s, t] = 1.0
+    out = weights.sum(axis=1)
+    m = np.where(out[:, None] > 0, weights / np.maximum(out, 1)[:, None], 1.0 / n)
+    return np.linalg.solve(np.eye(n) - damping * m.T, np.full(n, (1 - damping) / n))
+
+def test_solve_matches_dense_reference():
+    """Test power iteration against a direct solve, and that repeats and self-attestations add nothing."""
+    rng = np.random.default_rng(3)
+    n = 40
+    sources, targets = rng.integers(0, n, 150).tolist(), rng.integers(0, n, 150).tolist()
+    expected = _reference(sources, targets, n)
+
+    result = solve(_transition(sources, targets, n), tol=1e-13)
+    assert np.allclose(result.scores, expected, atol=1e-12)
+    assert abs(result.scores.sum() - 1) < 1e-9
+
+    # A Sybil issuer repeating its attestations and attesting to itself gains nothing
+    padded = solve(_transition(sources + [sources[0]] * 50 + [5] * 20, targets + [targets[0]] * 50 + [5] * 20, n), tol=1e-13)
+    assert np.allclose(padded.scores, expected, atol=1e-12)
+
+def test_incremental_update_and_warm_start_converge_to_full_solve():
+    """Test that both ways of reusing an earlier vector reach the fresh solution, with less work for the warm start."""
+    rng = np.random.default_rng(4)
+    n = 500
+    sources, targets = rng.integers(0, n, 4000).tolist(), (rng.zipf(1.5, 4000) % n).tolist()
+    before = solve(_transition(sources, targets, n), tol=1e-12)
+
+    # A few new edges, one of them introducing a new identity
+    sources += [1, 2, 3, n]
+    targets += [4, 5, n, 6]
+    after = _transition(sources, targets, n + 1)
+    fresh = solve(after, tol=1e-13)
+
+    incremental = update(after, before.scores, tol=1e-12)
+    assert np.allclose(incremental.scores, fresh.scores, atol=1e-10)
+    warm = solve(after, x0=before.scores, tol=1e-12)
+    assert np.allclose(warm.scores, fresh.scores, atol=1e-10)
+    assert warm.iterations < solve(after, tol=1e-12).iterations
+
+def test_scores_are_persisted_and_updated_incrementally():
+    """Test that recomputation persists scores, skips unchanged graphs and folds in new attestations."""
+    client.post("/attest/batch", json=[
+        {"issuer": "trust_a", "subject": "trust_b", "attestation_type": "peer_verified"},
+        {"issuer": "trust_b", "subject": "trust_c", "attestation_type": "peer_verified"},
+        {"issuer": "trust_c", "subject": "trust_a", "attestation_type": "peer_verified"},
+        {"issuer": "trust_d", "subject": "trust_a", "attestation_type": "peer_verified"},
+    ])
+    propagator = TrustPropagator(incremental_fraction=0.5)
+    assert asyncio.run(propagator.run_once()) > 0
+    assert asyncio.run(propagator.run_once()) == 0
+
+    a = client.get("/graph/node/trust_a/trust").json()
+    d = client.get("/graph/node/trust_d/trust").json()
+    assert a["score"] > d["score"] > 0
+
+    client.post("/attest", json={"issuer": "trust_a", "subject": "trust_e", "attestation_type": "peer_verified"})
+    assert asyncio.run(propagator.run_once()) > 0
+    assert propagator.stats()["last_mode"] == "incremental"
+    incremental = client.get("/graph/node/trust_e/trust").json()["score"]
+
+    response = client.post("/graph/trust/recompute", params={"full": True})
+    assert response.status_code == 200 and response.json()["last_mode"] == "full"
+    assert abs(client.get("/graph/node/trust_e/trust").json()["score"] - incremental) < 1e-8
+
+    top = client.get("/graph/trust", params={"limit": 5}).json()
+    assert len(top) <= 5 and top == sorted(top, key=lambda s: -s["score"])
+    assert client.get("/graph/node/trust_nobody/trust").status_code == 404
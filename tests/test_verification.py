@@ -0,0 +1,188 @@
+# Tests for the third-party attestation verification queue
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+
+from db.connection import DATABASE_URL, AsyncSessionLocal, is_memory_url
+from main import app
+from models.third_party import ThirdPartyAttestationModel
+from services.verification import (
+    VERIFIERS, Verifier, VerificationWorker, claim_pending, record_outcomes, register_verifier
+)
+
+client = TestClient(app)
+
+def _run(coro_fn):
+    async def wrapper():
+        async with AsyncSessionLocal() as db:
+            return await coro_fn(db)
+    return asyncio.run(wrapper())
+
+def _insert(rows):
+    async def apply(db):
+        ids = (await db.scalars(
+            insert(ThirdPartyAttestationModel).returning(ThirdPartyAttestationModel.id, sort_by_parameter_order=True),
+            [{"verified": 0, "attestation_metadata": "{}", **row} for row in rows]
+        )).all()
+        await db.commit()
+        return list(ids)
+    return _run(apply)
+
+def _rows(ids):
+    async def load(db):
+        rows = (await db.scalars(
+            select(ThirdPartyAttestationModel).where(ThirdPartyAttestationModel.id.in_(ids))
+        )).all()
+        return {row.id: row for row in rows}
+    return _run(load)
+
+class _PlatformScope:
+    """Register a verifier for a test-only platform."""
+
+    def __init__(self, platform, verifier):
+        self.platform = platform
+        self.verifier = verifier
+
+    def __enter__(self):
+        register_verifier(self.platform, self.verifier)
+
+    def __exit__(self, *exc):
+        VERIFIERS.pop(self.platform, None)
+
+class _FixedVerifier(Verifier):
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self.calls = 0
+
+    async def verify(self, attestations, limit):
+        self.calls += len(attestations)
+        return [self.outcome] * len(attestations)
+
+def test_worker_verifies_against_platform_data():
+    """Test that claims the platform supports are verified and the rest rejected."""
+    client.post("/identity/create", json={"username": "verify_user"})
+    ids = _insert([
+        {"username": "verify_user", "platform": "ebay", "platform_username": "honest",
+         "attestation_type": "transactions", "value": 0.0},
+        {"username": "verify_user", "platform": "ebay", "platform_username": "honest",
+         "attestation_type": "transactions", "value": 10 ** 9},
+        {"username": "verify_user", "platform": "ebay", "platform_username": "missing_seller",
+         "attestation_type": "transactions", "value": 1.0},
+        {"username": "verify_user", "platform": "ebay", "platform_username": "honest",
+         "attestation_type": "not_a_type", "value": 1.0},
+    ])
+
+    worker = VerificationWorker(batch_size=3, interval=0)
+    assert asyncio.run(worker.run_once()) >= 4
+
+    rows = _rows(ids)
+    assert [rows[i].verified for i in ids] == [1, -1, -1, -1]
+    assert all(rows[i].claim_token is None and rows[i].verification_attempts == 1 for i in ids)
+    assert worker.stats()["batches"] >= 2
+
+    queue = client.get("/integration/verification/queue").json()["queue"]
+    assert queue["verified"] >= 1 and queue["rejected"] >= 3
+
+@pytest.mark.skipif(
+    is_memory_url(DATABASE_URL),
+    reason="the in-memory database shares one connection, so transactions cannot run concurrently"
+)
+def test_claims_are_disjoint_and_leased():
+    """Test that concurrent claims never hand out the same row twice."""
+    verifier = _FixedVerifier(True)
+    with _PlatformScope("claimtest", verifier):
+        ids = set(_insert([
+            {"username": "claim_user", "platform": "claimtest", "platform_username": f"c{i}",
+             "attestation_type": "t", "value": 1.0, "timestamp": datetime(2000, 1, 1) + timedelta(seconds=i)}
+            for i in range(10)
+        ]))
+
+        async def claim_twice():
+            async def claim():
+                async with AsyncSessionLocal() as db:
+                    return await claim_pending(db, 6)
+            return await asyncio.gather(claim(), claim())
+
+        (token_a, claimed_a), (token_b, claimed_b) = asyncio.run(claim_twice())
+        ids_a = {a.id for a in claimed_a} & ids
+        ids_b = {a.id for a in claimed_b} & ids
+        assert token_a != token_b
+        assert not ids_a & ids_b
+        assert ids_a | ids_b == ids
+
+        # Leased rows are not claimable again until the lease expires
+        token, claimed = _run(lambda db: claim_pending(db, 100))
+        assert not {a.id for a in claimed} & ids
+        token, reclaimed = _run(lambda db: claim_pending(db, 100, now=datetime.utcnow() + timedelta(hours=1)))
+        assert ids <= {a.id for a in reclaimed}
+
+        # Results for the expired lease are discarded
+        assert _run(lambda db: record_outcomes(db, token_a, {i: True for i in ids_a})) == 0
+        assert _run(lambda db: record_outcomes(db, token, {i: True for i in ids})) == len(ids)
+        assert all(row.verified == 1 for row in _rows(ids).values())
+
+def test_undecided_rows_are_retried_later():
+    """Test that a verifier error releases the row with a retry delay."""
+    verifier = _FixedVerifier(None)
+    with _PlatformScope("flaky", verifier):
+        [row_id] = _insert([
+            {"username": "flaky_user", "platform": "flaky", "platform_username": "f",
+             "attestation_type": "t", "value": 1.0}
+        ])
+        worker = VerificationWorker(retry_seconds=3600, interval=0)
+        asyncio.run(worker.run_once())
+        row = _rows([row_id])[row_id]
+        assert row.verified == 0
+        assert row.verification_attempts == 1
+        assert row.claim_token is None and row.claimed_until > datetime.utcnow()
+
+        # Held back until the retry delay passes
+        calls = verifier.calls
+        asyncio.run(worker.run_once())
+        assert verifier.calls == calls
+        assert worker.stats()["retried"] == 1
+
+@pytest.mark.skipif(
+    is_memory_url(DATABASE_URL),
+    reason="the in-memory database shares one connection, so transactions cannot run concurrently"
+)
+def test_worker_bounds_batches_in_flight():
+    """Test that at most max_batches batches are claimed at once."""
+    peak = 0
+
+    class _SlowVerifier(Verifier):
+        async def verify(self, attestations, limit):
+            nonlocal peak
+            peak = max(peak, worker.in_flight_batches)
+            await asyncio.sleep(0.01)
+            return [True] * len(attestations)
+
+    with _PlatformScope("slowtest", _SlowVerifier()):
+        _insert([
+            {"username": "slow_user", "platform": "slowtest", "platform_username": f"s{i}",
+             "attestation_type": "t", "value": 1.0}
+            for i in range(40)
+        ])
+        worker = VerificationWorker(batch_size=5, max_batches=2, interval=0)
+        assert asyncio.run(worker.run_once()) >= 40
+    assert peak == 2
+    assert worker.in_flight_batches == 0
+
+def test_incomplete_verifiers_are_rejected_on_registration():
+    """Test that a verifier without verify() cannot be built or registered."""
+    class _IncompleteVerifier(Verifier):
+        pass
+
+    class _DuckVerifier:
+        async def verify(self, attestations, limit):
+            return [True] * len(attestations)
+
+    with pytest.raises(TypeError):
+        _IncompleteVerifier()
+    with pytest.raises(TypeError):
+        register_verifier("ducktest", _DuckVerifier())
+    assert "ducktest" not in VERIFIERS
@@ -92,6 +92,21 @@ def test_verify_selective_disclosure_invalid():
     ]
     
     is_valid = verify_selective_disclosure(proof, wrong_attestations)
-    # Should still pass basic format check but IDs won't match in real verification
-    # For this simplified version, we just check format
-    assert is_valid is True  # Basic format check passes
+    assert is_valid is False
+
+def test_selective_disclosure_proof_is_logarithmic():
+    """Test that a multi-leaf proof verifies and stays O(k log n)."""
+    attestations = [{"id": i, "issuer": f"issuer_{i}"} for i in range(1000)]
+    selected_indices = [3, 4, 500, 999]
+    
+    proof = create_selective_disclosure_proof(attestations, selected_indices)
+    
+    assert verify_selective_disclosure(proof, proof["disclosed_attestations"]) is True
+    # 4 leaves in a 1000-leaf tree: at most 4 * ceil(log2(1000)) siblings, fewer when shared
+    assert len(proof["proof"]) < 4 * 10
+    
+    # Tampering with the root or a sibling hash breaks verification
+    bad_root = dict(proof, merkle_root="00" * 32)
+    assert verify_selective_disclosure(bad_root, proof["disclosed_attestations"]) is False
+    bad_path = dict(proof, proof=["00" * 32] + proof["proof"][1:])
+    assert verify_selective_disclosure(bad_path, proof["disclosed_attestations"]) is False
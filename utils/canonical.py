@@ -0,0 +1,157 @@
+# Canonical encodings of attestation fields for signing
+#
+# Version 1 (legacy) is json.dumps(fields, sort_keys=True) in UTF-8. It
+# accepts any JSON-serializable dict, but its exact bytes depend on Python's
+# JSON formatting (separators, ASCII escaping, number formatting), which
+# other languages have to reproduce.
+#
+# Version 2 is a fixed binary layout of the attestation fields:
+#
+#     b"BRA" 0x02            magic and version
+#     u8 flags               bit i set if FIELDS[i] is present (not None)
+#     per present field, in FIELDS order:
+#         str fields         u32 big-endian UTF-8 length, UTF-8 bytes
+#         timestamp          i64 big-endian microseconds since the Unix
+#                            epoch (naive datetimes are taken as UTC)
+#
+# There is exactly one encoding per set of field values and no field names
+# on the wire. Fields outside FIELDS are rejected rather than left unsigned.
+# The message is built with one b"".join, which sizes the output once and
+# copies each part into it once, and is hashed straight from that buffer.
+#
+# Signatures carry their version as a prefix: "v2:<base64>" for version 2,
+# bare base64 for version 1, so signatures made before version 2 existed
+# still verify.
+#
+# signature_digest() identifies a signature by its decoded bytes, so a
+# signature stays the same signature under any spelling that still verifies
+# (another version tag, stray characters base64 decoding skips).
+
+import base64
+import hashlib
+import json
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+CANONICAL_V1 = 1
+CANONICAL_V2 = 2
+VERSIONS = (CANONICAL_V1, CANONICAL_V2)
+
+# Version used for new signatures
+DEFAULT_VERSION = int(os.getenv("BITREP_CANONICAL_VERSION", str(CANONICAL_V2)))
+
+FIELDS = ("issuer", "subject", "attestation_type", "timestamp", "anchor")
+_ALLOWED = frozenset(FIELDS)
+
+MAGIC_V2 = b"BRA\x02"
+_u32 = struct.Struct(">I").pack
+_i64 = struct.Struct(">q").pack
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def _microseconds(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _MICROSECOND
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def encode_v1(fields: dict) -> bytes:
+    """
+    Legacy canonical form: sorted-key JSON.
+    """
+    return json.dumps(fields, sort_keys=True, default=_json_default).encode('utf-8')
+
+def encode_v2(fields: dict) -> bytes:
+    """
+    Binary canonical form of the attestation fields.
+    Raises ValueError for fields outside FIELDS or values of the wrong type.
+    """
+    if not _ALLOWED.issuperset(fields):
+        unknown = sorted(set(fields) - _ALLOWED)
+        raise ValueError(f"Not attestation fields: {', '.join(unknown)}")
+
+    # Unrolled over FIELDS: this runs once per signature or verification.
+    # Non-string values have no .encode and are reported by the except.
+    parts = [MAGIC_V2, b""]
+    flags = 0
+    try:
+        value = fields.get("issuer")
+        if value is not None:
+            flags |= 1
+            raw = value.encode('utf-8')
+            parts += (_u32(len(raw)), raw)
+        value = fields.get("subject")
+        if value is not None:
+            flags |= 2
+            raw = value.encode('utf-8')
+            parts += (_u32(len(raw)), raw)
+        value = fields.get("attestation_type")
+        if value is not None:
+            flags |= 4
+            raw = value.encode('utf-8')
+            parts += (_u32(len(raw)), raw)
+        value = fields.get("timestamp")
+        if value is not None:
+            if not isinstance(value, datetime):
+                raise ValueError("timestamp must be a datetime")
+            flags |= 8
+            parts.append(_i64(_microseconds(value)))
+        value = fields.get("anchor")
+        if value is not None:
+            flags |= 16
+            raw = value.encode('utf-8')
+            parts += (_u32(len(raw)), raw)
+    except AttributeError:
+        raise ValueError("issuer, subject, attestation_type and anchor must be strings") from None
+    parts[1] = bytes((flags,))
+    return b"".join(parts)
+
+def encode(fields: dict, version: int = DEFAULT_VERSION) -> bytes:
+    if version == CANONICAL_V2:
+        return encode_v2(fields)
+    if version == CANONICAL_V1:
+        return encode_v1(fields)
+    raise ValueError(f"Unknown canonical version {version}")
+
+def digest(fields: dict, version: int = DEFAULT_VERSION) -> bytes:
+    """
+    SHA-256 of the canonical encoding; this is what gets signed.
+    """
+    return hashlib.sha256(encode(fields, version)).digest()
+
+def tag_signature(signature_b64: str, version: int) -> str:
+    """
+    Prefix a base64 signature with its canonical version (none for version 1).
+    """
+    return signature_b64 if version == CANONICAL_V1 else f"v{version}:{signature_b64}"
+
+def split_signature(signature: str) -> Tuple[int, str]:
+    """
+    (version, base64 signature) of a tagged signature.
+    Raises ValueError for an unknown version tag.
+    """
+    tag, sep, body = signature.partition(":")
+    if not sep:
+        return CANONICAL_V1, signature
+    if tag[:1] != "v" or not tag[1:].isdigit() or int(tag[1:]) not in VERSIONS:
+        raise ValueError(f"Unknown signature version {tag!r}")
+    return int(tag[1:]), body
+
+def signature_digest(signature: str) -> str:
+    """
+    Hex SHA-256 of a signature's raw bytes, ignoring its version tag and
+    decoded the way verification decodes it. Signatures that do not decode
+    are hashed as text.
+    """
+    try:
+        raw = base64.b64decode(split_signature(signature)[1])
+    except ValueError:
+        raw = signature.encode()
+    return hashlib.sha256(raw).hexdigest()
@@ -1,41 +1,198 @@
 # Cryptographic utilities for identity and attestation signing
 
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import asyncio
+import base64
+import functools
 import hashlib
-import json
-from typing import Tuple
+import os
+import threading
 
-def generate_keypair() -> Tuple[str, str]:
+from utils.canonical import DEFAULT_VERSION, digest, split_signature, tag_signature
+from utils.keypool import KeypairPool
+from utils.suites import DEFAULT_KEY_ALGORITHM, RSA_PSS_2048, get_suite, suite_for_key
+
+# Batches smaller than this are verified inline; pool dispatch costs more than it saves
+PARALLEL_VERIFY_THRESHOLD = 32
+
+# Pre-generated RSA keypairs kept ready for identity creation (0 disables the pool)
+KEYPOOL_SIZE = int(os.getenv("BITREP_KEYPOOL_SIZE", "16"))
+KEYPOOL_WORKERS = int(os.getenv("BITREP_KEYPOOL_WORKERS", "0")) or max(1, (os.cpu_count() or 2) // 2)
+
+# Parsed public keys kept by PublicKeyCache
+KEY_CACHE_SIZE = int(os.getenv("BITREP_KEY_CACHE_SIZE", "4096"))
+
+_crypto_executor: Optional[ThreadPoolExecutor] = None
+_crypto_executor_lock = threading.Lock()
+
+def get_crypto_executor() -> ThreadPoolExecutor:
     """
-    Generate RSA public/private key pair
+    Shared thread pool for CPU-bound crypto work.
+    Sized by BITREP_CRYPTO_WORKERS, defaulting to the number of CPUs.
+    """
+    global _crypto_executor
+    if _crypto_executor is None:
+        with _crypto_executor_lock:
+            if _crypto_executor is None:
+                workers = int(os.getenv("BITREP_CRYPTO_WORKERS", "0")) or os.cpu_count() or 1
+                _crypto_executor = ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix="bitrep-crypto"
+                )
+    return _crypto_executor
+
+def key_fingerprint(public_key_pem: str) -> str:
+    """
+    SHA-256 fingerprint of a PEM-encoded public key.
+    """
+    return hashlib.sha256(public_key_pem.encode('utf-8')).hexdigest()
+
+class PublicKeyCache:
+    """
+    Bounded, thread-safe LRU cache of parsed public keys.
+
+    Entries are keyed by (username, key fingerprint). An entry is dropped when
+    the identity presents a different key or a newer `last_updated` stamp, so
+    a rotated key is never served from the cache.
+    """
+
+    def __init__(self, maxsize: int = KEY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[Optional[str], str], Tuple[object, Optional[datetime]]]" = OrderedDict()
+        self._fingerprints: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, public_key_pem: str, username: Optional[str] = None, last_updated: Optional[datetime] = None):
+        """
+        Return the parsed key for a PEM, parsing it only on a cache miss.
+        Raises ValueError if the PEM cannot be parsed.
+        """
+        fingerprint = key_fingerprint(public_key_pem)
+        cache_key = (username, fingerprint)
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                if last_updated is None or entry[1] == last_updated:
+                    self._entries.move_to_end(cache_key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[cache_key]
+                self.invalidations += 1
+            if username is not None:
+                previous = self._fingerprints.get(username)
+                if previous is not None and previous != fingerprint:
+                    if self._entries.pop((username, previous), None) is not None:
+                        self.invalidations += 1
+            self.misses += 1
+
+        public_key = serialization.load_pem_public_key(
+            public_key_pem.encode('utf-8'),
+            backend=default_backend()
+        )
+
+        with self._lock:
+            self._entries[cache_key] = (public_key, last_updated)
+            self._entries.move_to_end(cache_key)
+            if username is not None:
+                self._fingerprints[username] = fingerprint
+            while len(self._entries) > self.maxsize:
+                (evicted_username, evicted_fingerprint), _ = self._entries.popitem(last=False)
+                if evicted_username is not None and self._fingerprints.get(evicted_username) == evicted_fingerprint:
+                    del self._fingerprints[evicted_username]
+                self.evictions += 1
+
+        return public_key
+
+    def invalidate(self, username: str) -> None:
+        """
+        Drop the cached key for an identity, e.g. after a key rotation.
+        """
+        with self._lock:
+            fingerprint = self._fingerprints.pop(username, None)
+            if fingerprint is not None and self._entries.pop((username, fingerprint), None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._fingerprints.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+public_key_cache = PublicKeyCache()
+
+def attestation_payload(
+    issuer: str,
+    subject: str,
+    attestation_type: str,
+    anchor: Optional[str] = None,
+    timestamp: Optional[datetime] = None
+) -> dict:
+    """
+    Build the attestation fields covered by the issuer's signature.
+    The timestamp is only included when given, so payloads without one
+    keep their legacy JSON form.
+    """
+    payload = {
+        "issuer": issuer,
+        "subject": subject,
+        "attestation_type": attestation_type,
+        "anchor": anchor
+    }
+    if timestamp is not None:
+        payload["timestamp"] = timestamp
+    return payload
+
+def generate_keypair(algorithm: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Get a public/private key pair for a signature suite (utils/suites.py,
+    BITREP_KEY_ALGORITHM by default). RSA pairs come from the pre-generated
+    pool when it has one ready, otherwise they are generated inline
     Returns: (public_key_pem, private_key_pem)
+    Raises ValueError for an unknown algorithm
     """
-    private_key = rsa.generate_private_key(
-        public_exponent=65537,
-        key_size=2048,
-        backend=default_backend()
-    )
-    
-    private_pem = private_key.private_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PrivateFormat.PKCS8,
-        encryption_algorithm=serialization.NoEncryption()
-    ).decode('utf-8')
-    
-    public_key = private_key.public_key()
-    public_pem = public_key.public_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PublicFormat.SubjectPublicKeyInfo
-    ).decode('utf-8')
-    
-    return public_pem, private_pem
+    suite = get_suite(algorithm or DEFAULT_KEY_ALGORITHM)
+    if suite.name == RSA_PSS_2048:
+        keypair = keypair_pool.take() if keypair_pool.running else None
+        if keypair is not None:
+            return keypair
+    return suite.generate_keypair()
 
-def sign_attestation(attestation_data: dict, private_key_pem: str) -> str:
+def generate_rsa_keypair() -> Tuple[str, str]:
     """
-    Sign attestation data with private key
-    Returns: Base64 encoded signature
+    Generate a fresh RSA-2048 public/private key pair
+    Returns: (public_key_pem, private_key_pem)
+    """
+    return get_suite(RSA_PSS_2048).generate_keypair()
+
+keypair_pool = KeypairPool(generate_rsa_keypair, target_depth=KEYPOOL_SIZE, workers=KEYPOOL_WORKERS)
+
+def sign_attestation(attestation_data: dict, private_key_pem: str, version: int = DEFAULT_VERSION) -> str:
+    """
+    Sign the canonical encoding (utils/canonical.py) of attestation data
+    with a private key of any signature suite
+    Returns: Base64 encoded signature, tagged with the canonical version
     """
     private_key = serialization.load_pem_private_key(
         private_key_pem.encode('utf-8'),
@@ -43,51 +200,141 @@ def sign_attestation(attestation_data: dict, private_key_pem: str) -> str:
         backend=default_backend()
     )
     
-    message = json.dumps(attestation_data, sort_keys=True).encode('utf-8')
+    signature = suite_for_key(private_key).sign(private_key, digest(attestation_data, version))
     
-    signature = private_key.sign(
-        message,
-        padding.PSS(
-            mgf=padding.MGF1(hashes.SHA256()),
-            salt_length=padding.PSS.MAX_LENGTH
-        ),
-        hashes.SHA256()
-    )
-    
-    import base64
-    return base64.b64encode(signature).decode('utf-8')
+    return tag_signature(base64.b64encode(signature).decode('utf-8'), version)
 
 def verify_signature(attestation_data: dict, signature: str, public_key_pem: str) -> bool:
     """
-    Verify attestation signature with public key
+    Verify attestation signature with public key, using the suite of the
+    key and the canonical version the signature is tagged with
     Returns: True if signature is valid
     """
     try:
-        public_key = serialization.load_pem_public_key(
-            public_key_pem.encode('utf-8'),
-            backend=default_backend()
-        )
-        
-        message = json.dumps(attestation_data, sort_keys=True).encode('utf-8')
+        public_key = public_key_cache.get(public_key_pem)
         
-        import base64
-        signature_bytes = base64.b64decode(signature)
+        version, signature = split_signature(signature)
         
-        public_key.verify(
-            signature_bytes,
-            message,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
+        suite_for_key(public_key).verify(
+            public_key,
+            base64.b64decode(signature),
+            digest(attestation_data, version)
         )
         return True
     except Exception:
         return False
 
+def _verify_chunk(chunk: Sequence[Tuple[object, object, bytes, str]]) -> List[bool]:
+    """
+    Verify (suite, public_key, message digest, base64 signature) items sequentially.
+    """
+    results = []
+    for suite, public_key, message, signature in chunk:
+        try:
+            suite.verify(public_key, base64.b64decode(signature), message)
+            results.append(True)
+        except Exception:
+            results.append(False)
+    return results
+
+def _prepare_verify_work(items: List[Tuple[dict, str, Union[str, object]]]):
+    """
+    Resolve keys and hash canonical messages for a verification batch.
+    Returns (work, positions): (suite, public_key, digest, signature) items
+    and the index of the input item each one came from.
+    """
+    keys = {}
+    work = []
+    positions = []
+
+    for i, (attestation_data, signature, public_key) in enumerate(items):
+        if not signature or public_key is None:
+            continue
+        if isinstance(public_key, str):
+            if public_key not in keys:
+                try:
+                    keys[public_key] = public_key_cache.get(public_key)
+                except Exception:
+                    keys[public_key] = None
+            public_key = keys[public_key]
+            if public_key is None:
+                continue
+        try:
+            suite = suite_for_key(public_key)
+            version, signature = split_signature(signature)
+            message = digest(attestation_data, version)
+        except ValueError:
+            continue
+        work.append((suite, public_key, message, signature))
+        positions.append(i)
+
+    return work, positions
+
+def _split_chunks(work: list) -> list:
+    # A few chunks per CPU keeps the pool busy without per-item futures
+    n_chunks = (os.cpu_count() or 1) * 4
+    chunk_size = -(-len(work) // n_chunks)
+    return [work[o:o + chunk_size] for o in range(0, len(work), chunk_size)]
+
+def verify_signatures_batch(
+    items: Iterable[Tuple[dict, str, Union[str, object]]],
+    executor: Optional[ThreadPoolExecutor] = None
+) -> List[bool]:
+    """
+    Verify many (attestation_data, signature, public_key) triples.
+    public_key is a PEM string or a key already obtained from public_key_cache.
+    Each distinct PEM is resolved once, and the verifies (any mix of
+    signature suites) are split into chunks across a thread pool (OpenSSL
+    releases the GIL while verifying).
+    Returns: one bool per item, in input order
+    """
+    items = list(items)
+    results = [False] * len(items)
+    work, positions = _prepare_verify_work(items)
+
+    if len(work) < PARALLEL_VERIFY_THRESHOLD:
+        verified = _verify_chunk(work)
+    else:
+        executor = executor or get_crypto_executor()
+        verified = []
+        for chunk_result in executor.map(_verify_chunk, _split_chunks(work)):
+            verified.extend(chunk_result)
+
+    for i, ok in zip(positions, verified):
+        results[i] = ok
+
+    return results
+
+async def verify_signatures_batch_async(items: Iterable[Tuple[dict, str, Union[str, object]]]) -> List[bool]:
+    """
+    verify_signatures_batch for request handlers: key parsing and verifies
+    both run on the crypto pool while the event loop keeps serving requests.
+    """
+    items = list(items)
+    results = [False] * len(items)
+    work, positions = await run_crypto(_prepare_verify_work, items)
+
+    verified = []
+    if work:
+        chunks = _split_chunks(work) if len(work) >= PARALLEL_VERIFY_THRESHOLD else [work]
+        for chunk_result in await asyncio.gather(*(run_crypto(_verify_chunk, c) for c in chunks)):
+            verified.extend(chunk_result)
+
+    for i, ok in zip(positions, verified):
+        results[i] = ok
+
+    return results
+
 def hash_private_key(private_key_pem: str) -> str:
     """
     Hash private key for storage (never store actual private key)
     """
     return hashlib.sha256(private_key_pem.encode('utf-8')).hexdigest()
+
+async def run_crypto(func, *args):
+    """
+    Run a CPU-bound crypto call on the shared crypto pool so it never blocks
+    the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_crypto_executor(), functools.partial(func, *args))
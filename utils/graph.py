@@ -0,0 +1,227 @@
+# Compact directed graph in compressed sparse row (CSR) form
+#
+# Nodes are dense integer ids (0..n-1) with a side table of names; edges are
+# stored twice, as out-adjacency (issuer -> subjects) and in-adjacency
+# (subject -> issuers):
+#
+#   indptr[i] .. indptr[i + 1]   slice of indices holding node i's neighbours
+#
+# Both arrays are int32 NumPy arrays, so 10M edges take ~80 MB for the two
+# directions. Parallel edges (several attestations between the same pair)
+# are kept, so degrees count attestations.
+#
+# add_edges() merges a batch into the existing arrays with one np.insert
+# per direction (a single O(E) copy plus O(d log d) for the batch) instead
+# of re-sorting every edge. Traversals expand a whole BFS frontier at once
+# with array gathers rather than visiting nodes one by one in Python.
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NODE_DTYPE = np.int32
+
+DIRECTIONS = ("out", "in", "both")
+
+def _empty() -> np.ndarray:
+    return np.zeros(0, dtype=NODE_DTYPE)
+
+def _merge(indptr: np.ndarray, indices: np.ndarray, rows: np.ndarray, values: np.ndarray, num_nodes: int):
+    """
+    Append (row, value) pairs to CSR arrays; each value goes after the
+    row's existing entries. Returns the new (indptr, indices).
+    """
+    if len(indptr) - 1 < num_nodes:
+        indptr = np.concatenate([indptr, np.full(num_nodes - len(indptr) + 1, indptr[-1], dtype=indptr.dtype)])
+    order = np.argsort(rows, kind="stable")
+    rows, values = rows[order], values[order]
+    indices = np.insert(indices, indptr[rows + 1], values)
+    counts = np.bincount(rows, minlength=num_nodes)
+    indptr = indptr + np.concatenate([[0], np.cumsum(counts)]).astype(indptr.dtype)
+    return indptr, indices
+
+def _expand(indptr: np.ndarray, indices: np.ndarray, frontier: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    All edges leaving the frontier as (parents, neighbours) arrays.
+    """
+    starts = indptr[frontier]
+    lengths = indptr[frontier + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return _empty(), _empty()
+    # Position of every edge: each frontier node's start, plus 0..length-1
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+    return np.repeat(frontier, lengths), indices[offsets]
+
+class TrustGraph:
+    """
+    Directed multigraph over named nodes with CSR out- and in-adjacency.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self._out_indptr = np.zeros(1, dtype=np.int64)
+        self._out_indices = _empty()
+        self._in_indptr = np.zeros(1, dtype=np.int64)
+        self._in_indices = _empty()
+
+    @classmethod
+    def from_arrays(cls, sources: np.ndarray, targets: np.ndarray, names: Sequence[str]) -> "TrustGraph":
+        """
+        Build a graph from integer edge arrays indexing into names.
+        """
+        graph = cls()
+        graph.names = list(names)
+        graph.ids = {name: i for i, name in enumerate(graph.names)}
+        graph.add_edge_ids(np.asarray(sources, dtype=NODE_DTYPE), np.asarray(targets, dtype=NODE_DTYPE))
+        return graph
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.names)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._out_indices)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self._out_indptr, self._out_indices, self._in_indptr, self._in_indices))
+
+    def node_id(self, name: str) -> Optional[int]:
+        return self.ids.get(name)
+
+    def out_adjacency(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The out-adjacency (indptr, indices) arrays. add_edges() replaces
+        rather than modifies them, so a caller may keep using a pair it
+        fetched while edges are added.
+        """
+        return self._out_indptr, self._out_indices
+
+    def _intern(self, names: Sequence[str]) -> np.ndarray:
+        ids = self.ids
+        out = np.empty(len(names), dtype=NODE_DTYPE)
+        for i, name in enumerate(names):
+            node = ids.get(name)
+            if node is None:
+                node = ids[name] = len(self.names)
+                self.names.append(name)
+            out[i] = node
+        return out
+
+    def add_edges(self, sources: Sequence[str], targets: Sequence[str]) -> None:
+        """
+        Add source -> target edges by name, creating nodes as needed.
+        """
+        self.add_edge_ids(self._intern(sources), self._intern(targets))
+
+    def add_edge_ids(self, sources: np.ndarray, targets: np.ndarray) -> None:
+        """
+        Add edges between existing node ids.
+        """
+        if len(sources) == 0:
+            return
+        n = self.num_nodes
+        self._out_indptr, self._out_indices = _merge(self._out_indptr, self._out_indices, sources, targets, n)
+        self._in_indptr, self._in_indices = _merge(self._in_indptr, self._in_indices, targets, sources, n)
+
+    def _adjacency(self, direction: str) -> List[Tuple[np.ndarray, np.ndarray]]:
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}")
+        out = (self._out_indptr, self._out_indices)
+        in_ = (self._in_indptr, self._in_indices)
+        return {"out": [out], "in": [in_], "both": [out, in_]}[direction]
+
+    def _frontier_edges(self, adjacency, frontier: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        pairs = [_expand(indptr, indices, frontier) for indptr, indices in adjacency]
+        if len(pairs) == 1:
+            return pairs[0]
+        return np.concatenate([p for p, _ in pairs]), np.concatenate([n for _, n in pairs])
+
+    def out_degree(self, node: int) -> int:
+        return int(self._out_indptr[node + 1] - self._out_indptr[node])
+
+    def in_degree(self, node: int) -> int:
+        return int(self._in_indptr[node + 1] - self._in_indptr[node])
+
+    def out_neighbours(self, node: int) -> np.ndarray:
+        return self._out_indices[self._out_indptr[node]:self._out_indptr[node + 1]]
+
+    def in_neighbours(self, node: int) -> np.ndarray:
+        return self._in_indices[self._in_indptr[node]:self._in_indptr[node + 1]]
+
+    def neighbourhood(
+        self, node: int, hops: int, direction: str = "out", limit: Optional[int] = None
+    ) -> Tuple[List[np.ndarray], bool]:
+        """
+        Nodes first reached at each distance 1..hops from node, nearest
+        first. At most `limit` nodes are returned in total; the flag is True
+        if the result was cut short.
+        """
+        adjacency = self._adjacency(direction)
+        seen = np.zeros(self.num_nodes, dtype=bool)
+        seen[node] = True
+        frontier = np.array([node], dtype=NODE_DTYPE)
+        levels, found = [], 0
+        for _ in range(hops):
+            _, reached = self._frontier_edges(adjacency, frontier)
+            frontier = np.unique(reached[~seen[reached]])
+            if len(frontier) == 0:
+                break
+            seen[frontier] = True
+            if limit is not None and found + len(frontier) > limit:
+                levels.append(frontier[:limit - found])
+                return levels, True
+            levels.append(frontier)
+            found += len(frontier)
+        return levels, False
+
+    def shortest_path(
+        self, source: int, target: int, direction: str = "out", max_hops: Optional[int] = None
+    ) -> Optional[List[int]]:
+        """
+        Node ids on a shortest path from source to target, or None if none
+        exists within max_hops. Bidirectional BFS: the smaller frontier is
+        expanded each round, forward along the edges from source and
+        backward against them from target.
+        """
+        if source == target:
+            return [source]
+        forward = self._adjacency(direction)
+        backward = self._adjacency({"out": "in", "in": "out", "both": "both"}[direction])
+
+        n = self.num_nodes
+        parent = [np.full(n, -1, dtype=NODE_DTYPE), np.full(n, -1, dtype=NODE_DTYPE)]
+        dist = [np.full(n, -1, dtype=np.int32), np.full(n, -1, dtype=np.int32)]
+        frontiers = [np.array([source], dtype=NODE_DTYPE), np.array([target], dtype=NODE_DTYPE)]
+        parent[0][source], dist[0][source] = source, 0
+        parent[1][target], dist[1][target] = target, 0
+        depth = [0, 0]
+
+        while len(frontiers[0]) and len(frontiers[1]):
+            if max_hops is not None and depth[0] + depth[1] >= max_hops:
+                return None
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            parents, reached = self._frontier_edges(forward if side == 0 else backward, frontiers[side])
+            fresh = dist[side][reached] < 0
+            reached, index = np.unique(reached[fresh], return_index=True)
+            depth[side] += 1
+            parent[side][reached] = parents[fresh][index]
+            dist[side][reached] = depth[side]
+            frontiers[side] = reached
+
+            met = reached[dist[1 - side][reached] >= 0]
+            if len(met):
+                meet = int(met[np.argmin(dist[1 - side][met])])
+                return self._trace(parent[0], meet)[::-1] + self._trace(parent[1], meet)[1:]
+        return None
+
+    @staticmethod
+    def _trace(parent: np.ndarray, node: int) -> List[int]:
+        path = [node]
+        while parent[node] != node:
+            node = int(parent[node])
+            path.append(node)
+        return path
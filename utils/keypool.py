@@ -0,0 +1,124 @@
+# Background pool of pre-generated keypairs
+#
+# RSA-2048 generation takes 50-500 ms of CPU. The pool keeps up to
+# `target_depth` keypairs ready, generated in worker processes, so identity
+# creation normally just pops one. When the pool is empty callers fall back to
+# generating inline.
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Optional, Tuple
+
+# Window over which the refill rate is reported
+REFILL_RATE_WINDOW = 60.0
+
+class KeypairPool:
+    """
+    Thread-safe pool of keypairs refilled in the background.
+    """
+
+    def __init__(
+        self,
+        generator: Callable[[], Tuple[str, str]],
+        target_depth: int = 16,
+        workers: int = 1,
+        executor_factory: Callable[[int], Executor] = ProcessPoolExecutor
+    ):
+        self.generator = generator
+        self.target_depth = target_depth
+        self.workers = workers
+        self._executor_factory = executor_factory
+        self._executor: Optional[Executor] = None
+        self._keys: deque = deque()
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._generated_at: deque = deque()
+        self.generated = 0
+        self.served = 0
+        self.fallbacks = 0
+        self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        """
+        Start the worker pool and fill up to the target depth.
+        A target depth of 0 leaves the pool disabled.
+        """
+        if self.target_depth <= 0 or self._executor is not None:
+            return
+        self._executor = self._executor_factory(self.workers)
+        self._refill()
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def take(self) -> Optional[Tuple[str, str]]:
+        """
+        Pop a pre-generated keypair, or return None if none is ready.
+        """
+        with self._lock:
+            keypair = self._keys.popleft() if self._keys else None
+            if keypair is None:
+                self.fallbacks += 1
+            else:
+                self.served += 1
+        self._refill()
+        return keypair
+
+    def _refill(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                return
+            needed = self.target_depth - len(self._keys) - self._inflight
+            self._inflight += max(needed, 0)
+            executor = self._executor
+        for _ in range(max(needed, 0)):
+            try:
+                future = executor.submit(self.generator)
+            except RuntimeError:
+                # Executor shut down under us
+                with self._lock:
+                    self._inflight -= 1
+                continue
+            future.add_done_callback(self._on_generated)
+
+    def _on_generated(self, future) -> None:
+        with self._lock:
+            self._inflight -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failures += 1
+                return
+            if self._executor is None:
+                return
+            self._keys.append(future.result())
+            self.generated += 1
+            now = time.monotonic()
+            self._generated_at.append(now)
+            while self._generated_at and self._generated_at[0] < now - REFILL_RATE_WINDOW:
+                self._generated_at.popleft()
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            recent = sum(1 for t in self._generated_at if t >= now - REFILL_RATE_WINDOW)
+            return {
+                "running": self._executor is not None,
+                "depth": len(self._keys),
+                "target_depth": self.target_depth,
+                "inflight": self._inflight,
+                "generated": self.generated,
+                "served": self.served,
+                "fallbacks": self.fallbacks,
+                "failures": self.failures,
+                "refill_rate_per_sec": recent / REFILL_RATE_WINDOW
+            }
@@ -0,0 +1,206 @@
+# Binary Merkle tree with domain-separated hashing and multi-inclusion proofs
+#
+# The tree shape follows RFC 6962 (Certificate Transparency): for n > 1 leaves
+# the left subtree holds the largest power of two k < n leaves and the right
+# subtree the remaining n - k. Every left subtree is therefore a perfect,
+# aligned subtree, which makes the tree append-only friendly: a perfect
+# subtree's hash never changes once its last leaf is added.
+#
+#   leaf hash = SHA-256(0x00 || data)
+#   node hash = SHA-256(0x01 || left || right)
+#
+# Perfect subtrees are addressed as (level, index): the node at level h and
+# index i covers leaves [i * 2^h, (i + 1) * 2^h). Proof construction only ever
+# needs perfect nodes, so callers can supply them from memory (MerkleTree) or
+# fetch them from storage via required_nodes() + multiproof().
+
+import hashlib
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+NodeGetter = Callable[[int, int], bytes]
+
+def leaf_hash(data: bytes) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+def _split(size: int) -> int:
+    """
+    Largest power of two strictly less than size (size > 1).
+    """
+    return 1 << ((size - 1).bit_length() - 1)
+
+def _is_perfect(size: int) -> bool:
+    return size & (size - 1) == 0
+
+def _perfect_cover(start: int, size: int) -> List[Tuple[int, int]]:
+    """
+    Perfect nodes covering leaves [start, start + size), largest first.
+    start must be aligned to the largest piece, which holds for every
+    subtree visited by the RFC 6962 recursion.
+    """
+    nodes = []
+    while size:
+        level = size.bit_length() - 1
+        nodes.append((level, start >> level))
+        start += 1 << level
+        size -= 1 << level
+    return nodes
+
+def _fold(hashes: List[bytes]) -> bytes:
+    """
+    Combine a perfect cover (largest first) into the subtree hash.
+    """
+    result = hashes[-1]
+    for h in reversed(hashes[:-1]):
+        result = node_hash(h, result)
+    return result
+
+def _normalize(indices: Iterable[int], size: int) -> List[int]:
+    targets = sorted(set(indices))
+    if targets and (targets[0] < 0 or targets[-1] >= size):
+        raise IndexError("leaf index out of range")
+    return targets
+
+def _walk(start: int, size: int, targets: List[int], lo: int, hi: int, visit):
+    """
+    Visit the subtrees without disclosed leaves, left to right, in the order
+    their hashes appear in a multiproof. targets[lo:hi] fall inside the range.
+    """
+    if lo == hi:
+        visit(start, size)
+        return
+    if size == 1:
+        return
+    k = _split(size)
+    mid = lo
+    while mid < hi and targets[mid] < start + k:
+        mid += 1
+    _walk(start, k, targets, lo, mid, visit)
+    _walk(start + k, size - k, targets, mid, hi, visit)
+
+def required_nodes(size: int, indices: Iterable[int]) -> List[Tuple[int, int]]:
+    """
+    Perfect nodes (level, index) needed to build the root and a multiproof
+    for the given leaves of a tree with `size` leaves.
+    """
+    targets = _normalize(indices, size)
+    needed = set(_perfect_cover(0, size))
+    _walk(0, size, targets, 0, len(targets), lambda s, n: needed.update(_perfect_cover(s, n)))
+    return sorted(needed)
+
+def root_from_nodes(size: int, get_node: NodeGetter) -> bytes:
+    if size == 0:
+        return hashlib.sha256(b"").digest()
+    return _fold([get_node(level, index) for level, index in _perfect_cover(0, size)])
+
+def multiproof(size: int, indices: Iterable[int], get_node: NodeGetter) -> List[bytes]:
+    """
+    Sibling hashes proving the inclusion of several leaves at once.
+    Siblings shared between leaves appear once; a single-leaf proof has at
+    most ceil(log2(size)) hashes.
+    """
+    targets = _normalize(indices, size)
+    proof = []
+    _walk(
+        0, size, targets, 0, len(targets),
+        lambda s, n: proof.append(_fold([get_node(level, index) for level, index in _perfect_cover(s, n)]))
+    )
+    return proof
+
+def verify_multiproof(root: bytes, size: int, leaves: Dict[int, bytes], proof: Sequence[bytes]) -> bool:
+    """
+    Check that the leaf hashes {index: hash} are included in a tree of
+    `size` leaves with the given root.
+    """
+    try:
+        targets = _normalize(leaves, size)
+    except IndexError:
+        return False
+    if not targets:
+        return False
+
+    position = 0
+
+    def compute(start: int, size_: int, lo: int, hi: int) -> bytes:
+        nonlocal position
+        if lo == hi:
+            if position >= len(proof):
+                raise ValueError("proof too short")
+            position += 1
+            return proof[position - 1]
+        if size_ == 1:
+            return leaves[start]
+        k = _split(size_)
+        mid = lo
+        while mid < hi and targets[mid] < start + k:
+            mid += 1
+        left = compute(start, k, lo, mid)
+        return node_hash(left, compute(start + k, size_ - k, mid, hi))
+
+    try:
+        computed = compute(0, size, 0, len(targets))
+    except ValueError:
+        return False
+    return position == len(proof) and computed == root
+
+def append_required_nodes(size: int, count: int) -> List[Tuple[int, int]]:
+    """
+    Existing perfect nodes needed to append `count` leaves to a tree of
+    `size` leaves: at most one left sibling per level, O(log n) in total.
+    """
+    new_size = size + count
+    needed = []
+    for level in range(1, new_size.bit_length()):
+        first = size >> level
+        if first < new_size >> level and 2 * first < size >> (level - 1):
+            needed.append((level - 1, 2 * first))
+    return needed
+
+def append_nodes(size: int, new_leaves: Sequence[bytes], get_node: NodeGetter) -> Dict[Tuple[int, int], bytes]:
+    """
+    Perfect nodes (level, index) -> hash created by appending leaf hashes to
+    a tree of `size` leaves, including the leaves themselves at level 0.
+    get_node is only asked for the nodes listed by append_required_nodes().
+    """
+    new_size = size + len(new_leaves)
+    nodes = {(0, size + i): h for i, h in enumerate(new_leaves)}
+
+    def child(level: int, index: int) -> bytes:
+        found = nodes.get((level, index))
+        return found if found is not None else get_node(level, index)
+
+    for level in range(1, new_size.bit_length()):
+        for index in range(size >> level, new_size >> level):
+            nodes[(level, index)] = node_hash(child(level - 1, 2 * index), child(level - 1, 2 * index + 1))
+    return nodes
+
+class MerkleTree:
+    """
+    In-memory Merkle tree over a list of leaf hashes.
+    Stores every perfect node, so proofs cost O(k log n) lookups.
+    """
+
+    def __init__(self, leaf_hashes: Sequence[bytes]):
+        self.levels: List[List[bytes]] = [list(leaf_hashes)]
+        level = self.levels[0]
+        while len(level) > 1:
+            level = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            self.levels.append(level)
+
+    @property
+    def size(self) -> int:
+        return len(self.levels[0])
+
+    def node(self, level: int, index: int) -> bytes:
+        return self.levels[level][index]
+
+    def root(self) -> bytes:
+        return root_from_nodes(self.size, self.node)
+
+    def proof(self, indices: Iterable[int]) -> List[bytes]:
+        return multiproof(self.size, indices, self.node)
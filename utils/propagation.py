@@ -0,0 +1,124 @@
+# Trust propagation over the attestation graph (PROTOCOL_SPEC 3.2)
+#
+# A modified PageRank on the issuer -> subject graph:
+#
+# - damping: a walker follows an attestation with probability `damping` and
+#   otherwise jumps to a uniformly random identity
+# - issuer credibility: an issuer passes on its own score, so attestations
+#   from well-attested issuers carry more weight
+# - Sybil normalization: repeated attestations between the same pair count
+#   once, self-attestations are ignored, and each issuer distributes a total
+#   weight of 1 over its subjects, so issuing more attestations creates no
+#   score. Identities that attest to nobody spread their score uniformly.
+#
+# Scores sum to 1. solve() runs power iteration, optionally warm-started from
+# an earlier vector. update() corrects an earlier solution after edges
+# change: it computes the residual once with a full sparse product, then
+# repeatedly pushes only the entries above tol / n along their out-edges,
+# so the work follows the part of the graph the change actually affects.
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+from scipy import sparse
+
+DAMPING = 0.85
+
+class Transition(NamedTuple):
+    matrix: sparse.csr_matrix   # row-stochastic issuer -> subject weights
+    dangling: np.ndarray        # identities with no outgoing weight
+
+class PropagationResult(NamedTuple):
+    scores: np.ndarray
+    iterations: int
+    residual: float
+
+def transition(indptr: np.ndarray, indices: np.ndarray, num_nodes: int) -> Transition:
+    """
+    Row-normalized transition matrix from CSR out-adjacency arrays.
+    """
+    rows = np.repeat(np.arange(num_nodes, dtype=np.int32), np.diff(indptr[:num_nodes + 1]))
+    cols = indices[:len(rows)]
+    keep = rows != cols
+    # Converting from COO sums duplicate pairs; resetting the data to 1 counts them once
+    matrix = sparse.csr_matrix(
+        (np.ones(int(keep.sum()), dtype=np.float64), (rows[keep], cols[keep])), shape=(num_nodes, num_nodes)
+    )
+    matrix.data[:] = 1.0
+    out_weight = np.asarray(matrix.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inverse = np.divide(1.0, out_weight, out=np.zeros_like(out_weight), where=~dangling)
+    return Transition(sparse.diags(inverse).dot(matrix).tocsr(), dangling)
+
+def _start_vector(x0: Optional[np.ndarray], n: int) -> np.ndarray:
+    if x0 is None or len(x0) == 0:
+        return np.full(n, 1.0 / n)
+    x = np.zeros(n)
+    x[:min(len(x0), n)] = x0[:n]
+    # Identities the earlier vector did not know start at the uniform score
+    if len(x0) < n:
+        x[len(x0):] = 1.0 / n
+    total = x.sum()
+    return x / total if total > 0 else np.full(n, 1.0 / n)
+
+def solve(
+    t: Transition,
+    damping: float = DAMPING,
+    x0: Optional[np.ndarray] = None,
+    tol: float = 1e-10,
+    max_iter: int = 200
+) -> PropagationResult:
+    """
+    Power iteration until the L1 change between iterations is below tol.
+    """
+    n = t.matrix.shape[0]
+    if n == 0:
+        return PropagationResult(np.zeros(0), 0, 0.0)
+    transposed = t.matrix.T.tocsr()
+    x = _start_vector(x0, n)
+    residual = float("inf")
+    iterations = 0
+    while iterations < max_iter and residual >= tol:
+        y = damping * transposed.dot(x)
+        y += (damping * x[t.dangling].sum() + 1.0 - damping) / n
+        residual = float(np.abs(y - x).sum())
+        x = y
+        iterations += 1
+    return PropagationResult(x, iterations, residual)
+
+def update(
+    t: Transition,
+    previous: np.ndarray,
+    damping: float = DAMPING,
+    tol: float = 1e-10,
+    max_iter: int = 1000
+) -> PropagationResult:
+    """
+    Correct an earlier solution for the current graph by residual pushing.
+    The invariant is exact = x + (I - damping * M)^-1 r, so pushing r into x
+    and r's successors converges to the same fixed point as solve().
+    """
+    n = t.matrix.shape[0]
+    if n == 0:
+        return PropagationResult(np.zeros(0), 0, 0.0)
+    x = np.zeros(n)
+    x[:min(len(previous), n)] = previous[:n]
+    r = damping * t.matrix.T.dot(x)
+    r += (damping * x[t.dangling].sum() + 1.0 - damping) / n
+    r -= x
+
+    threshold = tol / n
+    iterations = 0
+    while iterations < max_iter:
+        active = np.flatnonzero(np.abs(r) > threshold)
+        if len(active) == 0:
+            break
+        pushed = r[active]
+        x[active] += pushed
+        r[active] = 0.0
+        r += damping * t.matrix[active].T.dot(pushed)
+        dangling_mass = pushed[t.dangling[active]].sum()
+        if dangling_mass:
+            r += damping * dangling_mass / n
+        iterations += 1
+    return PropagationResult(x, iterations, float(np.abs(r).sum()))
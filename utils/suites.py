@@ -0,0 +1,124 @@
+# Signature suites
+#
+# A suite is a key algorithm plus how attestation digests (utils/canonical)
+# are signed and verified with it. Every suite signs the same 32-byte
+# SHA-256 digest of the canonical encoding:
+#
+#   rsa-pss-2048  RSA-2048, PSS with MGF1-SHA256 and maximum salt length,
+#                 over the digest as a prehashed SHA-256 message; what every
+#                 identity used before suites existed
+#   ed25519       Ed25519 (RFC 8032) over the digest bytes
+#
+# Keys travel as PEM (SubjectPublicKeyInfo / PKCS#8), which names the
+# algorithm, so a verifier picks the suite from the parsed key and one batch
+# can mix algorithms. Identities also record their suite in
+# user_identities.key_algorithm. New suites are added to SUITES.
+
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
+
+RSA_PSS_2048 = "rsa-pss-2048"
+ED25519 = "ed25519"
+
+def _pem_pair(private_key) -> Tuple[str, str]:
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode('utf-8')
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode('utf-8')
+    return public_pem, private_pem
+
+class SignatureSuite(ABC):
+    """
+    Key generation, signing and verification for one key algorithm.
+    """
+
+    name: str
+    public_key_type: type
+    private_key_type: type
+
+    @abstractmethod
+    def generate_keypair(self) -> Tuple[str, str]:
+        """
+        Returns: (public_key_pem, private_key_pem)
+        """
+
+    @abstractmethod
+    def sign(self, private_key, digest: bytes) -> bytes:
+        """
+        Signature over a 32-byte digest.
+        """
+
+    @abstractmethod
+    def verify(self, public_key, signature: bytes, digest: bytes) -> None:
+        """
+        Raises cryptography.exceptions.InvalidSignature if the signature
+        does not match.
+        """
+
+class RsaPssSuite(SignatureSuite):
+    name = RSA_PSS_2048
+    public_key_type = rsa.RSAPublicKey
+    private_key_type = rsa.RSAPrivateKey
+
+    def __init__(self):
+        self._padding = padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH)
+        self._prehashed = Prehashed(hashes.SHA256())
+
+    def generate_keypair(self) -> Tuple[str, str]:
+        return _pem_pair(rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend()))
+
+    def sign(self, private_key, digest: bytes) -> bytes:
+        return private_key.sign(digest, self._padding, self._prehashed)
+
+    def verify(self, public_key, signature: bytes, digest: bytes) -> None:
+        public_key.verify(signature, digest, self._padding, self._prehashed)
+
+class Ed25519Suite(SignatureSuite):
+    name = ED25519
+    public_key_type = ed25519.Ed25519PublicKey
+    private_key_type = ed25519.Ed25519PrivateKey
+
+    def generate_keypair(self) -> Tuple[str, str]:
+        return _pem_pair(ed25519.Ed25519PrivateKey.generate())
+
+    def sign(self, private_key, digest: bytes) -> bytes:
+        return private_key.sign(digest)
+
+    def verify(self, public_key, signature: bytes, digest: bytes) -> None:
+        public_key.verify(signature, digest)
+
+SUITES: Dict[str, SignatureSuite] = {suite.name: suite for suite in (RsaPssSuite(), Ed25519Suite())}
+
+# Suite for identities created without an explicit key_algorithm
+DEFAULT_KEY_ALGORITHM = os.getenv("BITREP_KEY_ALGORITHM", RSA_PSS_2048)
+
+def get_suite(name: Optional[str]) -> SignatureSuite:
+    """
+    Suite by name; None is an identity recorded before suites existed (RSA).
+    Raises ValueError for an unknown name.
+    """
+    suite = SUITES.get(name or RSA_PSS_2048)
+    if suite is None:
+        raise ValueError(f"Unsupported key algorithm {name!r}")
+    return suite
+
+def suite_for_key(key) -> SignatureSuite:
+    """
+    Suite of a parsed public or private key.
+    Raises ValueError for key types no suite handles.
+    """
+    for suite in SUITES.values():
+        if isinstance(key, (suite.public_key_type, suite.private_key_type)):
+            return suite
+    raise ValueError(f"Unsupported key type {type(key).__name__}")
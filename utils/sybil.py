@@ -0,0 +1,237 @@
+# Sybil-cluster heuristics over the attestation graph
+#
+# Sybil identities tend to form groups that attest to each other densely,
+# often reciprocally, receive few attestations from the rest of the graph,
+# and were created in a short burst. analyze() finds candidate groups two
+# ways and scores each one on those signals:
+#
+# - rings: connected components of the mutual-attestation graph (pairs that
+#   attested to each other), found with a vectorized union-find
+# - communities: label propagation over all distinct attestation pairs,
+#   with reciprocal pairs weighted double
+#
+# Per candidate it computes, from bincounts over the edge arrays:
+#
+#   density         internal pairs / (size * (size - 1))
+#   mutual_ratio    share of internal pairs that are reciprocated
+#   isolation       internal pairs / (internal + attestations in from outside)
+#   burst_fraction  largest share of members created within BURST_WINDOW
+#   mean_degree, degree_cv   distinct out-degree of members and its spread
+#
+# score = mean(min(density / DENSITY_REFERENCE, 1), mutual_ratio, isolation,
+# burst_fraction); candidates at or above the threshold are flagged. All of
+# it runs on NumPy arrays of integer node ids, never on Python objects per
+# edge.
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+DENSITY_REFERENCE = 0.5
+BURST_WINDOW_SECONDS = 3600.0
+
+class Clusters(NamedTuple):
+    kind: np.ndarray            # "ring" or "community" per cluster
+    members: list               # node id arrays, one per cluster
+    size: np.ndarray
+    density: np.ndarray
+    mutual_ratio: np.ndarray
+    isolation: np.ndarray
+    burst_fraction: np.ndarray
+    mean_degree: np.ndarray
+    degree_cv: np.ndarray
+    score: np.ndarray
+
+def _group_starts(sorted_keys: np.ndarray) -> np.ndarray:
+    """
+    Index of the first element of each run of equal keys.
+    """
+    first = np.ones(len(sorted_keys), dtype=bool)
+    first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    return np.flatnonzero(first)
+
+def distinct_pairs(sources: np.ndarray, targets: np.ndarray, num_nodes: int):
+    """
+    Unique (source, target) pairs without self-attestations, sorted by
+    source, and whether each pair is reciprocated.
+    """
+    keys = sources.astype(np.int64) * num_nodes + targets
+    keys = np.sort(keys[sources != targets])
+    keys = keys[_group_starts(keys)]
+    src, dst = (keys // num_nodes).astype(np.int64), (keys % num_nodes).astype(np.int64)
+    reverse = dst * num_nodes + src
+    position = np.minimum(np.searchsorted(keys, reverse), len(keys) - 1)
+    mutual = keys[position] == reverse if len(keys) else np.zeros(0, dtype=bool)
+    return src, dst, mutual
+
+def connected_components(num_nodes: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Component label (its smallest node id) per node for undirected edges
+    a-b. Union-find with every edge processed per round: roots are hooked
+    under the smallest root they touch, then paths are compressed by
+    pointer jumping.
+    """
+    parent = np.arange(num_nodes)
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        differ = root_a != root_b
+        if not differ.any():
+            return parent
+        low = np.minimum(root_a[differ], root_b[differ])
+        high = np.maximum(root_a[differ], root_b[differ])
+        np.minimum.at(parent, high, low)
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+def label_propagation(
+    num_nodes: int,
+    a: np.ndarray,
+    b: np.ndarray,
+    weights: np.ndarray,
+    iterations: int = 20,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Community label per node. Each round a random half of the nodes adopt
+    the label with the largest total edge weight among their neighbours
+    (ties go to the smallest label); updating half at a time avoids the
+    oscillation of fully synchronous updates.
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.arange(num_nodes, dtype=np.int64)
+    nodes = np.concatenate([a, b])
+    neighbours = np.concatenate([b, a])
+    weights = np.concatenate([weights, weights]).astype(np.float64)
+    for _ in range(iterations):
+        # Total weight per (node, neighbour label), sorted by node then label
+        keys = nodes * num_nodes + labels[neighbours]
+        order = np.argsort(keys)
+        keys = keys[order]
+        starts = _group_starts(keys)
+        totals = np.add.reduceat(weights[order], starts) if len(starts) else np.zeros(0)
+        keys = keys[starts]
+        key_nodes, key_labels = keys // num_nodes, keys % num_nodes
+
+        # Best label per node: highest total, then smallest label
+        node_starts = _group_starts(key_nodes)
+        best_total = np.repeat(
+            np.maximum.reduceat(totals, node_starts) if len(node_starts) else np.zeros(0),
+            np.diff(np.append(node_starts, len(keys)))
+        )
+        best = np.flatnonzero(totals == best_total)
+        best = best[_group_starts(key_nodes[best])]
+        best_nodes, best_labels = key_nodes[best], key_labels[best]
+
+        changed = labels[best_nodes] != best_labels
+        if not changed.any():
+            break
+        changed &= rng.random(len(best_nodes)) < 0.5
+        labels[best_nodes[changed]] = best_labels[changed]
+    return labels
+
+def _burst_counts(labels: np.ndarray, created: np.ndarray, window: float, num_labels: int) -> np.ndarray:
+    """
+    Per label, the most members created within any `window` seconds.
+    """
+    known = ~np.isnan(created)
+    labels, created = labels[known], created[known]
+    if len(created) == 0:
+        return np.zeros(num_labels)
+    span = float(created.max() - created.min()) + window + 1.0
+    # Offset each label's times past the previous label's so one sorted
+    # array and one searchsorted cover every group
+    combined = labels * span + (created - created.min())
+    combined.sort()
+    in_window = np.searchsorted(combined, combined + window, side="right") - np.arange(len(combined))
+    counts = np.zeros(num_labels)
+    np.maximum.at(counts, (combined // span).astype(np.int64), in_window)
+    return counts
+
+def score_clusters(
+    kind: str,
+    labels: np.ndarray,
+    src: np.ndarray,
+    dst: np.ndarray,
+    mutual: np.ndarray,
+    created: np.ndarray,
+    min_size: int,
+    max_size: int,
+    window: float = BURST_WINDOW_SECONDS
+) -> Clusters:
+    """
+    Metrics and score for every label with min_size..max_size members.
+    """
+    num_nodes = len(labels)
+    size = np.bincount(labels, minlength=num_nodes)
+    internal = labels[src] == labels[dst]
+    internal_pairs = np.bincount(labels[src][internal], minlength=num_nodes)
+    mutual_pairs = np.bincount(labels[src][internal & mutual], minlength=num_nodes)
+    incoming = np.bincount(labels[dst][~internal], minlength=num_nodes)
+    out_degree = np.bincount(src, minlength=num_nodes).astype(np.float64)
+    degree_sum = np.bincount(labels, weights=out_degree, minlength=num_nodes)
+    degree_sq = np.bincount(labels, weights=out_degree ** 2, minlength=num_nodes)
+    bursts = _burst_counts(labels, created, window, num_nodes)
+
+    candidates = np.flatnonzero((size >= min_size) & (size <= max_size))
+    n = size[candidates].astype(np.float64)
+    density = internal_pairs[candidates] / (n * (n - 1))
+    mutual_ratio = np.divide(
+        mutual_pairs[candidates], internal_pairs[candidates],
+        out=np.zeros(len(candidates)), where=internal_pairs[candidates] > 0
+    )
+    received = internal_pairs[candidates] + incoming[candidates]
+    isolation = np.divide(internal_pairs[candidates], received, out=np.zeros(len(candidates)), where=received > 0)
+    burst_fraction = bursts[candidates] / n
+    mean_degree = degree_sum[candidates] / n
+    variance = np.maximum(degree_sq[candidates] / n - mean_degree ** 2, 0.0)
+    degree_cv = np.divide(np.sqrt(variance), mean_degree, out=np.zeros(len(candidates)), where=mean_degree > 0)
+    score = (np.minimum(density / DENSITY_REFERENCE, 1.0) + mutual_ratio + isolation + burst_fraction) / 4
+
+    # Members of each candidate, grouped with one sort
+    is_candidate = np.zeros(num_nodes, dtype=bool)
+    is_candidate[candidates] = True
+    member_nodes = np.flatnonzero(is_candidate[labels])
+    member_nodes = member_nodes[np.argsort(labels[member_nodes], kind="stable")]
+    members = np.split(member_nodes, np.cumsum(size[candidates])[:-1]) if len(candidates) else []
+
+    return Clusters(
+        np.full(len(candidates), kind), members, size[candidates], density, mutual_ratio,
+        isolation, burst_fraction, mean_degree, degree_cv, score
+    )
+
+def analyze(
+    sources: np.ndarray,
+    targets: np.ndarray,
+    num_nodes: int,
+    created: Optional[np.ndarray] = None,
+    min_size: int = 4,
+    max_size: int = 1000,
+    iterations: int = 20,
+    window: float = BURST_WINDOW_SECONDS
+) -> Clusters:
+    """
+    Score mutual-attestation rings and label-propagation communities.
+    `created` holds identity creation times in seconds per node (NaN if
+    unknown).
+    """
+    if created is None:
+        created = np.full(num_nodes, np.nan)
+    src, dst, mutual = distinct_pairs(sources, targets, num_nodes)
+
+    rings = connected_components(num_nodes, src[mutual], dst[mutual])
+    ring_clusters = score_clusters("ring", rings, src, dst, mutual, created, min_size, max_size, window)
+
+    # Each reciprocated pair appears twice among the distinct pairs, so it
+    # counts double in the propagation
+    communities = label_propagation(num_nodes, src, dst, np.ones(len(src)), iterations)
+    community_clusters = score_clusters(
+        "community", communities, src, dst, mutual, created, min_size, max_size, window
+    )
+
+    return Clusters(*(
+        list(r) + list(c) if isinstance(r, list) else np.concatenate([r, c])
+        for r, c in zip(ring_clusters, community_clusters)
+    ))
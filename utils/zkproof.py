@@ -1,10 +1,13 @@
 # Zero-knowledge proof utilities for privacy-preserving attestation verification
 
 import hashlib
+import hmac
 import json
 import secrets
 from typing import Tuple
 
+from utils.merkle import MerkleTree, leaf_hash, verify_multiproof
+
 def generate_zk_proof(attestation_count: int, threshold: int, salt: str = None) -> Tuple[str, bool]:
     """
     Generate a zero-knowledge proof that a user's attestation count meets a threshold.
@@ -71,11 +74,28 @@ def verify_zk_proof(proof: str, threshold: float, claimed_result: bool) -> bool:
     except:
         return False
 
+def _leaf_salt(salt: str, index: int) -> str:
+    """
+    Per-leaf salt derived from the proof salt, so disclosing one leaf's salt
+    reveals nothing about the undisclosed leaves.
+    """
+    return hmac.new(salt.encode(), str(index).encode(), hashlib.sha256).hexdigest()
+
+def attestation_leaf_hash(attestation: dict, leaf_salt: str) -> bytes:
+    """
+    Merkle leaf hash of a salted attestation.
+    """
+    att_json = json.dumps(attestation, sort_keys=True, default=str)
+    return leaf_hash(f"{leaf_salt}:{att_json}".encode())
+
 def create_selective_disclosure_proof(attestations: list, selected_indices: list, salt: str = None) -> dict:
     """
     Create a proof for selective attestation disclosure.
     
     Allows proving certain attestations exist without revealing all attestations.
+    Every attestation is a salted leaf of a Merkle tree; the proof carries the
+    root, the disclosed attestations with their leaf salts, and one multiproof
+    of O(k log n) sibling hashes for the k disclosed leaves.
     
     Args:
         attestations: List of all attestation dictionaries
@@ -88,25 +108,22 @@ def create_selective_disclosure_proof(attestations: list, selected_indices: list
     if salt is None:
         salt = secrets.token_hex(32)
     
-    # Hash all attestations
-    attestation_hashes = []
-    for att in attestations:
-        att_json = json.dumps(att, sort_keys=True)
-        att_hash = hashlib.sha256(f"{att_json}{salt}".encode()).hexdigest()
-        attestation_hashes.append(att_hash)
+    leaf_salts = [_leaf_salt(salt, i) for i in range(len(attestations))]
+    tree = MerkleTree([
+        attestation_leaf_hash(att, leaf_salt)
+        for att, leaf_salt in zip(attestations, leaf_salts)
+    ])
     
-    # Create merkle root (simplified - just hash concatenation)
-    merkle_root = hashlib.sha256(
-        ''.join(attestation_hashes).encode()
-    ).hexdigest()
+    disclosed_indices = sorted(set(selected_indices))
     
     # Disclose selected attestations
     disclosed = {
-        "merkle_root": merkle_root,
+        "merkle_root": tree.root().hex(),
         "total_count": len(attestations),
-        "disclosed_attestations": [attestations[i] for i in selected_indices],
-        "disclosed_indices": selected_indices,
-        "salt": salt
+        "disclosed_attestations": [attestations[i] for i in disclosed_indices],
+        "disclosed_indices": disclosed_indices,
+        "disclosed_salts": [leaf_salts[i] for i in disclosed_indices],
+        "proof": [h.hex() for h in tree.proof(disclosed_indices)]
     }
     
     return disclosed
@@ -115,6 +132,9 @@ def verify_selective_disclosure(proof: dict, disclosed_attestations: list) -> bo
     """
     Verify a selective disclosure proof.
     
+    Recomputes the disclosed leaves from the attestations and their salts
+    and checks the Merkle multiproof against the committed root.
+    
     Args:
         proof: The disclosure proof dictionary
         disclosed_attestations: The attestations being disclosed
@@ -123,11 +143,23 @@ def verify_selective_disclosure(proof: dict, disclosed_attestations: list) -> bo
         True if proof is valid
     """
     try:
-        # Verify disclosed attestations match the proof
-        if len(disclosed_attestations) != len(proof.get('disclosed_attestations', [])):
+        indices = proof["disclosed_indices"]
+        salts = proof["disclosed_salts"]
+        if not (len(disclosed_attestations) == len(indices) == len(salts)):
             return False
         
-        # In production, would verify merkle proofs
-        return 'merkle_root' in proof and len(proof['merkle_root']) == 64
-    except:
+        leaves = {
+            index: attestation_leaf_hash(att, leaf_salt)
+            for index, att, leaf_salt in zip(indices, disclosed_attestations, salts)
+        }
+        if len(leaves) != len(indices):
+            return False
+        
+        return verify_multiproof(
+            bytes.fromhex(proof["merkle_root"]),
+            int(proof["total_count"]),
+            leaves,
+            [bytes.fromhex(h) for h in proof["proof"]]
+        )
+    except (KeyError, TypeError, ValueError):
         return False